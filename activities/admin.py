@@ -1,23 +1,219 @@
-from django.contrib import admin
-from .models import Activite, Panne, Recette, PriseCles, RemiseCles, DemandeModification
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.functional import cached_property
+
+from drivers.models import Chauffeur
+from .classement import recalculer_classement
+from .cloture import rouvrir_mois
+from .importation import FichierInvalide, importer_fichier
+from .indicateurs import invalider_indicateurs
+from .models import (
+    Activite, Panne, Recette, PriseCles, RemiseCles, DemandeModification, OperationPurge, EvenementCles,
+    EffetDiffere, ClotureMois, InstantaneMois, ClassementChauffeur,
+)
+
+
+# =============================================================================
+# OPTIMISATIONS POUR LES GRANDES FLOTTES - Listes d'administration
+# =============================================================================
+
+class PaginateurEstime(Paginator):
+    """
+    Paginateur qui évite le COUNT(*) complet sur les grandes tables
+    
+    Le comptage s'arrête à PLAFOND lignes : au-delà, la liste est plafonnée
+    et il faut affiner le filtre (chauffeur, date) pour atteindre les
+    lignes plus anciennes. Aucune estimation par la plus grande clé
+    primaire : après archivage ou purge, elle annoncerait des pages vides.
+    """
+    
+    PLAFOND = 10000
+    
+    @cached_property
+    def count(self):
+        return min(self.object_list.order_by()[:self.PLAFOND + 1].count(), self.PLAFOND)
+
+
+class FiltreChauffeurAutocomplete(admin.SimpleListFilter):
+    """
+    Filtre par chauffeur avec recherche, sans lister toute la flotte
+    
+    Le filtre standard sur une clé étrangère charge et affiche tous les
+    chauffeurs. Celui-ci affiche un champ de recherche (autocomplétion de
+    l'admin, basée sur ChauffeurAdmin.search_fields) et ne charge que le
+    chauffeur sélectionné.
+    """
+    
+    title = 'chauffeur'
+    parameter_name = 'chauffeur'
+    template = 'admin/activities/filtre_chauffeur.html'
+    
+    def __init__(self, request, params, model, model_admin):
+        # Informations nécessaires à la vue d'autocomplétion de l'admin
+        self.app_label = model._meta.app_label
+        self.model_name = model._meta.model_name
+        super().__init__(request, params, model, model_admin)
+    
+    def lookups(self, request, model_admin):
+        valeur = self.value()
+        if not valeur or not valeur.isdigit():
+            return []
+        return [(str(c.pk), c.nom_complet) for c in Chauffeur.objects.filter(pk=valeur)]
+    
+    def has_output(self):
+        return True
+    
+    def queryset(self, request, queryset):
+        valeur = self.value()
+        if valeur and valeur.isdigit():
+            return queryset.filter(chauffeur_id=valeur)
+        return queryset
+
+
+class AdminGrandVolumeMixin:
+    """
+    Réglages communs des listes d'administration sur les tables volumineuses
+    
+    - chauffeur chargé par jointure (utilisé par __str__ et list_display)
+    - pagination sans COUNT(*) complet, ni second comptage "total"
+    - sélection du chauffeur par autocomplétion (liste et formulaire)
+    - colonnes lourdes différées (colonnes_differees)
+    """
+    
+    list_select_related = ('chauffeur',)
+    paginator = PaginateurEstime
+    show_full_result_count = False
+    autocomplete_fields = ('chauffeur',)
+    colonnes_differees = ()
+    
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.colonnes_differees:
+            queryset = queryset.defer(*self.colonnes_differees)
+        return queryset
+    
+    @property
+    def media(self):
+        # Scripts select2 nécessaires au filtre chauffeur sur la liste
+        champ = self.model._meta.get_field('chauffeur')
+        return super().media + AutocompleteSelect(champ, self.admin_site).media
+
+
+class DonneesDeriveesMixin:
+    """
+    Répercute les modifications faites dans l'admin sur les données dérivées
+    
+    Une prise ou une remise créée, modifiée ou supprimée :
+    - rouvre son mois s'il est clôturé (et l'ancien mois si la date a
+      changé) : les rapports relisent les lignes jusqu'à la prochaine
+      clôture (voir activities.cloture)
+    - recalcule les classements des fenêtres qui la contiennent
+      (voir activities.classement)
+    - périme les indicateurs et calendriers en cache du chauffeur pour ce
+      mois (voir activities.indicateurs)
+    """
+    
+    def _repercuter(self, lignes):
+        lignes = set(lignes)
+        rouvrir_mois(jour for _, jour in lignes)
+        invalider_indicateurs(activites=lignes)
+        for chauffeur_id in {chauffeur_id for chauffeur_id, _ in lignes}:
+            recalculer_classement([chauffeur_id], [jour for pk, jour in lignes if pk == chauffeur_id])
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        lignes = [(obj.chauffeur_id, obj.date)]
+        if change:
+            lignes.append((form.initial.get('chauffeur'), form.initial.get('date')))
+        self._repercuter(ligne for ligne in lignes if all(ligne))
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self._repercuter([(obj.chauffeur_id, obj.date)])
+    
+    def delete_queryset(self, request, queryset):
+        lignes = list(queryset.values_list('chauffeur_id', 'date'))
+        super().delete_queryset(request, queryset)
+        self._repercuter(lignes)
+
+
+class FormulaireImport(forms.Form):
+    """Formulaire d'import de l'historique (admin des prises de clés)"""
+    
+    fichier = forms.FileField(help_text='Fichier .csv ou .xlsx, une ligne par chauffeur et par jour')
+    dry_run = forms.BooleanField(required=False, label='Valider sans importer')
 
 
 @admin.register(PriseCles)
-class PriseClesAdmin(admin.ModelAdmin):
+class PriseClesAdmin(DonneesDeriveesMixin, AdminGrandVolumeMixin, admin.ModelAdmin):
     list_display = ('chauffeur', 'date', 'heure_prise', 'objectif_recette', 'plein_carburant')
-    list_filter = ('date', 'plein_carburant', 'chauffeur')
+    list_filter = ('date', 'plein_carburant', FiltreChauffeurAutocomplete)
     search_fields = ('chauffeur__nom', 'chauffeur__prenom', 'probleme_mecanique')
-    date_hierarchy = 'date'
-    readonly_fields = ('date_creation',)
+    # La signature est une donnée d'audit : affichée en lecture seule,
+    # la clé vers la table des signatures n'est pas proposée en liste déroulante
+    exclude = ('signature_electronique',)
+    readonly_fields = ('signature', 'date_creation')
+    change_list_template = 'admin/activities/prisecles/change_list.html'
+    
+    def get_urls(self):
+        # Page d'import de l'historique, avant les URL standard (<path:object_id>)
+        urls = [
+            path(
+                'importer/',
+                self.admin_site.admin_view(self.importer_view),
+                name='activities_prisecles_importer',
+            ),
+        ]
+        return urls + super().get_urls()
+    
+    def importer_view(self, request):
+        """Import d'un fichier CSV/XLSX de journées (voir activities/importation.py)"""
+        if not (self.has_add_permission(request) and request.user.has_perm('activities.add_remisecles')):
+            raise PermissionDenied
+        
+        rapport = None
+        form = FormulaireImport(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            fichier = form.cleaned_data['fichier']
+            try:
+                rapport = importer_fichier(fichier, fichier.name, dry_run=form.cleaned_data['dry_run'])
+            except FichierInvalide as e:
+                form.add_error('fichier', str(e))
+            else:
+                niveau = messages.WARNING if rapport.erreurs else messages.SUCCESS
+                verbe = 'seraient importées' if form.cleaned_data['dry_run'] else 'importées'
+                self.message_user(
+                    request,
+                    f"{rapport.prises_creees} prise(s) et {rapport.remises_creees} remise(s) {verbe}, "
+                    f"{rapport.lignes_refusees} ligne(s) refusée(s) sur {rapport.lignes_lues}.",
+                    niveau
+                )
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Importer l'historique des journées",
+            'form': form,
+            'rapport': rapport,
+            'erreurs': rapport.erreurs[:500] if rapport else [],
+        }
+        return TemplateResponse(request, 'admin/activities/prisecles/importer.html', context)
 
 
 @admin.register(RemiseCles)
-class RemiseClesAdmin(admin.ModelAdmin):
+class RemiseClesAdmin(DonneesDeriveesMixin, AdminGrandVolumeMixin, admin.ModelAdmin):
     list_display = ('chauffeur', 'date', 'heure_remise', 'recette_realisee', 'plein_carburant')
-    list_filter = ('date', 'plein_carburant', 'chauffeur')
+    list_filter = ('date', 'plein_carburant', FiltreChauffeurAutocomplete)
     search_fields = ('chauffeur__nom', 'chauffeur__prenom', 'probleme_mecanique')
-    date_hierarchy = 'date'
-    readonly_fields = ('date_creation',)
+    # La signature est une donnée d'audit : affichée en lecture seule,
+    # la clé vers la table des signatures n'est pas proposée en liste déroulante
+    exclude = ('signature_electronique',)
+    readonly_fields = ('signature', 'date_creation')
 
 
 @admin.register(Activite)
@@ -59,9 +255,9 @@ class ActiviteAdmin(admin.ModelAdmin):
 
 
 @admin.register(Panne)
-class PanneAdmin(admin.ModelAdmin):
+class PanneAdmin(AdminGrandVolumeMixin, admin.ModelAdmin):
     list_display = ('chauffeur', 'severite', 'statut', 'description_short', 'date_creation')
-    list_filter = ('severite', 'statut', 'date_creation', 'chauffeur')
+    list_filter = ('severite', 'statut', 'date_creation', FiltreChauffeurAutocomplete)
     search_fields = ('chauffeur__nom', 'chauffeur__prenom', 'description')
     ordering = ('-date_creation',)
     readonly_fields = ('date_creation', 'date_modification')
@@ -108,11 +304,12 @@ class RecetteAdmin(admin.ModelAdmin):
 
 
 @admin.register(DemandeModification)
-class DemandeModificationAdmin(admin.ModelAdmin):
+class DemandeModificationAdmin(AdminGrandVolumeMixin, admin.ModelAdmin):
     list_display = ('chauffeur', 'type_activite', 'date_activite', 'statut', 'date_creation')
-    list_filter = ('statut', 'type_activite', 'date_activite', 'chauffeur')
+    list_filter = ('statut', 'type_activite', 'date_activite', FiltreChauffeurAutocomplete)
     search_fields = ('chauffeur__nom', 'chauffeur__prenom', 'raison')
-    date_hierarchy = 'date_creation'
+    # Données JSON de la demande : inutiles dans la liste
+    colonnes_differees = ('donnees_originales', 'nouvelles_donnees', 'commentaire_admin')
     readonly_fields = ('date_creation', 'date_traitement')
     
     fieldsets = (
@@ -141,4 +338,91 @@ class DemandeModificationAdmin(admin.ModelAdmin):
             from django.utils import timezone
             obj.date_traitement = timezone.now()
             obj.admin_traite = request.user
-        super().save_model(request, obj, form, change)
\ No newline at end of file
+        super().save_model(request, obj, form, change)
+
+@admin.register(OperationPurge)
+class OperationPurgeAdmin(admin.ModelAdmin):
+    list_display = ('type_purge', 'statut', 'lignes_supprimees', 'total_estime', 'demandeur', 'date_creation', 'date_fin')
+    list_filter = ('type_purge', 'statut')
+    ordering = ('-date_creation',)
+    readonly_fields = (
+        'type_purge', 'parametres', 'statut', 'total_estime', 'lignes_supprimees',
+        'etape_courante', 'erreur', 'demandeur', 'date_creation', 'date_debut', 'date_fin',
+    )
+    
+    def has_add_permission(self, request):
+        # Les purges sont lancées depuis le tableau de bord
+        return False
+
+
+@admin.register(EvenementCles)
+class EvenementClesAdmin(admin.ModelAdmin):
+    list_display = ('chauffeur', 'type_evenement', 'statut', 'message', 'date_reception')
+    list_filter = ('type_evenement', 'statut')
+    list_select_related = ('chauffeur',)
+    search_fields = ('cle', 'chauffeur__nom', 'chauffeur__prenom')
+    ordering = ('-date_reception',)
+    readonly_fields = ('cle', 'chauffeur', 'type_evenement', 'statut', 'message', 'date_reception')
+    
+    def has_add_permission(self, request):
+        # Les événements sont créés par la synchronisation du client chauffeur
+        return False
+
+
+@admin.register(EffetDiffere)
+class EffetDiffereAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'type_effet', 'statut', 'tentatives', 'date_creation', 'date_traitement')
+    list_filter = ('type_effet', 'statut')
+    ordering = ('-id',)
+    paginator = PaginateurEstime
+    show_full_result_count = False
+    readonly_fields = (
+        'type_effet', 'donnees', 'statut', 'tentatives', 'erreur',
+        'verrou', 'date_verrou', 'date_creation', 'date_traitement',
+    )
+    
+    def has_add_permission(self, request):
+        # Les effets sont publiés par les vues et traités par run_outbox_worker
+        return False
+
+
+class InstantaneMoisInline(admin.TabularInline):
+    model = InstantaneMois
+    fields = ('chauffeur', 'recette_totale', 'nb_remises', 'objectif_total', 'nb_prises')
+    readonly_fields = fields
+    can_delete = False
+    extra = 0
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ClotureMois)
+class ClotureMoisAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'recette_totale', 'objectif_total', 'nb_remises', 'nb_prises', 'nb_chauffeurs', 'date_cloture')
+    list_filter = ('annee',)
+    ordering = ('-annee', '-mois')
+    readonly_fields = (
+        'annee', 'mois', 'recette_totale', 'objectif_total', 'nb_prises', 'nb_remises',
+        'nb_chauffeurs', 'date_cloture',
+    )
+    inlines = [InstantaneMoisInline]
+    
+    def has_add_permission(self, request):
+        # Les clôtures sont calculées par la commande cloturer_mois ;
+        # supprimer une clôture rouvre le mois
+        return False
+
+
+@admin.register(ClassementChauffeur)
+class ClassementChauffeurAdmin(admin.ModelAdmin):
+    list_display = ('chauffeur', 'fenetre', 'debut', 'recette', 'objectif', 'taux', 'jours', 'date_modification')
+    list_filter = ('fenetre', 'debut')
+    list_select_related = ('chauffeur',)
+    search_fields = ('chauffeur__nom', 'chauffeur__prenom')
+    ordering = ('-debut', 'fenetre', '-recette')
+    readonly_fields = ('fenetre', 'debut', 'chauffeur', 'recette', 'objectif', 'jours', 'taux', 'date_modification')
+    
+    def has_add_permission(self, request):
+        # Tenu à jour par les remises de clés (voir activities.classement)
+        return False
@@ -0,0 +1,355 @@
+# =============================================================================
+# ARCHIVAGE - Partitionnement chaud/froid de l'historique des activités
+# =============================================================================
+"""
+Déplacement des mois clôturés vers les tables d'archive et lecture unifiée
+
+Les tables PriseCles, RemiseCles et Panne grossissent sans limite alors que
+presque tout le trafic concerne le mois courant et le mois précédent.
+Ce module :
+- déplace par lots courts les mois plus anciens que ARCHIVE_AGE_MOIS vers
+  les tables *Archive (une transaction par lot pour libérer le verrou SQLite)
+- exporte chaque mois archivé en JSON lines compressé (gzip)
+- fournit aux vues de rapport des fonctions de lecture qui n'interrogent
+  l'archive que si la période demandée l'atteint
+
+Un mois de prises/remises n'est archivé que s'il est clôturé, c'est-à-dire
+sans demande de modification en attente. Une panne n'est archivée que si
+elle est réparée ou annulée.
+"""
+
+import gzip
+import json
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import (
+    PriseCles, RemiseCles, Panne, DemandeModification,
+    PriseClesArchive, RemiseClesArchive, PanneArchive,
+)
+
+
+# Correspondance table chaude -> table d'archive
+ARCHIVES = {
+    PriseCles: PriseClesArchive,
+    RemiseCles: RemiseClesArchive,
+    Panne: PanneArchive,
+}
+
+# Statuts définitifs : seules ces pannes peuvent quitter la table chaude
+STATUTS_PANNE_CLOS = ['reparée', 'annulee']
+
+
+# =============================================================================
+# OUTILS DE PÉRIODE
+# =============================================================================
+
+def debut_mois(jour):
+    """Premier jour du mois de la date donnée"""
+    return jour.replace(day=1)
+
+
+def mois_suivant(jour):
+    """Premier jour du mois suivant la date donnée"""
+    if jour.month == 12:
+        return date(jour.year + 1, 1, 1)
+    return date(jour.year, jour.month + 1, 1)
+
+
+def limite_archivage(age_mois=None, aujourd_hui=None):
+    """
+    Calcule la date limite d'archivage
+
+    Args:
+        age_mois (int): Nombre de mois conservés dans les tables chaudes
+                        (par défaut settings.ARCHIVE_AGE_MOIS)
+        aujourd_hui (date): Date de référence (par défaut aujourd'hui)
+
+    Returns:
+        date: Premier jour du plus ancien mois conservé ; tout ce qui est
+              strictement antérieur est archivable
+    """
+    if age_mois is None:
+        age_mois = settings.ARCHIVE_AGE_MOIS
+    limite = debut_mois(aujourd_hui or date.today())
+    for _ in range(age_mois):
+        limite = debut_mois(limite - timedelta(days=1))
+    return limite
+
+
+def _bornes_mois(annee, mois):
+    """Retourne (premier jour, premier jour du mois suivant)"""
+    debut = date(annee, mois, 1)
+    return debut, mois_suivant(debut)
+
+
+def _filtre_mois(modele, annee, mois):
+    """Filtre des lignes d'un mois pour un modèle chaud ou archivé"""
+    debut, fin = _bornes_mois(annee, mois)
+    if modele in (Panne, PanneArchive):
+        return {
+            'date_creation__gte': timezone.make_aware(datetime.combine(debut, datetime.min.time())),
+            'date_creation__lt': timezone.make_aware(datetime.combine(fin, datetime.min.time())),
+        }
+    return {'date__gte': debut, 'date__lt': fin}
+
+
+# =============================================================================
+# DÉPLACEMENT VERS L'ARCHIVE
+# =============================================================================
+
+def mois_archivables(modele, age_mois=None):
+    """
+    Liste les mois de la table chaude qui peuvent être archivés
+
+    Args:
+        modele: PriseCles, RemiseCles ou Panne
+        age_mois (int): Âge minimal des mois à archiver
+
+    Returns:
+        list: Tuples (annee, mois) triés du plus ancien au plus récent
+    """
+    limite = limite_archivage(age_mois)
+
+    if modele is Panne:
+        limite_dt = timezone.make_aware(datetime.combine(limite, datetime.min.time()))
+        mois = Panne.objects.filter(
+            date_creation__lt=limite_dt,
+            statut__in=STATUTS_PANNE_CLOS
+        ).datetimes('date_creation', 'month')
+        return [(m.year, m.month) for m in mois]
+
+    mois = modele.objects.filter(date__lt=limite).dates('date', 'month')
+    resultat = []
+    for m in mois:
+        debut, fin = _bornes_mois(m.year, m.month)
+        # Un mois avec une demande de modification en attente n'est pas clôturé
+        en_attente = DemandeModification.objects.filter(
+            statut='en_attente',
+            date_activite__gte=debut,
+            date_activite__lt=fin
+        ).exists()
+        if not en_attente:
+            resultat.append((m.year, m.month))
+    return resultat
+
+
+def _copie(instance, modele_archive):
+    """
+    Valeurs des colonnes concrètes d'une instance (identifiant compris)
+    présentes dans la table d'archive (Panne.priorite n'y est pas)
+    """
+    colonnes = {f.attname for f in modele_archive._meta.concrete_fields}
+    return {f.attname: getattr(instance, f.attname) for f in instance._meta.concrete_fields if f.attname in colonnes}
+
+
+def archiver_mois(modele, annee, mois, taille_lot=None, pause=0, progression=None):
+    """
+    Déplace un mois de la table chaude vers la table d'archive
+
+    Le déplacement se fait par lots ordonnés par clé primaire, chaque lot
+    dans sa propre transaction courte : les chauffeurs peuvent continuer à
+    enregistrer leurs activités pendant l'archivage.
+
+    Args:
+        modele: PriseCles, RemiseCles ou Panne
+        annee (int): Année du mois à archiver
+        mois (int): Mois à archiver (1-12)
+        taille_lot (int): Nombre de lignes par transaction
+        pause (float): Pause en secondes entre deux lots
+        progression (callable): Appelée avec le nombre de lignes déplacées
+
+    Returns:
+        int: Nombre de lignes déplacées
+    """
+    modele_archive = ARCHIVES[modele]
+    taille_lot = taille_lot or settings.ARCHIVE_TAILLE_LOT
+
+    lignes = modele.objects.filter(**_filtre_mois(modele, annee, mois))
+    if modele is Panne:
+        lignes = lignes.filter(statut__in=STATUTS_PANNE_CLOS)
+
+    total = 0
+    dernier_pk = 0
+    while True:
+        with transaction.atomic():
+            lot = list(lignes.filter(pk__gt=dernier_pk).order_by('pk')[:taille_lot])
+            if not lot:
+                break
+            modele_archive.objects.bulk_create([modele_archive(**_copie(ligne, modele_archive)) for ligne in lot])
+            modele.objects.filter(pk__in=[ligne.pk for ligne in lot]).delete()
+
+        dernier_pk = lot[-1].pk
+        total += len(lot)
+        if progression:
+            progression(total)
+        if pause:
+            time.sleep(pause)
+
+    return total
+
+
+def exporter_mois(modele, annee, mois, repertoire=None):
+    """
+    Exporte un mois archivé en JSON lines compressé pour le stockage à froid
+
+    Le fichier est écrit dans <repertoire>/<table>/<AAAA-MM>.jsonl.gz,
+    une ligne JSON par enregistrement.
+
+    Args:
+        modele: Modèle chaud (PriseCles, RemiseCles ou Panne)
+        annee (int): Année du mois exporté
+        mois (int): Mois exporté (1-12)
+        repertoire (Path): Répertoire racine (par défaut settings.ARCHIVE_EXPORT_DIR)
+
+    Returns:
+        Path: Chemin du fichier écrit
+    """
+    modele_archive = ARCHIVES[modele]
+    repertoire = Path(repertoire or settings.ARCHIVE_EXPORT_DIR) / modele_archive._meta.db_table
+    repertoire.mkdir(parents=True, exist_ok=True)
+    chemin = repertoire / f"{annee}-{mois:02d}.jsonl.gz"
+
+    lignes = modele_archive.objects.filter(**_filtre_mois(modele_archive, annee, mois)).order_by('pk')
+    if modele is Panne:
+        lignes = lignes.values()
+    else:
+        # Le fichier froid doit rester autonome : on y recopie le contenu des signatures
+        colonnes = [f.attname for f in modele_archive._meta.concrete_fields]
+        lignes = lignes.annotate(signature=F('signature_electronique__contenu')).values(*colonnes, 'signature')
+    with gzip.open(chemin, 'wt', encoding='utf-8') as fichier:
+        for ligne in lignes.iterator(chunk_size=settings.ARCHIVE_TAILLE_LOT):
+            fichier.write(json.dumps(ligne, cls=DjangoJSONEncoder, ensure_ascii=False))
+            fichier.write('\n')
+
+    return chemin
+
+
+# =============================================================================
+# LECTURE UNIFIÉE - Tables chaudes + archive si la période l'atteint
+# =============================================================================
+
+def date_limite_archive(modele):
+    """
+    Premier jour non couvert par l'archive d'un modèle
+
+    Args:
+        modele: PriseCles ou RemiseCles
+
+    Returns:
+        date or None: Premier jour du mois suivant le dernier mois archivé,
+                      None si l'archive est vide
+    """
+    dernier = ARCHIVES[modele].objects.order_by('-date').values_list('date', flat=True).first()
+    if dernier is None:
+        return None
+    return mois_suivant(dernier)
+
+
+def sources_periode(modele, date_debut=None):
+    """
+    Modèles à interroger pour une période commençant à date_debut
+
+    Returns:
+        list: [modele] ou [modele, modele_archive] si la période atteint l'archive
+    """
+    limite = date_limite_archive(modele)
+    if limite is not None and (date_debut is None or date_debut < limite):
+        return [modele, ARCHIVES[modele]]
+    return [modele]
+
+
+def _filtrer(queryset, date_debut, date_fin, filtres):
+    """Applique les bornes de dates (incluses) et les filtres additionnels"""
+    if date_debut is not None:
+        queryset = queryset.filter(date__gte=date_debut)
+    if date_fin is not None:
+        queryset = queryset.filter(date__lte=date_fin)
+    return queryset.filter(**filtres)
+
+
+def lignes_periode(modele, date_debut=None, date_fin=None, ordre=None, **filtres):
+    """
+    Lignes d'une période, en lisant l'archive seulement si nécessaire
+
+    Les lignes archivées exposent les mêmes attributs que les lignes
+    chaudes (chauffeur, date, heures, montants...) et peuvent être utilisées
+    telles quelles dans les templates.
+
+    Args:
+        modele: PriseCles ou RemiseCles
+        date_debut (date): Début de période inclus (None = sans borne)
+        date_fin (date): Fin de période incluse (None = sans borne)
+        ordre (list): Champs de tri (par défaut l'ordre du modèle)
+        **filtres: Filtres additionnels (chauffeur, chauffeur__in, ...)
+
+    Returns:
+        list: Instances chaudes et archivées triées
+    """
+    ordre = list(ordre or modele._meta.ordering)
+    lignes = []
+    sources = sources_periode(modele, date_debut)
+    for source in sources:
+        queryset = _filtrer(source.objects.all(), date_debut, date_fin, filtres)
+        lignes.extend(queryset.select_related('chauffeur').order_by(*ordre))
+
+    if len(sources) > 1:
+        # Tri stable en partant du dernier critère
+        for champ in reversed(ordre):
+            attribut = champ.lstrip('-').replace('__', '.')
+            lignes.sort(key=lambda ligne: _valeur(ligne, attribut), reverse=champ.startswith('-'))
+    return lignes
+
+
+def _valeur(instance, chemin):
+    """Résout un chemin d'attribut pointé (ex. 'chauffeur.nom')"""
+    for attribut in chemin.split('.'):
+        instance = getattr(instance, attribut)
+    return instance
+
+
+def agreger_periode(modele, cle, champ, date_debut=None, date_fin=None, **filtres):
+    """
+    Somme et nombre de lignes groupés par clé, archive comprise si nécessaire
+
+    Args:
+        modele: PriseCles ou RemiseCles
+        cle (str): Champ de regroupement ('date', 'chauffeur', ...)
+        champ (str): Champ numérique à sommer
+        date_debut (date): Début de période inclus
+        date_fin (date): Fin de période incluse
+        **filtres: Filtres additionnels
+
+    Returns:
+        dict: {valeur_cle: {'total': int, 'nb': int}}
+    """
+    resultats = {}
+    for source in sources_periode(modele, date_debut):
+        queryset = _filtrer(source.objects.all(), date_debut, date_fin, filtres)
+        groupes = queryset.order_by().values(cle).annotate(total=Sum(champ), nb=Count('pk'))
+        for groupe in groupes:
+            agregat = resultats.setdefault(groupe[cle], {'total': 0, 'nb': 0})
+            agregat['total'] += groupe['total'] or 0
+            agregat['nb'] += groupe['nb']
+    return resultats
+
+
+def somme_periode(modele, champ, date_debut=None, date_fin=None, **filtres):
+    """
+    Somme d'un champ sur une période, archive comprise si nécessaire
+
+    Returns:
+        int: Total (0 si aucune ligne)
+    """
+    total = 0
+    for source in sources_periode(modele, date_debut):
+        queryset = _filtrer(source.objects.all(), date_debut, date_fin, filtres)
+        total += queryset.aggregate(total=Sum(champ))['total'] or 0
+    return total
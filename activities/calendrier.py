@@ -0,0 +1,156 @@
+# =============================================================================
+# CALENDRIERS MENSUELS - Grilles construites sur des agrégats par jour, en cache
+# =============================================================================
+"""
+Grilles des calendriers (activité mensuelle du chauffeur, calendrier des
+activités du superviseur)
+
+Une grille est construite à partir des agrégats par jour du mois (une
+requête groupée par table, archive comprise ; instantanés d'un mois
+clôturé, voir cloture.py) au lieu des lignes de prises et de remises,
+puis gardée dans le cache partagé par (périmètre, chauffeur, année,
+mois) :
+- un mois passé est gardé sans limite de durée : seule une écriture qui le
+  touche (demande de modification approuvée, import, suppression) le
+  périme, par l'étiquette 'chauffeur:<id>:<AAAA-MM>'
+- le mois courant est périmé par chaque saisie (même étiquette) et au plus
+  tard après CALENDRIER_MOIS_COURANT_DUREE secondes (modifications faites
+  dans l'admin Django)
+Naviguer dans l'historique ne lit donc plus la base.
+"""
+
+import calendar
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Count, Min, Sum
+
+from drivers.models import Chauffeur
+from gabomadriver_app.cache_partage import memoriser
+
+from .archive import _filtrer, mois_suivant, sources_periode
+from .cloture import agregats_instantanes, clotures_periode
+from .indicateurs import ETIQUETTE_INDICATEURS, etiquette_mois
+from .models import PriseCles, RemiseCles
+
+
+def agregats_par_jour(modele, champ, date_debut, date_fin, **filtres):
+    """
+    Somme, nombre de lignes et premier chauffeur par jour, archive comprise
+
+    Returns:
+        dict: {date: {'total': int, 'nb': int, 'chauffeur_id': int}}
+    """
+    resultats = {}
+    for source in sources_periode(modele, date_debut):
+        queryset = _filtrer(source.objects.all(), date_debut, date_fin, filtres)
+        groupes = queryset.order_by().values('date').annotate(
+            total=Sum(champ), nb=Count('pk'), chauffeur_id=Min('chauffeur_id')
+        )
+        for groupe in groupes:
+            agregat = resultats.setdefault(groupe['date'], {'total': 0, 'nb': 0, 'chauffeur_id': None})
+            agregat['total'] += groupe['total'] or 0
+            agregat['nb'] += groupe['nb']
+            if agregat['chauffeur_id'] is None or groupe['chauffeur_id'] < agregat['chauffeur_id']:
+                agregat['chauffeur_id'] = groupe['chauffeur_id']
+    return resultats
+
+
+def construire_grille(annee, mois, objectifs, recettes, noms=None):
+    """
+    Semaines du mois (lundi à dimanche) avec les chiffres de chaque jour
+
+    Args:
+        annee (int), mois (int): Mois de la grille
+        objectifs (dict): Agrégats des prises par jour (agregats_par_jour)
+        recettes (dict): Agrégats des remises par jour
+        noms (dict): Identifiant -> nom du chauffeur (calendrier superviseur)
+
+    Returns:
+        list: Semaines ; chaque jour est None (hors du mois) ou un dict
+              jour, date, prise, remise (nombre de lignes), recette,
+              objectif, actif, complet, performance et chauffeur
+    """
+    semaines = []
+    for semaine in calendar.monthcalendar(annee, mois):
+        jours = []
+        for numero in semaine:
+            if numero == 0:  # Jour vide (hors du mois)
+                jours.append(None)
+                continue
+            jour = date(annee, mois, numero)
+            prise = objectifs.get(jour)
+            remise = recettes.get(jour)
+            recette = remise['total'] if remise else 0
+            objectif = prise['total'] if prise else 0
+            # Chauffeur affiché : celui de la prise, sinon de la remise
+            chauffeur_id = (prise or remise or {}).get('chauffeur_id')
+            jours.append({
+                'jour': numero,
+                'date': jour,
+                'prise': prise['nb'] if prise else 0,
+                'remise': remise['nb'] if remise else 0,
+                'recette': recette,
+                'objectif': objectif,
+                'actif': prise is not None or remise is not None,
+                'complet': prise is not None and remise is not None,
+                # Performance = (recette réalisée / objectif) * 100
+                'performance': int(recette / objectif * 100) if objectif > 0 else 0,
+                'chauffeur': (noms or {}).get(chauffeur_id, ''),
+            })
+        semaines.append(jours)
+    return semaines
+
+
+def grille_mois(annee, mois, perimetre, chauffeurs, chauffeur_id=None, noms=False):
+    """
+    Grille et totaux d'un mois pour un périmètre, en cache
+
+    Args:
+        annee (int), mois (int): Mois demandé
+        perimetre (str): Clé du périmètre (voir indicateurs.py)
+        chauffeurs (QuerySet): Chauffeurs du périmètre
+        chauffeur_id: Chauffeur sélectionné dans le périmètre (None = tous)
+        noms (bool): Renseigner le nom du chauffeur de chaque jour
+
+    Returns:
+        dict: {'semaines', 'total_recette', 'nb_remises', 'nb_prises'}
+    """
+    debut = date(annee, mois, 1)
+    fin = date.fromordinal(mois_suivant(debut).toordinal() - 1)
+    filtres = {'chauffeur__in': chauffeurs}
+    if chauffeur_id:
+        filtres['chauffeur_id'] = chauffeur_id
+
+    def calculer():
+        clotures = clotures_periode(debut, fin)
+        if clotures:
+            # Mois clôturé : détail par jour des instantanés
+            objectifs = agregats_instantanes(PriseCles, 'date', debut, fin, clotures, **filtres)
+            recettes = agregats_instantanes(RemiseCles, 'date', debut, fin, clotures, **filtres)
+        else:
+            objectifs = agregats_par_jour(PriseCles, 'objectif_recette', debut, fin, **filtres)
+            recettes = agregats_par_jour(RemiseCles, 'recette_realisee', debut, fin, **filtres)
+        noms_chauffeurs = None
+        if noms:
+            ids = {a['chauffeur_id'] for a in (*objectifs.values(), *recettes.values())}
+            noms_chauffeurs = {c.pk: c.nom_complet for c in Chauffeur.objects.filter(pk__in=ids)}
+        return {
+            'semaines': construire_grille(annee, mois, objectifs, recettes, noms_chauffeurs),
+            'total_recette': sum(a['total'] for a in recettes.values()),
+            'nb_remises': sum(a['nb'] for a in recettes.values()),
+            'nb_prises': sum(a['nb'] for a in objectifs.values()),
+        }
+
+    def etiquettes():
+        ids = [chauffeur_id] if chauffeur_id else chauffeurs.values_list('pk', flat=True)
+        return [
+            ETIQUETTE_INDICATEURS,
+            f"scope:{perimetre}",
+            *(etiquette_mois(pk, debut) for pk in ids),
+        ]
+
+    # Mois terminé : gardé jusqu'à une écriture qui le touche
+    duree = None if fin < date.today() else settings.CALENDRIER_MOIS_COURANT_DUREE
+    cle = f"calendrier:{perimetre}:{chauffeur_id or 'tous'}:{debut:%Y-%m}:{int(noms)}"
+    return memoriser(cle, calculer, duree, etiquettes=etiquettes)
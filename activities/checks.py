@@ -0,0 +1,22 @@
+# =============================================================================
+# VÉRIFICATIONS SYSTÈME - manage.py check --database default, tests
+# =============================================================================
+
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.database)
+def verifier_index_recherche(app_configs, databases=None, **kwargs):
+    """Les déclencheurs de l'index plein texte existent après migrate"""
+    if not databases or 'default' not in databases:
+        return []
+    from .recherche import declencheurs_manquants
+
+    manquants = declencheurs_manquants()
+    return [
+        Error(
+            f"Déclencheurs de l'index de recherche manquants : {', '.join(manquants)}",
+            hint="Lancer python manage.py reconstruire_recherche",
+            id='activities.E001',
+        )
+    ] if manquants else []
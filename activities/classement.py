@@ -0,0 +1,254 @@
+# =============================================================================
+# CLASSEMENTS - Top chauffeurs tenus à jour à chaque remise de clés
+# =============================================================================
+"""
+Classement des chauffeurs par semaine, mois et année
+
+Chaque remise de clés ajoute sa recette, l'objectif de sa prise et un
+jour travaillé aux lignes ClassementChauffeur du chauffeur pour la
+semaine, le mois et l'année du jour (trois lignes lues puis écrites dans
+la transaction de la saisie). Les index (fenêtre, début, critère
+décroissant, chauffeur) rendent :
+- la mise à jour d'un rang en O(log n) (mise à jour de l'index B-tree)
+- la lecture des k premiers en O(k) (parcours du début de l'index)
+au lieu d'un agrégat trié de toute la flotte à chaque affichage.
+
+Les écritures qui ne sont pas de simples ajouts (demande de modification
+approuvée, suppression, modification dans l'admin Django) recalculent les
+fenêtres touchées à partir des lignes ; la commande reconstruire_classement
+recalcule les fenêtres en cours de toute la flotte (mise en service,
+filet de sécurité nocturne).
+"""
+
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from drivers.models import Chauffeur
+
+from .archive import _filtrer, sources_periode
+from .models import PriseCles, RemiseCles, ClassementChauffeur
+
+# Critères de classement : colonne triée (index décroissant)
+CRITERES = ('recette', 'taux', 'jours')
+
+FENETRES = [fenetre for fenetre, _ in ClassementChauffeur.FENETRE_CHOICES]
+
+
+# =============================================================================
+# FENÊTRES
+# =============================================================================
+
+def debut_fenetre(fenetre, jour):
+    """Lundi de la semaine, premier jour du mois ou de l'année du jour"""
+    if fenetre == 'semaine':
+        return jour - timedelta(days=jour.weekday())
+    if fenetre == 'mois':
+        return jour.replace(day=1)
+    return jour.replace(month=1, day=1)
+
+
+def fin_fenetre(fenetre, debut):
+    """Dernier jour (inclus) d'une fenêtre"""
+    if fenetre == 'semaine':
+        return debut + timedelta(days=6)
+    if fenetre == 'mois':
+        suivant = (debut + timedelta(days=32)).replace(day=1)
+        return suivant - timedelta(days=1)
+    return debut.replace(month=12, day=31)
+
+
+def _taux(recette, objectif):
+    return recette * 100 / objectif if objectif > 0 else 0
+
+
+# =============================================================================
+# MISE À JOUR
+# =============================================================================
+
+def _lignes(cles):
+    """Lignes existantes pour des clés (fenetre, debut, chauffeur_id), verrouillées"""
+    condition = Q()
+    for fenetre, debut in {(fenetre, debut) for fenetre, debut, _ in cles}:
+        condition |= Q(fenetre=fenetre, debut=debut)
+    lignes = ClassementChauffeur.objects.select_for_update().filter(
+        condition, chauffeur_id__in={chauffeur_id for _, _, chauffeur_id in cles}
+    )
+    return {(l.fenetre, l.debut, l.chauffeur_id): l for l in lignes}
+
+
+def _enregistrer(totaux, cumuler):
+    """
+    Écrit les totaux par clé : ajoutés aux lignes existantes (cumuler) ou
+    à leur place ; une ligne sans jour travaillé est supprimée
+    """
+    if not totaux:
+        return
+    existantes = _lignes(totaux)
+    maintenant = timezone.now()  # auto_now n'est pas appliqué par bulk_update
+    a_creer, a_modifier, a_supprimer = [], [], []
+    for cle, (recette, objectif, jours) in totaux.items():
+        ligne = existantes.get(cle)
+        if ligne is None:
+            if jours:
+                fenetre, debut, chauffeur_id = cle
+                a_creer.append(ClassementChauffeur(
+                    fenetre=fenetre, debut=debut, chauffeur_id=chauffeur_id,
+                    recette=recette, objectif=objectif, jours=jours, taux=_taux(recette, objectif),
+                ))
+            continue
+        if cumuler:
+            recette, objectif, jours = ligne.recette + recette, ligne.objectif + objectif, ligne.jours + jours
+        if not jours:
+            a_supprimer.append(ligne.pk)
+            continue
+        ligne.recette, ligne.objectif, ligne.jours = recette, objectif, jours
+        ligne.taux = _taux(recette, objectif)
+        ligne.date_modification = maintenant
+        a_modifier.append(ligne)
+
+    ClassementChauffeur.objects.bulk_create(a_creer)
+    ClassementChauffeur.objects.bulk_update(a_modifier, ['recette', 'objectif', 'jours', 'taux', 'date_modification'])
+    if a_supprimer:
+        ClassementChauffeur.objects.filter(pk__in=a_supprimer).delete()
+
+
+def ajouter_remises(remises):
+    """
+    Ajoute des remises de clés nouvelles aux classements
+
+    À appeler dans la transaction qui insère les remises.
+
+    Args:
+        remises (iterable): Tuples (chauffeur_id, jour, recette, objectif de la prise)
+    """
+    totaux = {}
+    for chauffeur_id, jour, recette, objectif in remises:
+        for fenetre in FENETRES:
+            cle = (fenetre, debut_fenetre(fenetre, jour), chauffeur_id)
+            total = totaux.setdefault(cle, [0, 0, 0])
+            total[0] += recette or 0
+            total[1] += objectif or 0
+            total[2] += 1
+    _enregistrer(totaux, cumuler=True)
+
+
+def recalculer_classement(chauffeur_ids, jours):
+    """
+    Recalcule à partir des lignes les fenêtres de chauffeurs qui contiennent des jours
+
+    Args:
+        chauffeur_ids (iterable): Chauffeurs dont les remises ou prises ont changé
+        jours (iterable): Dates modifiées (toutes les fenêtres qui les
+                          contiennent sont recalculées)
+    """
+    chauffeur_ids = set(chauffeur_ids)
+    fenetres = {(fenetre, debut_fenetre(fenetre, jour)) for jour in jours for fenetre in FENETRES}
+    if not chauffeur_ids or not fenetres:
+        return
+    date_debut = min(debut for _, debut in fenetres)
+    date_fin = max(fin_fenetre(fenetre, debut) for fenetre, debut in fenetres)
+
+    # Journées travaillées (remise) de la période, archive comprise
+    journees = {}
+    filtres = {'chauffeur_id__in': chauffeur_ids}
+    for source in sources_periode(RemiseCles, date_debut):
+        lignes = _filtrer(source.objects.all(), date_debut, date_fin, filtres)
+        for chauffeur_id, jour, recette in lignes.values_list('chauffeur_id', 'date', 'recette_realisee'):
+            journees[(chauffeur_id, jour)] = [recette or 0, 0]
+    for source in sources_periode(PriseCles, date_debut):
+        lignes = _filtrer(source.objects.all(), date_debut, date_fin, filtres)
+        for chauffeur_id, jour, objectif in lignes.values_list('chauffeur_id', 'date', 'objectif_recette'):
+            if (chauffeur_id, jour) in journees:
+                journees[(chauffeur_id, jour)][1] = objectif or 0
+
+    totaux = {
+        (fenetre, debut, chauffeur_id): [0, 0, 0]
+        for fenetre, debut in fenetres for chauffeur_id in chauffeur_ids
+    }
+    for (chauffeur_id, jour), (recette, objectif) in journees.items():
+        for fenetre in FENETRES:
+            total = totaux.get((fenetre, debut_fenetre(fenetre, jour), chauffeur_id))
+            if total is not None:
+                total[0] += recette
+                total[1] += objectif
+                total[2] += 1
+    _enregistrer(totaux, cumuler=False)
+
+
+# =============================================================================
+# LECTURE
+# =============================================================================
+
+def _valider(fenetre, critere):
+    if fenetre not in FENETRES:
+        raise ValueError(f"Fenêtre inconnue : {fenetre}")
+    if critere not in CRITERES:
+        raise ValueError(f"Critère inconnu : {critere}")
+
+
+def meilleurs_chauffeurs(fenetre, jour, critere='recette', limite=10, chauffeurs=None):
+    """
+    Premiers chauffeurs d'une fenêtre
+
+    Args:
+        fenetre (str): 'semaine', 'mois' ou 'annee'
+        jour (date): Jour contenu dans la fenêtre
+        critere (str): 'recette', 'taux' (objectif atteint) ou 'jours'
+        limite (int): Nombre de chauffeurs retournés
+        chauffeurs (QuerySet): Périmètre (None = toute la flotte)
+
+    Returns:
+        list: Dicts rang, chauffeur (instance), recette, objectif, jours, taux
+    """
+    _valider(fenetre, critere)
+    lignes = ClassementChauffeur.objects.filter(fenetre=fenetre, debut=debut_fenetre(fenetre, jour))
+    if chauffeurs is not None:
+        lignes = lignes.filter(chauffeur__in=chauffeurs)
+    lignes = lignes.select_related('chauffeur').order_by(f'-{critere}', 'chauffeur_id')[:limite]
+    return [
+        {
+            'rang': rang,
+            'chauffeur': ligne.chauffeur,
+            'recette': ligne.recette,
+            'objectif': ligne.objectif,
+            'jours': ligne.jours,
+            'taux': round(ligne.taux, 1),
+        }
+        for rang, ligne in enumerate(lignes, start=1)
+    ]
+
+
+def rang_chauffeur(chauffeur_id, fenetre, jour, critere='recette', chauffeurs=None):
+    """
+    Rang d'un chauffeur dans une fenêtre (None s'il n'a pas travaillé)
+
+    Le rang compte les chauffeurs placés avant lui sur l'index du critère
+    (ex aequo départagés par identifiant, comme meilleurs_chauffeurs).
+    """
+    _valider(fenetre, critere)
+    lignes = ClassementChauffeur.objects.filter(fenetre=fenetre, debut=debut_fenetre(fenetre, jour))
+    if chauffeurs is not None:
+        lignes = lignes.filter(chauffeur__in=chauffeurs)
+    valeur = lignes.filter(chauffeur_id=chauffeur_id).values_list(critere, flat=True).first()
+    if valeur is None:
+        return None
+    avant = lignes.filter(
+        Q(**{f'{critere}__gt': valeur}) | Q(**{critere: valeur, 'chauffeur_id__lt': chauffeur_id})
+    ).count()
+    return avant + 1
+
+
+def reconstruire_classement(jour, chauffeurs=None):
+    """
+    Recalcule les fenêtres contenant un jour pour toute la flotte
+
+    Returns:
+        int: Nombre de chauffeurs recalculés
+    """
+    if chauffeurs is None:
+        chauffeurs = Chauffeur.objects.all()
+    ids = list(chauffeurs.values_list('pk', flat=True))
+    recalculer_classement(ids, [jour])
+    return len(ids)
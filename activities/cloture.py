@@ -0,0 +1,296 @@
+# =============================================================================
+# CLÔTURES MENSUELLES - Instantanés figés des mois terminés
+# =============================================================================
+"""
+Clôture des mois terminés et lecture des rapports sur les instantanés
+
+Un mois terminé, avec des données et sans demande de modification en
+attente, est clôturé par la commande cloturer_mois : ses agrégats par
+chauffeur (totaux et détail par jour) sont calculés une fois, archive
+comprise, et enregistrés dans ClotureMois / InstantaneMois. Les rapports
+agrégés (statistiques des recettes, calendriers, indicateurs de période)
+lisent ensuite les instantanés des mois clôturés et ne lisent les lignes
+de prises et de remises que pour les mois ouverts.
+
+Un mois clôturé est rouvert (clôture et instantanés supprimés) par toute
+écriture qui le touche : demande de modification approuvée, import,
+suppression d'une activité, purge, modification dans l'admin Django. Il
+est clôturé de nouveau au prochain passage de la commande.
+
+Les exports ligne à ligne (PDF, Excel) continuent de lire les lignes
+(tables chaudes et archive) : un instantané ne garde que des totaux.
+"""
+
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Q
+
+from .archive import (
+    _bornes_mois, _filtrer, agreger_periode, debut_mois, mois_suivant, sources_periode, ARCHIVES,
+)
+from .models import PriseCles, RemiseCles, DemandeModification, ClotureMois, InstantaneMois
+
+
+# Champs des instantanés par modèle : (total du mois, nombre de lignes, détail par jour)
+CHAMPS_INSTANTANE = {
+    RemiseCles: ('recette_totale', 'nb_remises', 'recettes_jours'),
+    PriseCles: ('objectif_total', 'nb_prises', 'objectifs_jours'),
+}
+
+
+class ClotureImpossible(ValueError):
+    """Mois non clôturable : le message est affiché tel quel"""
+
+
+# =============================================================================
+# CLÔTURE ET RÉOUVERTURE
+# =============================================================================
+
+def mois_cloturables(aujourd_hui=None):
+    """
+    Liste les mois terminés qui peuvent être clôturés
+
+    Un mois est clôturable s'il est antérieur au mois courant, pas encore
+    clôturé, s'il contient des prises ou des remises (archive comprise) et
+    si aucune demande de modification en attente ne le concerne.
+
+    Args:
+        aujourd_hui (date): Date de référence (par défaut aujourd'hui)
+
+    Returns:
+        list: Tuples (annee, mois) triés du plus ancien au plus récent
+    """
+    limite = debut_mois(aujourd_hui or date.today())
+
+    avec_donnees = set()
+    for modele in (PriseCles, RemiseCles):
+        for source in (modele, ARCHIVES[modele]):
+            avec_donnees.update(
+                (m.year, m.month) for m in source.objects.filter(date__lt=limite).dates('date', 'month')
+            )
+
+    en_attente = {
+        (m.year, m.month)
+        for m in DemandeModification.objects.filter(statut='en_attente').dates('date_activite', 'month')
+    }
+    clotures = set(ClotureMois.objects.values_list('annee', 'mois'))
+    return sorted(avec_donnees - en_attente - clotures)
+
+
+def cloturer_mois(annee, mois):
+    """
+    Calcule et enregistre les instantanés d'un mois terminé
+
+    Une clôture existante du même mois est remplacée. Les lignes sont lues
+    et les instantanés écrits dans la même transaction.
+
+    Args:
+        annee (int): Année du mois à clôturer
+        mois (int): Mois à clôturer (1-12)
+
+    Returns:
+        ClotureMois: Clôture créée
+
+    Raises:
+        ClotureImpossible: Mois non terminé ou demande de modification en attente
+    """
+    debut, suivant = _bornes_mois(annee, mois)
+    if suivant > debut_mois(date.today()):
+        raise ClotureImpossible(f"{annee}-{mois:02d} n'est pas terminé")
+    if DemandeModification.objects.filter(
+        statut='en_attente', date_activite__gte=debut, date_activite__lt=suivant
+    ).exists():
+        raise ClotureImpossible(f"{annee}-{mois:02d} a des demandes de modification en attente")
+
+    fin = date.fromordinal(suivant.toordinal() - 1)
+    with transaction.atomic():
+        valeurs = {}
+        for modele, champ in ((RemiseCles, 'recette_realisee'), (PriseCles, 'objectif_recette')):
+            total, nombre, jours = CHAMPS_INSTANTANE[modele]
+            for source in sources_periode(modele, debut):
+                lignes = _filtrer(source.objects.all(), debut, fin, {}).values_list('chauffeur_id', 'date', champ)
+                for chauffeur_id, jour, montant in lignes:
+                    instantane = valeurs.setdefault(chauffeur_id, {
+                        'recette_totale': 0, 'nb_remises': 0, 'recettes_jours': {},
+                        'objectif_total': 0, 'nb_prises': 0, 'objectifs_jours': {},
+                    })
+                    instantane[total] += montant or 0
+                    instantane[nombre] += 1
+                    instantane[jours][str(jour.day)] = montant or 0
+
+        ClotureMois.objects.filter(annee=annee, mois=mois).delete()
+        cloture = ClotureMois.objects.create(
+            annee=annee,
+            mois=mois,
+            recette_totale=sum(v['recette_totale'] for v in valeurs.values()),
+            objectif_total=sum(v['objectif_total'] for v in valeurs.values()),
+            nb_remises=sum(v['nb_remises'] for v in valeurs.values()),
+            nb_prises=sum(v['nb_prises'] for v in valeurs.values()),
+            nb_chauffeurs=len(valeurs),
+        )
+        InstantaneMois.objects.bulk_create([
+            InstantaneMois(cloture=cloture, chauffeur_id=chauffeur_id, **instantane)
+            for chauffeur_id, instantane in valeurs.items()
+        ])
+    return cloture
+
+
+def rouvrir_mois(jours=(), chauffeurs=()):
+    """
+    Rouvre les mois clôturés touchés par une écriture
+
+    Les jours du mois courant (jamais clôturé) sont ignorés : une saisie du
+    jour ne coûte aucune requête. Les calendriers et indicateurs en cache
+    des chauffeurs présents dans les instantanés supprimés sont périmés
+    (mois passés gardés sans échéance, voir calendrier.grille_mois).
+
+    Args:
+        jours (iterable): Dates des prises/remises créées, modifiées ou supprimées
+        chauffeurs (iterable): Chauffeurs dont toutes les données changent
+                               (purge) : rouvre chaque mois où ils figurent
+
+    Returns:
+        int: Nombre de mois rouverts
+    """
+    limite = debut_mois(date.today())
+    condition = Q()
+    for annee, mois in {(jour.year, jour.month) for jour in jours if jour < limite}:
+        condition |= Q(annee=annee, mois=mois)
+    chauffeurs = list(chauffeurs)
+    if chauffeurs:
+        condition |= Q(instantanes__chauffeur_id__in=chauffeurs)
+    if not condition:
+        return 0
+
+    # Import local : indicateurs.py lit les clôtures (import circulaire)
+    from .indicateurs import invalider_indicateurs
+
+    ids = set(ClotureMois.objects.filter(condition).values_list('pk', flat=True))
+    if ids:
+        activites = {
+            (chauffeur_id, date(annee, mois, 1))
+            for chauffeur_id, annee, mois in InstantaneMois.objects.filter(cloture_id__in=ids).values_list(
+                'chauffeur_id', 'cloture__annee', 'cloture__mois'
+            )
+        }
+        ClotureMois.objects.filter(pk__in=ids).delete()
+        invalider_indicateurs(activites=activites)
+    return len(ids)
+
+
+# =============================================================================
+# LECTURE - Instantanés des mois clôturés, lignes des mois ouverts
+# =============================================================================
+
+def clotures_periode(date_debut, date_fin):
+    """
+    Mois clôturés d'une période
+
+    Returns:
+        dict: {(annee, mois): identifiant de la clôture}
+    """
+    debut = debut_mois(date_debut)
+    condition = Q(annee__gt=debut.year) | Q(annee=debut.year, mois__gte=debut.month)
+    condition &= Q(annee__lt=date_fin.year) | Q(annee=date_fin.year, mois__lte=date_fin.month)
+    return {
+        (annee, mois): pk
+        for pk, annee, mois in ClotureMois.objects.filter(condition).values_list('pk', 'annee', 'mois')
+    }
+
+
+def _plages_ouvertes(date_debut, date_fin, clotures):
+    """Plages de dates (début, fin incluses) de la période hors mois clôturés"""
+    plages = []
+    jour = date_debut
+    while jour <= date_fin:
+        suivant = mois_suivant(jour)
+        fin = min(date_fin, date.fromordinal(suivant.toordinal() - 1))
+        if (jour.year, jour.month) not in clotures:
+            if plages and plages[-1][1].toordinal() + 1 == jour.toordinal():
+                plages[-1] = (plages[-1][0], fin)  # Mois ouvert contigu : une seule plage
+            else:
+                plages.append((jour, fin))
+        jour = suivant
+    return plages
+
+
+def agregats_instantanes(modele, cle, date_debut, date_fin, clotures, **filtres):
+    """
+    Somme et nombre de lignes groupés par clé, lus dans les instantanés
+
+    Args:
+        modele: PriseCles ou RemiseCles
+        cle (str): 'chauffeur' ou 'date'
+        date_debut (date), date_fin (date): Période incluse
+        clotures (dict): Mois clôturés à lire (voir clotures_periode)
+        **filtres: Filtres sur le chauffeur (chauffeur, chauffeur_id, chauffeur__in)
+
+    Returns:
+        dict: {valeur_cle: {'total': int, 'nb': int}} ; pour cle='date',
+              'chauffeur_id' donne aussi le plus petit identifiant du jour
+    """
+    champ_total, champ_nombre, champ_jours = CHAMPS_INSTANTANE[modele]
+    mois_par_cloture = {pk: mois for mois, pk in clotures.items()}
+    instantanes = InstantaneMois.objects.filter(cloture_id__in=list(mois_par_cloture), **filtres).values_list(
+        'cloture_id', 'chauffeur_id', champ_total, champ_nombre, champ_jours
+    )
+
+    resultats = {}
+    for cloture_id, chauffeur_id, total, nombre, jours in instantanes:
+        annee, mois = mois_par_cloture[cloture_id]
+        debut, suivant = _bornes_mois(annee, mois)
+        if cle == 'chauffeur' and date_debut <= debut and suivant.toordinal() - 1 <= date_fin.toordinal():
+            # Mois entier dans la période : totaux du mois
+            agregat = resultats.setdefault(chauffeur_id, {'total': 0, 'nb': 0})
+            agregat['total'] += total
+            agregat['nb'] += nombre
+            continue
+        for numero, montant in jours.items():
+            jour = date(annee, mois, int(numero))
+            if not date_debut <= jour <= date_fin:
+                continue
+            if cle == 'chauffeur':
+                agregat = resultats.setdefault(chauffeur_id, {'total': 0, 'nb': 0})
+            else:
+                agregat = resultats.setdefault(jour, {'total': 0, 'nb': 0, 'chauffeur_id': chauffeur_id})
+                agregat['chauffeur_id'] = min(agregat['chauffeur_id'], chauffeur_id)
+            agregat['total'] += montant
+            agregat['nb'] += 1  # Une prise/remise par chauffeur et par jour
+    return resultats
+
+
+def agreger_avec_clotures(modele, cle, champ, date_debut, date_fin, **filtres):
+    """
+    agreger_periode qui lit les instantanés pour les mois clôturés
+
+    Même signature et même résultat que archive.agreger_periode ; seules
+    les plages ouvertes de la période lisent les lignes. Une période sans
+    borne ou une autre clé que 'chauffeur'/'date' lit toujours les lignes.
+
+    Args:
+        modele: PriseCles ou RemiseCles
+        cle (str): 'chauffeur' ou 'date'
+        champ (str): Champ sommé (recette_realisee ou objectif_recette)
+        date_debut (date), date_fin (date): Période incluse
+        **filtres: Filtres sur le chauffeur
+
+    Returns:
+        dict: {valeur_cle: {'total': int, 'nb': int}}
+    """
+    if date_debut is None or date_fin is None or cle not in ('chauffeur', 'date'):
+        return agreger_periode(modele, cle, champ, date_debut, date_fin, **filtres)
+    clotures = clotures_periode(date_debut, date_fin)
+    if not clotures:
+        return agreger_periode(modele, cle, champ, date_debut, date_fin, **filtres)
+
+    resultats = {
+        valeur: {'total': agregat['total'], 'nb': agregat['nb']}
+        for valeur, agregat in agregats_instantanes(modele, cle, date_debut, date_fin, clotures, **filtres).items()
+    }
+    for debut, fin in _plages_ouvertes(date_debut, date_fin, clotures):
+        for valeur, agregat in agreger_periode(modele, cle, champ, debut, fin, **filtres).items():
+            cumul = resultats.setdefault(valeur, {'total': 0, 'nb': 0})
+            cumul['total'] += agregat['total']
+            cumul['nb'] += agregat['nb']
+    return resultats
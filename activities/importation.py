@@ -0,0 +1,440 @@
+# =============================================================================
+# IMPORTATION - Reprise de l'historique papier des prises/remises de clés
+# =============================================================================
+"""
+Import en masse de journées (prise + remise de clés) depuis un CSV ou un XLSX
+
+Utilisé par la commande import_shifts et par la page d'import de l'admin
+(PriseClesAdmin). Le fichier est lu en flux et traité par lots :
+pour chaque lot, les chauffeurs, les journées déjà saisies et les
+signatures sont résolus en quelques requêtes, puis les lignes valides sont
+insérées par bulk_create dans une transaction courte. Chaque ligne refusée
+est reportée avec son numéro et le motif.
+
+Colonnes attendues (ligne d'en-tête, ordre libre) :
+- chauffeur : nom d'utilisateur ou numéro de téléphone du chauffeur
+- date : AAAA-MM-JJ ou JJ/MM/AAAA
+- heure_prise, objectif_recette : prise de clés (obligatoires)
+- heure_remise, recette_realisee : remise de clés (optionnelles ensemble)
+- plein_carburant : oui/non, 1/0, true/false (optionnel)
+- probleme_mecanique : texte (optionnel, "Aucun" par défaut)
+- signature : texte (optionnel, mention d'import par défaut)
+
+Les problèmes mécaniques importés ne créent pas de pannes : il s'agit
+d'historique, pas de signalements à traiter.
+"""
+
+import codecs
+import csv
+import io
+import zipfile
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from drivers.models import Chauffeur
+
+from .classement import ajouter_remises
+from .cloture import rouvrir_mois
+from .indicateurs import invalider_indicateurs
+from .saisie_cles import lire_montant
+from .models import (
+    PriseCles, RemiseCles, PriseClesArchive, RemiseClesArchive, SignatureElectronique,
+)
+
+
+COLONNES_OBLIGATOIRES = ['chauffeur', 'date', 'heure_prise', 'objectif_recette']
+COLONNES = COLONNES_OBLIGATOIRES + [
+    'heure_remise', 'recette_realisee', 'plein_carburant', 'probleme_mecanique', 'signature',
+]
+VALEURS_VRAIES = {'1', 'oui', 'o', 'true', 'vrai', 'x', 'yes', 'y'}
+TAILLE_LOT = 1000
+
+
+class FichierInvalide(ValueError):
+    """Fichier illisible ou en-tête incomplet : rien n'est importé"""
+
+
+class LigneInvalide(ValueError):
+    """Ligne refusée : le message est reporté dans le rapport"""
+
+
+@dataclass
+class RapportImport:
+    """Bilan d'un import (lignes lues, journées créées, erreurs par ligne)"""
+
+    lignes_lues: int = 0
+    prises_creees: int = 0
+    remises_creees: int = 0
+    erreurs: list = field(default_factory=list)
+
+    @property
+    def lignes_refusees(self):
+        return len(self.erreurs)
+
+
+# =============================================================================
+# LECTURE EN FLUX - CSV et XLSX
+# =============================================================================
+
+def _normaliser_entete(entete):
+    return [str(colonne or '').strip().lower() for colonne in entete]
+
+
+def _verifier_entete(entete):
+    manquantes = [c for c in COLONNES_OBLIGATOIRES if c not in entete]
+    if manquantes:
+        raise FichierInvalide(f"Colonnes manquantes : {', '.join(manquantes)}")
+
+
+def _verifier_utf8(fichier):
+    """
+    Vérifie l'encodage d'un CSV avant d'en importer la moindre ligne
+
+    Lecture par blocs (mémoire constante), puis retour au début du fichier :
+    un CSV enregistré en Latin-1 ou Windows-1252 est refusé en entier plutôt
+    qu'interrompu au milieu de l'import, lots précédents déjà insérés.
+    """
+    decodeur = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for bloc in iter(lambda: fichier.read(1 << 16), b''):
+            decodeur.decode(bloc)
+        decodeur.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise FichierInvalide("Fichier CSV illisible : enregistrez-le en UTF-8 (« CSV UTF-8 » dans Excel)")
+    fichier.seek(0)
+
+
+def _lire_csv(fichier):
+    """Lignes d'un CSV (séparateur , ou ; détecté sur l'en-tête)"""
+    _verifier_utf8(fichier)
+    texte = io.TextIOWrapper(fichier, encoding='utf-8-sig', newline='')
+    premiere = texte.readline()
+    separateur = ';' if premiere.count(';') > premiere.count(',') else ','
+    entete = _normaliser_entete(next(csv.reader([premiere], delimiter=separateur)))
+    _verifier_entete(entete)
+    for valeurs in csv.reader(texte, delimiter=separateur):
+        yield dict(zip(entete, valeurs))
+
+
+def _lire_xlsx(fichier):
+    """Lignes de la première feuille d'un XLSX (lecture seule, en flux)"""
+    import openpyxl
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        classeur = openpyxl.load_workbook(fichier, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError):
+        # Fichier renommé en .xlsx, corrompu ou tronqué
+        raise FichierInvalide("Fichier XLSX illisible : classeur Excel (.xlsx) attendu")
+    try:
+        lignes = classeur.worksheets[0].iter_rows(values_only=True)
+        entete = _normaliser_entete(next(lignes, []))
+        _verifier_entete(entete)
+        for valeurs in lignes:
+            yield dict(zip(entete, valeurs))
+    finally:
+        classeur.close()
+
+
+def lire_lignes(fichier, nom_fichier):
+    """
+    Lit un fichier d'import en flux
+
+    Args:
+        fichier: Fichier binaire ouvert (ou UploadedFile)
+        nom_fichier (str): Nom d'origine, pour distinguer CSV et XLSX
+
+    Returns:
+        generator: Tuples (numéro de ligne dans le fichier, dict colonne -> valeur)
+    """
+    if nom_fichier.lower().endswith('.xlsx'):
+        lignes = _lire_xlsx(fichier)
+    elif nom_fichier.lower().endswith('.csv'):
+        lignes = _lire_csv(fichier)
+    else:
+        raise FichierInvalide("Format non pris en charge : fichier .csv ou .xlsx attendu")
+
+    # Numérotation identique à celle du tableur (ligne 1 = en-tête)
+    for numero, ligne in enumerate(lignes, start=2):
+        if any(v not in (None, '') for v in ligne.values()):
+            yield numero, ligne
+
+
+# =============================================================================
+# VALIDATION D'UNE LIGNE
+# =============================================================================
+
+def _texte(valeur):
+    return '' if valeur is None else str(valeur).strip()
+
+
+def _lire_date(valeur):
+    if isinstance(valeur, datetime):
+        return valeur.date()
+    if isinstance(valeur, date):
+        return valeur
+    texte = _texte(valeur)
+    for format_date in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(texte, format_date).date()
+        except ValueError:
+            continue
+    raise LigneInvalide(f"date invalide « {texte} »")
+
+
+def _lire_heure(valeur, colonne):
+    if isinstance(valeur, datetime):
+        return valeur.time()
+    if isinstance(valeur, time):
+        return valeur
+    texte = _texte(valeur)
+    for format_heure in ('%H:%M:%S', '%H:%M', '%Hh%M'):
+        try:
+            return datetime.strptime(texte, format_heure).time()
+        except ValueError:
+            continue
+    raise LigneInvalide(f"{colonne} invalide « {texte} »")
+
+
+def _lire_montant(valeur, colonne, strictement_positif):
+    try:
+        montant = lire_montant(valeur)
+    except ValueError:
+        raise LigneInvalide(f"{colonne} doit être un nombre entier")
+    if montant < 0 or (strictement_positif and montant == 0):
+        raise LigneInvalide(f"{colonne} doit être positif")
+    return montant
+
+
+def _analyser(ligne, signature_defaut):
+    """Convertit une ligne brute en journée typée (sans accès à la base)"""
+    identifiant = _texte(ligne.get('chauffeur'))
+    if not identifiant:
+        raise LigneInvalide("chauffeur manquant")
+
+    journee = {
+        'chauffeur': identifiant,
+        'date': _lire_date(ligne.get('date')),
+        'heure_prise': _lire_heure(ligne.get('heure_prise'), 'heure_prise'),
+        'objectif_recette': _lire_montant(ligne.get('objectif_recette'), 'objectif_recette', True),
+        'plein_carburant': _texte(ligne.get('plein_carburant')).lower() in VALEURS_VRAIES,
+        'probleme_mecanique': _texte(ligne.get('probleme_mecanique'))[:200] or 'Aucun',
+        'signature': _texte(ligne.get('signature')) or signature_defaut,
+        'remise': None,
+    }
+
+    heure_remise = ligne.get('heure_remise')
+    recette = ligne.get('recette_realisee')
+    if _texte(heure_remise) or _texte(recette):
+        if not _texte(heure_remise) or not _texte(recette):
+            raise LigneInvalide("heure_remise et recette_realisee vont ensemble")
+        journee['remise'] = {
+            'heure_remise': _lire_heure(heure_remise, 'heure_remise'),
+            'recette_realisee': _lire_montant(recette, 'recette_realisee', False),
+        }
+    return journee
+
+
+# =============================================================================
+# TRAITEMENT PAR LOTS
+# =============================================================================
+
+class ImportJournees:
+    """
+    Import d'un fichier de journées, lot par lot
+
+    Conserve d'un lot à l'autre les chauffeurs déjà résolus et les journées
+    déjà vues dans le fichier (doublons internes).
+    """
+
+    def __init__(self, taille_lot=TAILLE_LOT, dry_run=False, signature_defaut='Import historique'):
+        self.taille_lot = taille_lot
+        self.dry_run = dry_run
+        self.signature_defaut = signature_defaut
+        self.rapport = RapportImport()
+        self.chauffeurs = {}
+        self.journees_vues = set()
+
+    def importer(self, lignes):
+        """
+        Importe les lignes (numéro, dict) fournies par lire_lignes
+
+        Returns:
+            RapportImport: Bilan de l'import
+        """
+        lot = []
+        for numero, ligne in lignes:
+            self.rapport.lignes_lues += 1
+            lot.append((numero, ligne))
+            if len(lot) >= self.taille_lot:
+                self._traiter_lot(lot)
+                lot = []
+        if lot:
+            self._traiter_lot(lot)
+        # Rapport dans l'ordre du fichier (les motifs sont collectés par étape)
+        self.rapport.erreurs.sort()
+        return self.rapport
+
+    def _erreur(self, numero, message):
+        self.rapport.erreurs.append((numero, message))
+
+    def _resoudre_chauffeurs(self, identifiants):
+        """Résout en une requête les identifiants encore inconnus"""
+        inconnus = set(identifiants) - set(self.chauffeurs)
+        if not inconnus:
+            return
+        trouves = {}
+        for chauffeur in Chauffeur.objects.select_related('user').filter(
+            Q(user__username__in=inconnus) | Q(telephone__in=inconnus)
+        ):
+            for cle in (chauffeur.user.username, chauffeur.telephone):
+                if cle in inconnus:
+                    trouves.setdefault(cle, set()).add(chauffeur)
+        for identifiant in inconnus:
+            candidats = trouves.get(identifiant, set())
+            # None : introuvable ; liste de plusieurs : téléphone partagé
+            self.chauffeurs[identifiant] = next(iter(candidats)) if len(candidats) == 1 else (
+                None if not candidats else list(candidats)
+            )
+
+    @staticmethod
+    def _journees_existantes(modeles, chauffeur_ids, dates):
+        """Couples (chauffeur_id, date) déjà saisis, tables chaudes et archives"""
+        existantes = set()
+        for modele in modeles:
+            existantes.update(
+                modele.objects.filter(chauffeur_id__in=chauffeur_ids, date__in=dates)
+                .values_list('chauffeur_id', 'date')
+            )
+        return existantes
+
+    def _traiter_lot(self, lot):
+        # 1. Analyse des valeurs, sans base de données
+        analysees = []
+        for numero, ligne in lot:
+            try:
+                analysees.append((numero, _analyser(ligne, self.signature_defaut)))
+            except LigneInvalide as e:
+                self._erreur(numero, str(e))
+
+        # 2. Résolution groupée des chauffeurs et des journées existantes
+        self._resoudre_chauffeurs(j['chauffeur'] for _, j in analysees)
+        valides = []
+        for numero, journee in analysees:
+            chauffeur = self.chauffeurs.get(journee['chauffeur'])
+            if chauffeur is None:
+                self._erreur(numero, f"chauffeur inconnu « {journee['chauffeur']} »")
+            elif isinstance(chauffeur, list):
+                self._erreur(numero, f"téléphone partagé par plusieurs chauffeurs « {journee['chauffeur']} »")
+            else:
+                journee['chauffeur_id'] = chauffeur.pk
+                valides.append((numero, journee))
+
+        chauffeur_ids = {j['chauffeur_id'] for _, j in valides}
+        dates = {j['date'] for _, j in valides}
+        prises_existantes = self._journees_existantes([PriseCles, PriseClesArchive], chauffeur_ids, dates)
+        remises_existantes = self._journees_existantes([RemiseCles, RemiseClesArchive], chauffeur_ids, dates)
+
+        # 3. Contrainte (chauffeur, date) : base et doublons internes au fichier
+        retenues = []
+        for numero, journee in valides:
+            couple = (journee['chauffeur_id'], journee['date'])
+            if couple in self.journees_vues:
+                self._erreur(numero, f"journée du {journee['date']:%d/%m/%Y} en double dans le fichier")
+            elif couple in prises_existantes:
+                self._erreur(numero, f"prise de clés du {journee['date']:%d/%m/%Y} déjà enregistrée")
+            elif journee['remise'] and couple in remises_existantes:
+                self._erreur(numero, f"remise de clés du {journee['date']:%d/%m/%Y} déjà enregistrée")
+            else:
+                self.journees_vues.add(couple)
+                retenues.append((numero, journee))
+
+        if not retenues:
+            return
+
+        nb_remises = sum(1 for _, j in retenues if j['remise'])
+        if self.dry_run:
+            self.rapport.prises_creees += len(retenues)
+            self.rapport.remises_creees += nb_remises
+            return
+
+        # 4. Insertion groupée dans une transaction courte
+        try:
+            with transaction.atomic():
+                self._inserer(retenues)
+        except IntegrityError:
+            # Saisie concurrente d'une des journées : le lot entier est signalé
+            for numero, _ in retenues:
+                self._erreur(numero, "conflit avec une saisie enregistrée pendant l'import, lot non importé")
+            return
+
+        self.rapport.prises_creees += len(retenues)
+        self.rapport.remises_creees += nb_remises
+
+    @staticmethod
+    def _inserer(retenues):
+        # Signatures adressées par contenu (une seule ligne par contenu distinct)
+        empreintes = {}
+        for _, journee in retenues:
+            contenu = journee['signature']
+            if contenu not in empreintes:
+                empreintes[contenu] = SignatureElectronique.calculer_empreinte(contenu)
+        SignatureElectronique.objects.bulk_create(
+            [SignatureElectronique(empreinte=e, contenu=c) for c, e in empreintes.items()],
+            ignore_conflicts=True
+        )
+
+        prises = []
+        remises = []
+        for _, journee in retenues:
+            commun = {
+                'chauffeur_id': journee['chauffeur_id'],
+                'date': journee['date'],
+                'plein_carburant': journee['plein_carburant'],
+                'probleme_mecanique': journee['probleme_mecanique'],
+                'signature_electronique_id': empreintes[journee['signature']],
+            }
+            prises.append(PriseCles(
+                heure_prise=journee['heure_prise'],
+                objectif_recette=journee['objectif_recette'],
+                **commun
+            ))
+            if journee['remise']:
+                remises.append(RemiseCles(**journee['remise'], **commun))
+
+        PriseCles.objects.bulk_create(prises)
+        RemiseCles.objects.bulk_create(remises)
+        ajouter_remises(
+            (j['chauffeur_id'], j['date'], j['remise']['recette_realisee'], j['objectif_recette'])
+            for _, j in retenues if j['remise']
+        )
+        rouvrir_mois({prise.date for prise in prises})
+        invalider_indicateurs(activites={(prise.chauffeur_id, prise.date) for prise in prises})
+
+
+def importer_fichier(fichier, nom_fichier, taille_lot=TAILLE_LOT, dry_run=False):
+    """
+    Importe un fichier CSV ou XLSX de journées
+
+    Args:
+        fichier: Fichier binaire ouvert (ou UploadedFile)
+        nom_fichier (str): Nom d'origine du fichier
+        taille_lot (int): Lignes validées et insérées ensemble
+        dry_run (bool): Valider sans rien insérer
+
+    Returns:
+        RapportImport: Bilan de l'import
+
+    Raises:
+        FichierInvalide: Format non pris en charge, fichier illisible (CSV
+                         hors UTF-8, XLSX corrompu) ou colonnes manquantes
+    """
+    importeur = ImportJournees(
+        taille_lot=taille_lot,
+        dry_run=dry_run,
+        signature_defaut=f"Import historique ({nom_fichier})"[:200],
+    )
+    return importeur.importer(lire_lignes(fichier, nom_fichier))
@@ -0,0 +1,248 @@
+# =============================================================================
+# INDICATEURS - Chiffres des tableaux de bord superviseur, en cache partagé
+# =============================================================================
+"""
+Indicateurs du jour et agrégats de période, calculés une fois par périmètre
+
+Un périmètre est l'ensemble des chauffeurs visibles par un utilisateur :
+'tous' pour les administrateurs, un périmètre par superviseur (voir
+admin_dashboard.views.perimetre_utilisateur). Les résultats sont gardés
+dans le cache partagé (gabomadriver_app/cache_partage.py) avec les
+étiquettes des données dont ils dépendent :
+- 'chauffeur:<id>' pour chaque chauffeur du périmètre
+  ('chauffeur:<id>:<AAAA-MM>' pour les calendriers, voir calendrier.py)
+- 'scope:<périmètre>' (assignations du superviseur)
+- 'indicateurs' (toutes les entrées)
+invalider_indicateurs() périme, après chaque écriture qui change les
+chiffres (saisies, import, pannes, suppressions, assignations), les seules
+entrées des périmètres qui contiennent les chauffeurs concernés.
+
+Les écritures qui n'appellent pas invalider_indicateurs() (modifications
+directes dans l'admin Django) sont visibles au plus tard après
+INDICATEURS_CACHE_DUREE secondes. La commande warmup remplit le cache
+pour tous les périmètres après un déploiement.
+
+Chaque compteur est déclaré (Indicateur : table, agrégat, colonne, filtre)
+et compiler_indicateurs() les regroupe par table en une requête
+d'agrégation conditionnelle (COUNT/SUM ... FILTER (WHERE ...)) : une
+requête par table quel que soit le nombre de compteurs.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from drivers.models import Chauffeur
+from gabomadriver_app.cache_partage import invalider_etiquettes, memoriser
+
+from .cloture import agreger_avec_clotures
+from .models import PriseCles, RemiseCles, Panne
+
+# Étiquette portée par toutes les entrées : invalidation complète
+ETIQUETTE_INDICATEURS = 'indicateurs'
+
+# Statuts d'une panne non résolue
+STATUTS_PANNE_OUVERTE = ['signalee', 'en_cours']
+
+
+# =============================================================================
+# ÉTIQUETTES ET INVALIDATION
+# =============================================================================
+
+def etiquettes_perimetre(perimetre, chauffeurs):
+    """
+    Étiquettes des entrées calculées pour un périmètre
+
+    Returns:
+        list: 'indicateurs', 'scope:<périmètre>' et 'chauffeur:<id>' par chauffeur
+    """
+    return [
+        ETIQUETTE_INDICATEURS,
+        f"scope:{perimetre}",
+        *(f"chauffeur:{pk}" for pk in chauffeurs.values_list('pk', flat=True)),
+    ]
+
+
+def etiquette_mois(chauffeur_id, jour):
+    """Étiquette des données d'un chauffeur pour le mois d'une date ('chauffeur:<id>:<AAAA-MM>')"""
+    return f"chauffeur:{chauffeur_id}:{jour:%Y-%m}"
+
+
+def invalider_indicateurs(chauffeurs=(), perimetres=(), activites=()):
+    """
+    Rend périmés les indicateurs en cache qui dépendent des données modifiées
+
+    Appliqué après la validation de la transaction en cours : une lecture
+    concurrente ne peut pas garder en cache des chiffres calculés avant
+    l'écriture.
+
+    Args:
+        chauffeurs (iterable): Identifiants des chauffeurs dont les données ont changé
+        perimetres (iterable): Périmètres dont la liste de chauffeurs a changé
+        activites (iterable): Couples (chauffeur_id, date) des prises/remises
+                              modifiées : périment aussi les calendriers du mois
+                              Sans argument : tous les indicateurs sont périmés
+    """
+    activites = set(activites)
+    etiquettes = (
+        [f"chauffeur:{pk}" for pk in set(chauffeurs) | {pk for pk, _ in activites}]
+        + [etiquette_mois(pk, jour) for pk, jour in activites]
+        + [f"scope:{p}" for p in perimetres]
+    )
+    etiquettes = etiquettes or [ETIQUETTE_INDICATEURS]
+    transaction.on_commit(lambda: invalider_etiquettes(*etiquettes))
+
+
+def _en_cache(cle, calcul, perimetre, chauffeurs):
+    # Étiquettes évaluées seulement si la valeur doit être recalculée
+    return memoriser(
+        f"indicateurs:{cle}",
+        calcul,
+        settings.INDICATEURS_CACHE_DUREE,
+        etiquettes=lambda: etiquettes_perimetre(perimetre, chauffeurs),
+    )
+
+
+# =============================================================================
+# COMPILATEUR
+# =============================================================================
+
+@dataclass(frozen=True)
+class Indicateur:
+    """
+    Compteur déclaré : agrégat d'une colonne sur les lignes d'une table
+    (restreinte au périmètre) qui vérifient un filtre
+    """
+    nom: str
+    modele: type
+    agregat: type = Count
+    champ: str = 'pk'
+    filtre: Q = field(default_factory=Q)
+
+    def expression(self):
+        return self.agregat(self.champ, filter=self.filtre or None)
+
+
+def compiler_indicateurs(indicateurs, chauffeurs):
+    """
+    Calcule des compteurs déclarés en une requête par table
+
+    Les compteurs d'une même table deviennent les agrégats conditionnels
+    d'un seul aggregate() sur les lignes des chauffeurs du périmètre.
+
+    Args:
+        indicateurs (iterable): Déclarations Indicateur (noms uniques)
+        chauffeurs (QuerySet): Chauffeurs du périmètre
+
+    Returns:
+        dict: Valeur de chaque compteur par nom (0 si aucune ligne)
+    """
+    par_table = {}
+    for indicateur in indicateurs:
+        par_table.setdefault(indicateur.modele, []).append(indicateur)
+
+    valeurs = {}
+    for modele, declarations in par_table.items():
+        perimetre = 'pk__in' if modele is Chauffeur else 'chauffeur__in'
+        resultat = modele.objects.filter(**{perimetre: chauffeurs}).aggregate(
+            **{indicateur.nom: indicateur.expression() for indicateur in declarations}
+        )
+        valeurs.update({nom: valeur or 0 for nom, valeur in resultat.items()})
+    return valeurs
+
+
+def declarations_du_jour(jour):
+    """Compteurs des tableaux de bord admin et superviseur pour un jour"""
+    # Fenêtres closes au jour de référence : une saisie postdatée n'y entre pas
+    semaine = Q(date__gte=jour - timedelta(days=7), date__lte=jour)
+    mois = Q(date__gte=jour.replace(day=1), date__lte=jour)
+    return [
+        Indicateur('total_chauffeurs', Chauffeur, filtre=Q(actif=True)),
+        Indicateur('prises_aujourdhui', PriseCles, filtre=Q(date=jour)),
+        Indicateur('remises_aujourdhui', RemiseCles, filtre=Q(date=jour)),
+        Indicateur('recettes_aujourdhui', RemiseCles, Sum, 'recette_realisee', Q(date=jour)),
+        Indicateur('recettes_semaine', RemiseCles, Sum, 'recette_realisee', semaine),
+        Indicateur('recettes_mois', RemiseCles, Sum, 'recette_realisee', mois),
+        Indicateur('pannes_en_cours', Panne, filtre=Q(statut__in=STATUTS_PANNE_OUVERTE)),
+        Indicateur('pannes_critiques', Panne, filtre=Q(severite='critique', statut__in=STATUTS_PANNE_OUVERTE)),
+        # Tableau de bord admin : toutes les pannes critiques, réparées comprises
+        Indicateur('pannes_critiques_total', Panne, filtre=Q(severite='critique')),
+    ]
+
+
+def declarations_du_mois(jour):
+    """Compteurs du mois d'un périmètre (page de détail d'un superviseur)"""
+    mois = Q(date__gte=jour.replace(day=1), date__lte=jour)
+    return [
+        Indicateur('total_chauffeurs', Chauffeur),
+        Indicateur('chauffeurs_actifs', Chauffeur, filtre=Q(actif=True)),
+        Indicateur('total_prises_mois', PriseCles, filtre=mois),
+        Indicateur('total_remises_mois', RemiseCles, filtre=mois),
+        Indicateur('recettes_mois', RemiseCles, Sum, 'recette_realisee', mois),
+    ]
+
+
+# =============================================================================
+# INDICATEURS
+# =============================================================================
+
+def indicateurs_du_jour(perimetre, chauffeurs, jour=None):
+    """
+    Chiffres des tableaux de bord admin et superviseur pour un périmètre
+
+    Args:
+        perimetre (str): Clé du périmètre ('tous', 'superviseur-<id>')
+        chauffeurs (QuerySet): Chauffeurs du périmètre
+        jour (date): Jour de référence (par défaut aujourd'hui)
+
+    Returns:
+        dict: total_chauffeurs, prises_aujourdhui, remises_aujourdhui,
+              recettes_aujourdhui, recettes_semaine, recettes_mois,
+              pannes_en_cours, pannes_critiques, pannes_critiques_total
+    """
+    jour = jour or date.today()
+    # Clé suffixée par le nombre de compteurs : une entrée calculée avant
+    # l'ajout d'un compteur n'est pas relue après un déploiement
+    declarations = declarations_du_jour(jour)
+    return _en_cache(
+        f"jour:{perimetre}:{jour.isoformat()}:{len(declarations)}",
+        lambda: compiler_indicateurs(declarations, chauffeurs),
+        perimetre,
+        chauffeurs,
+    )
+
+
+def agregats_recettes(perimetre, chauffeurs, date_debut, date_fin):
+    """
+    Recettes et objectifs d'une période pour un périmètre (archive comprise,
+    instantanés pour les mois clôturés)
+
+    Args:
+        perimetre (str): Clé du périmètre
+        chauffeurs (QuerySet): Chauffeurs du périmètre
+        date_debut (date), date_fin (date): Période incluse
+
+    Returns:
+        dict: {'recettes_par_chauffeur', 'objectifs_par_chauffeur',
+               'recettes_par_jour'} au format de agreger_periode
+    """
+    def calculer():
+        filtres = {'chauffeur__in': chauffeurs}
+        return {
+            'recettes_par_chauffeur': agreger_avec_clotures(
+                RemiseCles, 'chauffeur', 'recette_realisee', date_debut, date_fin, **filtres
+            ),
+            'objectifs_par_chauffeur': agreger_avec_clotures(
+                PriseCles, 'chauffeur', 'objectif_recette', date_debut, date_fin, **filtres
+            ),
+            'recettes_par_jour': agreger_avec_clotures(
+                RemiseCles, 'date', 'recette_realisee', date_debut, date_fin, **filtres
+            ),
+        }
+
+    return _en_cache(
+        f"periode:{perimetre}:{date_debut.isoformat()}:{date_fin.isoformat()}", calculer, perimetre, chauffeurs
+    )
@@ -0,0 +1,118 @@
+# =============================================================================
+# COMMANDE DE GESTION - Archivage des mois clôturés
+# =============================================================================
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.archive import ARCHIVES, archiver_mois, exporter_mois, mois_archivables
+from activities.models import PriseCles, RemiseCles, Panne
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour déplacer l'historique ancien vers les tables d'archive
+
+    Les prises de clés, remises de clés et pannes clôturées plus anciennes que
+    ARCHIVE_AGE_MOIS sont déplacées par lots courts (une transaction par lot),
+    puis chaque mois archivé est exporté en JSON lines compressé.
+
+    Prévue pour tourner en tâche planifiée (PythonAnywhere "Scheduled tasks"),
+    en dehors des heures de prise et de remise des clés.
+
+    Usage :
+    python manage.py archiver_activites
+    python manage.py archiver_activites --age-mois 6 --modele remise
+    python manage.py archiver_activites --dry-run
+    """
+
+    help = 'Archive les activités et pannes des mois clôturés'
+
+    MODELES = {
+        'prise': PriseCles,
+        'remise': RemiseCles,
+        'panne': Panne,
+    }
+
+    def add_arguments(self, parser):
+        """Définit les arguments de la commande"""
+        parser.add_argument(
+            '--age-mois',
+            type=int,
+            default=settings.ARCHIVE_AGE_MOIS,
+            help='Nombre de mois conservés dans les tables chaudes'
+        )
+        parser.add_argument(
+            '--modele',
+            choices=sorted(self.MODELES),
+            action='append',
+            help='Limiter l\'archivage à un type de données (répétable)'
+        )
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=settings.ARCHIVE_TAILLE_LOT,
+            help='Nombre de lignes déplacées par transaction'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.05,
+            help='Pause en secondes entre deux lots'
+        )
+        parser.add_argument(
+            '--sans-export',
+            action='store_true',
+            help='Ne pas écrire les fichiers JSON lines compressés'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Afficher les mois archivables sans rien déplacer'
+        )
+
+    def handle(self, *args, **options):
+        """Exécute l'archivage"""
+        if options['age_mois'] < 1:
+            raise CommandError('--age-mois doit être supérieur ou égal à 1 (le mois courant reste toujours chaud)')
+        if options['taille_lot'] < 1:
+            raise CommandError('--taille-lot doit être un entier positif')
+
+        noms = options['modele'] or list(self.MODELES)
+        total_general = 0
+
+        for nom in noms:
+            modele = self.MODELES[nom]
+            table_archive = ARCHIVES[modele]._meta.db_table
+            mois_liste = mois_archivables(modele, options['age_mois'])
+
+            if not mois_liste:
+                self.stdout.write(f"{modele._meta.verbose_name_plural} : rien à archiver")
+                continue
+
+            self.stdout.write(f"{modele._meta.verbose_name_plural} : {len(mois_liste)} mois archivable(s)")
+
+            for annee, mois in mois_liste:
+                if options['dry_run']:
+                    self.stdout.write(f"  - {annee}-{mois:02d} (dry-run)")
+                    continue
+
+                deplaces = archiver_mois(
+                    modele, annee, mois,
+                    taille_lot=options['taille_lot'],
+                    pause=options['pause'],
+                    progression=lambda n: self.stdout.write(f"    ... {n} ligne(s) déplacée(s)", ending='\r'),
+                )
+                total_general += deplaces
+                message = f"  ✓ {annee}-{mois:02d} : {deplaces} ligne(s) déplacée(s) vers {table_archive}"
+
+                if deplaces and not options['sans_export']:
+                    chemin = exporter_mois(modele, annee, mois)
+                    message += f" (export : {chemin})"
+
+                self.stdout.write(self.style.SUCCESS(message))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('MODE DRY-RUN : aucune ligne déplacée'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Archivage terminé : {total_general} ligne(s) déplacée(s)"))
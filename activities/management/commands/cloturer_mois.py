@@ -0,0 +1,81 @@
+# =============================================================================
+# COMMANDE DE GESTION - Clôture des mois terminés
+# =============================================================================
+
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.cloture import ClotureImpossible, cloturer_mois, mois_cloturables
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour figer les chiffres des mois terminés
+
+    Chaque mois terminé, avec des données et sans demande de modification en
+    attente, est clôturé : ses totaux par chauffeur et par jour sont
+    enregistrés dans des instantanés, lus ensuite par les rapports à la place
+    des lignes (voir activities/cloture.py). Un mois rouvert par une
+    modification est clôturé de nouveau au passage suivant.
+
+    À planifier chaque nuit (tâche planifiée PythonAnywhere), avant
+    archiver_activites.
+
+    Usage :
+    python manage.py cloturer_mois
+    python manage.py cloturer_mois --mois 2024-03
+    python manage.py cloturer_mois --dry-run
+    """
+
+    help = 'Clôture les mois terminés (instantanés des rapports)'
+
+    def add_arguments(self, parser):
+        """Définit les arguments de la commande"""
+        parser.add_argument(
+            '--mois',
+            action='append',
+            default=[],
+            help='Mois à clôturer ou recalculer, au format AAAA-MM (répétable)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Afficher les mois clôturables sans rien enregistrer'
+        )
+
+    def handle(self, *args, **options):
+        """Clôture les mois demandés ou tous les mois clôturables"""
+        mois_liste = []
+        for valeur in options['mois']:
+            try:
+                annee, mois = (int(partie) for partie in valeur.split('-'))
+            except ValueError:
+                raise CommandError(f"Mois invalide : {valeur} (format attendu AAAA-MM)")
+            if not 1 <= mois <= 12:
+                raise CommandError(f"Mois invalide : {valeur} (format attendu AAAA-MM)")
+            mois_liste.append((annee, mois))
+        mois_liste = mois_liste or mois_cloturables()
+
+        if not mois_liste:
+            self.stdout.write("Aucun mois à clôturer")
+            return
+
+        clotures = 0
+        for annee, mois in mois_liste:
+            if options['dry_run']:
+                self.stdout.write(f"  - {annee}-{mois:02d} (dry-run)")
+                continue
+            try:
+                cloture = cloturer_mois(annee, mois)
+            except ClotureImpossible as e:
+                self.stdout.write(self.style.WARNING(f"  ✗ {e}"))
+                continue
+            clotures += 1
+            self.stdout.write(self.style.SUCCESS(
+                f"  ✓ {annee}-{mois:02d} : {cloture.nb_chauffeurs} chauffeur(s), "
+                f"{cloture.nb_remises} remise(s), {cloture.recette_totale} FCFA"
+            ))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('MODE DRY-RUN : aucun mois clôturé'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Clôture terminée : {clotures} mois clôturé(s)"))
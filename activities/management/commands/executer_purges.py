@@ -0,0 +1,73 @@
+# =============================================================================
+# COMMANDE DE GESTION - Exécution des purges en attente
+# =============================================================================
+
+from django.core.management.base import BaseCommand
+
+from activities.models import OperationPurge
+from activities.purge import estimer_purge, executer_purge
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour exécuter ou reprendre les purges par lots
+
+    Les purges lancées depuis le tableau de bord tournent dans un thread du
+    processus web. Si ce processus est redémarré en cours de route, l'opération
+    reste "en cours" : cette commande la reprend (les lignes déjà supprimées
+    ne sont pas comptées deux fois, les étapes vidées ne font plus rien).
+
+    Usage :
+    python manage.py executer_purges
+    python manage.py executer_purges --reprendre
+    python manage.py executer_purges --dry-run
+    """
+
+    help = 'Exécute les purges par lots en attente (et reprend les purges interrompues)'
+
+    def add_arguments(self, parser):
+        """Définit les arguments de la commande"""
+        parser.add_argument(
+            '--reprendre',
+            action='store_true',
+            help='Reprendre aussi les opérations restées "en cours"'
+        )
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=None,
+            help='Nombre de lignes supprimées par transaction'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Afficher le coût restant sans rien supprimer'
+        )
+
+    def handle(self, *args, **options):
+        """Exécute les opérations de purge"""
+        statuts = ['en_attente', 'en_cours'] if options['reprendre'] else ['en_attente']
+        operations = OperationPurge.objects.filter(statut__in=statuts).order_by('date_creation')
+
+        if not operations:
+            self.stdout.write("Aucune purge à exécuter")
+            return
+
+        for operation in operations:
+            estimation = estimer_purge(operation.type_purge, operation.parametres, options['taille_lot'])
+            self.stdout.write(
+                f"Opération n°{operation.pk} ({operation.get_type_purge_display()}) : "
+                f"{estimation['total']} ligne(s) restante(s) en {estimation['lots']} lot(s)"
+            )
+
+            if options['dry_run']:
+                continue
+
+            operation = executer_purge(operation, taille_lot=options['taille_lot'])
+            if operation.statut == 'terminee':
+                self.stdout.write(self.style.SUCCESS(f"  ✓ {operation.lignes_supprimees} ligne(s) supprimée(s)"))
+            else:
+                self.stdout.write(self.style.ERROR(f"  ✗ Échec : {operation.erreur}"))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('MODE DRY-RUN : aucune suppression effectuée'))
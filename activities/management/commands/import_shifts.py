@@ -0,0 +1,88 @@
+# =============================================================================
+# COMMANDE DE GESTION - Import de l'historique des journées
+# =============================================================================
+
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.importation import TAILLE_LOT, FichierInvalide, importer_fichier
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour reprendre l'historique papier d'un dépôt
+
+    Importe un fichier CSV ou XLSX (une ligne par chauffeur et par jour) en
+    prises et remises de clés. Les lignes sont validées et insérées par lots ;
+    les lignes refusées n'empêchent pas l'import des autres et sont listées
+    avec leur numéro (voir activities/importation.py pour les colonnes).
+
+    Usage :
+    python manage.py import_shifts historique.csv
+    python manage.py import_shifts historique.xlsx --rapport erreurs.csv
+    python manage.py import_shifts historique.csv --dry-run
+    """
+
+    help = "Importe l'historique des prises et remises de clés depuis un CSV ou un XLSX"
+
+    def add_arguments(self, parser):
+        """Définit les arguments de la commande"""
+        parser.add_argument('fichier', help='Fichier .csv ou .xlsx à importer')
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=TAILLE_LOT,
+            help='Nombre de lignes validées et insérées ensemble'
+        )
+        parser.add_argument(
+            '--rapport',
+            help='Écrire les lignes refusées dans ce fichier CSV'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Valider le fichier sans rien insérer'
+        )
+
+    def handle(self, *args, **options):
+        """Exécute l'import"""
+        debut = time.monotonic()
+        try:
+            with open(options['fichier'], 'rb') as fichier:
+                rapport = importer_fichier(
+                    fichier,
+                    options['fichier'],
+                    taille_lot=options['taille_lot'],
+                    dry_run=options['dry_run'],
+                )
+        except OSError as e:
+            raise CommandError(f"Lecture impossible : {e}")
+        except FichierInvalide as e:
+            raise CommandError(str(e))
+
+        duree = time.monotonic() - debut
+        self.stdout.write(
+            f"{rapport.lignes_lues} ligne(s) lue(s) en {duree:.1f} s : "
+            f"{rapport.prises_creees} prise(s) et {rapport.remises_creees} remise(s) importée(s)"
+        )
+
+        if rapport.erreurs:
+            self.stdout.write(self.style.WARNING(f"{rapport.lignes_refusees} ligne(s) refusée(s)"))
+            if options['rapport']:
+                with open(options['rapport'], 'w', newline='', encoding='utf-8') as sortie:
+                    ecrivain = csv.writer(sortie)
+                    ecrivain.writerow(['ligne', 'erreur'])
+                    ecrivain.writerows(rapport.erreurs)
+                self.stdout.write(f"Détail écrit dans {options['rapport']}")
+            else:
+                for numero, message in rapport.erreurs[:50]:
+                    self.stdout.write(f"  Ligne {numero} : {message}")
+                if rapport.lignes_refusees > 50:
+                    self.stdout.write("  ... (utilisez --rapport pour la liste complète)")
+        else:
+            self.stdout.write(self.style.SUCCESS("✓ Aucune ligne refusée"))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('MODE DRY-RUN : aucune donnée insérée'))
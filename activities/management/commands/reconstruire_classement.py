@@ -0,0 +1,49 @@
+# =============================================================================
+# COMMANDE DE GESTION - Recalcul des classements des chauffeurs
+# =============================================================================
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.classement import reconstruire_classement
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour recalculer les classements à partir des lignes
+
+    Les classements sont tenus à jour à chaque remise de clés (voir
+    activities/classement.py). Cette commande recalcule, pour toute la
+    flotte, la semaine, le mois et l'année d'une date : à lancer à la mise
+    en service, puis chaque nuit comme filet de sécurité (modifications
+    faites directement en base).
+
+    Usage :
+    python manage.py reconstruire_classement
+    python manage.py reconstruire_classement --date 2024-12-31
+    """
+
+    help = 'Recalcule les classements des chauffeurs (semaine, mois, année)'
+
+    def add_arguments(self, parser):
+        """Définit les arguments de la commande"""
+        parser.add_argument(
+            '--date',
+            action='append',
+            default=[],
+            help="Jour dont les fenêtres sont recalculées, AAAA-MM-JJ (répétable, défaut : aujourd'hui)"
+        )
+
+    def handle(self, *args, **options):
+        """Recalcule les fenêtres de chaque date demandée"""
+        try:
+            jours = [date.fromisoformat(valeur) for valeur in options['date']] or [date.today()]
+        except ValueError as e:
+            raise CommandError(f"Date invalide : {e}")
+
+        for jour in jours:
+            nb = reconstruire_classement(jour)
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ Semaine, mois et année du {jour:%d/%m/%Y} recalculés pour {nb} chauffeur(s)"
+            ))
@@ -0,0 +1,36 @@
+# =============================================================================
+# COMMANDE DE GESTION - Reconstruction de l'index de recherche des pannes
+# =============================================================================
+
+from django.core.management.base import BaseCommand
+
+from activities.recherche import index_disponible, reconstruire_index
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour reconstruire l'index plein texte des pannes
+
+    L'index est tenu à jour par des déclencheurs SQL (voir
+    activities/recherche.py). Cette commande recrée les déclencheurs, vide
+    l'index et le remplit de nouveau à partir des pannes et des problèmes
+    mécaniques signalés, archives comprises, puis le compacte : à lancer
+    après une restauration de base ou une migration qui reconstruit l'une
+    des tables indexées.
+
+    Usage :
+    python manage.py reconstruire_recherche
+    """
+
+    help = "Reconstruit l'index de recherche des pannes et problèmes mécaniques"
+
+    def handle(self, *args, **options):
+        """Reconstruit l'index (SQLite seulement)"""
+        if not index_disponible():
+            self.stdout.write(self.style.WARNING(
+                "Index plein texte disponible sous SQLite seulement : recherche par filtres"
+            ))
+            return
+
+        nb = reconstruire_index()
+        self.stdout.write(self.style.SUCCESS(f"✓ {nb} texte(s) indexé(s)"))
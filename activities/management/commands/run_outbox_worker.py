@@ -0,0 +1,79 @@
+# =============================================================================
+# COMMANDE DE GESTION - Worker de l'outbox transactionnelle
+# =============================================================================
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from activities.models import EffetDiffere
+from activities.outbox import vider_outbox
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour traiter les effets différés publiés par les vues
+
+    Tourne en continu : vide la file par lots (voir activities.outbox), puis
+    scrute la table toutes les OUTBOX_PAUSE secondes. À lancer comme tâche
+    "Always-on" sur PythonAnywhere. L'option --une-fois vide la file puis
+    s'arrête (tâche planifiée, rattrapage après un incident).
+
+    Usage :
+    python manage.py run_outbox_worker
+    python manage.py run_outbox_worker --une-fois
+    python manage.py run_outbox_worker --taille-lot 500
+    """
+
+    help = 'Traite en continu les effets différés (pannes, notifications, cache)'
+
+    def add_arguments(self, parser):
+        """Définit les arguments de la commande"""
+        parser.add_argument(
+            '--une-fois',
+            action='store_true',
+            help='Vider la file puis s\'arrêter'
+        )
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=settings.OUTBOX_TAILLE_LOT,
+            help='Nombre d\'effets traités par lot'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=settings.OUTBOX_PAUSE,
+            help='Pause en secondes entre deux scrutations de la file vide'
+        )
+
+    def handle(self, *args, **options):
+        """Traite la file jusqu'à interruption (ou épuisement avec --une-fois)"""
+        en_attente = EffetDiffere.objects.filter(statut='en_attente').count()
+        self.stdout.write(f"{en_attente} effet(s) en attente")
+
+        try:
+            while True:
+                bilan = vider_outbox(taille_lot=options['taille_lot'])
+                if bilan['lots']:
+                    self._afficher(bilan)
+                if options['une_fois']:
+                    break
+                # Pas de connexion SQLite gardée ouverte pendant l'attente
+                connection.close()
+                time.sleep(options['pause'])
+        except KeyboardInterrupt:
+            self.stdout.write("Arrêt demandé")
+
+        echoues = EffetDiffere.objects.filter(statut='echoue').count()
+        if echoues:
+            self.stdout.write(self.style.WARNING(f"{echoues} effet(s) abandonné(s) après échecs répétés"))
+
+    def _afficher(self, bilan):
+        message = f"{bilan['traites']} effet(s) traité(s) en {bilan['lots']} lot(s)"
+        if bilan['echecs']:
+            self.stdout.write(self.style.WARNING(f"{message}, {bilan['echecs']} échec(s)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
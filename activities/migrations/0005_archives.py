@@ -0,0 +1,84 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0005_remove_assignationsuperviseur_drivers_assignationsuperviseur_unique_chauffeur_superviseur_and_more'),
+        ('activities', '0004_alter_activite_carburant_litres_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RemiseClesArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Date de remise des clés', verbose_name='Date')),
+                ('heure_remise', models.TimeField(help_text='Heure à laquelle les clés ont été remises', verbose_name='Heure de remise')),
+                ('recette_realisee', models.IntegerField(help_text='Montant de la recette réalisée pendant la journée en FCFA', verbose_name='Recette réalisée (FCFA)')),
+                ('plein_carburant', models.BooleanField(default=False, help_text='Indique si le véhicule avait le plein de carburant', verbose_name='Plein de carburant')),
+                ('probleme_mecanique', models.CharField(default='Aucun', help_text='Description des problèmes mécaniques éventuels', max_length=200, verbose_name='Problème mécanique')),
+                ('signature', models.TextField(help_text='Signature électronique du chauffeur', verbose_name='Signature électronique')),
+                ('date_creation', models.DateTimeField(help_text="Date et heure de création de l'enregistrement d'origine", verbose_name='Date de création')),
+                ('date_archivage', models.DateTimeField(auto_now_add=True, help_text="Date et heure du déplacement vers l'archive", verbose_name="Date d'archivage")),
+                ('chauffeur', models.ForeignKey(help_text='Chauffeur qui a remis les clés', on_delete=django.db.models.deletion.CASCADE, to='drivers.chauffeur', verbose_name='Chauffeur')),
+            ],
+            options={
+                'verbose_name': 'Remise de clés archivée',
+                'verbose_name_plural': 'Remises de clés archivées',
+                'db_table': 'activities_remise_cles_archive',
+                'ordering': ['-date', '-heure_remise'],
+                'indexes': [models.Index(fields=['date'], name='remise_archive_date_idx')],
+                'unique_together': {('chauffeur', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PriseClesArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Date de prise des clés', verbose_name='Date')),
+                ('heure_prise', models.TimeField(help_text='Heure à laquelle les clés ont été prises', verbose_name='Heure de prise')),
+                ('objectif_recette', models.IntegerField(help_text='Objectif de recette fixé pour la journée en FCFA', verbose_name='Objectif de recette (FCFA)')),
+                ('plein_carburant', models.BooleanField(default=False, help_text='Indique si le véhicule avait le plein de carburant', verbose_name='Plein de carburant')),
+                ('probleme_mecanique', models.CharField(default='Aucun', help_text='Description des problèmes mécaniques éventuels', max_length=200, verbose_name='Problème mécanique')),
+                ('signature', models.TextField(help_text='Signature électronique du chauffeur', verbose_name='Signature électronique')),
+                ('date_creation', models.DateTimeField(help_text="Date et heure de création de l'enregistrement d'origine", verbose_name='Date de création')),
+                ('date_archivage', models.DateTimeField(auto_now_add=True, help_text="Date et heure du déplacement vers l'archive", verbose_name="Date d'archivage")),
+                ('chauffeur', models.ForeignKey(help_text='Chauffeur qui a pris les clés', on_delete=django.db.models.deletion.CASCADE, to='drivers.chauffeur', verbose_name='Chauffeur')),
+            ],
+            options={
+                'verbose_name': 'Prise de clés archivée',
+                'verbose_name_plural': 'Prises de clés archivées',
+                'db_table': 'activities_prise_cles_archive',
+                'ordering': ['-date', '-heure_prise'],
+                'indexes': [models.Index(fields=['date'], name='prise_archive_date_idx')],
+                'unique_together': {('chauffeur', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PanneArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.TextField(help_text='Description détaillée du problème mécanique', verbose_name='Description du problème')),
+                ('severite', models.CharField(choices=[('mineure', 'Mineure'), ('moderee', 'Modérée'), ('majeure', 'Majeure'), ('critique', 'Critique')], help_text='Niveau de sévérité de la panne', max_length=10, verbose_name='Sévérité')),
+                ('statut', models.CharField(choices=[('signalee', 'Signalée'), ('en_cours', 'En cours de réparation'), ('reparée', 'Réparée'), ('annulee', 'Annulée')], help_text="Statut de la panne au moment de l'archivage", max_length=10, verbose_name='Statut')),
+                ('cout_reparation', models.DecimalField(blank=True, decimal_places=2, help_text='Coût de la réparation en euros', max_digits=8, null=True, verbose_name='Coût de réparation (€)')),
+                ('date_reparation', models.DateTimeField(blank=True, help_text='Date et heure de la réparation', null=True, verbose_name='Date de réparation')),
+                ('date_creation', models.DateTimeField(help_text='Date et heure de signalement de la panne', verbose_name='Date de création')),
+                ('date_modification', models.DateTimeField(help_text='Date et heure de la dernière modification avant archivage', verbose_name='Dernière modification')),
+                ('date_archivage', models.DateTimeField(auto_now_add=True, help_text="Date et heure du déplacement vers l'archive", verbose_name="Date d'archivage")),
+                ('activite', models.ForeignKey(blank=True, help_text='Activité associée à la panne (optionnel)', null=True, on_delete=django.db.models.deletion.SET_NULL, to='activities.activite', verbose_name='Activité liée')),
+                ('chauffeur', models.ForeignKey(help_text='Chauffeur qui a signalé la panne', on_delete=django.db.models.deletion.CASCADE, to='drivers.chauffeur', verbose_name='Chauffeur')),
+            ],
+            options={
+                'verbose_name': 'Panne archivée',
+                'verbose_name_plural': 'Pannes archivées',
+                'db_table': 'activities_panne_archive',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['date_creation'], name='panne_archive_creation_idx')],
+            },
+        ),
+    ]
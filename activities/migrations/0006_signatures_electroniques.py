@@ -0,0 +1,132 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:55
+
+import hashlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+MODELES_SIGNES = ['PriseCles', 'RemiseCles', 'PriseClesArchive', 'RemiseClesArchive']
+
+
+def deplacer_signatures(apps, schema_editor):
+    """Remplace chaque signature par son empreinte et stocke le contenu à part"""
+    SignatureElectronique = apps.get_model('activities', 'SignatureElectronique')
+    for nom in MODELES_SIGNES:
+        Modele = apps.get_model('activities', nom)
+        for ligne in Modele.objects.only('pk', 'signature').iterator(chunk_size=500):
+            contenu = ligne.signature or ''
+            empreinte = hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+            SignatureElectronique.objects.get_or_create(empreinte=empreinte, defaults={'contenu': contenu})
+            Modele.objects.filter(pk=ligne.pk).update(signature_electronique_id=empreinte)
+
+
+def restaurer_signatures(apps, schema_editor):
+    """Recopie le contenu des signatures sur les lignes d'activité"""
+    SignatureElectronique = apps.get_model('activities', 'SignatureElectronique')
+    contenus = dict(SignatureElectronique.objects.values_list('empreinte', 'contenu'))
+    for nom in MODELES_SIGNES:
+        Modele = apps.get_model('activities', nom)
+        for pk, empreinte in Modele.objects.values_list('pk', 'signature_electronique_id').iterator():
+            Modele.objects.filter(pk=pk).update(signature=contenus.get(empreinte, ''))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0005_archives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignatureElectronique',
+            fields=[
+                ('empreinte', models.CharField(help_text='Empreinte hexadécimale du contenu de la signature', max_length=64, primary_key=True, serialize=False, verbose_name='Empreinte SHA-256')),
+                ('contenu', models.TextField(help_text='Signature électronique du chauffeur', verbose_name='Signature électronique')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, help_text='Date du premier enregistrement de cette signature', verbose_name='Date de création')),
+            ],
+            options={
+                'verbose_name': 'Signature électronique',
+                'verbose_name_plural': 'Signatures électroniques',
+                'db_table': 'activities_signature',
+            },
+        ),
+        migrations.AddField(
+            model_name='prisecles',
+            name='signature_electronique',
+            field=models.ForeignKey(db_column='signature_empreinte', help_text='Empreinte de la signature électronique du chauffeur', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='activities.signatureelectronique', verbose_name='Signature électronique'),
+        ),
+        migrations.AddField(
+            model_name='priseclesarchive',
+            name='signature_electronique',
+            field=models.ForeignKey(db_column='signature_empreinte', help_text='Empreinte de la signature électronique du chauffeur', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='activities.signatureelectronique', verbose_name='Signature électronique'),
+        ),
+        migrations.AddField(
+            model_name='remisecles',
+            name='signature_electronique',
+            field=models.ForeignKey(db_column='signature_empreinte', help_text='Empreinte de la signature électronique du chauffeur', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='activities.signatureelectronique', verbose_name='Signature électronique'),
+        ),
+        migrations.AddField(
+            model_name='remiseclesarchive',
+            name='signature_electronique',
+            field=models.ForeignKey(db_column='signature_empreinte', help_text='Empreinte de la signature électronique du chauffeur', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='activities.signatureelectronique', verbose_name='Signature électronique'),
+        ),
+        migrations.RunPython(deplacer_signatures, restaurer_signatures),
+        # Valeur par défaut transitoire : permet de recréer la colonne en cas de retour arrière
+        migrations.AlterField(
+            model_name='prisecles',
+            name='signature',
+            field=models.TextField(default='', help_text='Signature électronique du chauffeur', verbose_name='Signature électronique'),
+        ),
+        migrations.AlterField(
+            model_name='priseclesarchive',
+            name='signature',
+            field=models.TextField(default='', help_text='Signature électronique du chauffeur', verbose_name='Signature électronique'),
+        ),
+        migrations.AlterField(
+            model_name='remisecles',
+            name='signature',
+            field=models.TextField(default='', help_text='Signature électronique du chauffeur', verbose_name='Signature électronique'),
+        ),
+        migrations.AlterField(
+            model_name='remiseclesarchive',
+            name='signature',
+            field=models.TextField(default='', help_text='Signature électronique du chauffeur', verbose_name='Signature électronique'),
+        ),
+        migrations.RemoveField(
+            model_name='prisecles',
+            name='signature',
+        ),
+        migrations.RemoveField(
+            model_name='priseclesarchive',
+            name='signature',
+        ),
+        migrations.RemoveField(
+            model_name='remisecles',
+            name='signature',
+        ),
+        migrations.RemoveField(
+            model_name='remiseclesarchive',
+            name='signature',
+        ),
+        migrations.AlterField(
+            model_name='prisecles',
+            name='signature_electronique',
+            field=models.ForeignKey(db_column='signature_empreinte', help_text='Empreinte de la signature électronique du chauffeur', on_delete=django.db.models.deletion.PROTECT, related_name='+', to='activities.signatureelectronique', verbose_name='Signature électronique'),
+        ),
+        migrations.AlterField(
+            model_name='priseclesarchive',
+            name='signature_electronique',
+            field=models.ForeignKey(db_column='signature_empreinte', help_text='Empreinte de la signature électronique du chauffeur', on_delete=django.db.models.deletion.PROTECT, related_name='+', to='activities.signatureelectronique', verbose_name='Signature électronique'),
+        ),
+        migrations.AlterField(
+            model_name='remisecles',
+            name='signature_electronique',
+            field=models.ForeignKey(db_column='signature_empreinte', help_text='Empreinte de la signature électronique du chauffeur', on_delete=django.db.models.deletion.PROTECT, related_name='+', to='activities.signatureelectronique', verbose_name='Signature électronique'),
+        ),
+        migrations.AlterField(
+            model_name='remiseclesarchive',
+            name='signature_electronique',
+            field=models.ForeignKey(db_column='signature_empreinte', help_text='Empreinte de la signature électronique du chauffeur', on_delete=django.db.models.deletion.PROTECT, related_name='+', to='activities.signatureelectronique', verbose_name='Signature électronique'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('activities', '0006_signatures_electroniques'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperationPurge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_purge', models.CharField(choices=[('activites', 'Toutes les activités'), ('pannes', 'Toutes les pannes'), ('demandes', 'Demandes de modification'), ('compte_chauffeur', 'Compte chauffeur')], help_text='Ensemble de données à supprimer', max_length=20, verbose_name='Type de purge')),
+                ('parametres', models.JSONField(default=dict, help_text='Périmètre de la purge (identifiants des chauffeurs concernés...)', verbose_name='Paramètres')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('echouee', 'Échouée')], default='en_attente', help_text='Avancement de la purge', max_length=10, verbose_name='Statut')),
+                ('total_estime', models.IntegerField(default=0, help_text='Nombre de lignes à supprimer estimé au lancement', verbose_name='Lignes estimées')),
+                ('lignes_supprimees', models.IntegerField(default=0, help_text='Nombre de lignes déjà supprimées', verbose_name='Lignes supprimées')),
+                ('etape_courante', models.CharField(blank=True, help_text='Table en cours de purge', max_length=100, verbose_name='Étape courante')),
+                ('erreur', models.TextField(blank=True, help_text="Message d'erreur si la purge a échoué", verbose_name='Erreur')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_debut', models.DateTimeField(blank=True, null=True, verbose_name="Début d'exécution")),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name="Fin d'exécution")),
+                ('demandeur', models.ForeignKey(blank=True, help_text='Utilisateur qui a lancé la purge', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Demandeur')),
+            ],
+            options={
+                'verbose_name': 'Opération de purge',
+                'verbose_name_plural': 'Opérations de purge',
+                'db_table': 'activities_operation_purge',
+                'ordering': ['-date_creation'],
+            },
+        ),
+    ]
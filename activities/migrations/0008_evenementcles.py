@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0005_remove_assignationsuperviseur_drivers_assignationsuperviseur_unique_chauffeur_superviseur_and_more'),
+        ('activities', '0007_operationpurge'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvenementCles',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cle', models.CharField(help_text="Identifiant unique de l'événement généré par le client", max_length=64, unique=True, verbose_name="Clé d'idempotence")),
+                ('type_evenement', models.CharField(choices=[('prise', 'Prise de clés'), ('remise', 'Remise de clés')], max_length=10, verbose_name="Type d'événement")),
+                ('statut', models.CharField(choices=[('applique', 'Appliqué'), ('rejete', 'Rejeté')], help_text="Résultat du traitement de l'événement", max_length=10, verbose_name='Statut')),
+                ('message', models.CharField(blank=True, help_text='Message retourné au chauffeur (motif du rejet le cas échéant)', max_length=255, verbose_name='Message')),
+                ('date_reception', models.DateTimeField(auto_now_add=True, verbose_name='Date de réception')),
+                ('chauffeur', models.ForeignKey(help_text="Chauffeur à l'origine de l'événement", on_delete=django.db.models.deletion.CASCADE, to='drivers.chauffeur', verbose_name='Chauffeur')),
+            ],
+            options={
+                'verbose_name': 'Événement de clés',
+                'verbose_name_plural': 'Événements de clés',
+                'db_table': 'activities_evenement_cles',
+                'ordering': ['-date_reception'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0008_evenementcles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EffetDiffere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_effet', models.CharField(choices=[('panne_signalee', 'Panne signalée'), ('notification', 'Notification'), ('invalidation_cache', 'Invalidation de cache')], max_length=30, verbose_name="Type d'effet")),
+                ('donnees', models.JSONField(default=dict, help_text="Paramètres de l'effet (sérialisables en JSON)", verbose_name='Données')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('traite', 'Traité'), ('echoue', 'Échoué')], default='en_attente', max_length=15, verbose_name='Statut')),
+                ('tentatives', models.PositiveIntegerField(default=0, help_text='Nombre de traitements en échec', verbose_name='Tentatives')),
+                ('erreur', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('verrou', models.CharField(blank=True, help_text="Jeton du worker qui traite l'effet (vide si libre)", max_length=32, verbose_name='Verrou')),
+                ('date_verrou', models.DateTimeField(blank=True, null=True, verbose_name='Date du verrou')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_traitement', models.DateTimeField(blank=True, null=True, verbose_name='Date de traitement')),
+            ],
+            options={
+                'verbose_name': 'Effet différé',
+                'verbose_name_plural': 'Effets différés',
+                'db_table': 'activities_outbox',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['statut', 'id'], name='outbox_statut_id_idx')],
+            },
+        ),
+    ]
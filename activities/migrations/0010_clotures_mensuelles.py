@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0005_remove_assignationsuperviseur_drivers_assignationsuperviseur_unique_chauffeur_superviseur_and_more'),
+        ('activities', '0009_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClotureMois',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annee', models.PositiveSmallIntegerField(verbose_name='Année')),
+                ('mois', models.PositiveSmallIntegerField(help_text='Mois clôturé (1-12)', verbose_name='Mois')),
+                ('recette_totale', models.BigIntegerField(default=0, help_text='Somme des recettes réalisées de la flotte sur le mois', verbose_name='Recette totale (FCFA)')),
+                ('objectif_total', models.BigIntegerField(default=0, help_text='Somme des objectifs de recette de la flotte sur le mois', verbose_name='Objectif total (FCFA)')),
+                ('nb_prises', models.IntegerField(default=0, verbose_name='Prises de clés')),
+                ('nb_remises', models.IntegerField(default=0, verbose_name='Remises de clés')),
+                ('nb_chauffeurs', models.IntegerField(default=0, help_text='Nombre de chauffeurs avec au moins une prise ou une remise', verbose_name='Chauffeurs actifs')),
+                ('date_cloture', models.DateTimeField(auto_now_add=True, verbose_name='Date de clôture')),
+            ],
+            options={
+                'verbose_name': 'Clôture mensuelle',
+                'verbose_name_plural': 'Clôtures mensuelles',
+                'db_table': 'activities_cloture_mois',
+                'ordering': ['-annee', '-mois'],
+                'unique_together': {('annee', 'mois')},
+            },
+        ),
+        migrations.CreateModel(
+            name='InstantaneMois',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recette_totale', models.IntegerField(default=0, verbose_name='Recette totale (FCFA)')),
+                ('nb_remises', models.IntegerField(default=0, verbose_name='Remises de clés')),
+                ('objectif_total', models.IntegerField(default=0, verbose_name='Objectif total (FCFA)')),
+                ('nb_prises', models.IntegerField(default=0, verbose_name='Prises de clés')),
+                ('recettes_jours', models.JSONField(default=dict, help_text='Numéro du jour -> recette réalisée (jours avec remise)', verbose_name='Recettes par jour')),
+                ('objectifs_jours', models.JSONField(default=dict, help_text='Numéro du jour -> objectif de recette (jours avec prise)', verbose_name='Objectifs par jour')),
+                ('chauffeur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='drivers.chauffeur', verbose_name='Chauffeur')),
+                ('cloture', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='instantanes', to='activities.cloturemois', verbose_name='Clôture')),
+            ],
+            options={
+                'verbose_name': 'Instantané mensuel',
+                'verbose_name_plural': 'Instantanés mensuels',
+                'db_table': 'activities_instantane_mois',
+                'unique_together': {('cloture', 'chauffeur')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0005_remove_assignationsuperviseur_drivers_assignationsuperviseur_unique_chauffeur_superviseur_and_more'),
+        ('activities', '0010_clotures_mensuelles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassementChauffeur',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fenetre', models.CharField(choices=[('semaine', 'Semaine'), ('mois', 'Mois'), ('annee', 'Année')], max_length=10, verbose_name='Fenêtre')),
+                ('debut', models.DateField(help_text="Lundi de la semaine, premier jour du mois ou de l'année", verbose_name='Début de la fenêtre')),
+                ('recette', models.IntegerField(default=0, help_text='Somme des recettes réalisées sur la fenêtre', verbose_name='Recette (FCFA)')),
+                ('objectif', models.IntegerField(default=0, help_text='Somme des objectifs des jours avec remise de clés', verbose_name='Objectif (FCFA)')),
+                ('jours', models.IntegerField(default=0, help_text='Nombre de remises de clés sur la fenêtre', verbose_name='Jours travaillés')),
+                ('taux', models.FloatField(default=0, help_text='Recette / objectif des jours travaillés x 100', verbose_name='Objectif atteint (%)')),
+                ('date_modification', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+                ('chauffeur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='classements', to='drivers.chauffeur', verbose_name='Chauffeur')),
+            ],
+            options={
+                'verbose_name': 'Classement chauffeur',
+                'verbose_name_plural': 'Classements chauffeurs',
+                'db_table': 'activities_classement_chauffeur',
+                'indexes': [models.Index(fields=['fenetre', 'debut', '-recette', 'chauffeur'], name='classement_recette_idx'), models.Index(fields=['fenetre', 'debut', '-taux', 'chauffeur'], name='classement_taux_idx'), models.Index(fields=['fenetre', 'debut', '-jours', 'chauffeur'], name='classement_jours_idx')],
+                'unique_together': {('fenetre', 'debut', 'chauffeur')},
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Index plein texte (FTS5) des pannes et problèmes mécaniques, SQLite seulement
+# (voir activities/recherche.py)
+
+from django.db import migrations
+
+TABLE_INDEX = 'activities_recherche_problemes'
+
+PAS = 8
+
+# (code, table, colonne de texte, colonne de date)
+SOURCES = [
+    (0, 'activities_panne', 'description', 'date_creation'),
+    (1, 'activities_panne_archive', 'description', 'date_creation'),
+    (2, 'activities_prise_cles', 'probleme_mecanique', 'date'),
+    (3, 'activities_prise_cles_archive', 'probleme_mecanique', 'date'),
+    (4, 'activities_remise_cles', 'probleme_mecanique', 'date'),
+    (5, 'activities_remise_cles_archive', 'probleme_mecanique', 'date'),
+]
+
+
+def _declencheurs(code, table, texte, jour):
+    ligne = f"NEW.id * {PAS} + {code}, NEW.{texte}, NEW.chauffeur_id, date(NEW.{jour})"
+    condition = f"lower(trim(NEW.{texte})) NOT IN ('', 'aucun')"
+    return [
+        f"""CREATE TRIGGER {table}_recherche_ai AFTER INSERT ON {table} WHEN {condition} BEGIN
+            INSERT INTO {TABLE_INDEX} (rowid, texte, chauffeur_id, jour) VALUES ({ligne});
+        END""",
+        f"""CREATE TRIGGER {table}_recherche_ad AFTER DELETE ON {table} BEGIN
+            DELETE FROM {TABLE_INDEX} WHERE rowid = OLD.id * {PAS} + {code};
+        END""",
+        f"""CREATE TRIGGER {table}_recherche_au AFTER UPDATE OF {texte}, chauffeur_id, {jour} ON {table} BEGIN
+            DELETE FROM {TABLE_INDEX} WHERE rowid = OLD.id * {PAS} + {code};
+            INSERT INTO {TABLE_INDEX} (rowid, texte, chauffeur_id, jour) SELECT {ligne} WHERE {condition};
+        END""",
+    ]
+
+
+def creer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {TABLE_INDEX} USING fts5("
+        f"texte, chauffeur_id UNINDEXED, jour UNINDEXED, "
+        f"tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    for code, table, texte, jour in SOURCES:
+        schema_editor.execute(
+            f"INSERT INTO {TABLE_INDEX} (rowid, texte, chauffeur_id, jour) "
+            f"SELECT id * {PAS} + {code}, {texte}, chauffeur_id, date({jour}) FROM {table} "
+            f"WHERE lower(trim({texte})) NOT IN ('', 'aucun')"
+        )
+        for sql in _declencheurs(code, table, texte, jour):
+            schema_editor.execute(sql)
+
+
+def supprimer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for _, table, _, _ in SOURCES:
+        for suffixe in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_recherche_{suffixe}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0011_classements'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_index, supprimer_index),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:12
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+
+STATUTS_CLOS = ['reparée', 'annulee']
+RANG_SEVERITE = {'critique': 0, 'majeure': 1, 'moderee': 2, 'mineure': 3}
+RANG_STATUT = {'signalee': 0, 'en_cours': 1, 'reparée': 2, 'annulee': 3}
+
+
+def calculer_priorites(apps, schema_editor):
+    """Une mise à jour par couple (statut, sévérité) : la priorité n'en dépend que"""
+    Panne = apps.get_model('activities', 'Panne')
+    for statut, rang_statut in RANG_STATUT.items():
+        for severite, rang_severite in RANG_SEVERITE.items():
+            priorite = (100 if statut in STATUTS_CLOS else 0) + rang_severite * 10 + rang_statut
+            Panne.objects.filter(statut=statut, severite=severite).update(priorite=priorite)
+
+
+def recreer_declencheurs_recherche(apps, schema_editor):
+    """
+    Sous SQLite, l'ajout de la colonne reconstruit activities_panne et
+    supprime les déclencheurs de l'index de recherche (migration 0012)
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    recherche = import_module('activities.migrations.0012_recherche_problemes')
+    for code, table, texte, jour in recherche.SOURCES:
+        if table == 'activities_panne':
+            for suffixe in ('ai', 'ad', 'au'):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_recherche_{suffixe}")
+            for sql in recherche._declencheurs(code, table, texte, jour):
+                schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0012_recherche_problemes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='panne',
+            name='priorite',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text="Calculée à l'enregistrement depuis le statut et la sévérité (0 = à traiter en premier)", verbose_name='Priorité de traitement'),
+        ),
+        migrations.RunPython(calculer_priorites, migrations.RunPython.noop),
+        migrations.RunPython(recreer_declencheurs_recherche, recreer_declencheurs_recherche),
+        migrations.AddIndex(
+            model_name='panne',
+            index=models.Index(fields=['priorite', '-date_creation', '-id'], name='panne_triage_idx'),
+        ),
+    ]
@@ -2,12 +2,135 @@
 # MODÈLES DE L'APPLICATION ACTIVITIES - Gestion des activités de taxi
 # =============================================================================
 
+import hashlib
+
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from drivers.models import Chauffeur
 
 
-class PriseCles(models.Model):
+# =============================================================================
+# SIGNATURES ÉLECTRONIQUES - Stockage adressé par contenu
+# =============================================================================
+
+class SignatureElectronique(models.Model):
+    """
+    Contenu des signatures électroniques, adressé par son empreinte SHA-256
+    
+    Les signatures ne sont utiles qu'en cas d'audit : elles sont stockées
+    hors des tables d'activités, qui ne gardent que l'empreinte. Les listes,
+    exports et agrégats ne lisent ainsi plus ces données volumineuses.
+    Une même signature (souvent le nom du chauffeur) n'est stockée qu'une fois.
+    
+    Utilisation :
+    - SignatureElectronique.enregistrer(contenu) à l'enregistrement d'une activité
+    - activite.signature pour relire le contenu (requête à la demande)
+    - activite.signature_valide() pour vérifier l'intégrité
+    """
+    
+    empreinte = models.CharField(
+        max_length=64,
+        primary_key=True,
+        verbose_name="Empreinte SHA-256",
+        help_text="Empreinte hexadécimale du contenu de la signature"
+    )
+    contenu = models.TextField(
+        verbose_name="Signature électronique",
+        help_text="Signature électronique du chauffeur"
+    )
+    date_creation = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date de création",
+        help_text="Date du premier enregistrement de cette signature"
+    )
+    
+    class Meta:
+        verbose_name = "Signature électronique"
+        verbose_name_plural = "Signatures électroniques"
+        db_table = 'activities_signature'
+    
+    def __str__(self):
+        return self.empreinte[:12]
+    
+    @staticmethod
+    def calculer_empreinte(contenu):
+        """
+        Calcule l'empreinte d'un contenu de signature
+        
+        Args:
+            contenu (str): Signature saisie par le chauffeur
+        
+        Returns:
+            str: Empreinte SHA-256 hexadécimale (64 caractères)
+        """
+        return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def enregistrer(cls, contenu):
+        """
+        Stocke une signature si elle n'existe pas encore
+        
+        Args:
+            contenu (str): Signature saisie par le chauffeur
+        
+        Returns:
+            SignatureElectronique: Signature existante ou nouvellement créée
+        """
+        signature, _ = cls.objects.get_or_create(
+            empreinte=cls.calculer_empreinte(contenu),
+            defaults={'contenu': contenu}
+        )
+        return signature
+
+
+class SignatureStockeeMixin:
+    """
+    Accès transparent à la signature d'une activité
+    
+    L'attribut signature reste lisible et modifiable comme un champ :
+    - en lecture, le contenu est chargé à la demande depuis SignatureElectronique
+    - en écriture, le contenu est stocké à la sauvegarde et seule
+      l'empreinte est conservée sur la ligne d'activité
+    """
+    
+    @property
+    def signature(self):
+        """Contenu de la signature (requête à la demande)"""
+        en_attente = getattr(self, '_signature_en_attente', None)
+        if en_attente is not None:
+            return en_attente
+        if self.signature_electronique_id is None:
+            return ''
+        return self.signature_electronique.contenu
+    
+    @signature.setter
+    def signature(self, contenu):
+        self._signature_en_attente = contenu or ''
+    
+    def signature_valide(self):
+        """
+        Vérifie que le contenu stocké correspond à l'empreinte de la ligne
+        
+        Returns:
+            bool: True si la signature n'a pas été altérée
+        """
+        if self.signature_electronique_id is None:
+            return False
+        contenu = self.signature_electronique.contenu
+        return SignatureElectronique.calculer_empreinte(contenu) == self.signature_electronique_id
+    
+    def save(self, *args, **kwargs):
+        """Stocke la signature en attente avant d'enregistrer l'activité"""
+        en_attente = getattr(self, '_signature_en_attente', None)
+        if en_attente is None and self.signature_electronique_id is None:
+            en_attente = ''
+        if en_attente is not None:
+            self.signature_electronique = SignatureElectronique.enregistrer(en_attente)
+            self._signature_en_attente = None
+        super().save(*args, **kwargs)
+
+
+class PriseCles(SignatureStockeeMixin, models.Model):
     """
     Modèle pour représenter la prise de clés du matin par un chauffeur
     
@@ -70,10 +193,14 @@ class PriseCles(models.Model):
         help_text="Description des problèmes mécaniques éventuels"
     )
     
-    # Signature électronique pour traçabilité
-    signature = models.TextField(
+    # Signature électronique pour traçabilité (empreinte seule, contenu à part)
+    signature_electronique = models.ForeignKey(
+        SignatureElectronique,
+        on_delete=models.PROTECT,  # Une signature référencée ne peut pas être supprimée
+        related_name='+',
+        db_column='signature_empreinte',
         verbose_name="Signature électronique",
-        help_text="Signature électronique du chauffeur"
+        help_text="Empreinte de la signature électronique du chauffeur"
     )
     
     # Métadonnées de suivi
@@ -136,7 +263,7 @@ class PriseCles(models.Model):
         ).exists()
 
 
-class RemiseCles(models.Model):
+class RemiseCles(SignatureStockeeMixin, models.Model):
     """
     Modèle pour représenter la remise de clés du soir par un chauffeur
     
@@ -201,10 +328,14 @@ class RemiseCles(models.Model):
         help_text="Description des problèmes mécaniques éventuels"
     )
     
-    # Signature électronique pour traçabilité
-    signature = models.TextField(
+    # Signature électronique pour traçabilité (empreinte seule, contenu à part)
+    signature_electronique = models.ForeignKey(
+        SignatureElectronique,
+        on_delete=models.PROTECT,  # Une signature référencée ne peut pas être supprimée
+        related_name='+',
+        db_column='signature_empreinte',
         verbose_name="Signature électronique",
-        help_text="Signature électronique du chauffeur"
+        help_text="Empreinte de la signature électronique du chauffeur"
     )
     
     # Métadonnées de suivi
@@ -238,19 +369,23 @@ class RemiseCles(models.Model):
         """
         return f"{self.chauffeur.nom_complet} - Remise {self.date} - {self.recette_realisee} FCFA"
     
-    def get_objectif_atteint(self):
+    def get_objectif_atteint(self, prise=None):
         """
         Calcule si l'objectif de recette a été atteint
         
         Cette méthode compare la recette réalisée avec l'objectif fixé
         lors de la prise de clés et retourne un statut avec message.
         
+        Args:
+            prise (PriseCles): Prise de clés du jour si déjà chargée (évite une requête)
+        
         Returns:
             tuple: (type_alerte, message) où type_alerte est 'success', 'warning', 'danger' ou 'info'
         """
         try:
             # Récupération de la prise de clés correspondante
-            prise = PriseCles.objects.get(chauffeur=self.chauffeur, date=self.date)
+            if prise is None:
+                prise = PriseCles.objects.get(chauffeur_id=self.chauffeur_id, date=self.date)
             
             # Calcul du pourcentage de réalisation
             pourcentage = (self.recette_realisee / prise.objectif_recette) * 100
@@ -450,6 +585,12 @@ class Panne(models.Model):
         ('annulee', 'Annulée'),                      # Signalement annulé (faux positif)
     ]
     
+    # Ordre de traitement (voir priorite) : pannes ouvertes avant les closes,
+    # puis de la plus grave à la plus légère, puis signalées avant en cours
+    STATUTS_CLOS = ['reparée', 'annulee']
+    RANG_SEVERITE = {'critique': 0, 'majeure': 1, 'moderee': 2, 'mineure': 3}
+    RANG_STATUT = {'signalee': 0, 'en_cours': 1, 'reparée': 2, 'annulee': 3}
+    
     # =============================================================================
     # CHAMPS DU MODÈLE - Définition des attributs de la base de données
     # =============================================================================
@@ -490,6 +631,13 @@ class Panne(models.Model):
         help_text="Statut actuel de la panne"
     )
     
+    priorite = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Priorité de traitement",
+        help_text="Calculée à l'enregistrement depuis le statut et la sévérité (0 = à traiter en premier)"
+    )
+    
     # Coûts et réparations
     cout_reparation = models.DecimalField(
         max_digits=8, 
@@ -527,12 +675,59 @@ class Panne(models.Model):
         verbose_name = "Panne"                        # Nom singulier dans l'admin
         verbose_name_plural = "Pannes"                # Nom pluriel dans l'admin
         ordering = ['-date_creation']                 # Tri par date de création (plus récent en premier)
+        indexes = [
+            # File de tri de gestion_pannes : filtre et pagination sur l'index
+            models.Index(fields=['priorite', '-date_creation', '-id'], name='panne_triage_idx'),
+        ]
         db_table = 'activities_panne'                 # Nom de la table en base
     
     # =============================================================================
     # MÉTHODES DU MODÈLE - Fonctionnalités personnalisées
     # =============================================================================
     
+    @classmethod
+    def calculer_priorite(cls, statut, severite):
+        """
+        Priorité de traitement d'une panne (plus petite = plus urgente)
+        
+        Centaines : ouverte (0) ou close (1) ; dizaines : sévérité ;
+        unités : statut. Un filtre sur le statut ou la sévérité devient
+        ainsi un filtre sur la seule colonne priorite.
+        """
+        return (
+            (100 if statut in cls.STATUTS_CLOS else 0)
+            + cls.RANG_SEVERITE.get(severite, 3) * 10
+            + cls.RANG_STATUT.get(statut, 0)
+        )
+    
+    @classmethod
+    def priorites(cls, ouvertes=None, severite=None):
+        """
+        Priorités possibles des pannes ouvertes ou closes, d'une sévérité
+        
+        Args:
+            ouvertes (bool): True = signalées ou en cours, False = closes, None = toutes
+            severite (str): Sévérité (None = toutes)
+        
+        Returns:
+            list: Valeurs de priorite correspondantes
+        """
+        return sorted({
+            cls.calculer_priorite(statut, valeur)
+            for statut in cls.RANG_STATUT
+            for valeur in cls.RANG_SEVERITE
+            if (ouvertes is None or (statut not in cls.STATUTS_CLOS) == ouvertes)
+            and (severite is None or valeur == severite)
+        })
+    
+    def save(self, *args, **kwargs):
+        """Recalcule la priorité de traitement avant l'enregistrement"""
+        self.priorite = self.calculer_priorite(self.statut, self.severite)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'statut', 'severite'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'priorite'}
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         """
         Représentation textuelle de la panne
@@ -828,4 +1023,707 @@ class DemandeModification(models.Model):
         self.commentaire_admin = commentaire
         self.statut = 'approuvee' if approuvee else 'rejetee'
         self.date_traitement = timezone.now()
-        self.save()
\ No newline at end of file
+        self.save()
+
+
+# =============================================================================
+# PURGES PAR LOTS - Suivi des suppressions massives en arrière-plan
+# =============================================================================
+
+class OperationPurge(models.Model):
+    """
+    Suivi d'une suppression massive exécutée par lots (voir activities.purge)
+    
+    Les suppressions massives (toutes les activités, toutes les pannes,
+    demandes de modification, compte chauffeur) ne sont plus faites en une
+    seule transaction : elles sont enregistrées ici puis exécutées en
+    arrière-plan par lots de clés primaires, chacun dans une transaction courte.
+    
+    Utilisation :
+    - Progression affichée via la vue admin_dashboard:statut_purge
+    - Reprise des opérations interrompues : python manage.py executer_purges
+    """
+    
+    TYPE_CHOICES = [
+        ('activites', 'Toutes les activités'),
+        ('pannes', 'Toutes les pannes'),
+        ('demandes', 'Demandes de modification'),
+        ('compte_chauffeur', 'Compte chauffeur'),
+    ]
+    
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('terminee', 'Terminée'),
+        ('echouee', 'Échouée'),
+    ]
+    
+    type_purge = models.CharField(
+        max_length=20,
+        choices=TYPE_CHOICES,
+        verbose_name="Type de purge",
+        help_text="Ensemble de données à supprimer"
+    )
+    parametres = models.JSONField(
+        default=dict,
+        verbose_name="Paramètres",
+        help_text="Périmètre de la purge (identifiants des chauffeurs concernés...)"
+    )
+    statut = models.CharField(
+        max_length=10,
+        choices=STATUT_CHOICES,
+        default='en_attente',
+        verbose_name="Statut",
+        help_text="Avancement de la purge"
+    )
+    total_estime = models.IntegerField(
+        default=0,
+        verbose_name="Lignes estimées",
+        help_text="Nombre de lignes à supprimer estimé au lancement"
+    )
+    lignes_supprimees = models.IntegerField(
+        default=0,
+        verbose_name="Lignes supprimées",
+        help_text="Nombre de lignes déjà supprimées"
+    )
+    etape_courante = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Étape courante",
+        help_text="Table en cours de purge"
+    )
+    erreur = models.TextField(
+        blank=True,
+        verbose_name="Erreur",
+        help_text="Message d'erreur si la purge a échoué"
+    )
+    demandeur = models.ForeignKey(
+        'auth.User',
+        on_delete=models.SET_NULL,  # Le suivi survit à la suppression du demandeur
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Demandeur",
+        help_text="Utilisateur qui a lancé la purge"
+    )
+    date_creation = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date de création"
+    )
+    date_debut = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Début d'exécution"
+    )
+    date_fin = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Fin d'exécution"
+    )
+    
+    class Meta:
+        verbose_name = "Opération de purge"
+        verbose_name_plural = "Opérations de purge"
+        ordering = ['-date_creation']
+        db_table = 'activities_operation_purge'
+    
+    def __str__(self):
+        return f"{self.get_type_purge_display()} - {self.get_statut_display()} ({self.lignes_supprimees}/{self.total_estime})"
+    
+    @property
+    def pourcentage(self):
+        """Progression en pourcentage"""
+        if self.statut == 'terminee':
+            return 100
+        if not self.total_estime:
+            return 0
+        return min(100, round(self.lignes_supprimees * 100 / self.total_estime))
+
+
+# =============================================================================
+# SYNCHRONISATION HORS LIGNE - Événements de clés déjà traités
+# =============================================================================
+
+class EvenementCles(models.Model):
+    """
+    Trace d'un événement de prise ou remise de clés reçu du client hors ligne
+    
+    Chaque événement envoyé par le téléphone du chauffeur porte une clé
+    d'idempotence générée côté client. Une clé déjà reçue n'est jamais
+    rejouée : un renvoi (réseau coupé avant la réponse, double envoi)
+    retourne simplement le résultat enregistré.
+    
+    Utilisation :
+    - Dédoublonnage des lots reçus par drivers:synchroniser_cles
+    - Diagnostic des événements rejetés (message d'erreur conservé)
+    """
+    
+    TYPE_CHOICES = [
+        ('prise', 'Prise de clés'),
+        ('remise', 'Remise de clés'),
+    ]
+    
+    STATUT_CHOICES = [
+        ('applique', 'Appliqué'),
+        ('rejete', 'Rejeté'),
+    ]
+    
+    cle = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Clé d'idempotence",
+        help_text="Identifiant unique de l'événement généré par le client"
+    )
+    chauffeur = models.ForeignKey(
+        Chauffeur,
+        on_delete=models.CASCADE,  # Suppression en cascade si le chauffeur est supprimé
+        verbose_name="Chauffeur",
+        help_text="Chauffeur à l'origine de l'événement"
+    )
+    type_evenement = models.CharField(
+        max_length=10,
+        choices=TYPE_CHOICES,
+        verbose_name="Type d'événement"
+    )
+    statut = models.CharField(
+        max_length=10,
+        choices=STATUT_CHOICES,
+        verbose_name="Statut",
+        help_text="Résultat du traitement de l'événement"
+    )
+    message = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="Message",
+        help_text="Message retourné au chauffeur (motif du rejet le cas échéant)"
+    )
+    date_reception = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date de réception"
+    )
+    
+    class Meta:
+        verbose_name = "Événement de clés"
+        verbose_name_plural = "Événements de clés"
+        ordering = ['-date_reception']
+        db_table = 'activities_evenement_cles'
+    
+    def __str__(self):
+        return f"{self.get_type_evenement_display()} {self.cle} - {self.get_statut_display()}"
+
+
+# =============================================================================
+# OUTBOX TRANSACTIONNELLE - Effets secondaires différés
+# =============================================================================
+
+class EffetDiffere(models.Model):
+    """
+    Effet secondaire d'une action, enregistré dans la même transaction
+    
+    Les vues n'exécutent plus les effets secondaires (création de panne,
+    notifications, invalidation de cache) pendant la requête : elles
+    publient un effet dans cette table (voir activities.outbox.publier),
+    validé ou annulé avec l'action elle-même. La commande run_outbox_worker
+    traite ensuite les effets en attente par lots.
+    
+    Utilisation :
+    - Pannes signalées lors des prises/remises de clés et des demandes approuvées
+    - Récapitulatifs de notification aux superviseurs et chauffeurs
+    - Suivi des effets en échec (tentatives et dernière erreur conservées)
+    """
+    
+    TYPE_CHOICES = [
+        ('panne_signalee', 'Panne signalée'),
+        ('notification', 'Notification'),
+        ('invalidation_cache', 'Invalidation de cache'),
+    ]
+    
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('traite', 'Traité'),
+        ('echoue', 'Échoué'),
+    ]
+    
+    type_effet = models.CharField(
+        max_length=30,
+        choices=TYPE_CHOICES,
+        verbose_name="Type d'effet"
+    )
+    donnees = models.JSONField(
+        default=dict,
+        verbose_name="Données",
+        help_text="Paramètres de l'effet (sérialisables en JSON)"
+    )
+    statut = models.CharField(
+        max_length=15,
+        choices=STATUT_CHOICES,
+        default='en_attente',
+        verbose_name="Statut"
+    )
+    tentatives = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Tentatives",
+        help_text="Nombre de traitements en échec"
+    )
+    erreur = models.TextField(
+        blank=True,
+        verbose_name="Dernière erreur"
+    )
+    verrou = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name="Verrou",
+        help_text="Jeton du worker qui traite l'effet (vide si libre)"
+    )
+    date_verrou = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Date du verrou"
+    )
+    date_creation = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date de création"
+    )
+    date_traitement = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Date de traitement"
+    )
+    
+    class Meta:
+        verbose_name = "Effet différé"
+        verbose_name_plural = "Effets différés"
+        ordering = ['-date_creation']
+        db_table = 'activities_outbox'
+        indexes = [
+            # Lecture des effets en attente, dans l'ordre de publication
+            models.Index(fields=['statut', 'id'], name='outbox_statut_id_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_type_effet_display()} n°{self.pk} - {self.get_statut_display()}"
+
+
+# =============================================================================
+# ARCHIVES - Historique froid des activités (mois clôturés)
+# =============================================================================
+
+class PriseClesArchive(SignatureStockeeMixin, models.Model):
+    """
+    Archive des prises de clés des mois clôturés
+    
+    Les prises de clés plus anciennes que ARCHIVE_AGE_MOIS sont déplacées
+    dans cette table par la commande archiver_activites. La table chaude
+    PriseCles ne contient ainsi que le mois courant et les mois récents.
+    
+    Les identifiants d'origine sont conservés pour la traçabilité.
+    Les champs de date ne sont pas automatiques : ils recopient les valeurs
+    de l'enregistrement d'origine.
+    
+    Utilisation :
+    - Rapports et calendriers sur des périodes anciennes (voir activities.archive)
+    - Export mensuel en JSON compressé pour le stockage à froid
+    """
+    
+    chauffeur = models.ForeignKey(
+        Chauffeur,
+        on_delete=models.CASCADE,  # Suppression en cascade si le chauffeur est supprimé
+        verbose_name="Chauffeur",
+        help_text="Chauffeur qui a pris les clés"
+    )
+    date = models.DateField(
+        verbose_name="Date",
+        help_text="Date de prise des clés"
+    )
+    heure_prise = models.TimeField(
+        verbose_name="Heure de prise",
+        help_text="Heure à laquelle les clés ont été prises"
+    )
+    objectif_recette = models.IntegerField(
+        verbose_name="Objectif de recette (FCFA)",
+        help_text="Objectif de recette fixé pour la journée en FCFA"
+    )
+    plein_carburant = models.BooleanField(
+        default=False,
+        verbose_name="Plein de carburant",
+        help_text="Indique si le véhicule avait le plein de carburant"
+    )
+    probleme_mecanique = models.CharField(
+        max_length=200,
+        default="Aucun",
+        verbose_name="Problème mécanique",
+        help_text="Description des problèmes mécaniques éventuels"
+    )
+    signature_electronique = models.ForeignKey(
+        SignatureElectronique,
+        on_delete=models.PROTECT,
+        related_name='+',
+        db_column='signature_empreinte',
+        verbose_name="Signature électronique",
+        help_text="Empreinte de la signature électronique du chauffeur"
+    )
+    date_creation = models.DateTimeField(
+        verbose_name="Date de création",
+        help_text="Date et heure de création de l'enregistrement d'origine"
+    )
+    date_archivage = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date d'archivage",
+        help_text="Date et heure du déplacement vers l'archive"
+    )
+    
+    class Meta:
+        verbose_name = "Prise de clés archivée"
+        verbose_name_plural = "Prises de clés archivées"
+        ordering = ['-date', '-heure_prise']
+        unique_together = ['chauffeur', 'date']
+        indexes = [models.Index(fields=['date'], name='prise_archive_date_idx')]
+        db_table = 'activities_prise_cles_archive'
+    
+    def __str__(self):
+        return f"{self.chauffeur.nom_complet} - Prise {self.date} (archive)"
+
+
+class RemiseClesArchive(SignatureStockeeMixin, models.Model):
+    """
+    Archive des remises de clés des mois clôturés
+    
+    Même principe que PriseClesArchive pour la table RemiseCles.
+    """
+    
+    chauffeur = models.ForeignKey(
+        Chauffeur,
+        on_delete=models.CASCADE,  # Suppression en cascade si le chauffeur est supprimé
+        verbose_name="Chauffeur",
+        help_text="Chauffeur qui a remis les clés"
+    )
+    date = models.DateField(
+        verbose_name="Date",
+        help_text="Date de remise des clés"
+    )
+    heure_remise = models.TimeField(
+        verbose_name="Heure de remise",
+        help_text="Heure à laquelle les clés ont été remises"
+    )
+    recette_realisee = models.IntegerField(
+        verbose_name="Recette réalisée (FCFA)",
+        help_text="Montant de la recette réalisée pendant la journée en FCFA"
+    )
+    plein_carburant = models.BooleanField(
+        default=False,
+        verbose_name="Plein de carburant",
+        help_text="Indique si le véhicule avait le plein de carburant"
+    )
+    probleme_mecanique = models.CharField(
+        max_length=200,
+        default="Aucun",
+        verbose_name="Problème mécanique",
+        help_text="Description des problèmes mécaniques éventuels"
+    )
+    signature_electronique = models.ForeignKey(
+        SignatureElectronique,
+        on_delete=models.PROTECT,
+        related_name='+',
+        db_column='signature_empreinte',
+        verbose_name="Signature électronique",
+        help_text="Empreinte de la signature électronique du chauffeur"
+    )
+    date_creation = models.DateTimeField(
+        verbose_name="Date de création",
+        help_text="Date et heure de création de l'enregistrement d'origine"
+    )
+    date_archivage = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date d'archivage",
+        help_text="Date et heure du déplacement vers l'archive"
+    )
+    
+    class Meta:
+        verbose_name = "Remise de clés archivée"
+        verbose_name_plural = "Remises de clés archivées"
+        ordering = ['-date', '-heure_remise']
+        unique_together = ['chauffeur', 'date']
+        indexes = [models.Index(fields=['date'], name='remise_archive_date_idx')]
+        db_table = 'activities_remise_cles_archive'
+    
+    def __str__(self):
+        return f"{self.chauffeur.nom_complet} - Remise {self.date} (archive)"
+
+
+class PanneArchive(models.Model):
+    """
+    Archive des pannes clôturées (réparées ou annulées)
+    
+    Seules les pannes dont le statut est définitif sont archivées :
+    une panne signalée ou en cours de réparation reste dans la table chaude.
+    """
+    
+    chauffeur = models.ForeignKey(
+        Chauffeur,
+        on_delete=models.CASCADE,  # Suppression en cascade si le chauffeur est supprimé
+        verbose_name="Chauffeur",
+        help_text="Chauffeur qui a signalé la panne"
+    )
+    activite = models.ForeignKey(
+        Activite,
+        on_delete=models.SET_NULL,  # L'archive survit à la suppression de l'activité legacy
+        null=True,
+        blank=True,
+        verbose_name="Activité liée",
+        help_text="Activité associée à la panne (optionnel)"
+    )
+    description = models.TextField(
+        verbose_name="Description du problème",
+        help_text="Description détaillée du problème mécanique"
+    )
+    severite = models.CharField(
+        max_length=10,
+        choices=Panne.SEVERITE_CHOICES,
+        verbose_name="Sévérité",
+        help_text="Niveau de sévérité de la panne"
+    )
+    statut = models.CharField(
+        max_length=10,
+        choices=Panne.STATUT_CHOICES,
+        verbose_name="Statut",
+        help_text="Statut de la panne au moment de l'archivage"
+    )
+    cout_reparation = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="Coût de réparation (€)",
+        help_text="Coût de la réparation en euros"
+    )
+    date_reparation = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Date de réparation",
+        help_text="Date et heure de la réparation"
+    )
+    date_creation = models.DateTimeField(
+        verbose_name="Date de création",
+        help_text="Date et heure de signalement de la panne"
+    )
+    date_modification = models.DateTimeField(
+        verbose_name="Dernière modification",
+        help_text="Date et heure de la dernière modification avant archivage"
+    )
+    date_archivage = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date d'archivage",
+        help_text="Date et heure du déplacement vers l'archive"
+    )
+    
+    class Meta:
+        verbose_name = "Panne archivée"
+        verbose_name_plural = "Pannes archivées"
+        ordering = ['-date_creation']
+        indexes = [models.Index(fields=['date_creation'], name='panne_archive_creation_idx')]
+        db_table = 'activities_panne_archive'
+    
+    def __str__(self):
+        return f"{self.chauffeur.nom_complet} - {self.get_severite_display()} (archive)"
+
+
+# =============================================================================
+# CLÔTURES MENSUELLES - Chiffres figés des mois terminés
+# =============================================================================
+
+class ClotureMois(models.Model):
+    """
+    Clôture d'un mois terminé : totaux de la flotte figés
+    
+    Un mois terminé sans demande de modification en attente est clôturé par
+    la commande cloturer_mois : ses agrégats sont calculés une fois et
+    enregistrés ici (flotte) et dans InstantaneMois (par chauffeur). Les
+    rapports sur une période clôturée lisent ces instantanés au lieu des
+    lignes de prises et de remises (voir activities.cloture).
+    
+    Une écriture qui touche un mois clôturé (demande de modification
+    approuvée, import, suppression) supprime sa clôture : le mois est
+    rouvert et sera clôturé de nouveau au prochain passage de la commande.
+    """
+    
+    annee = models.PositiveSmallIntegerField(
+        verbose_name="Année"
+    )
+    mois = models.PositiveSmallIntegerField(
+        verbose_name="Mois",
+        help_text="Mois clôturé (1-12)"
+    )
+    recette_totale = models.BigIntegerField(
+        default=0,
+        verbose_name="Recette totale (FCFA)",
+        help_text="Somme des recettes réalisées de la flotte sur le mois"
+    )
+    objectif_total = models.BigIntegerField(
+        default=0,
+        verbose_name="Objectif total (FCFA)",
+        help_text="Somme des objectifs de recette de la flotte sur le mois"
+    )
+    nb_prises = models.IntegerField(
+        default=0,
+        verbose_name="Prises de clés"
+    )
+    nb_remises = models.IntegerField(
+        default=0,
+        verbose_name="Remises de clés"
+    )
+    nb_chauffeurs = models.IntegerField(
+        default=0,
+        verbose_name="Chauffeurs actifs",
+        help_text="Nombre de chauffeurs avec au moins une prise ou une remise"
+    )
+    date_cloture = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date de clôture"
+    )
+    
+    class Meta:
+        verbose_name = "Clôture mensuelle"
+        verbose_name_plural = "Clôtures mensuelles"
+        ordering = ['-annee', '-mois']
+        unique_together = ['annee', 'mois']
+        db_table = 'activities_cloture_mois'
+    
+    def __str__(self):
+        return f"Clôture {self.mois:02d}/{self.annee}"
+
+
+class InstantaneMois(models.Model):
+    """
+    Chiffres figés d'un chauffeur pour un mois clôturé
+    
+    Les totaux du mois servent aux rapports par chauffeur ; le détail par
+    jour (numéro du jour -> montant) sert aux graphiques journaliers et aux
+    périodes qui ne couvrent qu'une partie du mois.
+    """
+    
+    cloture = models.ForeignKey(
+        ClotureMois,
+        on_delete=models.CASCADE,  # Rouvrir un mois supprime ses instantanés
+        related_name='instantanes',
+        verbose_name="Clôture"
+    )
+    chauffeur = models.ForeignKey(
+        Chauffeur,
+        on_delete=models.CASCADE,  # Suppression en cascade si le chauffeur est supprimé
+        verbose_name="Chauffeur"
+    )
+    recette_totale = models.IntegerField(
+        default=0,
+        verbose_name="Recette totale (FCFA)"
+    )
+    nb_remises = models.IntegerField(
+        default=0,
+        verbose_name="Remises de clés"
+    )
+    objectif_total = models.IntegerField(
+        default=0,
+        verbose_name="Objectif total (FCFA)"
+    )
+    nb_prises = models.IntegerField(
+        default=0,
+        verbose_name="Prises de clés"
+    )
+    recettes_jours = models.JSONField(
+        default=dict,
+        verbose_name="Recettes par jour",
+        help_text="Numéro du jour -> recette réalisée (jours avec remise)"
+    )
+    objectifs_jours = models.JSONField(
+        default=dict,
+        verbose_name="Objectifs par jour",
+        help_text="Numéro du jour -> objectif de recette (jours avec prise)"
+    )
+    
+    class Meta:
+        verbose_name = "Instantané mensuel"
+        verbose_name_plural = "Instantanés mensuels"
+        unique_together = ['cloture', 'chauffeur']
+        db_table = 'activities_instantane_mois'
+    
+    def __str__(self):
+        return f"{self.chauffeur.nom_complet} - {self.cloture}"
+
+
+# =============================================================================
+# CLASSEMENTS - Totaux des chauffeurs par semaine, mois et année
+# =============================================================================
+
+class ClassementChauffeur(models.Model):
+    """
+    Totaux d'un chauffeur pour une fenêtre (semaine, mois ou année)
+    
+    Une ligne par chauffeur et par fenêtre, mise à jour à chaque remise de
+    clés (voir activities.classement) : le classement du mois n'est plus un
+    tri de toute la flotte à chaque affichage mais la lecture des premières
+    lignes d'un index (fenêtre, début, critère décroissant).
+    
+    Utilisation :
+    - Top chauffeurs des tableaux de bord
+    - Classement au format JSON (admin_dashboard:classement)
+    """
+    
+    FENETRE_CHOICES = [
+        ('semaine', 'Semaine'),
+        ('mois', 'Mois'),
+        ('annee', 'Année'),
+    ]
+    
+    fenetre = models.CharField(
+        max_length=10,
+        choices=FENETRE_CHOICES,
+        verbose_name="Fenêtre"
+    )
+    debut = models.DateField(
+        verbose_name="Début de la fenêtre",
+        help_text="Lundi de la semaine, premier jour du mois ou de l'année"
+    )
+    chauffeur = models.ForeignKey(
+        Chauffeur,
+        on_delete=models.CASCADE,  # Suppression en cascade si le chauffeur est supprimé
+        related_name='classements',
+        verbose_name="Chauffeur"
+    )
+    recette = models.IntegerField(
+        default=0,
+        verbose_name="Recette (FCFA)",
+        help_text="Somme des recettes réalisées sur la fenêtre"
+    )
+    objectif = models.IntegerField(
+        default=0,
+        verbose_name="Objectif (FCFA)",
+        help_text="Somme des objectifs des jours avec remise de clés"
+    )
+    jours = models.IntegerField(
+        default=0,
+        verbose_name="Jours travaillés",
+        help_text="Nombre de remises de clés sur la fenêtre"
+    )
+    taux = models.FloatField(
+        default=0,
+        verbose_name="Objectif atteint (%)",
+        help_text="Recette / objectif des jours travaillés x 100"
+    )
+    date_modification = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Dernière modification"
+    )
+    
+    class Meta:
+        verbose_name = "Classement chauffeur"
+        verbose_name_plural = "Classements chauffeurs"
+        unique_together = ['fenetre', 'debut', 'chauffeur']
+        indexes = [
+            # Premiers d'une fenêtre par critère, dans l'ordre de l'index
+            models.Index(fields=['fenetre', 'debut', '-recette', 'chauffeur'], name='classement_recette_idx'),
+            models.Index(fields=['fenetre', 'debut', '-taux', 'chauffeur'], name='classement_taux_idx'),
+            models.Index(fields=['fenetre', 'debut', '-jours', 'chauffeur'], name='classement_jours_idx'),
+        ]
+        db_table = 'activities_classement_chauffeur'
+    
+    def __str__(self):
+        return f"{self.chauffeur.nom_complet} - {self.get_fenetre_display()} du {self.debut}"
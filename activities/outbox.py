@@ -0,0 +1,278 @@
+# =============================================================================
+# OUTBOX TRANSACTIONNELLE - Publication et traitement des effets différés
+# =============================================================================
+"""
+Effets secondaires des actions chauffeurs et administrateurs, hors requête
+
+Une vue publie ses effets secondaires (publier, publier_lot) dans la table
+EffetDiffere, dans la même transaction que l'action : si l'action est
+annulée, l'effet l'est aussi ; si elle est validée, l'effet sera traité.
+La commande run_outbox_worker vide ensuite la table par lots :
+- les effets d'un lot sont regroupés par type et traités ensemble
+  (une insertion groupée de pannes, un récapitulatif par destinataire)
+- un lot en échec est rejoué effet par effet pour isoler le fautif, qui
+  est retenté plus tard, jusqu'à OUTBOX_TENTATIVES_MAX fois
+- chaque lot est réservé par un jeton : deux workers ne traitent pas le
+  même effet, et un lot abandonné (worker arrêté) est repris après
+  OUTBOX_DELAI_VERROU secondes
+
+Types d'effets (voir TRAITEMENTS) :
+- panne_signalee : {'chauffeur_id', 'description', 'severite'}
+- notification : {'destinataire_id', 'sujet', 'lignes'}
+- invalidation_cache : {'cles': [...]}
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from drivers.models import Chauffeur, AssignationSuperviseur
+
+from .indicateurs import invalider_indicateurs
+from .models import EffetDiffere, Panne
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# PUBLICATION - Appelée dans la transaction de l'action
+# =============================================================================
+
+def publier(type_effet, **donnees):
+    """
+    Publie un effet différé (à appeler dans la transaction de l'action)
+
+    Args:
+        type_effet (str): Clé de EffetDiffere.TYPE_CHOICES
+        **donnees: Paramètres de l'effet (sérialisables en JSON)
+
+    Returns:
+        EffetDiffere: Effet enregistré
+    """
+    return EffetDiffere.objects.create(type_effet=type_effet, donnees=donnees)
+
+
+def publier_lot(effets):
+    """
+    Publie plusieurs effets en une insertion
+
+    Args:
+        effets (list): Tuples (type_effet, donnees)
+    """
+    EffetDiffere.objects.bulk_create([
+        EffetDiffere(type_effet=type_effet, donnees=donnees)
+        for type_effet, donnees in effets
+    ])
+
+
+def effet_panne(chauffeur_id, description, severite='moderee'):
+    """Tuple d'effet pour une panne signalée (à passer à publier_lot)"""
+    return 'panne_signalee', {
+        'chauffeur_id': chauffeur_id,
+        'description': description,
+        'severite': severite,
+    }
+
+
+# =============================================================================
+# TRAITEMENTS - Un appel par type d'effet et par lot
+# =============================================================================
+
+def _traiter_pannes(effets):
+    """Crée les pannes du lot puis un récapitulatif par superviseur"""
+    chauffeur_ids = {e.donnees['chauffeur_id'] for e in effets}
+    # Chauffeur supprimé entre-temps : la panne n'a plus lieu d'être
+    chauffeurs = Chauffeur.objects.in_bulk(chauffeur_ids)
+    pannes = [
+        Panne(
+            chauffeur_id=e.donnees['chauffeur_id'],
+            description=e.donnees['description'],
+            severite=e.donnees.get('severite', 'moderee'),
+            statut='signalee',
+            # bulk_create n'appelle pas save() : priorité calculée ici
+            priorite=Panne.calculer_priorite('signalee', e.donnees.get('severite', 'moderee')),
+        )
+        for e in effets if e.donnees['chauffeur_id'] in chauffeurs
+    ]
+    Panne.objects.bulk_create(pannes)
+    invalider_indicateurs({panne.chauffeur_id for panne in pannes})
+
+    lignes_par_superviseur = defaultdict(list)
+    assignations = AssignationSuperviseur.objects.filter(
+        chauffeur_id__in=chauffeurs, actif=True
+    ).values_list('superviseur_id', 'chauffeur_id')
+    for superviseur_id, chauffeur_id in assignations:
+        lignes_par_superviseur[superviseur_id].extend(
+            f"{chauffeurs[p.chauffeur_id].nom_complet} : {p.description}"
+            for p in pannes if p.chauffeur_id == chauffeur_id
+        )
+    publier_lot([
+        ('notification', {
+            'destinataire_id': superviseur_id,
+            'sujet': f"{len(lignes)} panne(s) signalée(s)",
+            'lignes': lignes,
+        })
+        for superviseur_id, lignes in lignes_par_superviseur.items()
+    ])
+
+
+def _envoyer_notifications(effets):
+    """Envoie un seul courriel récapitulatif par destinataire"""
+    par_destinataire = defaultdict(list)
+    for effet in effets:
+        par_destinataire[effet.donnees['destinataire_id']].append(effet.donnees)
+
+    courriels = []
+    for utilisateur in User.objects.filter(pk__in=par_destinataire).exclude(email=''):
+        notifications = par_destinataire[utilisateur.pk]
+        if len(notifications) == 1:
+            sujet = notifications[0]['sujet']
+        else:
+            sujet = f"{len(notifications)} notifications Gaboma Driver"
+        corps = '\n\n'.join(
+            '\n'.join([n['sujet']] + [f"- {ligne}" for ligne in n.get('lignes', [])])
+            for n in notifications
+        )
+        courriels.append((sujet, corps, settings.DEFAULT_FROM_EMAIL, [utilisateur.email]))
+
+    if courriels:
+        send_mass_mail(courriels, fail_silently=False)
+
+
+def _invalider_cache(effets):
+    """Supprime en un appel toutes les clés de cache du lot"""
+    cles = {cle for effet in effets for cle in effet.donnees.get('cles', [])}
+    if cles:
+        cache.delete_many(list(cles))
+
+
+TRAITEMENTS = {
+    'panne_signalee': _traiter_pannes,
+    'notification': _envoyer_notifications,
+    'invalidation_cache': _invalider_cache,
+}
+
+
+# =============================================================================
+# WORKER - Réservation et traitement des lots
+# =============================================================================
+
+def reserver_lot(taille_lot=None):
+    """
+    Réserve les plus anciens effets en attente pour ce worker
+
+    Args:
+        taille_lot (int): Nombre maximal d'effets (par défaut OUTBOX_TAILLE_LOT)
+
+    Returns:
+        list: Effets réservés, dans l'ordre de publication
+    """
+    taille_lot = taille_lot or settings.OUTBOX_TAILLE_LOT
+    maintenant = timezone.now()
+    libres = Q(statut='en_attente') & (
+        Q(verrou='') | Q(date_verrou__lt=maintenant - timedelta(seconds=settings.OUTBOX_DELAI_VERROU))
+    )
+    ids = list(EffetDiffere.objects.filter(libres).order_by('id').values_list('id', flat=True)[:taille_lot])
+    if not ids:
+        return []
+
+    # Réservation conditionnelle : un autre worker a pu prendre certains effets
+    jeton = uuid.uuid4().hex
+    EffetDiffere.objects.filter(libres, id__in=ids).update(verrou=jeton, date_verrou=maintenant)
+    return list(EffetDiffere.objects.filter(verrou=jeton, statut='en_attente').order_by('id'))
+
+
+def _traiter_groupe(type_effet, effets):
+    """Traite un groupe d'effets du même type et le marque traité (atomique)"""
+    with transaction.atomic():
+        TRAITEMENTS[type_effet](effets)
+        EffetDiffere.objects.filter(pk__in=[e.pk for e in effets]).update(
+            statut='traite', verrou='', date_traitement=timezone.now()
+        )
+
+
+def _signaler_echec(effet, erreur):
+    """
+    Enregistre l'échec d'un effet, abandonné après OUTBOX_TENTATIVES_MAX essais
+
+    Le verrou est conservé et daté : l'effet n'est retenté qu'après
+    OUTBOX_DELAI_VERROU secondes, pas dans le lot suivant.
+    """
+    logger.exception("Échec de l'effet différé %s", effet.pk)
+    abandon = effet.tentatives + 1 >= settings.OUTBOX_TENTATIVES_MAX
+    EffetDiffere.objects.filter(pk=effet.pk).update(
+        tentatives=F('tentatives') + 1,
+        erreur=str(erreur),
+        date_verrou=timezone.now(),
+        statut='echoue' if abandon else 'en_attente',
+        date_traitement=timezone.now() if abandon else None,
+    )
+
+
+def traiter_lot(effets):
+    """
+    Traite un lot réservé, regroupé par type d'effet
+
+    Args:
+        effets (list): Effets réservés par reserver_lot
+
+    Returns:
+        dict: {'traites': int, 'echecs': int}
+    """
+    groupes = defaultdict(list)
+    for effet in effets:
+        groupes[effet.type_effet].append(effet)
+
+    bilan = {'traites': 0, 'echecs': 0}
+    for type_effet, groupe in groupes.items():
+        try:
+            _traiter_groupe(type_effet, groupe)
+            bilan['traites'] += len(groupe)
+            continue
+        except Exception as e:
+            if len(groupe) == 1:
+                _signaler_echec(groupe[0], e)
+                bilan['echecs'] += 1
+                continue
+
+        # Échec du groupe : rejeu effet par effet pour isoler le fautif
+        for effet in groupe:
+            try:
+                _traiter_groupe(type_effet, [effet])
+                bilan['traites'] += 1
+            except Exception as e:
+                _signaler_echec(effet, e)
+                bilan['echecs'] += 1
+    return bilan
+
+
+def vider_outbox(taille_lot=None, max_lots=None):
+    """
+    Traite les effets en attente jusqu'à épuisement
+
+    Args:
+        taille_lot (int): Effets réservés par lot (par défaut OUTBOX_TAILLE_LOT)
+        max_lots (int): Nombre maximal de lots (illimité par défaut)
+
+    Returns:
+        dict: {'lots': int, 'traites': int, 'echecs': int}
+    """
+    bilan = {'lots': 0, 'traites': 0, 'echecs': 0}
+    while max_lots is None or bilan['lots'] < max_lots:
+        effets = reserver_lot(taille_lot)
+        if not effets:
+            break
+        resultat = traiter_lot(effets)
+        bilan['lots'] += 1
+        bilan['traites'] += resultat['traites']
+        bilan['echecs'] += resultat['echecs']
+    return bilan
@@ -0,0 +1,320 @@
+# =============================================================================
+# PURGES PAR LOTS - Suppressions massives sans verrou prolongé
+# =============================================================================
+"""
+Moteur de suppression par lots pour les purges massives
+
+Un .delete() sur un ensemble non borné garde le verrou d'écriture SQLite
+pendant toute la suppression : les chauffeurs ne peuvent plus enregistrer
+leurs prises et remises de clés. Ce module :
+- découpe chaque suppression en plages de clés primaires bornées
+  (au plus PURGE_TAILLE_LOT lignes), chacune dans une transaction courte
+- estime le coût d'une purge sans rien supprimer (dry-run)
+- exécute les purges en arrière-plan avec suivi dans OperationPurge
+
+Les plans de purge sont décrits par type (voir PLANS) : une liste d'étapes
+(modèle, filtres) exécutées dans l'ordre, puis une finalisation optionnelle
+pour les suppressions qui doivent se terminer par un objet précis
+(profil chauffeur et utilisateur pour une suppression de compte).
+"""
+
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from drivers.models import Chauffeur, AssignationSuperviseur
+
+from .indicateurs import invalider_indicateurs
+from .models import (
+    PriseCles, RemiseCles, Activite, Panne, Recette, DemandeModification,
+    PriseClesArchive, RemiseClesArchive, PanneArchive, OperationPurge, ClotureMois,
+    InstantaneMois, ClassementChauffeur,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# PLANS DE PURGE - Étapes par type d'opération
+# =============================================================================
+
+def _clotures_chauffeurs(**filtres):
+    """Clôtures mensuelles des mois où figurent les chauffeurs (sous-requête)"""
+    return InstantaneMois.objects.filter(**filtres).values('cloture_id')
+
+
+def _plan_activites(parametres):
+    """Prises et remises de clés (archives comprises) des chauffeurs donnés"""
+    filtres = {'chauffeur_id__in': parametres['chauffeur_ids']}
+    return [
+        (PriseCles, filtres),
+        (RemiseCles, filtres),
+        (PriseClesArchive, filtres),
+        (RemiseClesArchive, filtres),
+        (ClassementChauffeur, filtres),
+        # Mois clôturés où figurent ces chauffeurs : rouverts (instantanés en cascade)
+        (ClotureMois, {'pk__in': _clotures_chauffeurs(chauffeur_id__in=parametres['chauffeur_ids'])}),
+    ]
+
+
+def _plan_pannes(parametres):
+    """Pannes (archives comprises) des chauffeurs donnés"""
+    filtres = {'chauffeur_id__in': parametres['chauffeur_ids']}
+    return [
+        (Panne, filtres),
+        (PanneArchive, filtres),
+    ]
+
+
+def _plan_demandes(parametres):
+    """Demandes de modification des chauffeurs donnés"""
+    return [
+        (DemandeModification, {'chauffeur_id__in': parametres['chauffeur_ids']}),
+    ]
+
+
+def _plan_compte_chauffeur(parametres):
+    """Toutes les données rattachées à un chauffeur, avant son profil"""
+    filtres = {'chauffeur_id': parametres['chauffeur_id']}
+    return [
+        (PriseCles, filtres),
+        (RemiseCles, filtres),
+        (Panne, filtres),
+        (PanneArchive, filtres),
+        (PriseClesArchive, filtres),
+        (RemiseClesArchive, filtres),
+        (Recette, filtres),
+        (Activite, filtres),
+        (DemandeModification, filtres),
+        (AssignationSuperviseur, filtres),
+        (ClassementChauffeur, filtres),
+        (ClotureMois, {'pk__in': _clotures_chauffeurs(chauffeur_id=parametres['chauffeur_id'])}),
+    ]
+
+
+def _finaliser_compte_chauffeur(parametres):
+    """Supprime le profil chauffeur puis l'utilisateur (tables déjà vidées)"""
+    with transaction.atomic():
+        Chauffeur.objects.filter(pk=parametres['chauffeur_id']).delete()
+        if parametres.get('user_id'):
+            AssignationSuperviseur.objects.filter(assigne_par_id=parametres['user_id']).update(assigne_par=None)
+            User.objects.filter(pk=parametres['user_id']).delete()
+
+
+PLANS = {
+    'activites': _plan_activites,
+    'pannes': _plan_pannes,
+    'demandes': _plan_demandes,
+    'compte_chauffeur': _plan_compte_chauffeur,
+}
+
+FINALISATIONS = {
+    'compte_chauffeur': _finaliser_compte_chauffeur,
+}
+
+
+def plan_compte_chauffeur(chauffeur):
+    """
+    Étapes de purge des données d'un chauffeur (utilisé par delete_user_safely)
+
+    Args:
+        chauffeur (Chauffeur): Chauffeur dont les données sont purgées
+
+    Returns:
+        list: Étapes (modèle, filtres)
+    """
+    return _plan_compte_chauffeur({'chauffeur_id': chauffeur.pk})
+
+
+# =============================================================================
+# ESTIMATION ET EXÉCUTION
+# =============================================================================
+
+def estimer_etapes(etapes, taille_lot=None):
+    """
+    Estime le coût d'une purge sans rien supprimer (dry-run)
+
+    Args:
+        etapes (list): Étapes (modèle, filtres)
+        taille_lot (int): Lignes par transaction (par défaut PURGE_TAILLE_LOT)
+
+    Returns:
+        dict: {'etapes': [{'modele', 'lignes', 'lots'}], 'total': int, 'lots': int}
+    """
+    taille_lot = taille_lot or settings.PURGE_TAILLE_LOT
+    detail = []
+    for modele, filtres in etapes:
+        lignes = modele.objects.filter(**filtres).count()
+        detail.append({
+            'modele': modele._meta.verbose_name_plural,
+            'lignes': lignes,
+            'lots': math.ceil(lignes / taille_lot),
+        })
+    return {
+        'etapes': detail,
+        'total': sum(e['lignes'] for e in detail),
+        'lots': sum(e['lots'] for e in detail),
+    }
+
+
+def estimer_purge(type_purge, parametres, taille_lot=None):
+    """Estime le coût d'une purge d'un type donné (voir estimer_etapes)"""
+    return estimer_etapes(PLANS[type_purge](parametres), taille_lot)
+
+
+def purger_par_lots(queryset, taille_lot=None, pause=None, progression=None):
+    """
+    Supprime un queryset par plages de clés primaires bornées
+
+    Chaque lot lit au plus taille_lot clés primaires puis supprime la plage
+    [première, dernière] restreinte aux filtres du queryset, dans sa propre
+    transaction. Les suppressions en cascade restent gérées par Django,
+    mais sur un lot borné.
+
+    Args:
+        queryset (QuerySet): Lignes à supprimer
+        taille_lot (int): Lignes par transaction (par défaut PURGE_TAILLE_LOT)
+        pause (float): Pause en secondes entre deux lots (par défaut PURGE_PAUSE)
+        progression (callable): Appelée avec le nombre de lignes supprimées par lot
+
+    Returns:
+        int: Nombre de lignes du queryset supprimées
+    """
+    taille_lot = taille_lot or settings.PURGE_TAILLE_LOT
+    pause = settings.PURGE_PAUSE if pause is None else pause
+    queryset = queryset.order_by('pk')
+    label = queryset.model._meta.label
+
+    total = 0
+    while True:
+        with transaction.atomic():
+            pks = list(queryset.values_list('pk', flat=True)[:taille_lot])
+            if not pks:
+                break
+            _, detail = queryset.filter(pk__gte=pks[0], pk__lte=pks[-1]).delete()
+
+        supprimes = detail.get(label, 0)
+        total += supprimes
+        if progression:
+            progression(supprimes)
+        if pause:
+            time.sleep(pause)
+
+    return total
+
+
+def purger_etapes(etapes, taille_lot=None, pause=None, progression=None):
+    """
+    Exécute une liste d'étapes (modèle, filtres) dans l'ordre
+
+    Args:
+        etapes (list): Étapes (modèle, filtres)
+        progression (callable): Appelée avec (modèle, lignes supprimées du lot)
+
+    Returns:
+        int: Nombre total de lignes supprimées
+    """
+    total = 0
+    for modele, filtres in etapes:
+        rappel = None
+        if progression:
+            rappel = lambda n, modele=modele: progression(modele, n)
+        total += purger_par_lots(modele.objects.filter(**filtres), taille_lot, pause, rappel)
+    return total
+
+
+def executer_purge(operation, taille_lot=None, pause=None):
+    """
+    Exécute une opération de purge en mettant à jour sa progression
+
+    Une opération interrompue peut être relancée : les étapes déjà
+    vidées ne suppriment plus rien.
+
+    Args:
+        operation (OperationPurge): Opération à exécuter
+
+    Returns:
+        OperationPurge: Opération mise à jour (terminée ou échouée)
+    """
+    OperationPurge.objects.filter(pk=operation.pk).update(
+        statut='en_cours',
+        date_debut=operation.date_debut or timezone.now(),
+    )
+
+    def progression(modele, supprimes):
+        # Mise à jour atomique : la vue de statut lit la ligne en parallèle
+        OperationPurge.objects.filter(pk=operation.pk).update(
+            lignes_supprimees=F('lignes_supprimees') + supprimes,
+            etape_courante=modele._meta.verbose_name_plural,
+        )
+
+    try:
+        purger_etapes(PLANS[operation.type_purge](operation.parametres), taille_lot, pause, progression)
+        finalisation = FINALISATIONS.get(operation.type_purge)
+        if finalisation:
+            finalisation(operation.parametres)
+        OperationPurge.objects.filter(pk=operation.pk).update(
+            statut='terminee', etape_courante='', date_fin=timezone.now()
+        )
+    except Exception as e:
+        logger.exception("Échec de la purge %s", operation.pk)
+        OperationPurge.objects.filter(pk=operation.pk).update(
+            statut='echouee', erreur=str(e), date_fin=timezone.now()
+        )
+
+    # Purge terminée ou interrompue : des lignes ont pu disparaître
+    invalider_indicateurs()
+    operation.refresh_from_db()
+    return operation
+
+
+def _executer_en_arriere_plan(operation_id):
+    """Point d'entrée du thread de purge"""
+    try:
+        executer_purge(OperationPurge.objects.get(pk=operation_id))
+    finally:
+        # Le thread ouvre sa propre connexion : on la libère explicitement
+        connection.close()
+
+
+def lancer_purge(type_purge, parametres, demandeur=None):
+    """
+    Enregistre une purge et la lance en arrière-plan
+
+    Le thread démarre après la validation de la transaction en cours,
+    pour qu'il voie bien l'opération enregistrée.
+
+    Args:
+        type_purge (str): Clé de OperationPurge.TYPE_CHOICES
+        parametres (dict): Périmètre de la purge (sérialisable en JSON)
+        demandeur (User): Utilisateur qui lance la purge
+
+    Returns:
+        OperationPurge: Opération créée (en attente ou terminée si exécutée
+                        pendant la requête)
+    """
+    operation = OperationPurge.objects.create(
+        type_purge=type_purge,
+        parametres=parametres,
+        total_estime=estimer_purge(type_purge, parametres)['total'],
+        demandeur=demandeur,
+    )
+
+    if settings.PURGE_EN_ARRIERE_PLAN:
+        transaction.on_commit(lambda: threading.Thread(
+            target=_executer_en_arriere_plan,
+            args=(operation.pk,),
+            name=f'purge-{operation.pk}',
+            daemon=True,
+        ).start())
+    else:
+        executer_purge(operation)
+
+    return operation
@@ -0,0 +1,263 @@
+# =============================================================================
+# RECHERCHE - Index plein texte des pannes et problèmes mécaniques
+# =============================================================================
+"""
+Recherche plein texte dans les descriptions de pannes et les problèmes
+mécaniques signalés à la prise ou à la remise des clés
+
+Sous SQLite, une table virtuelle FTS5 (activities_recherche_problemes,
+créée par la migration 0012) indexe le texte des six tables concernées,
+archives comprises. Des déclencheurs SQL la tiennent à jour à chaque
+insertion, modification ou suppression, y compris par bulk_create,
+update() et le déplacement vers l'archive, qui n'envoient pas de signaux.
+
+Chaque ligne de l'index a pour rowid id * PAS + code de la source : la
+mise à jour d'une ligne est une recherche par clé, et la source d'un
+résultat se lit sans colonne supplémentaire. Les problèmes « Aucun » (valeur
+par défaut) ne sont pas indexés.
+
+Une recherche « frein pneu » devient la requête FTS5 "frein"* "pneu"* :
+tous les termes, en préfixe (freins, freinage...), sans accents ni
+casse, classés par pertinence (bm25). Sur un autre moteur de base de
+données, la recherche retombe sur des filtres icontains, sans classement.
+La commande reconstruire_recherche reconstruit l'index.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date
+
+from django.db import connection, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Panne, PanneArchive, PriseCles, PriseClesArchive, RemiseCles, RemiseClesArchive
+
+TABLE_INDEX = 'activities_recherche_problemes'
+
+# rowid de l'index = id de la ligne * PAS + code de la source
+PAS = 8
+
+# Marqueurs des termes trouvés dans les extraits (remplacés par <mark>)
+DEBUT_MARQUE, FIN_MARQUE = '\x02', '\x03'
+
+
+@dataclass(frozen=True)
+class Source:
+    """Table dont une colonne de texte est indexée"""
+    code: int
+    type: str
+    archive: bool
+    modele: type
+    champ_texte: str
+    champ_jour: str
+
+
+SOURCES = [
+    Source(0, 'panne', False, Panne, 'description', 'date_creation'),
+    Source(1, 'panne', True, PanneArchive, 'description', 'date_creation'),
+    Source(2, 'prise', False, PriseCles, 'probleme_mecanique', 'date'),
+    Source(3, 'prise', True, PriseClesArchive, 'probleme_mecanique', 'date'),
+    Source(4, 'remise', False, RemiseCles, 'probleme_mecanique', 'date'),
+    Source(5, 'remise', True, RemiseClesArchive, 'probleme_mecanique', 'date'),
+]
+
+TYPES = ('panne', 'prise', 'remise')
+
+PAR_CODE = {source.code: source for source in SOURCES}
+
+
+def index_disponible():
+    """L'index FTS5 n'existe que sous SQLite"""
+    return connection.vendor == 'sqlite'
+
+
+def expression_fts(texte):
+    """
+    Traduit une saisie libre en requête FTS5 : tous les termes, en préfixe
+
+    Seuls les mots (lettres et chiffres) sont gardés : la syntaxe FTS5
+    (guillemets, opérateurs, colonnes) ne peut pas être injectée.
+
+    Returns:
+        str: Requête FTS5 ('' si la saisie ne contient aucun mot)
+    """
+    return ' '.join(f'"{terme}"*' for terme in re.findall(r'\w+', texte))
+
+
+def _extrait(texte):
+    """Extrait échappé, termes trouvés entre balises <mark>"""
+    html = escape(texte).replace(DEBUT_MARQUE, '<mark>').replace(FIN_MARQUE, '</mark>')
+    return mark_safe(html)
+
+
+def _resultat(source, ligne_id, chauffeur_id, jour, extrait):
+    return {
+        'type': source.type,
+        'archive': source.archive,
+        'id': ligne_id,
+        'chauffeur_id': chauffeur_id,
+        'date': jour,
+        'extrait': extrait,
+    }
+
+
+# =============================================================================
+# RECHERCHE
+# =============================================================================
+
+def rechercher_problemes(texte, chauffeurs=None, types=None, limite=50):
+    """
+    Pannes et problèmes mécaniques contenant tous les termes saisis
+
+    Args:
+        texte (str): Saisie libre (ex. "frein arrière")
+        chauffeurs (QuerySet): Périmètre (None = toute la flotte)
+        types (iterable): Parmi 'panne', 'prise', 'remise' (None = tous)
+        limite (int): Nombre maximal de résultats
+
+    Returns:
+        list: Dicts type, archive, id, chauffeur_id, date, extrait (HTML sûr),
+              du plus pertinent au moins pertinent
+    """
+    expression = expression_fts(texte)
+    if not expression:
+        return []
+    codes = [source.code for source in SOURCES if types is None or source.type in types]
+    if not index_disponible():
+        return _rechercher_sans_index(texte, chauffeurs, codes, limite)
+
+    sql = (
+        f"SELECT rowid, chauffeur_id, jour, snippet({TABLE_INDEX}, 0, %s, %s, '…', 16) "
+        f"FROM {TABLE_INDEX} WHERE {TABLE_INDEX} MATCH %s"
+    )
+    params = [DEBUT_MARQUE, FIN_MARQUE, expression]
+    if len(codes) < len(SOURCES):
+        sql += f" AND rowid %% {PAS} IN ({', '.join(['%s'] * len(codes))})"
+        params += codes
+    if chauffeurs is not None:
+        sous_requete, sous_params = chauffeurs.values('pk').query.sql_with_params()
+        sql += f" AND chauffeur_id IN ({sous_requete})"
+        params += sous_params
+    sql += " ORDER BY rank LIMIT %s"
+    params.append(limite)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        lignes = cursor.fetchall()
+    return [
+        _resultat(PAR_CODE[rowid % PAS], rowid // PAS, chauffeur_id, date.fromisoformat(jour), _extrait(extrait))
+        for rowid, chauffeur_id, jour, extrait in lignes
+    ]
+
+
+def _rechercher_sans_index(texte, chauffeurs, codes, limite):
+    """Repli hors SQLite : tous les termes en icontains, plus récents d'abord"""
+    termes = re.findall(r'\w+', texte)
+    resultats = []
+    for code in codes:
+        source = PAR_CODE[code]
+        lignes = source.modele.objects.all()
+        for terme in termes:
+            lignes = lignes.filter(**{f'{source.champ_texte}__icontains': terme})
+        if chauffeurs is not None:
+            lignes = lignes.filter(chauffeur__in=chauffeurs)
+        lignes = lignes.order_by(f'-{source.champ_jour}').values_list(
+            'pk', 'chauffeur_id', source.champ_jour, source.champ_texte
+        )[:limite]
+        for pk, chauffeur_id, jour, contenu in lignes:
+            jour = jour.date() if hasattr(jour, 'date') else jour
+            resultats.append(_resultat(source, pk, chauffeur_id, jour, escape(contenu)))
+    resultats.sort(key=lambda resultat: resultat['date'], reverse=True)
+    return resultats[:limite]
+
+
+# =============================================================================
+# DÉCLENCHEURS ET RECONSTRUCTION
+# =============================================================================
+
+def _colonnes(source):
+    """(table, colonne de texte, colonne de date) d'une source"""
+    meta = source.modele._meta
+    return meta.db_table, meta.get_field(source.champ_texte).column, meta.get_field(source.champ_jour).column
+
+
+def declencheurs_sql(source):
+    """
+    Déclencheurs qui tiennent l'index à jour pour une source
+
+    Une migration qui reconstruit la table (ajout de colonne sous SQLite)
+    les supprime : elle doit les recréer (voir la migration 0013), et
+    reconstruire_index() les recrée tous.
+
+    Returns:
+        list: Requêtes CREATE TRIGGER (insertion, suppression, modification)
+    """
+    table, texte, jour = _colonnes(source)
+    ligne = f"NEW.id * {PAS} + {source.code}, NEW.{texte}, NEW.chauffeur_id, date(NEW.{jour})"
+    condition = f"lower(trim(NEW.{texte})) NOT IN ('', 'aucun')"
+    return [
+        f"""CREATE TRIGGER {table}_recherche_ai AFTER INSERT ON {table} WHEN {condition} BEGIN
+            INSERT INTO {TABLE_INDEX} (rowid, texte, chauffeur_id, jour) VALUES ({ligne});
+        END""",
+        f"""CREATE TRIGGER {table}_recherche_ad AFTER DELETE ON {table} BEGIN
+            DELETE FROM {TABLE_INDEX} WHERE rowid = OLD.id * {PAS} + {source.code};
+        END""",
+        f"""CREATE TRIGGER {table}_recherche_au AFTER UPDATE OF {texte}, chauffeur_id, {jour} ON {table} BEGIN
+            DELETE FROM {TABLE_INDEX} WHERE rowid = OLD.id * {PAS} + {source.code};
+            INSERT INTO {TABLE_INDEX} (rowid, texte, chauffeur_id, jour) SELECT {ligne} WHERE {condition};
+        END""",
+    ]
+
+
+def declencheurs_manquants():
+    """
+    Déclencheurs de l'index absents de la base (3 par source, 18 en tout)
+
+    Une migration qui reconstruit une table source sans les recréer les
+    perd sans erreur : les nouvelles lignes ne sont plus trouvées.
+
+    Returns:
+        list: Noms des déclencheurs manquants ([] hors SQLite ou avant
+              la migration 0012)
+    """
+    if not index_disponible():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        presents = {nom for nom, in cursor.fetchall()}
+    if TABLE_INDEX not in presents:
+        return []
+    attendus = [
+        f"{_colonnes(source)[0]}_recherche_{suffixe}" for source in SOURCES for suffixe in ('ai', 'ad', 'au')
+    ]
+    return [nom for nom in attendus if nom not in presents]
+
+
+def reconstruire_index():
+    """
+    Recrée les déclencheurs, vide puis remplit l'index à partir des six
+    tables, puis le compacte
+
+    Returns:
+        int: Nombre de lignes indexées (0 hors SQLite, sans index)
+    """
+    if not index_disponible():
+        return 0
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE_INDEX}")
+        for source in SOURCES:
+            table, texte, jour = _colonnes(source)
+            for suffixe in ('ai', 'ad', 'au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {table}_recherche_{suffixe}")
+            for sql in declencheurs_sql(source):
+                cursor.execute(sql)
+            cursor.execute(
+                f"INSERT INTO {TABLE_INDEX} (rowid, texte, chauffeur_id, jour) "
+                f"SELECT id * {PAS} + {source.code}, {texte}, chauffeur_id, date({jour}) FROM {table} "
+                f"WHERE lower(trim({texte})) NOT IN ('', 'aucun')"
+            )
+            total += cursor.rowcount
+        cursor.execute(f"INSERT INTO {TABLE_INDEX} ({TABLE_INDEX}) VALUES ('optimize')")
+    return total
@@ -0,0 +1,284 @@
+# =============================================================================
+# SAISIE DES CLÉS - Écriture transactionnelle et idempotente des journées
+# =============================================================================
+"""
+Service d'écriture des prises et remises de clés
+
+Point d'entrée unique des formulaires (drivers:prendre_cles,
+drivers:remettre_cles) et de la synchronisation hors ligne
+(activities.synchronisation). Chaque saisie :
+- s'exécute dans une transaction courte (point de sauvegarde par saisie)
+- insère directement et détecte un doublon par la contrainte
+  unique (chauffeur, date), sans lecture préalable .exists()
+- peut porter une clé d'idempotence générée par le client : un renvoi de la
+  même clé (double appui, réseau lent) retourne le résultat d'origine
+- diffère les effets secondaires : traces d'événements écrites par
+  bulk_create et pannes signalées publiées dans l'outbox
+  (activities.outbox) en fin d'unité de travail, dans la même transaction ;
+  les indicateurs en cache (activities.indicateurs) sont périmés une fois
+  et un mois passé déjà clôturé est rouvert (activities.cloture) ;
+  les remises sont ajoutées au classement (activities.classement)
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+
+from .classement import ajouter_remises
+from .cloture import rouvrir_mois
+from .indicateurs import invalider_indicateurs
+from .models import PriseCles, RemiseCles, EvenementCles
+from .outbox import publier_lot, effet_panne
+
+# Plus grand montant accepté (limite d'un IntegerField)
+MONTANT_MAX = 2147483647
+
+
+class SaisieRefusee(ValueError):
+    """Saisie refusée : le message est affiché tel quel au chauffeur"""
+
+    niveau = 'danger'
+
+
+class SaisieEnDouble(SaisieRefusee):
+    """Journée déjà enregistrée (contrainte unique chauffeur/date)"""
+
+    niveau = 'warning'
+
+
+def lire_montant(valeur):
+    """
+    Montant entier en FCFA saisi, synchronisé ou importé
+
+    Commun aux formulaires de clés, à la synchronisation hors ligne et à
+    l'import de l'historique. Accepte "50000", "50 000", "50000.0" ou un
+    nombre (cellule XLSX) ; la partie décimale est tronquée. Les valeurs non
+    finies (inf, nan) ou hors de la plage d'un IntegerField (1e999) sont
+    refusées au lieu de lever OverflowError à la conversion ou à l'écriture.
+
+    Raises:
+        ValueError: Montant illisible, non fini ou trop grand
+
+    Returns:
+        int: Montant (éventuellement négatif : le signe est vérifié par l'appelant)
+    """
+    texte = '' if valeur is None else str(valeur).strip().replace(' ', '')
+    try:
+        montant = Decimal(texte)
+    except InvalidOperation:
+        raise ValueError(f"Montant illisible : {texte!r}")
+    if not montant.is_finite() or abs(montant) > MONTANT_MAX:
+        raise ValueError(f"Montant hors limites : {texte!r}")
+    return int(montant)
+
+
+@dataclass
+class ResultatSaisie:
+    """Résultat d'une saisie : statut 'applique', 'doublon' ou 'rejete'"""
+
+    statut: str
+    niveau: str
+    message: str
+    type_evenement: str = ''
+    cle: str = ''
+
+
+class SaisieCles:
+    """
+    Unité de travail : saisies de clés d'un chauffeur dans une transaction
+
+    S'utilise à l'intérieur d'un transaction.atomic() ; terminer() écrit
+    les effets différés de toutes les saisies en une fois.
+    """
+
+    def __init__(self, chauffeur):
+        self.chauffeur = chauffeur
+        self.pannes = []
+        self.evenements = []
+        self.cles_recues = {}
+        self.jours_modifies = set()
+        self.remises = []
+
+    def precharger(self, cles):
+        """Charge en une requête les événements déjà reçus pour ces clés"""
+        for evenement in EvenementCles.objects.filter(cle__in=[c for c in cles if c]):
+            self.cles_recues[evenement.cle] = evenement
+
+    # =========================================================================
+    # SAISIES
+    # =========================================================================
+
+    def prise(self, jour, heure, objectif_recette, plein_carburant, probleme_mecanique, signature, cle=''):
+        """
+        Enregistre une prise de clés
+
+        Args:
+            jour (date), heure (time): Moment de la prise
+            objectif_recette (int): Objectif du jour, déjà validé
+            plein_carburant (bool), probleme_mecanique (str), signature (str)
+            cle (str): Clé d'idempotence du client (optionnelle)
+
+        Returns:
+            ResultatSaisie: Résultat à afficher au chauffeur
+        """
+        def inserer():
+            self._inserer(PriseCles(
+                chauffeur=self.chauffeur,
+                date=jour,
+                heure_prise=heure,
+                objectif_recette=objectif_recette,
+                plein_carburant=plein_carburant,
+                probleme_mecanique=probleme_mecanique,
+                signature=signature,
+            ), f"Clés déjà prises le {jour:%d/%m/%Y}.")
+            return 'success', '✅ La journée peut commencer, bonne route !'
+
+        return self._executer('prise', jour, cle, signature, probleme_mecanique, inserer)
+
+    def remise(self, jour, heure, recette_realisee, plein_carburant, probleme_mecanique, signature, cle=''):
+        """
+        Enregistre une remise de clés (la prise du jour doit exister)
+
+        Args:
+            jour (date), heure (time): Moment de la remise
+            recette_realisee (int): Recette du jour, déjà validée
+            plein_carburant (bool), probleme_mecanique (str), signature (str)
+            cle (str): Clé d'idempotence du client (optionnelle)
+
+        Returns:
+            ResultatSaisie: Résultat à afficher au chauffeur (message de performance)
+        """
+        def inserer():
+            prise = PriseCles.objects.filter(
+                chauffeur=self.chauffeur, date=jour
+            ).only('objectif_recette').first()
+            if prise is None:
+                raise SaisieRefusee(f"Aucune prise de clés le {jour:%d/%m/%Y}.")
+            remise = self._inserer(RemiseCles(
+                chauffeur=self.chauffeur,
+                date=jour,
+                heure_remise=heure,
+                recette_realisee=recette_realisee,
+                plein_carburant=plein_carburant,
+                probleme_mecanique=probleme_mecanique,
+                signature=signature,
+            ), f"Clés déjà remises le {jour:%d/%m/%Y}.")
+            self.remises.append((self.chauffeur.pk, jour, recette_realisee, prise.objectif_recette))
+            return remise.get_objectif_atteint(prise)
+
+        return self._executer('remise', jour, cle, signature, probleme_mecanique, inserer)
+
+    # =========================================================================
+    # MÉCANIQUE COMMUNE
+    # =========================================================================
+
+    @staticmethod
+    def _inserer(objet, message_doublon):
+        """Insère directement ; la contrainte unique signale le doublon"""
+        try:
+            with transaction.atomic():
+                objet.save(force_insert=True)
+        except IntegrityError:
+            raise SaisieEnDouble(message_doublon)
+        return objet
+
+    def resultat_precedent(self, cle, type_evenement=''):
+        """
+        Résultat d'origine si la clé d'idempotence a déjà été reçue
+
+        Returns:
+            ResultatSaisie | None: Doublon (ou rejet si la clé appartient à un
+                                   autre chauffeur), None pour une clé nouvelle
+        """
+        if cle not in self.cles_recues:
+            self.precharger([cle])
+        precedent = self.cles_recues.get(cle)
+        if precedent is None:
+            return None
+        if precedent.chauffeur_id != self.chauffeur.pk:
+            return ResultatSaisie('rejete', 'danger', "Clé d'idempotence déjà utilisée.", type_evenement, cle)
+        niveau = 'danger' if precedent.statut == 'rejete' else 'info'
+        return ResultatSaisie('doublon', niveau, precedent.message, precedent.type_evenement, cle)
+
+    def rejeter(self, type_evenement, cle, message, niveau='danger'):
+        """Enregistre le refus d'une saisie (tracé si elle porte une clé)"""
+        self._tracer(type_evenement, cle, 'rejete', message)
+        return ResultatSaisie('rejete', niveau, message, type_evenement, cle)
+
+    def _tracer(self, type_evenement, cle, statut, message):
+        if not cle:
+            return
+        evenement = EvenementCles(
+            cle=cle,
+            chauffeur=self.chauffeur,
+            type_evenement=type_evenement,
+            statut=statut,
+            message=message[:255],
+        )
+        self.evenements.append(evenement)
+        self.cles_recues[cle] = evenement
+
+    def _executer(self, type_evenement, jour, cle, signature, probleme_mecanique, inserer):
+        if cle:
+            precedent = self.resultat_precedent(cle, type_evenement)
+            if precedent is not None:
+                return precedent
+
+        try:
+            if not signature:
+                raise SaisieRefusee("La signature est obligatoire.")
+            # L'insertion a son propre point de sauvegarde (voir _inserer) :
+            # un refus n'annule pas les autres saisies de la transaction
+            niveau, message = inserer()
+        except SaisieRefusee as e:
+            return self.rejeter(type_evenement, cle, str(e), e.niveau)
+
+        if probleme_mecanique and probleme_mecanique != 'Aucun':
+            self.pannes.append(effet_panne(self.chauffeur.pk, probleme_mecanique))
+        self._tracer(type_evenement, cle, 'applique', message)
+        self.jours_modifies.add(jour)
+        return ResultatSaisie('applique', niveau, message, type_evenement, cle)
+
+    def terminer(self):
+        """Écrit les traces, publie les pannes, met à jour le classement et périme les indicateurs en cache"""
+        publier_lot(self.pannes)
+        EvenementCles.objects.bulk_create(self.evenements)
+        ajouter_remises(self.remises)
+        if self.jours_modifies:
+            # Saisie hors ligne d'un mois passé et clôturé : le mois est rouvert
+            rouvrir_mois(self.jours_modifies)
+            invalider_indicateurs(activites=[(self.chauffeur.pk, jour) for jour in self.jours_modifies])
+        self.pannes = []
+        self.evenements = []
+        self.jours_modifies = set()
+        self.remises = []
+
+
+def enregistrer_saisie(chauffeur, type_evenement, cle='', **champs):
+    """
+    Enregistre une prise ou une remise de clés dans sa propre transaction
+
+    Si la même clé d'idempotence est enregistrée en parallèle (double
+    envoi simultané), la transaction est relue une fois : la saisie est
+    alors signalée comme doublon.
+
+    Args:
+        chauffeur (Chauffeur): Chauffeur connecté
+        type_evenement (str): 'prise' ou 'remise'
+        cle (str): Clé d'idempotence du client (optionnelle)
+        **champs: Arguments de SaisieCles.prise ou SaisieCles.remise
+
+    Returns:
+        ResultatSaisie: Résultat à afficher au chauffeur
+    """
+    for tentative in range(2):
+        try:
+            with transaction.atomic():
+                saisie = SaisieCles(chauffeur)
+                resultat = getattr(saisie, type_evenement)(cle=cle, **champs)
+                saisie.terminer()
+            return resultat
+        except IntegrityError:
+            if tentative or not cle:
+                raise
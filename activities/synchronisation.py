@@ -0,0 +1,196 @@
+# =============================================================================
+# SYNCHRONISATION HORS LIGNE - Application des événements de clés par lots
+# =============================================================================
+"""
+Application des prises et remises de clés mises en file sur le téléphone
+
+Le client chauffeur (static/js/cles-hors-ligne.js) enregistre chaque
+prise ou remise de clés localement avec une clé d'idempotence, puis envoie
+la file par lots à drivers:synchroniser_cles dès que le réseau le permet.
+
+Un lot est appliqué dans une seule transaction par le service de saisie
+(activities.saisie_cles) ; chaque événement dispose de son propre point de
+sauvegarde, de sorte qu'un événement rejeté n'annule pas les autres. Les
+clés déjà reçues ne sont jamais rejouées.
+
+Format d'un événement :
+    {
+        "cle": "uuid généré par le client",
+        "type": "prise" | "remise",
+        "date": "AAAA-MM-JJ",
+        "heure": "HH:MM[:SS]",
+        "objectif_recette": 50000,        # prise
+        "recette_realisee": 42000,        # remise
+        "plein_carburant": true,
+        "probleme_mecanique": "Aucun",
+        "signature": "..."
+    }
+"""
+
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .saisie_cles import SaisieCles, lire_montant
+
+
+class EvenementInvalide(ValueError):
+    """Événement refusé : le message est renvoyé tel quel au chauffeur"""
+
+
+# =============================================================================
+# VALIDATION DES CHAMPS
+# =============================================================================
+
+def _lire_date(valeur):
+    """Date de l'événement, bornée à SYNC_JOURS_MAX jours dans le passé"""
+    try:
+        jour = date.fromisoformat(str(valeur))
+    except (TypeError, ValueError):
+        raise EvenementInvalide("Date de l'événement invalide.")
+
+    aujourd_hui = date.today()
+    if jour > aujourd_hui:
+        raise EvenementInvalide("La date de l'événement est dans le futur.")
+    if jour < aujourd_hui - timedelta(days=settings.SYNC_JOURS_MAX):
+        raise EvenementInvalide("Événement trop ancien : contactez votre superviseur.")
+    return jour
+
+
+def _lire_heure(valeur):
+    """Heure saisie sur le téléphone (heure du serveur si absente)"""
+    if not valeur:
+        return timezone.now().time()
+    for format_heure in ('%H:%M:%S', '%H:%M'):
+        try:
+            return datetime.strptime(str(valeur), format_heure).time()
+        except ValueError:
+            continue
+    raise EvenementInvalide("Heure de l'événement invalide.")
+
+
+def _lire_montant(valeur, libelle, strictement_positif):
+    """Montant entier en FCFA"""
+    try:
+        montant = lire_montant(valeur)
+    except ValueError:
+        raise EvenementInvalide(f"{libelle} doit être un nombre entier.")
+    if montant < 0 or (strictement_positif and montant == 0):
+        raise EvenementInvalide(f"{libelle} doit être un nombre entier positif.")
+    return montant
+
+
+# =============================================================================
+# APPLICATION DES ÉVÉNEMENTS
+# =============================================================================
+
+def _appliquer_prise(saisie, cle, donnees):
+    """Valide puis enregistre une prise de clés (voir SaisieCles.prise)"""
+    return saisie.prise(
+        jour=_lire_date(donnees.get('date')),
+        heure=_lire_heure(donnees.get('heure')),
+        objectif_recette=_lire_montant(donnees.get('objectif_recette'), "L'objectif de recette", True),
+        plein_carburant=bool(donnees.get('plein_carburant')),
+        probleme_mecanique=str(donnees.get('probleme_mecanique') or 'Aucun')[:200],
+        signature=str(donnees.get('signature') or '').strip(),
+        cle=cle,
+    )
+
+
+def _appliquer_remise(saisie, cle, donnees):
+    """Valide puis enregistre une remise de clés (voir SaisieCles.remise)"""
+    return saisie.remise(
+        jour=_lire_date(donnees.get('date')),
+        heure=_lire_heure(donnees.get('heure')),
+        recette_realisee=_lire_montant(donnees.get('recette_realisee'), "La recette réalisée", False),
+        plein_carburant=bool(donnees.get('plein_carburant')),
+        probleme_mecanique=str(donnees.get('probleme_mecanique') or 'Aucun')[:200],
+        signature=str(donnees.get('signature') or '').strip(),
+        cle=cle,
+    )
+
+
+APPLICATIONS = {
+    'prise': _appliquer_prise,
+    'remise': _appliquer_remise,
+}
+
+
+def _resultat(cle, statut, message, type_evenement='', niveau=None):
+    """Entrée de la réponse JSON pour un événement"""
+    if niveau is None:
+        niveau = 'danger' if statut == 'rejete' else 'info'
+    return {'cle': cle, 'type': type_evenement, 'statut': statut, 'niveau': niveau, 'message': message}
+
+
+def _appliquer_lot(chauffeur, evenements):
+    """Applique un lot dans une transaction (voir appliquer_evenements)"""
+    resultats = []
+
+    with transaction.atomic():
+        saisie = SaisieCles(chauffeur)
+        saisie.precharger(str(e.get('cle') or '') for e in evenements if isinstance(e, dict))
+
+        for donnees in evenements:
+            if not isinstance(donnees, dict):
+                resultats.append(_resultat('', 'rejete', "Événement illisible."))
+                continue
+
+            cle = str(donnees.get('cle') or '')
+            type_evenement = donnees.get('type')
+            if not isinstance(type_evenement, str):
+                type_evenement = ''
+
+            if not cle or len(cle) > 64:
+                resultats.append(_resultat(cle, 'rejete', "Clé d'idempotence manquante ou invalide.", type_evenement))
+                continue
+
+            if type_evenement not in APPLICATIONS:
+                resultats.append(_resultat(cle, 'rejete', "Type d'événement inconnu.", type_evenement))
+                continue
+
+            # Événement déjà reçu : on renvoie le résultat d'origine, sans revalider
+            resultat = saisie.resultat_precedent(cle, type_evenement)
+            if resultat is not None:
+                resultats.append(_resultat(cle, resultat.statut, resultat.message, resultat.type_evenement))
+                continue
+
+            try:
+                resultat = APPLICATIONS[type_evenement](saisie, cle, donnees)
+            except EvenementInvalide as e:
+                # Champ invalide : rejet enregistré comme pour un refus métier
+                resultat = saisie.rejeter(type_evenement, cle, str(e))
+            resultats.append(_resultat(
+                cle, resultat.statut, resultat.message, resultat.type_evenement, resultat.niveau
+            ))
+
+        # Traces du lot et pannes signalées (outbox) écrites en une fois
+        saisie.terminer()
+
+    return resultats
+
+
+def appliquer_evenements(chauffeur, evenements):
+    """
+    Applique un lot d'événements de clés envoyés par le client hors ligne
+
+    Les événements sont traités dans l'ordre reçu (une prise avant la
+    remise du même jour). Si un autre envoi du même lot a été enregistré
+    entre-temps (conflit sur une clé d'idempotence), le lot est relu une
+    fois : les événements concernés sont alors signalés comme doublons.
+
+    Args:
+        chauffeur (Chauffeur): Chauffeur connecté
+        evenements (list): Événements décodés depuis le JSON
+
+    Returns:
+        list: Un résultat par événement {'cle', 'type', 'statut', 'niveau', 'message'}
+              avec statut 'applique', 'doublon' ou 'rejete'
+    """
+    try:
+        return _appliquer_lot(chauffeur, evenements)
+    except IntegrityError:
+        # Envoi concurrent du même lot : la relecture voit les clés enregistrées
+        return _appliquer_lot(chauffeur, evenements)
@@ -0,0 +1,579 @@
+# =============================================================================
+# TESTS DE L'APPLICATION ACTIVITIES
+# =============================================================================
+
+import gzip
+import importlib.util
+import io
+import json
+import tempfile
+from datetime import date, time, timedelta
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.checks import run_checks
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from drivers.models import AssignationSuperviseur, Chauffeur
+
+from .admin import PaginateurEstime
+from .calendrier import grille_mois
+from .classement import CRITERES as CRITERES_CLASSEMENT, FENETRES as FENETRES_CLASSEMENT
+from .classement import meilleurs_chauffeurs, rang_chauffeur, reconstruire_classement
+from .cloture import agreger_avec_clotures, clotures_periode, cloturer_mois, rouvrir_mois
+from .archive import agreger_periode, archiver_mois, exporter_mois, lignes_periode, somme_periode
+from .importation import FichierInvalide, importer_fichier
+from .recherche import declencheurs_manquants, rechercher_problemes
+from .outbox import effet_panne, publier, publier_lot, reserver_lot, traiter_lot, vider_outbox
+from .models import (
+    ClotureMois, EffetDiffere, EvenementCles, Panne, PriseCles, PriseClesArchive, RemiseCles, RemiseClesArchive,
+    SignatureElectronique,
+)
+from .saisie_cles import lire_montant
+from .synchronisation import appliquer_evenements
+
+
+def creer_chauffeur(nom='Moussavou', telephone='+24106000001'):
+    """Chauffeur actif et son compte utilisateur"""
+    user = User.objects.create_user(username=nom.lower(), password='secret')
+    return Chauffeur.objects.create(user=user, nom=nom, prenom='Jean', telephone=telephone)
+
+
+def creer_journee(chauffeur, jour, objectif=50000, recette=52000, probleme='Aucun'):
+    """Prise et remise des clés d'une journée"""
+    prise = PriseCles.objects.create(
+        chauffeur=chauffeur, date=jour, heure_prise=time(7, 30),
+        objectif_recette=objectif, probleme_mecanique=probleme, signature=chauffeur.nom,
+    )
+    remise = RemiseCles.objects.create(
+        chauffeur=chauffeur, date=jour, heure_remise=time(19, 0),
+        recette_realisee=recette, signature=chauffeur.nom,
+    )
+    return prise, remise
+
+
+class TestCaseCache(TestCase):
+    """
+    Cache partagé dans un dossier temporaire, vidé avant chaque test (il
+    survit au rollback de la base) ; statiques servis sous leur nom
+    d'origine, sans collectstatic préalable
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        dossier = tempfile.TemporaryDirectory(prefix='gaboma-cache-')
+        cls.addClassCleanup(dossier.cleanup)
+        reglages = override_settings(
+            CACHES={'default': {**settings.CACHES['default'], 'LOCATION': dossier.name}},
+            STORAGES={
+                **settings.STORAGES,
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        reglages.enable()
+        cls.addClassCleanup(reglages.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        cache.clear()
+
+
+# =============================================================================
+# SIGNATURES ÉLECTRONIQUES (SignatureStockeeMixin)
+# =============================================================================
+
+class SignaturesTests(TestCaseCache):
+
+    def test_signature_identique_stockee_une_fois(self):
+        chauffeur = creer_chauffeur()
+        creer_journee(chauffeur, date(2024, 1, 3))
+        creer_journee(chauffeur, date(2024, 1, 4))
+
+        self.assertEqual(SignatureElectronique.objects.count(), 1)
+        empreinte = SignatureElectronique.calculer_empreinte('Moussavou')
+        self.assertEqual(
+            set(PriseCles.objects.values_list('signature_electronique_id', flat=True)), {empreinte}
+        )
+        self.assertEqual(
+            set(RemiseCles.objects.values_list('signature_electronique_id', flat=True)), {empreinte}
+        )
+
+    def test_signature_relue_avec_defer_et_only(self):
+        chauffeur = creer_chauffeur()
+        prise, _ = creer_journee(chauffeur, date(2024, 1, 3))
+
+        self.assertEqual(PriseCles.objects.defer('signature_electronique').get(pk=prise.pk).signature, 'Moussavou')
+        self.assertEqual(PriseCles.objects.only('date').get(pk=prise.pk).signature, 'Moussavou')
+
+        # Modification sur une instance partielle : nouvelle empreinte, ancienne conservée
+        partielle = PriseCles.objects.only('date').get(pk=prise.pk)
+        partielle.signature = 'J. Moussavou'
+        partielle.save()
+        relue = PriseCles.objects.get(pk=prise.pk)
+        self.assertEqual(relue.signature, 'J. Moussavou')
+        self.assertTrue(relue.signature_valide())
+        self.assertEqual(SignatureElectronique.objects.count(), 2)
+
+
+# =============================================================================
+# ARCHIVAGE (activities/archive.py)
+# =============================================================================
+
+class ArchivageTests(TestCaseCache):
+
+    def setUp(self):
+        super().setUp()
+        self.chauffeur = creer_chauffeur()
+        for jour in (3, 4, 5):
+            creer_journee(self.chauffeur, date(2024, 1, jour), recette=40000 + jour)
+        creer_journee(self.chauffeur, date(2024, 2, 1), recette=60000)
+
+    def test_aller_retour_archive(self):
+        avant = [
+            (r.date, r.heure_remise, r.recette_realisee, r.signature)
+            for r in lignes_periode(RemiseCles, date(2024, 1, 1), date(2024, 2, 29), ordre=['date'])
+        ]
+
+        self.assertEqual(archiver_mois(PriseCles, 2024, 1, taille_lot=2), 3)
+        self.assertEqual(archiver_mois(RemiseCles, 2024, 1, taille_lot=2), 3)
+
+        # Le mois quitte la table chaude avec ses identifiants, le suivant reste
+        self.assertEqual(RemiseCles.objects.filter(date__month=1).count(), 0)
+        self.assertEqual(RemiseClesArchive.objects.count(), 3)
+        self.assertEqual(PriseClesArchive.objects.count(), 3)
+        self.assertEqual(RemiseCles.objects.count(), 1)
+
+        # Lecture unifiée : mêmes lignes, même ordre, mêmes signatures
+        apres = [
+            (r.date, r.heure_remise, r.recette_realisee, r.signature)
+            for r in lignes_periode(RemiseCles, date(2024, 1, 1), date(2024, 2, 29), ordre=['date'])
+        ]
+        self.assertEqual(apres, avant)
+        self.assertEqual(somme_periode(RemiseCles, 'recette_realisee', date(2024, 1, 1)), 40003 + 40004 + 40005 + 60000)
+        self.assertTrue(all(r.signature_valide() for r in RemiseClesArchive.objects.all()))
+
+    def test_export_froid_autonome(self):
+        archiver_mois(RemiseCles, 2024, 1)
+        with tempfile.TemporaryDirectory() as dossier, override_settings(ARCHIVE_EXPORT_DIR=dossier):
+            chemin = exporter_mois(RemiseCles, 2024, 1)
+            with gzip.open(chemin, 'rt', encoding='utf-8') as fichier:
+                lignes = [json.loads(ligne) for ligne in fichier]
+
+        self.assertEqual([ligne['recette_realisee'] for ligne in lignes], [40003, 40004, 40005])
+        self.assertEqual({ligne['signature'] for ligne in lignes}, {'Moussavou'})
+
+
+# =============================================================================
+# CALENDRIERS ET CLÔTURES DES MOIS PASSÉS (calendrier.py, cloture.py)
+# =============================================================================
+
+class CalendrierMoisPassesTests(TestCaseCache):
+
+    def setUp(self):
+        super().setUp()
+        self.chauffeur = creer_chauffeur()
+        for jour in (3, 4, 5):
+            creer_journee(self.chauffeur, date(2024, 1, jour), recette=40000)
+        cloturer_mois(2024, 1)
+
+    def total_janvier(self):
+        return grille_mois(2024, 1, 'tous', Chauffeur.objects.all())['total_recette']
+
+    def test_suppression_dans_l_admin(self):
+        self.assertEqual(self.total_janvier(), 120000)
+
+        remise = RemiseCles.objects.get(date=date(2024, 1, 4))
+        requete = RequestFactory().post('/')
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.site._registry[RemiseCles].delete_model(requete, remise)
+
+        self.assertEqual(self.total_janvier(), 80000)
+
+    def test_mois_rouvert(self):
+        self.assertEqual(self.total_janvier(), 120000)
+
+        # Écriture sans invalidation propre : la réouverture suffit
+        RemiseCles.objects.filter(date=date(2024, 1, 3)).update(recette_realisee=10000)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(rouvrir_mois([date(2024, 1, 3)]), 1)
+
+        self.assertEqual(self.total_janvier(), 90000)
+
+
+class ClotureTests(TestCaseCache):
+    """Les agrégats lus sur les instantanés égalent ceux des lignes"""
+
+    def setUp(self):
+        super().setUp()
+        self.moussavou = creer_chauffeur()
+        self.nzue = creer_chauffeur('Nzue', '+24106000002')
+        for chauffeur, jours in (
+            (self.moussavou, (date(2023, 12, 30), date(2024, 1, 3), date(2024, 1, 15), date(2024, 2, 2))),
+            (self.nzue, (date(2024, 1, 3), date(2024, 1, 31), date(2024, 2, 1))),
+        ):
+            for jour in jours:
+                creer_journee(chauffeur, jour, objectif=40000 + jour.day, recette=50000 + jour.day * 100)
+        cloturer_mois(2024, 1)
+
+    def comparer(self, date_debut, date_fin, **filtres):
+        for modele, champ in ((RemiseCles, 'recette_realisee'), (PriseCles, 'objectif_recette')):
+            for cle in ('chauffeur', 'date'):
+                with self.subTest(modele=modele.__name__, cle=cle, debut=date_debut, fin=date_fin):
+                    self.assertEqual(
+                        agreger_avec_clotures(modele, cle, champ, date_debut, date_fin, **filtres),
+                        agreger_periode(modele, cle, champ, date_debut, date_fin, **filtres),
+                    )
+
+    def test_periodes_a_cheval_sur_un_mois_cloture(self):
+        self.assertEqual(set(clotures_periode(date(2023, 12, 1), date(2024, 2, 29))), {(2024, 1)})
+        for debut, fin in (
+            (date(2023, 12, 1), date(2024, 2, 29)),  # Mois clôturé entier entre deux mois ouverts
+            (date(2023, 12, 31), date(2024, 2, 1)),
+            (date(2024, 1, 10), date(2024, 2, 29)),  # Mois clôturé en partie : détail par jour
+            (date(2024, 1, 3), date(2024, 1, 3)),
+        ):
+            self.comparer(debut, fin)
+        self.comparer(date(2023, 12, 1), date(2024, 2, 29), chauffeur=self.nzue)
+        self.comparer(date(2024, 1, 10), date(2024, 2, 29), chauffeur__in=[self.moussavou.pk])
+
+    def test_mois_rouvert_par_une_ecriture(self):
+        periode = (date(2023, 12, 1), date(2024, 2, 29))
+        # Écriture sans réouverture : l'instantané fait foi
+        RemiseCles.objects.filter(date=date(2024, 1, 3)).update(recette_realisee=0)
+        totaux = agreger_avec_clotures(RemiseCles, 'chauffeur', 'recette_realisee', *periode)
+        self.assertEqual(totaux[self.nzue.pk]['total'], 50300 + 53100 + 50100)
+
+        # Import d'une journée de janvier : le mois est rouvert
+        with self.captureOnCommitCallbacks(execute=True):
+            rapport = importer_fichier(io.BytesIO((
+                ImportationTests.ENTETE + 'nzue;2024-01-20;07:30;45000;19:00;47000;\n'
+            ).encode()), 'journees.csv')
+        self.assertEqual(rapport.remises_creees, 1)
+        self.assertFalse(ClotureMois.objects.exists())
+
+        totaux = agreger_avec_clotures(RemiseCles, 'chauffeur', 'recette_realisee', *periode)
+        self.assertEqual(totaux[self.nzue.pk], {'total': 0 + 53100 + 47000 + 50100, 'nb': 4})
+        self.comparer(*periode)
+
+        # Clôturé de nouveau avec la journée importée
+        cloturer_mois(2024, 1)
+        self.comparer(*periode)
+
+
+# =============================================================================
+# LISTES D'ADMINISTRATION (activities/admin.py)
+# =============================================================================
+
+class PaginateurEstimeTests(TestCaseCache):
+
+    def test_pas_de_pages_fantomes_apres_purge(self):
+        chauffeur = creer_chauffeur()
+        for jour in range(1, 5):
+            creer_journee(chauffeur, date(2024, 1, jour))
+        # Clé primaire élevée, peu de lignes (archivage ou purge passés)
+        PriseCles.objects.filter(date=date(2024, 1, 4)).update(id=100000)
+
+        with mock.patch.object(PaginateurEstime, 'PLAFOND', 3):
+            paginateur = PaginateurEstime(PriseCles.objects.order_by('-id'), 2)
+            self.assertEqual(paginateur.count, 3)
+            self.assertTrue(paginateur.page(paginateur.num_pages).object_list)
+
+
+# =============================================================================
+# SAISIE ET SYNCHRONISATION HORS LIGNE (saisie_cles.py, synchronisation.py)
+# =============================================================================
+
+class LireMontantTests(TestCase):
+
+    def test_formats_acceptes(self):
+        self.assertEqual(lire_montant('50 000'), 50000)
+        self.assertEqual(lire_montant(' 42000.0 '), 42000)
+        self.assertEqual(lire_montant(35000.0), 35000)
+        self.assertEqual(lire_montant('-5'), -5)
+
+    def test_valeurs_refusees_sans_overflow(self):
+        for valeur in ('inf', '-inf', 'nan', '1e999', '99999999999', 'abc', '', None, float('inf')):
+            with self.subTest(valeur=valeur), self.assertRaises(ValueError):
+                lire_montant(valeur)
+
+
+class SynchronisationTests(TestCaseCache):
+
+    def setUp(self):
+        super().setUp()
+        self.chauffeur = creer_chauffeur()
+        self.prise = {
+            'cle': 'prise-1', 'type': 'prise', 'date': date.today().isoformat(), 'heure': '07:30',
+            'objectif_recette': 50000, 'signature': 'Moussavou',
+        }
+
+    def test_montant_non_fini_rejete_seul(self):
+        remise = {
+            'cle': 'remise-1', 'type': 'remise', 'date': date.today().isoformat(), 'heure': '19:00',
+            'recette_realisee': '1e999', 'signature': 'Moussavou',
+        }
+        resultats = appliquer_evenements(self.chauffeur, [self.prise, remise])
+
+        self.assertEqual([r['statut'] for r in resultats], ['applique', 'rejete'])
+        self.assertEqual(PriseCles.objects.count(), 1)
+        self.assertFalse(RemiseCles.objects.exists())
+
+    def test_cle_deja_recue_non_rejouee(self):
+        premier = appliquer_evenements(self.chauffeur, [self.prise])
+        renvoi = appliquer_evenements(self.chauffeur, [self.prise, dict(self.prise)])
+
+        self.assertEqual(premier[0]['statut'], 'applique')
+        self.assertEqual([r['statut'] for r in renvoi], ['doublon', 'doublon'])
+        self.assertEqual([r['message'] for r in renvoi], [premier[0]['message']] * 2)
+        self.assertEqual(PriseCles.objects.count(), 1)
+        self.assertEqual(EvenementCles.objects.filter(cle='prise-1').count(), 1)
+
+
+# =============================================================================
+# OUTBOX TRANSACTIONNELLE (outbox.py)
+# =============================================================================
+
+class OutboxTests(TestCaseCache):
+
+    def setUp(self):
+        super().setUp()
+        self.chauffeur = creer_chauffeur()
+        superviseur = User.objects.create_user('superviseur', 'superviseur@example.com', 'secret', is_staff=True)
+        AssignationSuperviseur.objects.create(chauffeur=self.chauffeur, superviseur=superviseur, actif=True)
+
+    def test_effet_annule_avec_l_action(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            publier_lot([effet_panne(self.chauffeur.pk, 'Frein avant')])
+            raise RuntimeError("action annulée")
+        self.assertFalse(EffetDiffere.objects.exists())
+
+    def test_effet_traite_une_seule_fois(self):
+        publier_lot([effet_panne(self.chauffeur.pk, 'Frein avant')])
+
+        lot = reserver_lot()
+        # Un second worker ne prend pas un lot déjà réservé
+        self.assertEqual(reserver_lot(), [])
+        self.assertEqual(traiter_lot(lot), {'traites': 1, 'echecs': 0})
+        # Ni un effet déjà traité, même si on lui repasse le lot
+        vider_outbox()
+        vider_outbox()
+
+        self.assertEqual(Panne.objects.filter(chauffeur=self.chauffeur).count(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(EffetDiffere.objects.filter(statut='en_attente').count(), 0)
+
+    def test_lot_abandonne_repris_apres_delai(self):
+        publier_lot([effet_panne(self.chauffeur.pk, 'Frein avant')])
+        self.assertEqual(len(reserver_lot()), 1)
+
+        # Worker arrêté sans traiter son lot
+        EffetDiffere.objects.update(date_verrou=timezone.now() - timedelta(seconds=settings.OUTBOX_DELAI_VERROU + 1))
+        # La panne, puis le récapitulatif qu'elle publie pour le superviseur
+        self.assertEqual(vider_outbox()['traites'], 2)
+        self.assertEqual(Panne.objects.count(), 1)
+
+    @override_settings(OUTBOX_TENTATIVES_MAX=2)
+    def test_effet_fautif_isole_puis_abandonne(self):
+        publier('notification', destinataire_id=self.chauffeur.user.pk, sujet='Rappel')
+        fautif = publier('notification', sujet='Sans destinataire')
+
+        with self.assertLogs('activities.outbox', 'ERROR'):
+            self.assertEqual(vider_outbox(), {'lots': 1, 'traites': 1, 'echecs': 1})
+        fautif.refresh_from_db()
+        self.assertEqual((fautif.statut, fautif.tentatives), ('en_attente', 1))
+
+        EffetDiffere.objects.filter(pk=fautif.pk).update(date_verrou=timezone.now() - timedelta(days=1))
+        with self.assertLogs('activities.outbox', 'ERROR'):
+            vider_outbox()
+        fautif.refresh_from_db()
+        self.assertEqual((fautif.statut, fautif.tentatives), ('echoue', 2))
+
+
+# =============================================================================
+# RECHERCHE PLEIN TEXTE (recherche.py)
+# =============================================================================
+
+@skipUnless(connection.vendor == 'sqlite', "index FTS5 propre à SQLite")
+class RechercheTests(TestCaseCache):
+
+    def test_declencheurs_presents_apres_migrate(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_recherche_a_'")
+            self.assertEqual(cursor.fetchone()[0], 18)
+        self.assertEqual(declencheurs_manquants(), [])
+        self.assertEqual(run_checks(databases=['default']), [])
+
+    def test_declencheur_manquant_signale(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER activities_panne_recherche_ai")
+        self.assertEqual(declencheurs_manquants(), ['activities_panne_recherche_ai'])
+        self.assertEqual([e.id for e in run_checks(databases=['default'])], ['activities.E001'])
+
+    def test_nouvelle_panne_trouvee(self):
+        chauffeur = creer_chauffeur()
+        panne = Panne.objects.create(chauffeur=chauffeur, description='Plaquettes de freins usées', severite='majeure')
+        creer_journee(chauffeur, date(2024, 1, 2), probleme='Pneu arrière crevé')
+
+        resultats = rechercher_problemes('frein plaquette')
+        self.assertEqual([(r['type'], r['id']) for r in resultats], [('panne', panne.pk)])
+        self.assertIn('<mark>', resultats[0]['extrait'])
+        self.assertEqual([r['type'] for r in rechercher_problemes('pneu', types=['prise'])], ['prise'])
+
+        Panne.objects.filter(pk=panne.pk).update(description='Rétroviseur cassé')
+        self.assertEqual(rechercher_problemes('frein'), [])
+        self.assertEqual(len(rechercher_problemes('retroviseur')), 1)
+
+
+# =============================================================================
+# IMPORT DE L'HISTORIQUE (importation.py)
+# =============================================================================
+
+class ImportationTests(TestCaseCache):
+
+    ENTETE = 'chauffeur;date;heure_prise;objectif_recette;heure_remise;recette_realisee;signature\n'
+
+    def setUp(self):
+        super().setUp()
+        creer_chauffeur()
+
+    def importer(self, contenu, nom='journees.csv'):
+        return importer_fichier(io.BytesIO(contenu), nom)
+
+    def test_montant_non_fini_refuse_par_ligne(self):
+        rapport = self.importer((
+            self.ENTETE
+            + 'moussavou;2024-01-02;07:30;inf;;;\n'
+            + 'moussavou;2024-01-03;07:30;50000;19:00;1e999;\n'
+            + 'moussavou;2024-01-04;07:30;50000;19:00;52 000;\n'
+        ).encode())
+
+        self.assertEqual([numero for numero, _ in rapport.erreurs], [2, 3])
+        self.assertEqual((rapport.prises_creees, rapport.remises_creees), (1, 1))
+
+    def test_csv_hors_utf8_refuse_en_entier(self):
+        contenu = (self.ENTETE + 'moussavou;2024-01-02;07:30;50000;;;Frédéric\n').encode('latin-1')
+        with self.assertRaisesMessage(FichierInvalide, 'UTF-8'):
+            self.importer(contenu)
+        self.assertFalse(PriseCles.objects.exists())
+
+    @skipUnless(importlib.util.find_spec('openpyxl'), "openpyxl n'est pas installé")
+    def test_xlsx_cellules_numeriques(self):
+        import openpyxl
+
+        classeur = openpyxl.Workbook()
+        feuille = classeur.active
+        feuille.append(self.ENTETE.strip().split(';'))
+        feuille.append(['moussavou', date(2024, 1, 2), time(7, 30), 50000.0, time(19, 0), float('inf'), ''])
+        feuille.append(['moussavou', date(2024, 1, 3), time(7, 30), 50000, time(19, 0), 48000.0, ''])
+        contenu = io.BytesIO()
+        classeur.save(contenu)
+
+        rapport = self.importer(contenu.getvalue(), 'journees.xlsx')
+        self.assertEqual([numero for numero, _ in rapport.erreurs], [2])
+        self.assertEqual(RemiseCles.objects.get().recette_realisee, 48000)
+
+    @skipUnless(importlib.util.find_spec('openpyxl'), "openpyxl n'est pas installé")
+    def test_xlsx_corrompu_refuse(self):
+        for contenu in (b'ceci ne vient pas de Excel', b'PK\x03\x04tronque'):
+            with self.subTest(contenu=contenu), self.assertRaisesMessage(FichierInvalide, 'XLSX illisible'):
+                self.importer(contenu, 'journees.xlsx')
+
+
+# =============================================================================
+# CLASSEMENTS (classement.py)
+# =============================================================================
+
+class ClassementTests(TestCaseCache):
+    """Classements tenus à jour à la saisie égaux à ceux reconstruits"""
+
+    LUNDI = date(2024, 3, 4)
+
+    def setUp(self):
+        super().setUp()
+        self.chauffeurs = [
+            creer_chauffeur(nom, f'+2410600000{n}')
+            for n, nom in enumerate(('Moussavou', 'Nzue', 'Obame', 'Ndong'), start=1)
+        ]
+        # Import : trois jours de la même semaine, objectifs et recettes variés
+        lignes = [
+            f'{chauffeur.user.username};{self.LUNDI + timedelta(days=jour)};07:30;'
+            f'{40000 + 5000 * n};19:00;{38000 + 3000 * n + 1000 * jour};'
+            for n, chauffeur in enumerate(self.chauffeurs)
+            for jour in range(3)
+            if n != 3 or jour == 0  # Ndong ne travaille qu'un jour
+        ]
+        contenu = ImportationTests.ENTETE + '\n'.join(lignes) + '\n'
+        rapport = importer_fichier(io.BytesIO(contenu.encode()), 'journees.csv')
+        self.assertEqual(rapport.remises_creees, 10)
+
+    def etat(self, jour):
+        """Classements et rangs de toutes les fenêtres et de tous les critères"""
+        etat = {}
+        for fenetre in FENETRES_CLASSEMENT:
+            for critere in CRITERES_CLASSEMENT:
+                etat[fenetre, critere] = [
+                    (ligne['rang'], ligne['chauffeur'].pk, ligne['recette'],
+                     ligne['objectif'], ligne['jours'], ligne['taux'])
+                    for ligne in meilleurs_chauffeurs(fenetre, jour, critere)
+                ]
+                etat[fenetre, critere, 'rangs'] = [
+                    rang_chauffeur(chauffeur.pk, fenetre, jour, critere) for chauffeur in self.chauffeurs
+                ]
+        return etat
+
+    def assertEtatReconstruit(self, jour):
+        avant = self.etat(jour)
+        reconstruire_classement(jour)
+        self.assertEqual(self.etat(jour), avant)
+        return avant
+
+    def test_import_puis_reconstruction(self):
+        etat = self.assertEtatReconstruit(self.LUNDI)
+
+        # Recettes et objectifs croissants de Moussavou à Obame ; Ndong : un seul jour
+        moussavou, nzue, obame, ndong = self.chauffeurs
+        self.assertEqual([ligne[1] for ligne in etat['semaine', 'recette']], [obame.pk, nzue.pk, moussavou.pk, ndong.pk])
+        self.assertEqual(etat['mois', 'jours', 'rangs'], [1, 2, 3, 4])
+        self.assertEqual(etat['annee', 'recette'][0][2:5], (44000 + 45000 + 46000, 3 * 50000, 3))
+
+    def test_saisie_du_jour(self):
+        chauffeur = self.chauffeurs[3]
+        self.client.force_login(chauffeur.user)
+        self.client.post(reverse('drivers:prendre_cles'), {
+            'objectif_recette': '50000', 'signature': 'Ndong', 'cle_idempotence': 'prise-1',
+        })
+        self.client.post(reverse('drivers:remettre_cles'), {
+            'recette_realisee': '90000', 'signature': 'Ndong', 'cle_idempotence': 'remise-1',
+        })
+
+        etat = self.assertEtatReconstruit(date.today())
+        self.assertEqual(etat['semaine', 'recette'][0][1:5], (chauffeur.pk, 90000, 50000, 1))
+        self.assertEqual(rang_chauffeur(chauffeur.pk, 'semaine', date.today()), 1)
+
+    def test_remise_modifiee_puis_supprimee(self):
+        modele_admin = admin.site._registry[RemiseCles]
+        requete = RequestFactory().post('/')
+        premier, dernier = self.chauffeurs[2], self.chauffeurs[3]
+
+        # Remise de Ndong corrigée dans l'admin : il passe en tête de la semaine
+        remise = RemiseCles.objects.get(chauffeur=dernier, date=self.LUNDI)
+        remise.recette_realisee = 500000
+        formulaire = mock.Mock(initial={'chauffeur': dernier.pk, 'date': self.LUNDI})
+        modele_admin.save_model(requete, remise, formulaire, change=True)
+        self.assertEqual(rang_chauffeur(dernier.pk, 'semaine', self.LUNDI), 1)
+        self.assertEqual(rang_chauffeur(premier.pk, 'semaine', self.LUNDI), 2)
+        self.assertEtatReconstruit(self.LUNDI)
+
+        # Remise supprimée : plus de journée travaillée, plus de rang
+        modele_admin.delete_model(requete, remise)
+        self.assertIsNone(rang_chauffeur(dernier.pk, 'semaine', self.LUNDI))
+        self.assertNotIn(dernier.pk, [ligne['chauffeur'].pk for ligne in meilleurs_chauffeurs('annee', self.LUNDI)])
+        self.assertEqual(rang_chauffeur(premier.pk, 'semaine', self.LUNDI), 1)
+        self.assertEtatReconstruit(self.LUNDI)
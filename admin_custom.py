@@ -7,12 +7,41 @@ from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.template.response import TemplateResponse
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 
 from drivers.models import Chauffeur, AssignationSuperviseur
 from activities.models import DemandeModification
+from activities.purge import estimer_purge, lancer_purge
+
+
+def _compter_lies(modele, champ, **filtres):
+    """
+    Sous-requête comptant les objets liés à l'utilisateur de la ligne
+    
+    Une sous-requête par compteur évite le produit cartésien qu'entraîneraient
+    plusieurs Count() sur des jointures différentes.
+    
+    Args:
+        modele: Modèle lié (AssignationSuperviseur, DemandeModification...)
+        champ (str): Clé étrangère vers User
+        **filtres: Filtres additionnels (ex. actif=True)
+    
+    Returns:
+        Coalesce: Expression entière utilisable dans annotate()
+    """
+    compte = (
+        modele.objects.filter(**{champ: OuterRef('pk')}, **filtres)
+        .order_by()
+        .values(champ)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(compte, output_field=IntegerField()), Value(0))
 
 
 class CustomUserAdmin(UserAdmin):
@@ -44,80 +73,122 @@ class CustomUserAdmin(UserAdmin):
     
     def get_superviseur_info(self, obj):
         """Affiche les informations de superviseur"""
-        assignations = AssignationSuperviseur.objects.filter(superviseur=obj, actif=True)
-        if assignations.exists():
-            count = assignations.count()
-            return format_html('<span style="color: green;">Superviseur ({} chauffeurs)</span>', count)
+        if obj.nb_assignations_actives > 0:
+            return format_html('<span style="color: green;">Superviseur ({} chauffeurs)</span>', obj.nb_assignations_actives)
         return "Non superviseur"
     get_superviseur_info.short_description = 'Statut superviseur'
     
     def get_related_objects_count(self, obj):
-        """Compte les objets liés à cet utilisateur"""
-        chauffeur_count = Chauffeur.objects.filter(user=obj).count()
-        assignations_count = AssignationSuperviseur.objects.filter(superviseur=obj).count()
-        assignations_created_count = AssignationSuperviseur.objects.filter(assigne_par=obj).count()
-        demandes_count = DemandeModification.objects.filter(admin_traite=obj).count()
-        
-        total = chauffeur_count + assignations_count + assignations_created_count + demandes_count
+        """Compte les objets liés à cet utilisateur (compteurs annotés)"""
+        total = self.get_dependances(obj)['total']
         
         if total > 0:
             return format_html('<span style="color: red; font-weight: bold;">{} objets liés</span>', total)
         return "Aucun objet lié"
     get_related_objects_count.short_description = 'Objets liés'
     
+    def get_dependances(self, obj):
+        """
+        Dépendances d'un utilisateur, lues sur les annotations de get_queryset
+        
+        Args:
+            obj (User): Utilisateur issu de get_queryset (annoté)
+        
+        Returns:
+            dict: Chauffeur associé (ou None), compteurs par relation et total
+        """
+        try:
+            chauffeur = obj.chauffeur
+        except Chauffeur.DoesNotExist:
+            chauffeur = None
+        
+        dependances = {
+            'chauffeur': chauffeur,
+            'assignations': obj.nb_assignations,
+            'assignations_creees': obj.nb_assignations_creees,
+            'demandes_traitees': obj.nb_demandes_traitees,
+        }
+        dependances['total'] = (
+            (1 if chauffeur else 0)
+            + dependances['assignations']
+            + dependances['assignations_creees']
+            + dependances['demandes_traitees']
+        )
+        return dependances
+    
     def delete_users_safely(self, request, queryset):
         """
         Supprime les utilisateurs de manière sécurisée en gérant les dépendances
         
         Cette méthode :
-        1. Vérifie les dépendances pour chaque utilisateur
-        2. Supprime les objets liés en premier
-        3. Supprime l'utilisateur en dernier
+        1. Affiche une page de confirmation avec les dépendances de chaque
+           utilisateur et l'estimation de la purge de l'historique des
+           chauffeurs (lignes et lots par table, rien n'est supprimé)
+        2. À la confirmation, supprime aussitôt les comptes sans chauffeur
+           (assignations supprimées, références mises à NULL)
+        3. Désactive les comptes chauffeur et lance la purge de leurs données
+           par lots courts (voir activities.purge) : mois clôturés rouverts et
+           indicateurs invalidés, profil et utilisateur supprimés en dernier
         4. Affiche un rapport détaillé
         """
+        # Le queryset de l'action vient de get_queryset : les dépendances
+        # sont déjà annotées, aucun comptage supplémentaire par utilisateur
+        utilisateurs = [(user, self.get_dependances(user)) for user in queryset]
+        
+        if request.POST.get('post') != 'yes':
+            return self.confirmer_suppression(request, utilisateurs)
+        
         deleted_count = 0
+        purges_lancees = 0
         errors = []
         
-        for user in queryset:
+        for user, dependances in utilisateurs:
+            username = user.username
             try:
                 with transaction.atomic():
-                    # 1. Supprimer le chauffeur associé (si existe)
-                    try:
-                        chauffeur = user.chauffeur
-                        chauffeur.delete()
-                        self.message_user(request, f"Chauffeur '{chauffeur.nom_complet}' supprimé pour l'utilisateur '{user.username}'", messages.INFO)
-                    except Chauffeur.DoesNotExist:
-                        pass
+                    chauffeur = dependances['chauffeur']
+                    if chauffeur:
+                        # 1. Compte chauffeur : plus de connexion possible, puis
+                        # purge de l'historique, du profil et de l'utilisateur
+                        user.is_active = False
+                        user.save(update_fields=['is_active'])
+                        Chauffeur.objects.filter(pk=chauffeur.pk).update(actif=False)
+                        operation = lancer_purge(
+                            'compte_chauffeur',
+                            {'chauffeur_id': chauffeur.pk, 'user_id': user.pk},
+                            demandeur=request.user
+                        )
+                        purges_lancees += 1
+                        self.message_user(request, format_html(
+                            "Chauffeur '{}' : suppression de {} ligne(s) lancée par lots pour '{}' "
+                            "(<a href=\"{}\">suivre la progression</a>)",
+                            chauffeur.nom_complet, operation.total_estime, username,
+                            reverse('admin_dashboard:suivi_purge', args=[operation.pk])
+                        ), messages.INFO)
+                        continue
                     
                     # 2. Supprimer les assignations où cet utilisateur est superviseur
-                    assignations_as_supervisor = AssignationSuperviseur.objects.filter(superviseur=user)
-                    assignations_count = assignations_as_supervisor.count()
-                    if assignations_count > 0:
-                        assignations_as_supervisor.delete()
-                        self.message_user(request, f"{assignations_count} assignation(s) de superviseur supprimée(s) pour '{user.username}'", messages.INFO)
+                    if dependances['assignations'] > 0:
+                        AssignationSuperviseur.objects.filter(superviseur=user).delete()
+                        self.message_user(request, f"{dependances['assignations']} assignation(s) de superviseur supprimée(s) pour '{username}'", messages.INFO)
                     
                     # 3. Mettre à NULL les assignations créées par cet utilisateur
-                    assignations_created = AssignationSuperviseur.objects.filter(assigne_par=user)
-                    created_count = assignations_created.count()
-                    if created_count > 0:
-                        assignations_created.update(assigne_par=None)
-                        self.message_user(request, f"{created_count} assignation(s) créée(s) mise(s) à NULL pour '{user.username}'", messages.INFO)
+                    if dependances['assignations_creees'] > 0:
+                        AssignationSuperviseur.objects.filter(assigne_par=user).update(assigne_par=None)
+                        self.message_user(request, f"{dependances['assignations_creees']} assignation(s) créée(s) mise(s) à NULL pour '{username}'", messages.INFO)
                     
                     # 4. Mettre à NULL les demandes de modification traitées par cet utilisateur
-                    demandes_traitees = DemandeModification.objects.filter(admin_traite=user)
-                    demandes_count = demandes_traitees.count()
-                    if demandes_count > 0:
-                        demandes_traitees.update(admin_traite=None)
-                        self.message_user(request, f"{demandes_count} demande(s) de modification mise(s) à NULL pour '{user.username}'", messages.INFO)
+                    if dependances['demandes_traitees'] > 0:
+                        DemandeModification.objects.filter(admin_traite=user).update(admin_traite=None)
+                        self.message_user(request, f"{dependances['demandes_traitees']} demande(s) de modification mise(s) à NULL pour '{username}'", messages.INFO)
                     
                     # 5. Supprimer l'utilisateur
-                    username = user.username
                     user.delete()
                     deleted_count += 1
                     self.message_user(request, f"Utilisateur '{username}' supprimé avec succès", messages.SUCCESS)
                     
             except Exception as e:
-                error_msg = f"Erreur lors de la suppression de '{user.username}': {str(e)}"
+                error_msg = f"Erreur lors de la suppression de '{username}': {str(e)}"
                 errors.append(error_msg)
                 self.message_user(request, error_msg, messages.ERROR)
         
@@ -125,17 +196,55 @@ class CustomUserAdmin(UserAdmin):
         if deleted_count > 0:
             self.message_user(request, f"Suppression terminée : {deleted_count} utilisateur(s) supprimé(s) avec succès", messages.SUCCESS)
         
+        if purges_lancees > 0:
+            self.message_user(request, f"{purges_lancees} compte(s) chauffeur désactivé(s), suppression en cours par lots", messages.SUCCESS)
+        
         if errors:
             self.message_user(request, f"{len(errors)} erreur(s) rencontrée(s)", messages.ERROR)
     
+    def confirmer_suppression(self, request, utilisateurs):
+        """
+        Page de confirmation de delete_users_safely (dry-run)
+        
+        Args:
+            request: Requête de l'administrateur
+            utilisateurs (list): Couples (utilisateur, dépendances)
+        
+        Returns:
+            TemplateResponse: Dépendances et estimation par utilisateur
+        """
+        lignes = []
+        for user, dependances in utilisateurs:
+            chauffeur = dependances['chauffeur']
+            estimation = None
+            if chauffeur:
+                estimation = estimer_purge('compte_chauffeur', {'chauffeur_id': chauffeur.pk})
+            lignes.append({'user': user, 'dependances': dependances, 'estimation': estimation})
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': "Confirmer la suppression des utilisateurs",
+            'opts': self.model._meta,
+            'lignes': lignes,
+            'action': 'delete_users_safely',
+            'action_checkbox_name': admin.helpers.ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(request, 'admin/auth/user/confirmer_suppression.html', context)
+    
     delete_users_safely.short_description = "Supprimer les utilisateurs sélectionnés (sécurisé)"
     
     def get_queryset(self, request):
-        """Optimise la requête en préchargeant les relations"""
-        return super().get_queryset(request).select_related('chauffeur').prefetch_related(
-            'assignationsuperviseur_set',
-            'assignationsuperviseur_set__chauffeur',
-            'demandemodification_set'
+        """
+        Précharge le chauffeur et annote les compteurs de dépendances
+        
+        La liste des utilisateurs, le rapport de dépendances et l'action de
+        suppression lisent ces annotations : une seule requête par page.
+        """
+        return super().get_queryset(request).select_related('chauffeur').annotate(
+            nb_assignations=_compter_lies(AssignationSuperviseur, 'superviseur'),
+            nb_assignations_actives=_compter_lies(AssignationSuperviseur, 'superviseur', actif=True),
+            nb_assignations_creees=_compter_lies(AssignationSuperviseur, 'assigne_par'),
+            nb_demandes_traitees=_compter_lies(DemandeModification, 'admin_traite'),
         )
 
 
@@ -0,0 +1,93 @@
+# =============================================================================
+# COMMANDE DE GESTION - Profil du rendu des templates par page
+# =============================================================================
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import NoReverseMatch, reverse
+
+from gabomadriver_app.profil_templates import profiler
+
+from .rapport_tailles import PAGES_PAR_DEFAUT
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour trouver les parties lentes des templates
+
+    Rend chaque page comme un navigateur connecté (client de test Django),
+    une première fois pour compiler les templates, puis --repetitions fois
+    sous le profileur (voir gabomadriver_app/profil_templates.py). Affiche
+    par page le temps moyen de chaque template, bloc et boucle {% for %},
+    trié par temps propre. Seules des requêtes GET sont envoyées.
+
+    Usage :
+    python manage.py profil_templates --utilisateur admin
+    python manage.py profil_templates --utilisateur admin --page admin_dashboard:calendrier_activites
+    python manage.py profil_templates --utilisateur c0 --page drivers:activite_mensuelle --limite 20
+    """
+
+    help = 'Affiche le temps de rendu des templates, blocs et boucles de chaque page'
+
+    def add_arguments(self, parser):
+        """Définit les arguments de la commande"""
+        parser.add_argument(
+            '--utilisateur',
+            required=True,
+            help="Nom de l'utilisateur connecté pour rendre les pages"
+        )
+        parser.add_argument(
+            '--page',
+            action='append',
+            default=[],
+            help='Nom de route (app:nom) ou chemin à profiler (option répétable)'
+        )
+        parser.add_argument(
+            '--repetitions',
+            type=int,
+            default=5,
+            help='Nombre de rendus mesurés par page (défaut : 5)'
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=10,
+            help='Nombre de lignes affichées par page (défaut : 10)'
+        )
+
+    def handle(self, *args, **options):
+        """Profile chaque page et affiche son classement"""
+        try:
+            utilisateur = User.objects.get(username=options['utilisateur'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur {options['utilisateur']} introuvable")
+        repetitions = max(options['repetitions'], 1)
+
+        client = Client()
+        client.force_login(utilisateur)
+        for page in options['page'] or PAGES_PAR_DEFAUT:
+            try:
+                chemin = reverse(page) if ':' in page else page
+            except NoReverseMatch:
+                self.stdout.write(self.style.WARNING(f"{page} : route inconnue ou avec paramètres"))
+                continue
+
+            # Premier rendu hors mesure : compilation des templates
+            response = client.get(chemin)
+            if response.status_code != 200:
+                self.stdout.write(self.style.WARNING(f"{page} : HTTP {response.status_code}"))
+                continue
+            with profiler() as collecteur:
+                for _ in range(repetitions):
+                    client.get(chemin)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{page} : {collecteur.total() * 1000 / repetitions:.1f} ms de rendu par requête"
+            ))
+            self.stdout.write(f"  {'propre':>9} {'total':>9} {'appels':>7}  élément")
+            for nature, nom, appels, total, propre in collecteur.classement(options['limite']):
+                self.stdout.write(
+                    f"  {propre * 1000 / repetitions:>6.2f} ms {total * 1000 / repetitions:>6.2f} ms "
+                    f"{appels / repetitions:>7.0f}  {nature} {nom}"
+                )
@@ -0,0 +1,120 @@
+# =============================================================================
+# COMMANDE DE GESTION - Tailles des pages avant et après optimisation
+# =============================================================================
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import NoReverseMatch, reverse
+
+from gabomadriver_app.optimisation import minifier_html
+from gabomadriver_app.statiques import brotli_disponible, compresser
+
+# Pages en lecture seule mesurées par défaut
+PAGES_PAR_DEFAUT = [
+    'admin_dashboard:dashboard_admin',
+    'admin_dashboard:liste_chauffeurs',
+    'admin_dashboard:gestion_activites',
+    'admin_dashboard:statistiques_recettes',
+    'admin_dashboard:calendrier_activites',
+    'admin_dashboard:gestion_pannes',
+    'admin_dashboard:gestion_demandes_modification',
+    'admin_dashboard:gestion_superviseurs',
+]
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour mesurer le gain de la minification et de la compression
+
+    Rend chaque page comme le ferait un navigateur connecté (client de test
+    Django, sans serveur) et affiche sa taille brute, minifiée puis
+    compressée en gzip et en brotli (voir gabomadriver_app/optimisation.py).
+    Seules des requêtes GET sont envoyées.
+
+    Usage :
+    python manage.py rapport_tailles --utilisateur admin
+    python manage.py rapport_tailles --utilisateur admin --page admin_dashboard:gestion_activites
+    python manage.py rapport_tailles --utilisateur admin --page /admin-dashboard/activites/?page=2
+    """
+
+    help = 'Affiche la taille des pages avant et après minification et compression'
+
+    def add_arguments(self, parser):
+        """Définit les arguments de la commande"""
+        parser.add_argument(
+            '--utilisateur',
+            required=True,
+            help="Nom de l'utilisateur connecté pour rendre les pages"
+        )
+        parser.add_argument(
+            '--page',
+            action='append',
+            default=[],
+            help='Nom de route (app:nom) ou chemin à mesurer (option répétable)'
+        )
+
+    def handle(self, *args, **options):
+        """Mesure chaque page et affiche le tableau des tailles"""
+        try:
+            utilisateur = User.objects.get(username=options['utilisateur'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur {options['utilisateur']} introuvable")
+
+        client = Client()
+        client.force_login(utilisateur)
+        encodages = ['gzip'] + (['br'] if brotli_disponible() else [])
+
+        self.stdout.write(
+            f"{'Page':<48} {'brut':>9} {'minifié':>9} "
+            + ' '.join(f"{encodage:>9}" for encodage in encodages)
+        )
+        totaux = None
+        for page in options['page'] or PAGES_PAR_DEFAUT:
+            tailles = self._mesurer(client, page, encodages)
+            if tailles is None:
+                continue
+            totaux = tailles if totaux is None else [a + b for a, b in zip(totaux, tailles)]
+            self.stdout.write(f"{page:<48} " + ' '.join(self._ko(taille) for taille in tailles))
+
+        if totaux:
+            self.stdout.write(
+                f"{'Total':<48} " + ' '.join(self._ko(taille) for taille in totaux)
+                + f"  (-{100 - 100 * totaux[-1] / totaux[0]:.0f} %)"
+            )
+
+    def _mesurer(self, client, page, encodages):
+        """
+        Rend une page et calcule ses tailles
+
+        Returns:
+            list | None: [brut, minifié, compressé par encodage], None si la
+                         page n'a pas pu être rendue
+        """
+        try:
+            chemin = reverse(page) if ':' in page else page
+        except NoReverseMatch:
+            self.stdout.write(self.style.WARNING(f"{page} : route inconnue ou avec paramètres"))
+            return None
+
+        # identity : le middleware minifie mais ne compresse pas
+        response = client.get(chemin, HTTP_ACCEPT_ENCODING='identity')
+        if response.status_code != 200:
+            self.stdout.write(self.style.WARNING(f"{page} : HTTP {response.status_code}"))
+            return None
+
+        contenu = response.content
+        tailles = getattr(response, 'tailles_optimisation', None)
+        if tailles is None:
+            # Middleware absent ou désactivé : mesure directe
+            brut = len(contenu)
+            contenu = minifier_html(contenu.decode(response.charset)).encode(response.charset)
+        else:
+            brut = tailles['origine']
+        return [brut, len(contenu)] + [
+            len(compresser(contenu, encodage, niveau_max=False)) for encodage in encodages
+        ]
+
+    @staticmethod
+    def _ko(taille):
+        return f"{taille / 1024:>7.1f} Ko"
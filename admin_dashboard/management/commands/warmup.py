@@ -0,0 +1,78 @@
+# =============================================================================
+# COMMANDE DE GESTION - Préchauffage après un déploiement
+# =============================================================================
+
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_dashboard.prechauffage import prechauffer
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour préchauffer l'application après un rechargement
+
+    Importe les vues, compile les templates (détecte aussi une erreur de
+    syntaxe avant qu'un utilisateur ne la rencontre) et calcule dans le
+    cache partagé les indicateurs du jour et du mois de chaque périmètre
+    superviseur (voir admin_dashboard/prechauffage.py). Avec --url, appelle
+    ensuite le site pour que le processus web rechargé démarre tout de suite.
+    Lancée automatiquement par deploy.py après le rechargement.
+
+    Usage :
+    python manage.py warmup
+    python manage.py warmup --url https://gabomazone.pythonanywhere.com/
+    python manage.py warmup --sans-indicateurs
+    """
+
+    help = "Préchauffe vues, templates et indicateurs des tableaux de bord"
+
+    def add_arguments(self, parser):
+        """Définit les arguments de la commande"""
+        parser.add_argument(
+            '--url',
+            action='append',
+            default=[],
+            help='URL à appeler après le préchauffage (option répétable)'
+        )
+        parser.add_argument(
+            '--sans-indicateurs',
+            action='store_true',
+            help='Ne pas calculer les indicateurs (imports et templates seulement)'
+        )
+
+    def handle(self, *args, **options):
+        """Exécute le préchauffage et affiche la durée de chaque étape"""
+        bilan = prechauffer(indicateurs=not options['sans_indicateurs'])
+
+        self.stdout.write(f"Vues : {bilan['vues']['resultat']} route(s) en {self._ms(bilan['vues'])}")
+        compiles, erreurs = bilan['templates']['resultat']
+        self.stdout.write(f"Templates : {compiles} compilé(s) en {self._ms(bilan['templates'])}")
+        if 'indicateurs' in bilan:
+            self.stdout.write(
+                f"Indicateurs : {bilan['indicateurs']['resultat']} périmètre(s) en {self._ms(bilan['indicateurs'])}"
+            )
+
+        for url in options['url']:
+            self._appeler(url)
+
+        if erreurs:
+            for nom, erreur in erreurs:
+                self.stderr.write(f"  {nom} : {erreur}")
+            raise CommandError(f"{len(erreurs)} template(s) en erreur")
+
+    def _appeler(self, url):
+        """Première requête vers le site : démarre le processus web rechargé"""
+        try:
+            with urllib.request.urlopen(url, timeout=60) as reponse:
+                self.stdout.write(f"{url} : HTTP {reponse.status}")
+        except urllib.error.HTTPError as e:
+            self.stdout.write(self.style.WARNING(f"{url} : HTTP {e.code}"))
+        except (urllib.error.URLError, OSError) as e:
+            self.stdout.write(self.style.WARNING(f"{url} : injoignable ({e})"))
+
+    @staticmethod
+    def _ms(etape):
+        return f"{etape['duree'] * 1000:.0f} ms"
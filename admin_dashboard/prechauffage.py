@@ -0,0 +1,140 @@
+# =============================================================================
+# PRÉCHAUFFAGE - Imports, templates et indicateurs avant la première requête
+# =============================================================================
+"""
+Travail payé sinon par le premier superviseur après un rechargement
+
+- importer_vues : charge l'URLconf et tous les modules de vues
+- compiler_templates : compile les templates de templates/ dans le cache du
+  chargeur de templates (cached.Loader, configuré dans TEMPLATES) du processus
+- calculer_indicateurs : remplit le cache partagé avec les indicateurs du
+  jour et les agrégats du mois courant de chaque périmètre superviseur
+
+Utilisé par la commande warmup (déploiement) et, si
+PRECHAUFFAGE_AU_DEMARRAGE est activé, au démarrage de chaque processus web
+(wsgi.py) : les deux premières étapes ne profitent qu'au processus qui les
+exécute, la troisième à tous.
+"""
+
+import logging
+import time
+from datetime import date
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+from activities.indicateurs import agregats_recettes, indicateurs_du_jour
+from drivers.models import Chauffeur
+
+from .views import perimetre_utilisateur
+
+logger = logging.getLogger(__name__)
+
+
+def importer_vues():
+    """
+    Charge l'URLconf, les modules de vues et les tables de résolution inverse
+
+    Returns:
+        int: Nombre de routes chargées
+    """
+    def parcourir(resolveur):
+        # reverse_dict construit la table utilisée par reverse() et {% url %}
+        resolveur.reverse_dict
+        total = 0
+        for motif in resolveur.url_patterns:
+            total += parcourir(motif) if hasattr(motif, 'url_patterns') else 1
+        return total
+
+    return parcourir(get_resolver())
+
+
+def compiler_templates():
+    """
+    Compile tous les templates des répertoires DIRS du moteur Django
+
+    Returns:
+        tuple: (nombre de templates compilés, liste de (nom, erreur))
+    """
+    moteur = engines['django'].engine
+    compiles = 0
+    erreurs = []
+    for dossier in moteur.dirs:
+        for chemin in sorted(Path(dossier).rglob('*.html')):
+            nom = chemin.relative_to(dossier).as_posix()
+            try:
+                moteur.get_template(nom)
+                compiles += 1
+            except TemplateSyntaxError as e:
+                erreurs.append((nom, str(e)))
+    return compiles, erreurs
+
+
+def perimetres():
+    """
+    Périmètres des tableaux de bord : administrateurs et chaque superviseur
+
+    Returns:
+        list: Tuples (clé du périmètre, QuerySet des chauffeurs)
+    """
+    resultat = [('tous', Chauffeur.objects.all())]
+    superviseurs = User.objects.filter(
+        groups__name='Superviseurs', is_staff=False, is_superuser=False, is_active=True
+    )
+    resultat.extend(perimetre_utilisateur(superviseur) for superviseur in superviseurs)
+    return resultat
+
+
+def calculer_indicateurs(jour=None):
+    """
+    Calcule en cache les indicateurs du jour et du mois de chaque périmètre
+
+    Les périodes correspondent aux pages par défaut : tableau de bord
+    (dashboard_admin) et statistiques du mois (statistiques_recettes).
+
+    Returns:
+        int: Nombre de périmètres calculés
+    """
+    jour = jour or date.today()
+    liste = perimetres()
+    for perimetre, chauffeurs in liste:
+        indicateurs_du_jour(perimetre, chauffeurs, jour)
+        agregats_recettes(perimetre, chauffeurs, jour.replace(day=1), jour)
+    return len(liste)
+
+
+def prechauffer(indicateurs=True):
+    """
+    Exécute toutes les étapes du préchauffage
+
+    Args:
+        indicateurs (bool): Calculer aussi les indicateurs (requêtes SQL)
+
+    Returns:
+        dict: Étape -> {'duree': secondes, 'resultat': valeur retournée}
+    """
+    etapes = [('vues', importer_vues), ('templates', compiler_templates)]
+    if indicateurs:
+        etapes.append(('indicateurs', calculer_indicateurs))
+
+    bilan = {}
+    for nom, fonction in etapes:
+        debut = time.monotonic()
+        resultat = fonction()
+        bilan[nom] = {'duree': time.monotonic() - debut, 'resultat': resultat}
+    return bilan
+
+
+def prechauffer_processus():
+    """Préchauffage au démarrage d'un processus web : un échec ne l'empêche pas de démarrer"""
+    try:
+        bilan = prechauffer()
+    except Exception:
+        logger.exception("Échec du préchauffage au démarrage")
+        return
+    logger.info(
+        "Préchauffage : %s",
+        ', '.join(f"{nom} {etape['duree'] * 1000:.0f} ms" for nom, etape in bilan.items())
+    )
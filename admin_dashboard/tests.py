@@ -0,0 +1,145 @@
+# =============================================================================
+# TESTS DU TABLEAU DE BORD ADMINISTRATEUR
+# =============================================================================
+
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+
+from activities.models import OperationPurge, Panne, PriseCles, RemiseCles
+from activities.tests import TestCaseCache, creer_chauffeur, creer_journee
+
+from . import views
+
+
+class TestCaseAdmin(TestCaseCache):
+    """Superutilisateur connecté et un chauffeur avec trois journées"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.admin)
+        self.chauffeur = creer_chauffeur()
+        for jour in (1, 2, 3):
+            creer_journee(self.chauffeur, date(2024, 3, jour))
+
+
+# =============================================================================
+# INDICATEURS (tableaux de bord, indicateurs_json)
+# =============================================================================
+
+class IndicateursTests(TestCaseAdmin):
+
+    def indicateurs(self, jour):
+        reponse = self.client.get(reverse('admin_dashboard:indicateurs'), {'date': jour})
+        self.assertEqual(reponse.status_code, 200)
+        return reponse.json()['indicateurs']
+
+    def test_fenetres_closes_au_jour_demande(self):
+        # Journées du 1er au 3 mars : vues du 2, celle du 3 n'est pas encore passée
+        indicateurs = self.indicateurs('2024-03-02')
+        self.assertEqual(indicateurs['recettes_aujourdhui'], 52000)
+        self.assertEqual(indicateurs['recettes_semaine'], 2 * 52000)
+        self.assertEqual(indicateurs['recettes_mois'], 2 * 52000)
+
+    def test_date_hors_limites(self):
+        for jour in ('0001-01-03', '2024-02-30', 'hier'):
+            with self.subTest(jour=jour):
+                reponse = self.client.get(reverse('admin_dashboard:indicateurs'), {'date': jour})
+                self.assertEqual(reponse.status_code, 400)
+        self.assertEqual(self.indicateurs('0001-01-08')['recettes_semaine'], 0)
+
+    def test_pannes_critiques(self):
+        for statut in ('signalee', 'reparée'):
+            Panne.objects.create(chauffeur=self.chauffeur, description='Moteur', severite='critique', statut=statut)
+
+        # Tableau de bord admin : toutes les pannes critiques ; JSON et superviseurs : ouvertes
+        reponse = self.client.get(reverse('admin_dashboard:dashboard_admin'))
+        self.assertEqual(reponse.context['pannes_critiques'], 2)
+        self.assertEqual(self.indicateurs('2024-03-02')['pannes_critiques'], 1)
+
+
+class DashboardAdminTests(TestCaseAdmin):
+
+    def test_listes_recentes_bornees(self):
+        for n in range(12):
+            Panne.objects.create(chauffeur=self.chauffeur, description=f'Panne {n}', severite='mineure')
+        url = reverse('admin_dashboard:dashboard_admin')
+
+        with mock.patch.object(views, 'ACTIVITES_RECENTES', 2):
+            reponse = self.client.get(url)
+
+        # Deux dernières lignes de chaque table, fusionnées puis tronquées
+        activites = reponse.context['activites_recentes']
+        self.assertEqual(
+            [(a['type_activite'], a['date']) for a in activites],
+            [('remise', date(2024, 3, 3)), ('prise', date(2024, 3, 3))],
+        )
+
+        pannes = reponse.context['pannes_recentes']
+        self.assertEqual((len(pannes), pannes.total, pannes[0].description), (10, 12, 'Panne 11'))
+        self.assertContains(reponse, 'Page 1 sur 2')
+        suivante = self.client.get(url + pannes.url_suivante)
+        self.assertEqual([p.description for p in suivante.context['pannes_recentes']], ['Panne 1', 'Panne 0'])
+
+
+# =============================================================================
+# FILE DES PANNES (gestion_pannes)
+# =============================================================================
+
+class GestionPannesTests(TestCaseAdmin):
+
+    def test_pagination_partagee(self):
+        for n in range(30):
+            Panne.objects.create(chauffeur=self.chauffeur, description=f'Panne {n}', severite='moderee')
+        url = reverse('admin_dashboard:gestion_pannes')
+
+        premiere = self.client.get(url, {'statut': 'en_cours'})
+        page = premiere.context['page_pannes']
+        self.assertEqual((len(page), page.total, page.num_pages), (25, 30, 2))
+        self.assertContains(premiere, 'Page 1 sur 2')
+
+        deuxieme = self.client.get(url + page.url_suivante)
+        self.assertEqual(len(deuxieme.context['page_pannes']), 5)
+        self.assertEqual(deuxieme.context['statut_actuel'], 'en_cours')
+
+
+# =============================================================================
+# PURGES MASSIVES (estimation, lancement, suivi)
+# =============================================================================
+
+@override_settings(PURGE_EN_ARRIERE_PLAN=False)
+class PurgeTests(TestCaseAdmin):
+
+    def test_estimation_sans_suppression(self):
+        reponse = self.client.get(reverse('admin_dashboard:supprimer_toutes_activites'))
+
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse.context['estimation']['total'], 6)
+        self.assertContains(reponse, 'Supprimer 6 ligne(s)')
+        self.assertEqual(PriseCles.objects.count(), 3)
+        self.assertFalse(OperationPurge.objects.exists())
+
+    def test_lancement_puis_suivi(self):
+        reponse = self.client.post(reverse('admin_dashboard:supprimer_toutes_activites'))
+
+        operation = OperationPurge.objects.get()
+        self.assertRedirects(reponse, reverse('admin_dashboard:suivi_purge', args=[operation.pk]))
+        self.assertEqual(PriseCles.objects.count() + RemiseCles.objects.count(), 0)
+
+        reponse = self.client.get(reverse('admin_dashboard:suivi_purge', args=[operation.pk]))
+        self.assertContains(reponse, reverse('admin_dashboard:statut_purge', args=[operation.pk]))
+
+        statut = self.client.get(reverse('admin_dashboard:statut_purge', args=[operation.pk])).json()
+        self.assertEqual((statut['statut'], statut['lignes_supprimees'], statut['pourcentage']), ('terminee', 6, 100))
+
+    def test_suivi_reserve_au_demandeur(self):
+        operation = OperationPurge.objects.create(type_purge='pannes', demandeur=self.admin)
+        superviseur = User.objects.create_user('superviseur', password='secret', is_staff=True)
+        self.client.force_login(superviseur)
+
+        reponse = self.client.get(reverse('admin_dashboard:statut_purge', args=[operation.pk]))
+        self.assertEqual(reponse.status_code, 404)
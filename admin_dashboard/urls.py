@@ -13,7 +13,10 @@ urlpatterns = [
     path('recettes/', views.statistiques_recettes, name='statistiques_recettes'),
     path('recettes/excel/', views.exporter_excel, name='exporter_excel'),
     path('calendrier/', views.calendrier_activites, name='calendrier_activites'),
+    path('classement/', views.classement, name='classement'),
+    path('indicateurs/', views.indicateurs_json, name='indicateurs'),
     path('pannes/', views.gestion_pannes, name='gestion_pannes'),
+    path('pannes/recherche/', views.recherche_pannes, name='recherche_pannes'),
     
     # =============================================================================
     # GESTION DES ACTIVITÉS - Nouvelles fonctionnalités
@@ -37,6 +40,8 @@ urlpatterns = [
     path('reinitialiser-demandes-modification/', views.reinitialiser_demandes_modification, name='reinitialiser_demandes_modification'),
     path('supprimer-panne/<int:panne_id>/', views.supprimer_panne, name='supprimer_panne'),
     path('supprimer-toutes-pannes/', views.supprimer_toutes_pannes, name='supprimer_toutes_pannes'),
+    path('purges/<int:operation_id>/', views.suivi_purge, name='suivi_purge'),
+    path('purges/<int:operation_id>/statut/', views.statut_purge, name='statut_purge'),
     
     # =============================================================================
     # GESTION DES SUPERVISEURS - Privilèges et permissions
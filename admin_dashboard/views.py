@@ -3,15 +3,27 @@ from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import logout
 from django.contrib.auth.models import User, Group
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Sum, Count, Avg, Q
-from django.db import models
+from django.db.models import Sum, Count
+from django.db import models, transaction
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from datetime import datetime, date, timedelta
 from drivers.models import Chauffeur, AssignationSuperviseur
 from activities.models import Activite, Recette, Panne, PriseCles, RemiseCles, DemandeModification
+from activities.archive import lignes_periode
+from activities.classement import meilleurs_chauffeurs, rang_chauffeur, recalculer_classement, CRITERES, FENETRES
+from activities.cloture import agreger_avec_clotures, rouvrir_mois
+from activities.recherche import rechercher_problemes, TYPES as TYPES_RECHERCHE
+from activities.calendrier import grille_mois
+from activities.indicateurs import (
+    indicateurs_du_jour, agregats_recettes, invalider_indicateurs, compiler_indicateurs, declarations_du_mois,
+    etiquettes_perimetre, ETIQUETTE_INDICATEURS,
+)
+from activities.models import OperationPurge
+from activities.purge import estimer_purge, lancer_purge
+from activities.outbox import publier_lot, effet_panne
 from functools import wraps
+from gabomadriver_app.pagination import paginer
 
 
 def supervisor_required(view_func):
@@ -71,6 +83,37 @@ def get_chauffeurs_for_user(user):
         return Chauffeur.objects.none()
 
 
+def perimetre_utilisateur(user):
+    """
+    Périmètre de l'utilisateur pour les indicateurs en cache
+    
+    Les administrateurs partagent le périmètre 'tous' ; chaque superviseur
+    du groupe a le sien (ses chauffeurs assignés).
+    
+    Args:
+        user: Utilisateur connecté
+        
+    Returns:
+        tuple: (clé du périmètre, QuerySet des chauffeurs accessibles)
+    """
+    if user.is_superuser or user.is_staff:
+        return 'tous', Chauffeur.objects.all()
+    return f'superviseur-{user.pk}', get_chauffeurs_for_user(user)
+
+
+def classement_utilisateur(user, fenetre='mois', critere='recette', limite=5):
+    """
+    Premiers chauffeurs du périmètre de l'utilisateur (voir activities.classement)
+    
+    Returns:
+        list: Lignes de meilleurs_chauffeurs (rang, chauffeur, recette, ...)
+    """
+    perimetre, chauffeurs = perimetre_utilisateur(user)
+    return meilleurs_chauffeurs(
+        fenetre, date.today(), critere, limite, chauffeurs=None if perimetre == 'tous' else chauffeurs
+    )
+
+
 def get_activites_for_user(user, model_class, **filters):
     """
     Récupère les activités accessibles selon le type d'utilisateur
@@ -89,14 +132,8 @@ def get_activites_for_user(user, model_class, **filters):
     else:
         return model_class.objects.none()
 
-# Import conditionnel d'openpyxl pour éviter les erreurs si le module n'est pas installé
-try:
-    import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    from openpyxl.utils import get_column_letter
-    OPENPYXL_AVAILABLE = True
-except ImportError:
-    OPENPYXL_AVAILABLE = False
+# openpyxl (export Excel, optionnel) est importé dans exporter_excel : son
+# chargement coûte une part importante du démarrage à froid de l'application
 
 
 def logout_admin(request):
@@ -145,26 +182,11 @@ def dashboard_superviseur(request):
     if request.user.is_superuser or request.user.is_staff:
         return redirect('admin_dashboard:dashboard_admin')
     
-    # Récupérer les chauffeurs accessibles selon le type d'utilisateur
-    # La fonction get_chauffeurs_for_user gère déjà toute la logique de filtrage
-    chauffeurs_accessibles = get_chauffeurs_for_user(request.user)
-    
-    # Statistiques générales (identiques au dashboard admin mais filtrées)
-    total_chauffeurs = chauffeurs_accessibles.filter(actif=True).count()
-    
-    # Activités du jour
-    prises_aujourdhui = get_activites_for_user(request.user, PriseCles, date=date.today()).count()
-    remises_aujourdhui = get_activites_for_user(request.user, RemiseCles, date=date.today()).count()
-    total_activites_aujourdhui = prises_aujourdhui + remises_aujourdhui
-    
-    # Recettes
-    recettes_aujourdhui = get_activites_for_user(request.user, RemiseCles, date=date.today()).aggregate(total=Sum('recette_realisee'))['total'] or 0
-    recettes_semaine = get_activites_for_user(request.user, RemiseCles, date__gte=date.today() - timedelta(days=7)).aggregate(total=Sum('recette_realisee'))['total'] or 0
-    recettes_mois = get_activites_for_user(request.user, RemiseCles, date__gte=date.today().replace(day=1)).aggregate(total=Sum('recette_realisee'))['total'] or 0
-    
-    # Pannes
-    pannes_en_cours = get_activites_for_user(request.user, Panne, statut__in=['signalee', 'en_cours']).count()
-    pannes_critiques = get_activites_for_user(request.user, Panne, severite='critique', statut__in=['signalee', 'en_cours']).count()
+    # Indicateurs du périmètre du superviseur (requêtes compilées et cache partagé,
+    # voir activities.indicateurs)
+    perimetre, chauffeurs_accessibles = perimetre_utilisateur(request.user)
+    indicateurs = indicateurs_du_jour(perimetre, chauffeurs_accessibles)
+    total_activites_aujourdhui = indicateurs['prises_aujourdhui'] + indicateurs['remises_aujourdhui']
     
     # Activités récentes (limitées)
     activites_recentes = []
@@ -208,23 +230,12 @@ def dashboard_superviseur(request):
         statut='en_attente'
     ).count()
     
-    # Activités très récentes (aujourd'hui)
-    prises_recentes_aujourdhui = get_activites_for_user(request.user, PriseCles, date=date.today()).count()
-    remises_recentes_aujourdhui = get_activites_for_user(request.user, RemiseCles, date=date.today()).count()
-    
     # Vérifier si l'utilisateur a le privilège "Statut équipe" (is_staff)
     has_staff_privilege = request.user.is_staff
     
     context = {
-        'total_chauffeurs': total_chauffeurs,
+        **indicateurs,
         'total_activites_aujourdhui': total_activites_aujourdhui,
-        'prises_aujourdhui': prises_aujourdhui,
-        'remises_aujourdhui': remises_aujourdhui,
-        'recettes_aujourdhui': recettes_aujourdhui,
-        'recettes_semaine': recettes_semaine,
-        'recettes_mois': recettes_mois,
-        'pannes_en_cours': pannes_en_cours,
-        'pannes_critiques': pannes_critiques,
         'activites_recentes': activites_recentes,
         'pannes_recentes': pannes_recentes,
         'is_supervisor': True,
@@ -233,13 +244,21 @@ def dashboard_superviseur(request):
         'is_chauffeur_with_staff': is_chauffeur_with_staff,
         'demandes_recentes': demandes_recentes,
         'demandes_en_attente': demandes_en_attente,
-        'prises_recentes_aujourdhui': prises_recentes_aujourdhui,
-        'remises_recentes_aujourdhui': remises_recentes_aujourdhui,
+        'prises_recentes_aujourdhui': indicateurs['prises_aujourdhui'],
+        'remises_recentes_aujourdhui': indicateurs['remises_aujourdhui'],
+        'top_chauffeurs': [
+            ('du mois', classement_utilisateur(request.user, 'mois')),
+            ('de la semaine', classement_utilisateur(request.user, 'semaine')),
+        ],
     }
     
     return render(request, 'admin_dashboard/dashboard_superviseur.html', context)
 
 
+# Activités récentes du tableau de bord administrateur (5 pages de 10)
+ACTIVITES_RECENTES = 50
+
+
 @supervisor_required
 def dashboard_admin(request):
     # Vérifier si l'utilisateur est un superviseur simple (pas super admin ni is_staff)
@@ -255,32 +274,20 @@ def dashboard_admin(request):
     - Top chauffeurs du mois
     - Activités et pannes récentes
     """
-    # Récupérer les chauffeurs accessibles selon le type d'utilisateur
-    chauffeurs_accessibles = get_chauffeurs_for_user(request.user)
-    
-    # Statistiques générales
-    total_chauffeurs = chauffeurs_accessibles.filter(actif=True).count()
-    
-    # Activités du jour (filtrées par chauffeurs accessibles)
-    prises_aujourdhui = get_activites_for_user(request.user, PriseCles, date=date.today()).count()
-    remises_aujourdhui = get_activites_for_user(request.user, RemiseCles, date=date.today()).count()
-    total_activites_aujourdhui = prises_aujourdhui + remises_aujourdhui
-    
-    # Recettes en FCFA (filtrées par chauffeurs accessibles)
-    recettes_aujourdhui = get_activites_for_user(request.user, RemiseCles, date=date.today()).aggregate(total=Sum('recette_realisee'))['total'] or 0
-    
-    recettes_semaine = get_activites_for_user(request.user, RemiseCles, date__gte=date.today() - timedelta(days=7)).aggregate(total=Sum('recette_realisee'))['total'] or 0
-    
-    recettes_mois = get_activites_for_user(request.user, RemiseCles, date__gte=date.today().replace(day=1)).aggregate(total=Sum('recette_realisee'))['total'] or 0
-    
-    # Pannes (filtrées par chauffeurs accessibles)
-    pannes_en_cours = get_activites_for_user(request.user, Panne, statut__in=['signalee', 'en_cours']).count()
-    pannes_critiques = get_activites_for_user(request.user, Panne, severite='critique').count()
-    
+    # Indicateurs du périmètre de l'utilisateur (cache partagé, voir activities.indicateurs)
+    perimetre, chauffeurs_accessibles = perimetre_utilisateur(request.user)
+    indicateurs = indicateurs_du_jour(perimetre, chauffeurs_accessibles)
+    total_activites_aujourdhui = indicateurs['prises_aujourdhui'] + indicateurs['remises_aujourdhui']
     
     # Activités récentes (prises et remises) - filtrées par chauffeurs accessibles
-    prises_recentes = get_activites_for_user(request.user, PriseCles).select_related('chauffeur').order_by('-date', '-heure_prise')
-    remises_recentes = get_activites_for_user(request.user, RemiseCles).select_related('chauffeur').order_by('-date', '-heure_remise')
+    # Seules les ACTIVITES_RECENTES dernières de chaque table sont lues puis
+    # fusionnées : l'historique complet n'est jamais chargé
+    prises_recentes = get_activites_for_user(request.user, PriseCles).select_related('chauffeur').order_by(
+        '-date', '-heure_prise', '-id'
+    )[:ACTIVITES_RECENTES]
+    remises_recentes = get_activites_for_user(request.user, RemiseCles).select_related('chauffeur').order_by(
+        '-date', '-heure_remise', '-id'
+    )[:ACTIVITES_RECENTES]
     
     # Combiner les activités récentes pour l'affichage
     activites_recentes = []
@@ -304,31 +311,30 @@ def dashboard_admin(request):
     # Trier par date décroissante
     activites_recentes.sort(key=lambda x: (x['date'], x['heure']), reverse=True)
     
-    # Pagination des activités récentes
+    # Pagination des activités récentes (liste bornée en mémoire)
     from django.core.paginator import Paginator
-    activites_paginator = Paginator(activites_recentes, 10)  # 10 activités par page
+    activites_paginator = Paginator(activites_recentes[:ACTIVITES_RECENTES], 10)  # 10 activités par page
     activites_page = request.GET.get('activites_page')
     activites_obj = activites_paginator.get_page(activites_page)
     
     # Demandes de modification en attente
     demandes_en_attente = DemandeModification.objects.filter(statut='en_attente').count()
     
-    # Pannes récentes pour affichage avec pagination
-    pannes_recentes = Panne.objects.select_related('chauffeur').order_by('-date_creation')
-    pannes_paginator = Paginator(pannes_recentes, 10)  # 10 pannes par page
-    pannes_page = request.GET.get('pannes_page')
-    pannes_obj = pannes_paginator.get_page(pannes_page)
+    # Pannes récentes, paginées par curseur (total en cache)
+    pannes_obj = paginer(
+        request, Panne.objects.select_related('chauffeur'), ['-date_creation', '-id'], 10,
+        parametre='pannes_curseur',
+        etiquettes=lambda: etiquettes_perimetre(perimetre, chauffeurs_accessibles),
+    )
     
     context = {
-        'total_chauffeurs': total_chauffeurs,
+        **indicateurs,
+        'pannes_critiques': indicateurs['pannes_critiques_total'],
+        'top_chauffeurs': [
+            ('du mois', classement_utilisateur(request.user, 'mois')),
+            ('de la semaine', classement_utilisateur(request.user, 'semaine')),
+        ],
         'total_activites_aujourdhui': total_activites_aujourdhui,
-        'prises_aujourdhui': prises_aujourdhui,
-        'remises_aujourdhui': remises_aujourdhui,
-        'recettes_aujourdhui': recettes_aujourdhui,
-        'recettes_semaine': recettes_semaine,
-        'recettes_mois': recettes_mois,
-        'pannes_en_cours': pannes_en_cours,
-        'pannes_critiques': pannes_critiques,
         'demandes_en_attente': demandes_en_attente,
         'activites_recentes': activites_obj,
         'activites_page_obj': activites_obj,
@@ -341,16 +347,12 @@ def dashboard_admin(request):
 
 @supervisor_required
 def liste_chauffeurs(request):
-    """Liste des chauffeurs avec pagination"""
-    from django.core.paginator import Paginator
-    
+    """Liste des chauffeurs avec pagination par curseur"""
     # Filtrer les chauffeurs selon le type d'utilisateur
-    chauffeurs = get_chauffeurs_for_user(request.user).order_by('nom', 'prenom')
+    chauffeurs = get_chauffeurs_for_user(request.user)
     
-    # Pagination
-    paginator = Paginator(chauffeurs, 10)  # 10 chauffeurs par page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination (10 chauffeurs par page)
+    page_obj = paginer(request, chauffeurs, ['nom', 'prenom', 'id'], 10)
     
     # Déterminer les permissions de l'utilisateur
     can_modify_chauffeurs = request.user.is_superuser or request.user.is_staff
@@ -403,44 +405,49 @@ def statistiques_recettes(request):
         date_fin = date.today()
     
     # Filtre par chauffeur si spécifié
-    chauffeur_filter = {}
     if chauffeur_id:
         try:
             chauffeur = Chauffeur.objects.get(id=chauffeur_id)
-            chauffeur_filter = {'chauffeur': chauffeur}
         except Chauffeur.DoesNotExist:
             chauffeur = None
     else:
         chauffeur = None
     
     # Recettes par chauffeur (filtrées selon les permissions utilisateur)
-    chauffeurs_accessibles = get_chauffeurs_for_user(request.user)
-    
-    recettes_chauffeurs = chauffeurs_accessibles.filter(
-        remisecles__date__gte=date_debut,
-        remisecles__date__lte=date_fin
-    ).annotate(
-        total_recettes=Sum('remisecles__recette_realisee'),
-        nb_jours=Count('remisecles', distinct=True),
-        moyenne_journaliere=Avg('remisecles__recette_realisee')
-    ).filter(total_recettes__gt=0).order_by('-total_recettes')
-    
-    # Recettes par jour (utilisant les nouveaux modèles)
-    recettes_par_jour = RemiseCles.objects.filter(
-        date__gte=date_debut,
-        date__lte=date_fin,
-        **chauffeur_filter
-    ).values('date').annotate(
-        total=Sum('recette_realisee'),
-        nb_chauffeurs=Count('chauffeur', distinct=True)
-    ).order_by('date')
+    # Les agrégats lisent l'archive uniquement si la période l'atteint
+    # Agrégats du périmètre en cache partagé (voir activities.indicateurs)
+    perimetre, chauffeurs_accessibles = perimetre_utilisateur(request.user)
+    filtres = {'chauffeur__in': chauffeurs_accessibles}
+    agregats = agregats_recettes(perimetre, chauffeurs_accessibles, date_debut, date_fin)
+    
+    recettes_par_chauffeur = agregats['recettes_par_chauffeur']
+    objectifs_par_chauffeur = agregats['objectifs_par_chauffeur']
+    chauffeurs_par_id = chauffeurs_accessibles.in_bulk(list(recettes_par_chauffeur))
+    
+    recettes_chauffeurs = []
+    for chauffeur_pk, agregat in recettes_par_chauffeur.items():
+        chauffeur_data = chauffeurs_par_id.get(chauffeur_pk)
+        if chauffeur_data is None or agregat['total'] <= 0:
+            continue
+        chauffeur_data.total_recettes = agregat['total']
+        chauffeur_data.nb_jours = agregat['nb']  # Une remise par jour et par chauffeur
+        chauffeur_data.moyenne_journaliere = agregat['total'] / agregat['nb']
+        recettes_chauffeurs.append(chauffeur_data)
+    recettes_chauffeurs.sort(key=lambda c: c.total_recettes, reverse=True)
+    
+    # Recettes par jour (périmètre entier en cache, chauffeur sélectionné à la demande)
+    if chauffeur:
+        filtres['chauffeur'] = chauffeur
+        recettes_jours = agreger_avec_clotures(RemiseCles, 'date', 'recette_realisee', date_debut, date_fin, **filtres)
+    else:
+        recettes_jours = agregats['recettes_par_jour']
+    recettes_par_jour = [
+        {'date': jour, 'total': agregat['total'], 'nb_chauffeurs': agregat['nb']}
+        for jour, agregat in sorted(recettes_jours.items())
+    ]
     
     # Calcul des totaux
-    recette_totale = RemiseCles.objects.filter(
-        date__gte=date_debut,
-        date__lte=date_fin,
-        **chauffeur_filter
-    ).aggregate(Sum('recette_realisee'))['recette_realisee__sum'] or 0
+    recette_totale = sum(jour['total'] for jour in recettes_par_jour)
     
     # Statistiques supplémentaires adaptées aux filtres
     if chauffeur:
@@ -478,12 +485,8 @@ def statistiques_recettes(request):
     # Calcul de la performance moyenne
     performances_chauffeurs = []
     for chauffeur_data in recettes_chauffeurs:
-        # Récupérer les objectifs pour ce chauffeur sur la période
-        objectifs_chauffeur = PriseCles.objects.filter(
-            chauffeur=chauffeur_data,
-            date__gte=date_debut,
-            date__lte=date_fin
-        ).aggregate(Sum('objectif_recette'))['objectif_recette__sum'] or 0
+        # Objectifs de ce chauffeur sur la période (agrégés en une seule requête)
+        objectifs_chauffeur = objectifs_par_chauffeur.get(chauffeur_data.pk, {'total': 0})['total']
         
         performance = (chauffeur_data.total_recettes / objectifs_chauffeur * 100) if objectifs_chauffeur > 0 else 0
         performances_chauffeurs.append({
@@ -505,10 +508,7 @@ def statistiques_recettes(request):
             for i in range(7):
                 jour_date = date_debut + timedelta(days=i)
                 if jour_date <= date_fin:
-                    recette_jour = RemiseCles.objects.filter(
-                        date=jour_date,
-                        **chauffeur_filter
-                    ).aggregate(Sum('recette_realisee'))['recette_realisee__sum'] or 0
+                    recette_jour = recettes_jours.get(jour_date, {'total': 0})['total']
                     evolution_data.append({
                         'periode': jour_date.strftime('%A'),
                         'recette': float(recette_jour)
@@ -537,11 +537,9 @@ def statistiques_recettes(request):
         elif periode == 'annee':
             # Par mois de l'année
             for mois in range(1, 13):
-                recette_mois = RemiseCles.objects.filter(
-                    date__year=date.today().year,
-                    date__month=mois,
-                    **chauffeur_filter
-                ).aggregate(Sum('recette_realisee'))['recette_realisee__sum'] or 0
+                recette_mois = sum(
+                    agregat['total'] for jour, agregat in recettes_jours.items() if jour.month == mois
+                )
                 evolution_data.append({
                     'periode': f'{mois:02d}',
                     'recette': float(recette_mois)
@@ -585,8 +583,6 @@ def calendrier_activites(request):
     
     Utilise la même logique que le calendrier chauffeur mais pour tous les chauffeurs.
     """
-    import calendar
-    
     # Paramètres de navigation
     today = date.today()
     annee = int(request.GET.get('annee', today.year))
@@ -603,51 +599,35 @@ def calendrier_activites(request):
     # Récupération des chauffeurs pour le filtre (filtrée selon les permissions)
     chauffeurs = get_chauffeurs_for_user(request.user).filter(actif=True).order_by('nom', 'prenom')
     
-    # Récupération des données du mois
-    prises_query = get_activites_for_user(request.user, PriseCles, 
-        date__gte=mois_debut,
-        date__lte=mois_fin
-    ).select_related('chauffeur').order_by('date')
-    
-    remises_query = get_activites_for_user(request.user, RemiseCles,
-        date__gte=mois_debut,
-        date__lte=mois_fin
-    ).select_related('chauffeur').order_by('date')
-    
-    # Filtrage par chauffeur si spécifié
+    # Filtres communs : chauffeurs accessibles et éventuel chauffeur sélectionné
+    filtres = {'chauffeur__in': get_chauffeurs_for_user(request.user)}
     if chauffeur_id:
-        prises_query = prises_query.filter(chauffeur_id=chauffeur_id)
-        remises_query = remises_query.filter(chauffeur_id=chauffeur_id)
+        filtres['chauffeur_id'] = chauffeur_id
     
-    prises_mois = list(prises_query)
-    remises_mois = list(remises_query)
-    
-    # Créer le calendrier du mois (même logique que chauffeur)
-    calendrier = creer_calendrier_admin_mensuel(annee, mois, prises_mois, remises_mois)
+    # Calendrier et totaux du mois (agrégats par jour, en cache ; un mois
+    # passé n'est recalculé qu'après une modification qui le touche)
+    perimetre, chauffeurs_perimetre = perimetre_utilisateur(request.user)
+    mois_calendrier = grille_mois(
+        annee, mois, perimetre, chauffeurs_perimetre, chauffeur_id=chauffeur_id, noms=True
+    )
+    calendrier = mois_calendrier['semaines']
     
     # Calculer les statistiques du mois
-    total_mois = sum(remise.recette_realisee for remise in remises_mois)
-    jours_travailles = len(remises_mois)
+    total_mois = mois_calendrier['total_recette']
+    jours_travailles = mois_calendrier['nb_remises']
     moyenne_journaliere = total_mois / jours_travailles if jours_travailles > 0 else 0
     
-    # Statistiques par mois de l'année
+    # Statistiques par mois de l'année : instantanés des mois clôturés,
+    # une requête groupée par date pour les mois ouverts
+    recettes_annee = agreger_avec_clotures(
+        RemiseCles, 'date', 'recette_realisee',
+        date(annee, 1, 1), date(annee, 12, 31), **filtres
+    )
     stats_par_mois = []
     for m in range(1, 13):
-        mois_debut_m = date(annee, m, 1)
-        if m == 12:
-            mois_fin_m = date(annee + 1, 1, 1) - timedelta(days=1)
-        else:
-            mois_fin_m = date(annee, m + 1, 1) - timedelta(days=1)
-        
-        remises_m = get_activites_for_user(request.user, RemiseCles,
-            date__gte=mois_debut_m, 
-            date__lte=mois_fin_m
-        )
-        if chauffeur_id:
-            remises_m = remises_m.filter(chauffeur_id=chauffeur_id)
-            
-        total_m = sum(remise.recette_realisee for remise in remises_m)
-        jours_m = remises_m.count()
+        jours_du_mois = [agregat for jour, agregat in recettes_annee.items() if jour.month == m]
+        total_m = sum(agregat['total'] for agregat in jours_du_mois)
+        jours_m = sum(agregat['nb'] for agregat in jours_du_mois)
         
         stats_par_mois.append({
             'mois': m,
@@ -665,8 +645,7 @@ def calendrier_activites(request):
         'mois_debut': mois_debut,
         'mois_fin': mois_fin,
         'calendrier': calendrier,
-        'prises_mois': prises_mois,
-        'remises_mois': remises_mois,
+        'nb_prises_mois': mois_calendrier['nb_prises'],
         'total_mois': total_mois,
         'jours_travailles': jours_travailles,
         'moyenne_journaliere': moyenne_journaliere,
@@ -679,99 +658,78 @@ def calendrier_activites(request):
     return render(request, 'admin_dashboard/calendrier_activites.html', context)
 
 
-def creer_calendrier_admin_mensuel(annee, mois, prises, remises):
-    """
-    Créer un calendrier mensuel avec les données d'activité pour l'admin
-    
-    Version adaptée de la fonction chauffeur pour gérer plusieurs chauffeurs.
-    """
-    import calendar
-    
-    # Création du calendrier du mois avec le module calendar
-    cal = calendar.monthcalendar(annee, mois)
-    
-    # Création de dictionnaires pour un accès rapide aux données
-    prises_dict = {}
-    remises_dict = {}
-    
-    # Grouper par date pour gérer plusieurs chauffeurs
-    for prise in prises:
-        if prise.date not in prises_dict:
-            prises_dict[prise.date] = []
-        prises_dict[prise.date].append(prise)
-    
-    for remise in remises:
-        if remise.date not in remises_dict:
-            remises_dict[remise.date] = []
-        remises_dict[remise.date].append(remise)
-    
-    # Construction de la structure de données pour le template
-    calendrier_semaines = []
-    
-    for semaine in cal:
-        semaine_data = []
-        for jour in semaine:
-            if jour == 0:  # Jour vide (hors du mois)
-                semaine_data.append(None)
-            else:
-                # Création de la date du jour
-                jour_date = date(annee, mois, jour)
-                
-                # Récupération des activités pour ce jour
-                prises_jour = prises_dict.get(jour_date, [])
-                remises_jour = remises_dict.get(jour_date, [])
-                
-                # Calcul des totaux pour ce jour
-                total_recette = sum(remise.recette_realisee for remise in remises_jour)
-                total_objectif = sum(prise.objectif_recette for prise in prises_jour)
-                
-                # Construction des données du jour
-                jour_data = {
-                    'jour': jour,
-                    'date': jour_date,
-                    'prises': prises_jour,
-                    'remises': remises_jour,
-                    'recette': total_recette,
-                    'objectif': total_objectif,
-                    'actif': len(prises_jour) > 0 or len(remises_jour) > 0,
-                    'complet': len(prises_jour) > 0 and len(remises_jour) > 0,
-                }
-                
-                # Calcul du pourcentage de performance
-                if jour_data['objectif'] > 0:
-                    jour_data['performance'] = int((jour_data['recette'] / jour_data['objectif']) * 100)
-                else:
-                    jour_data['performance'] = 0
-                
-                semaine_data.append(jour_data)
-        
-        calendrier_semaines.append(semaine_data)
-    
-    return calendrier_semaines
-
-
 @supervisor_required
 def gestion_pannes(request):
-    """Gestion des pannes"""
-    # Filtrer les pannes selon les chauffeurs accessibles
-    chauffeurs_accessibles = get_chauffeurs_for_user(request.user)
-    pannes = Panne.objects.select_related('chauffeur').filter(
-        chauffeur__in=chauffeurs_accessibles
-    ).order_by('-date_creation')
+    """
+    File de tri des pannes
+    
+    Les pannes sont classées par priorité de traitement (ouvertes d'abord,
+    de la plus grave à la plus légère, voir Panne.calculer_priorite) puis
+    de la plus récente à la plus ancienne, et paginées par curseur sur
+    l'index panne_triage_idx. Les filtres de statut et de sévérité sont
+    des filtres sur la priorité : la page reste une lecture d'index.
+    
+    Paramètres GET :
+    - statut : 'en_cours' (signalées ou en cours) ou 'resolue' (réparées ou annulées)
+    - severite : mineure, moderee, majeure ou critique
+    - curseur : jeton de page (liens suivant / précédent)
+    - q : recherche plein texte (voir activities.recherche) ; les pannes
+      sont alors classées par pertinence et les problèmes mécaniques
+      signalés aux prises et remises (archives comprises) listés à part
+    """
+    # Filtrer les pannes selon les chauffeurs accessibles (aucun filtre pour les administrateurs)
+    perimetre, chauffeurs_accessibles = perimetre_utilisateur(request.user)
+    pannes = Panne.objects.all()
+    if perimetre != 'tous':
+        pannes = pannes.filter(chauffeur__in=chauffeurs_accessibles)
+    
+    # Comptes par statut et par sévérité : une requête groupée
+    par_statut = dict.fromkeys(dict(Panne.STATUT_CHOICES), 0)
+    par_severite = dict.fromkeys(dict(Panne.SEVERITE_CHOICES), 0)
+    for ligne in pannes.values('statut', 'severite').annotate(nb=Count('pk')).order_by():
+        par_statut[ligne['statut']] = par_statut.get(ligne['statut'], 0) + ligne['nb']
+        par_severite[ligne['severite']] = par_severite.get(ligne['severite'], 0) + ligne['nb']
     
     # Filtres
     statut = request.GET.get('statut')
     severite = request.GET.get('severite')
-    
-    if statut:
-        pannes = pannes.filter(resolue=(statut == 'resolue'))
-    if severite:
-        pannes = pannes.filter(severite=severite)
+    recherche = request.GET.get('q', '').strip()
+    
+    if statut or severite:
+        ouvertes = {'en_cours': True, 'resolue': False}.get(statut)
+        pannes = pannes.filter(priorite__in=Panne.priorites(ouvertes=ouvertes, severite=severite or None))
+    pannes = pannes.select_related('chauffeur')
+    
+    signalements = []
+    page_pannes = None
+    if recherche:
+        resultats = rechercher_problemes(recherche, chauffeurs=chauffeurs_accessibles, limite=200)
+        extraits = {r['id']: r['extrait'] for r in resultats if r['type'] == 'panne' and not r['archive']}
+        rangs = {pk: rang for rang, pk in enumerate(extraits)}
+        pannes = sorted(pannes.filter(pk__in=rangs), key=lambda panne: rangs[panne.pk])
+        for panne in pannes:
+            panne.extrait = extraits[panne.pk]
+        signalements = [r for r in resultats if r['type'] != 'panne' or r['archive']]
+        auteurs = Chauffeur.objects.in_bulk({r['chauffeur_id'] for r in signalements})
+        for signalement in signalements:
+            signalement['chauffeur'] = auteurs.get(signalement['chauffeur_id'])
+    else:
+        # Total en cache, périmé par les pannes des chauffeurs du périmètre
+        page_pannes = paginer(
+            request, pannes, ['priorite', '-date_creation', '-id'], 25,
+            etiquettes=lambda: etiquettes_perimetre(perimetre, chauffeurs_accessibles),
+        )
+        pannes = page_pannes.objets
     
     context = {
         'pannes': pannes,
+        'page_pannes': page_pannes,
+        'pannes_par_statut': [(cle, libelle, par_statut[cle]) for cle, libelle in Panne.STATUT_CHOICES],
+        'pannes_par_severite': [(cle, libelle, par_severite[cle]) for cle, libelle in Panne.SEVERITE_CHOICES],
         'statut_actuel': statut,
         'severite_actuelle': severite,
+        'recherche': recherche,
+        'signalements': signalements,
     }
     
     return render(request, 'admin_dashboard/gestion_pannes.html', context)
@@ -823,29 +781,28 @@ def gestion_activites(request):
         except ValueError:
             pass
     
-    # Tri par date décroissante
-    prises = prises.order_by('-date', '-heure_prise')
-    remises = remises.order_by('-date', '-heure_remise')
-    
     # Filtrage par type d'activité (pour l'affichage)
     if type_activite == 'prise':
         remises = remises.none()  # Afficher seulement les prises
     elif type_activite == 'remise':
         prises = prises.none()  # Afficher seulement les remises
     
-    # Pagination pour les prises
-    prises_paginator = Paginator(prises, 10)  # 10 éléments par page
-    prises_page = request.GET.get('prises_page')
-    prises_obj = prises_paginator.get_page(prises_page)
-    
-    # Pagination pour les remises
-    remises_paginator = Paginator(remises, 10)  # 10 éléments par page
-    remises_page = request.GET.get('remises_page')
-    remises_obj = remises_paginator.get_page(remises_page)
+    # Pagination par curseur (10 éléments par page, plus récentes d'abord) ;
+    # totaux en cache, périmés par les saisies des chauffeurs du périmètre
+    perimetre, chauffeurs_accessibles = perimetre_utilisateur(request.user)
+    etiquettes = lambda: etiquettes_perimetre(perimetre, chauffeurs_accessibles)
+    prises_obj = paginer(
+        request, prises.select_related('chauffeur'), ['-date', '-heure_prise', '-id'], 10,
+        parametre='prises_curseur', etiquettes=etiquettes,
+    )
+    remises_obj = paginer(
+        request, remises.select_related('chauffeur'), ['-date', '-heure_remise', '-id'], 10,
+        parametre='remises_curseur', etiquettes=etiquettes,
+    )
     
     # Statistiques
-    total_prises = prises.count()
-    total_remises = remises.count()
+    total_prises = prises_obj.total
+    total_remises = remises_obj.total
     
     # Calcul des recettes totales pour la période
     recettes_totales = remises.aggregate(total=Sum('recette_realisee'))['total'] or 0
@@ -854,8 +811,6 @@ def gestion_activites(request):
         'chauffeurs': chauffeurs,
         'prises': prises_obj,
         'remises': remises_obj,
-        'prises_paginator': prises_paginator,
-        'remises_paginator': remises_paginator,
         'total_prises': total_prises,
         'total_remises': total_remises,
         'recettes_totales': recettes_totales,
@@ -889,37 +844,38 @@ def activites_chauffeur(request, chauffeur_id):
     chauffeur = get_object_or_404(Chauffeur, id=chauffeur_id, id__in=chauffeurs_accessibles.values_list('id', flat=True))
     
     # Récupération des activités du chauffeur
-    prises = PriseCles.objects.filter(chauffeur=chauffeur).order_by('-date', '-heure_prise')
-    remises = RemiseCles.objects.filter(chauffeur=chauffeur).order_by('-date', '-heure_remise')
-    
-    # Pagination pour les prises
-    prises_paginator = Paginator(prises, 15)
-    prises_page = request.GET.get('prises_page')
-    prises_obj = prises_paginator.get_page(prises_page)
-    
-    # Pagination pour les remises
-    remises_paginator = Paginator(remises, 15)
-    remises_page = request.GET.get('remises_page')
-    remises_obj = remises_paginator.get_page(remises_page)
+    prises = PriseCles.objects.filter(chauffeur=chauffeur)
+    remises = RemiseCles.objects.filter(chauffeur=chauffeur)
+    
+    # Pagination par curseur (15 éléments par page) ; totaux en cache,
+    # périmés par les saisies du chauffeur
+    etiquettes = [ETIQUETTE_INDICATEURS, f"chauffeur:{chauffeur.pk}"]
+    prises_obj = paginer(
+        request, prises, ['-date', '-heure_prise', '-id'], 15, parametre='prises_curseur', etiquettes=etiquettes
+    )
+    remises_obj = paginer(
+        request, remises, ['-date', '-heure_remise', '-id'], 15, parametre='remises_curseur', etiquettes=etiquettes
+    )
     
     # Statistiques du chauffeur
-    total_prises = prises.count()
-    total_remises = remises.count()
+    total_prises = prises_obj.total
+    total_remises = remises_obj.total
     
-    # Calcul des performances
+    # Calcul des performances (objectifs lus en une requête, par date)
+    objectifs = dict(prises.values_list('date', 'objectif_recette'))
     performances = []
-    for remise in remises:
-        try:
-            prise = PriseCles.objects.get(chauffeur=chauffeur, date=remise.date)
-            pourcentage = (remise.recette_realisee / prise.objectif_recette) * 100
+    for remise in remises.order_by('-date', '-heure_remise'):
+        if remise.date in objectifs:
+            objectif = objectifs[remise.date]
+            pourcentage = (remise.recette_realisee / objectif) * 100
             performances.append({
                 'date': remise.date,
-                'objectif': prise.objectif_recette,
+                'objectif': objectif,
                 'realise': remise.recette_realisee,
                 'pourcentage': pourcentage,
                 'statut': 'success' if pourcentage >= 100 else 'warning' if pourcentage >= 90 else 'danger'
             })
-        except PriseCles.DoesNotExist:
+        else:
             performances.append({
                 'date': remise.date,
                 'objectif': 0,
@@ -937,8 +893,6 @@ def activites_chauffeur(request, chauffeur_id):
         'chauffeur': chauffeur,
         'prises': prises_obj,
         'remises': remises_obj,
-        'prises_paginator': prises_paginator,
-        'remises_paginator': remises_paginator,
         'performances': performances,
         'total_prises': total_prises,
         'total_remises': total_remises,
@@ -983,24 +937,16 @@ def exporter_activite_chauffeur_pdf(request, chauffeur_id):
     if isinstance(date_fin, str):
         date_fin = datetime.strptime(date_fin, '%Y-%m-%d').date()
     
-    # Récupération des activités du chauffeur pour le mois
-    prises = PriseCles.objects.filter(
-        chauffeur=chauffeur,
-        date__gte=date_debut,
-        date__lte=date_fin
-    ).order_by('date', 'heure_prise')
-    
-    remises = RemiseCles.objects.filter(
-        chauffeur=chauffeur,
-        date__gte=date_debut,
-        date__lte=date_fin
-    ).order_by('date', 'heure_remise')
+    # Récupération des activités du chauffeur pour la période (archive comprise si nécessaire)
+    prises = lignes_periode(PriseCles, date_debut, date_fin, ordre=['date', 'heure_prise'], chauffeur=chauffeur)
+    remises = lignes_periode(RemiseCles, date_debut, date_fin, ordre=['date', 'heure_remise'], chauffeur=chauffeur)
+    prises_par_date = {prise.date: prise for prise in prises}
     
     # Calcul des statistiques générales
-    total_prises = prises.count()
-    total_remises = remises.count()
-    recettes_totales = remises.aggregate(total=Sum('recette_realisee'))['total'] or 0
-    objectifs_totaux = prises.aggregate(total=Sum('objectif_recette'))['total'] or 0
+    total_prises = len(prises)
+    total_remises = len(remises)
+    recettes_totales = sum(remise.recette_realisee for remise in remises)
+    objectifs_totaux = sum(prise.objectif_recette for prise in prises)
     performance_moyenne = (recettes_totales / objectifs_totaux * 100) if objectifs_totaux > 0 else 0
     
     # Calcul des performances par jour avec détails
@@ -1009,8 +955,8 @@ def exporter_activite_chauffeur_pdf(request, chauffeur_id):
     
     for remise in remises:
         jours_travailles.add(remise.date)
-        try:
-            prise = PriseCles.objects.get(chauffeur=chauffeur, date=remise.date)
+        prise = prises_par_date.get(remise.date)
+        if prise is not None:
             pourcentage = (remise.recette_realisee / prise.objectif_recette) * 100
             performances_journalieres.append({
                 'date': remise.date,
@@ -1024,7 +970,7 @@ def exporter_activite_chauffeur_pdf(request, chauffeur_id):
                 'plein_carburant': remise.plein_carburant,
                 'probleme_mecanique': remise.probleme_mecanique
             })
-        except PriseCles.DoesNotExist:
+        else:
             performances_journalieres.append({
                 'date': remise.date,
                 'jour_semaine': remise.date.strftime('%A'),
@@ -1145,26 +1091,28 @@ def gestion_demandes_modification(request):
     if chauffeur_id:
         demandes = demandes.filter(chauffeur_id=chauffeur_id)
     
-    # Tri par date de création décroissante
-    demandes = demandes.order_by('-date_creation')
-    
-    # Pagination
-    paginator = Paginator(demandes, 15)  # 15 éléments par page
-    page_number = request.GET.get('page')
-    demandes_obj = paginator.get_page(page_number)
+    # Pagination par curseur (15 éléments par page, plus récentes d'abord) ;
+    # total en cache, périmé par les demandes des chauffeurs du périmètre
+    perimetre, _ = perimetre_utilisateur(request.user)
+    demandes_obj = paginer(
+        request, demandes, ['-date_creation', '-id'], 15,
+        etiquettes=lambda: etiquettes_perimetre(perimetre, chauffeurs_accessibles),
+    )
     
     # Liste des chauffeurs pour le filtre (filtrée selon les permissions)
     chauffeurs = chauffeurs_accessibles.filter(actif=True).order_by('nom', 'prenom')
     
-    # Statistiques
-    total_demandes = demandes.count()
-    demandes_en_attente = DemandeModification.objects.filter(statut='en_attente').count()
-    demandes_approuvees = DemandeModification.objects.filter(statut='approuvee').count()
-    demandes_rejetees = DemandeModification.objects.filter(statut='rejetee').count()
+    # Statistiques (une requête groupée par statut)
+    total_demandes = demandes_obj.total
+    par_statut = dict(
+        DemandeModification.objects.values_list('statut').annotate(nb=Count('pk')).order_by()
+    )
+    demandes_en_attente = par_statut.get('en_attente', 0)
+    demandes_approuvees = par_statut.get('approuvee', 0)
+    demandes_rejetees = par_statut.get('rejetee', 0)
     
     context = {
         'demandes': demandes_obj,
-        'paginator': paginator,
         'chauffeurs': chauffeurs,
         'total_demandes': total_demandes,
         'demandes_en_attente': demandes_en_attente,
@@ -1196,51 +1144,57 @@ def traiter_demande_modification(request, demande_id):
         commentaire = request.POST.get('commentaire', '')
         
         if action in ['approuver', 'rejeter']:
-            # Traitement de la demande
-            demande.traiter(
-                admin=request.user,
-                approuvee=(action == 'approuver'),
-                commentaire=commentaire
-            )
-            
-            # Si approuvée, appliquer les modifications
-            if action == 'approuver':
-                try:
-                    if demande.type_activite == 'prise':
-                        activite = PriseCles.objects.get(
-                            chauffeur=demande.chauffeur, 
-                            date=demande.date_activite
-                        )
-                    else:
-                        activite = RemiseCles.objects.get(
+            try:
+                # Décision, modifications et effets différés validés ensemble
+                with transaction.atomic():
+                    demande.traiter(
+                        admin=request.user,
+                        approuvee=(action == 'approuver'),
+                        commentaire=commentaire
+                    )
+                    effets = []
+                    
+                    # Si approuvée, appliquer les modifications
+                    if action == 'approuver':
+                        modele = PriseCles if demande.type_activite == 'prise' else RemiseCles
+                        activite = modele.objects.get(
                             chauffeur=demande.chauffeur, 
                             date=demande.date_activite
                         )
+                        
+                        # Application des nouvelles données
+                        nouvelles_donnees = demande.nouvelles_donnees
+                        for champ, valeur in nouvelles_donnees.items():
+                            if hasattr(activite, champ):
+                                setattr(activite, champ, valeur)
+                        
+                        activite.save()
+                        # Mois clôturé : rouvert, ses instantanés seront recalculés
+                        rouvrir_mois([demande.date_activite])
+                        recalculer_classement([activite.chauffeur_id], [demande.date_activite])
+                        invalider_indicateurs(activites=[(activite.chauffeur_id, demande.date_activite)])
+                        
+                        # Panne créée par le worker de l'outbox si un problème mécanique est signalé
+                        nouveau_probleme = nouvelles_donnees.get('probleme_mecanique', '')
+                        if nouveau_probleme and nouveau_probleme != 'Aucun':
+                            effets.append(effet_panne(demande.chauffeur_id, nouveau_probleme))
                     
-                    # Application des nouvelles données
-                    nouvelles_donnees = demande.nouvelles_donnees
-                    for champ, valeur in nouvelles_donnees.items():
-                        if hasattr(activite, champ):
-                            setattr(activite, champ, valeur)
-                    
-                    activite.save()
-                    
-                    # Créer une panne si un problème mécanique est signalé dans les nouvelles données
-                    nouveau_probleme = nouvelles_donnees.get('probleme_mecanique', '')
-                    if nouveau_probleme and nouveau_probleme != 'Aucun':
-                        from activities.models import Panne
-                        Panne.objects.create(
-                            chauffeur=demande.chauffeur,
-                            description=nouveau_probleme,
-                            severite='moderee',  # Par défaut
-                            statut='signalee'  # Statut par défaut
-                        )
-                    
+                    # Notification du chauffeur (récapitulatif envoyé par le worker)
+                    effets.append(('notification', {
+                        'destinataire_id': demande.chauffeur.user_id,
+                        'sujet': f"Demande de modification du {demande.date_activite:%d/%m/%Y} {demande.get_statut_display().lower()}",
+                        'lignes': [commentaire] if commentaire else [],
+                    }))
+                    publier_lot(effets)
+                # Totaux des listes de demandes (filtrées par statut) périmés
+                invalider_indicateurs([demande.chauffeur_id])
+                
+                if action == 'approuver':
                     messages.success(request, f'Demande approuvée et modifications appliquées avec succès.')
-                except Exception as e:
-                    messages.error(request, f'Erreur lors de l\'application des modifications: {str(e)}')
-            else:
-                messages.success(request, 'Demande rejetée avec succès.')
+                else:
+                    messages.success(request, 'Demande rejetée avec succès.')
+            except Exception as e:
+                messages.error(request, f'Erreur lors de l\'application des modifications: {str(e)}')
             
             return redirect('admin_dashboard:gestion_demandes_modification')
     
@@ -1284,6 +1238,9 @@ def supprimer_activite(request, activite_id, type_activite):
         
         chauffeur_nom = activite.chauffeur.nom_complet
         activite.delete()
+        rouvrir_mois([activite.date])
+        recalculer_classement([activite.chauffeur_id], [activite.date])
+        invalider_indicateurs(activites=[(activite.chauffeur_id, activite.date)])
         
         messages.success(request, f'Activité de {chauffeur_nom} supprimée avec succès.')
     except Exception as e:
@@ -1292,29 +1249,56 @@ def supprimer_activite(request, activite_id, type_activite):
     return redirect('admin_dashboard:gestion_activites')
 
 
+# Liste à laquelle revenir après une purge, par type
+RETOURS_PURGE = {
+    'activites': 'admin_dashboard:gestion_activites',
+    'demandes': 'admin_dashboard:gestion_demandes_modification',
+    'pannes': 'admin_dashboard:gestion_pannes',
+}
+
+
+def _purge_massive(request, type_purge, libelle):
+    """
+    Estime puis lance une purge massive sur les chauffeurs accessibles
+    
+    GET : page de confirmation avec l'estimation du coût (dry-run : lignes et
+    lots par table, rien n'est supprimé). POST : la suppression est lancée en
+    arrière-plan par lots courts (voir activities.purge), puis la page de
+    suivi affiche sa progression ; les chauffeurs continuent d'enregistrer
+    leurs activités pendant la purge.
+    
+    Args:
+        request: Requête du superviseur
+        type_purge (str): Type d'opération (voir OperationPurge.TYPE_CHOICES)
+        libelle (str): Description des données supprimées
+    """
+    retour = RETOURS_PURGE[type_purge]
+    # Supprimer seulement les données des chauffeurs accessibles
+    chauffeurs_accessibles = get_chauffeurs_for_user(request.user)
+    parametres = {'chauffeur_ids': list(chauffeurs_accessibles.values_list('id', flat=True))}
+    
+    if request.method != 'POST':
+        return render(request, 'admin_dashboard/purge.html', {
+            'libelle': libelle,
+            'estimation': estimer_purge(type_purge, parametres),
+            'retour': retour,
+        })
+    
+    try:
+        operation = lancer_purge(type_purge, parametres, demandeur=request.user)
+    except Exception as e:
+        messages.error(request, f'Erreur lors de la suppression: {str(e)}')
+        return redirect(retour)
+    
+    return redirect('admin_dashboard:suivi_purge', operation_id=operation.pk)
+
+
 @supervisor_required
 def supprimer_toutes_activites(request):
     """
     Vue pour supprimer toutes les activités (prises et remises de clés)
     """
-    if request.method == 'POST':
-        try:
-            # Supprimer seulement les activités des chauffeurs accessibles
-            chauffeurs_accessibles = get_chauffeurs_for_user(request.user)
-            
-            # Supprimer les prises de clés
-            prises_count = PriseCles.objects.filter(chauffeur__in=chauffeurs_accessibles).count()
-            PriseCles.objects.filter(chauffeur__in=chauffeurs_accessibles).delete()
-            
-            # Supprimer les remises de clés
-            remises_count = RemiseCles.objects.filter(chauffeur__in=chauffeurs_accessibles).count()
-            RemiseCles.objects.filter(chauffeur__in=chauffeurs_accessibles).delete()
-            
-            messages.success(request, f'Toutes les activités ont été supprimées ({prises_count} prises, {remises_count} remises).')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de la suppression: {str(e)}')
-    
-    return redirect('admin_dashboard:gestion_activites')
+    return _purge_massive(request, 'activites', 'Toutes les activités')
 
 
 @supervisor_required
@@ -1328,6 +1312,7 @@ def supprimer_demande_modification(request, demande_id):
         demande = get_object_or_404(DemandeModification, id=demande_id, chauffeur__in=chauffeurs_accessibles)
         chauffeur_nom = demande.chauffeur.nom_complet
         demande.delete()
+        invalider_indicateurs([demande.chauffeur_id])
         
         messages.success(request, f'Demande de modification de {chauffeur_nom} supprimée avec succès.')
     except Exception as e:
@@ -1341,18 +1326,7 @@ def reinitialiser_demandes_modification(request):
     """
     Vue pour réinitialiser toutes les demandes de modification
     """
-    if request.method == 'POST':
-        try:
-            # Supprimer seulement les demandes des chauffeurs accessibles
-            chauffeurs_accessibles = get_chauffeurs_for_user(request.user)
-            demandes_count = DemandeModification.objects.filter(chauffeur__in=chauffeurs_accessibles).count()
-            DemandeModification.objects.filter(chauffeur__in=chauffeurs_accessibles).delete()
-            
-            messages.success(request, f'Toutes les demandes de modification ont été supprimées ({demandes_count} demandes).')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de la suppression: {str(e)}')
-    
-    return redirect('admin_dashboard:gestion_demandes_modification')
+    return _purge_massive(request, 'demandes', 'Toutes les demandes de modification')
 
 
 @supervisor_required
@@ -1364,6 +1338,7 @@ def supprimer_panne(request, panne_id):
         panne = get_object_or_404(Panne, id=panne_id)
         chauffeur_nom = panne.chauffeur.nom_complet
         panne.delete()
+        invalider_indicateurs([panne.chauffeur_id])
         
         messages.success(request, f'Panne de {chauffeur_nom} supprimée avec succès.')
     except Exception as e:
@@ -1377,18 +1352,151 @@ def supprimer_toutes_pannes(request):
     """
     Vue pour supprimer toutes les pannes
     """
-    if request.method == 'POST':
-        try:
-            # Supprimer seulement les pannes des chauffeurs accessibles
-            chauffeurs_accessibles = get_chauffeurs_for_user(request.user)
-            pannes_count = Panne.objects.filter(chauffeur__in=chauffeurs_accessibles).count()
-            Panne.objects.filter(chauffeur__in=chauffeurs_accessibles).delete()
-            
-            messages.success(request, f'Toutes les pannes ont été supprimées ({pannes_count} pannes).')
-        except Exception as e:
-            messages.error(request, f'Erreur lors de la suppression: {str(e)}')
+    return _purge_massive(request, 'pannes', 'Toutes les pannes')
+
+
+@supervisor_required
+def recherche_pannes(request):
+    """
+    Recherche plein texte dans les pannes et problèmes mécaniques du périmètre (JSON)
     
-    return redirect('admin_dashboard:dashboard_admin')
+    Paramètres GET :
+    - q : termes recherchés, en préfixe (ex. "frein pneu")
+    - type : panne, prise ou remise (répétable, défaut : tous)
+    - limite : nombre de résultats (défaut 50, au plus 200)
+    """
+    types = request.GET.getlist('type') or None
+    if types and not set(types) <= set(TYPES_RECHERCHE):
+        return JsonResponse({'erreur': 'Type inconnu'}, status=400)
+    try:
+        limite = min(max(int(request.GET.get('limite', 50)), 1), 200)
+    except ValueError:
+        return JsonResponse({'erreur': 'Paramètre limite invalide'}, status=400)
+    
+    resultats = rechercher_problemes(
+        request.GET.get('q', ''), chauffeurs=get_chauffeurs_for_user(request.user), types=types, limite=limite
+    )
+    return JsonResponse({
+        'q': request.GET.get('q', ''),
+        'resultats': [{**resultat, 'date': resultat['date'].isoformat()} for resultat in resultats],
+    })
+
+
+def _operation_purge(request, operation_id):
+    """Opération de purge visible par l'utilisateur (un superviseur ne voit que les siennes)"""
+    operations = OperationPurge.objects.all()
+    if not request.user.is_superuser:
+        operations = operations.filter(demandeur=request.user)
+    return get_object_or_404(operations, id=operation_id)
+
+
+@supervisor_required
+def suivi_purge(request, operation_id):
+    """
+    Page de suivi d'une purge : barre de progression mise à jour par
+    interrogation de statut_purge jusqu'à la fin de l'opération
+    """
+    operation = _operation_purge(request, operation_id)
+    return render(request, 'admin_dashboard/purge.html', {
+        'libelle': operation.get_type_purge_display(),
+        'operation': operation,
+        'retour': RETOURS_PURGE.get(operation.type_purge, 'admin_dashboard:dashboard_admin'),
+    })
+
+
+@supervisor_required
+def statut_purge(request, operation_id):
+    """
+    Progression d'une purge en arrière-plan (JSON, interrogé périodiquement)
+    
+    Un superviseur ne voit que les opérations qu'il a lancées.
+    """
+    operation = _operation_purge(request, operation_id)
+    
+    return JsonResponse({
+        'id': operation.pk,
+        'type': operation.type_purge,
+        'statut': operation.statut,
+        'total_estime': operation.total_estime,
+        'lignes_supprimees': operation.lignes_supprimees,
+        'pourcentage': operation.pourcentage,
+        'etape_courante': operation.etape_courante,
+        'erreur': operation.erreur,
+    })
+
+
+@supervisor_required
+def classement(request):
+    """
+    Classement des chauffeurs du périmètre (JSON)
+    
+    Paramètres GET :
+    - fenetre : semaine, mois (défaut) ou annee
+    - critere : recette (défaut), taux (objectif atteint) ou jours
+    - limite : nombre de chauffeurs (défaut 10, au plus 100)
+    - date : jour contenu dans la fenêtre (AAAA-MM-JJ, défaut aujourd'hui)
+    - chauffeur : identifiant dont le rang est aussi retourné
+    """
+    fenetre = request.GET.get('fenetre', 'mois')
+    critere = request.GET.get('critere', 'recette')
+    if fenetre not in FENETRES or critere not in CRITERES:
+        return JsonResponse({'erreur': 'Fenêtre ou critère inconnu'}, status=400)
+    try:
+        limite = min(max(int(request.GET.get('limite', 10)), 1), 100)
+        jour = date.fromisoformat(request.GET['date']) if request.GET.get('date') else date.today()
+    except ValueError:
+        return JsonResponse({'erreur': 'Paramètre limite ou date invalide'}, status=400)
+    
+    perimetre, chauffeurs = perimetre_utilisateur(request.user)
+    chauffeurs = None if perimetre == 'tous' else chauffeurs
+    lignes = meilleurs_chauffeurs(fenetre, jour, critere, limite, chauffeurs=chauffeurs)
+    donnees = {
+        'fenetre': fenetre,
+        'critere': critere,
+        'date': jour.isoformat(),
+        'classement': [
+            {
+                'rang': ligne['rang'],
+                'chauffeur_id': ligne['chauffeur'].pk,
+                'nom': ligne['chauffeur'].nom_complet,
+                'recette': ligne['recette'],
+                'objectif': ligne['objectif'],
+                'taux': ligne['taux'],
+                'jours': ligne['jours'],
+            }
+            for ligne in lignes
+        ],
+    }
+    chauffeur_id = request.GET.get('chauffeur', '')
+    if chauffeur_id.isdigit():
+        donnees['rang_chauffeur'] = rang_chauffeur(int(chauffeur_id), fenetre, jour, critere, chauffeurs=chauffeurs)
+    return JsonResponse(donnees)
+
+
+@supervisor_required
+def indicateurs_json(request):
+    """
+    Indicateurs du jour du périmètre de l'utilisateur (JSON)
+    
+    Mêmes chiffres et même cache que les tableaux de bord.
+    
+    Paramètres GET :
+    - date : jour de référence (AAAA-MM-JJ, défaut aujourd'hui)
+    """
+    try:
+        jour = date.fromisoformat(request.GET['date']) if request.GET.get('date') else date.today()
+    except ValueError:
+        return JsonResponse({'erreur': 'Paramètre date invalide'}, status=400)
+    if jour < date.min + timedelta(days=7):
+        # Recettes de la semaine : les 7 jours précédents doivent exister
+        return JsonResponse({'erreur': 'Paramètre date hors limites'}, status=400)
+    
+    perimetre, chauffeurs = perimetre_utilisateur(request.user)
+    return JsonResponse({
+        'date': jour.isoformat(),
+        'perimetre': perimetre,
+        'indicateurs': indicateurs_du_jour(perimetre, chauffeurs, jour),
+    })
 
 
 @supervisor_required
@@ -1400,8 +1508,12 @@ def exporter_excel(request):
     - Période : jour, semaine, mois, année
     - Chauffeur : spécifique ou tous
     """
-    # Vérifier si openpyxl est disponible
-    if not OPENPYXL_AVAILABLE:
+    # Vérifier si openpyxl est disponible (import différé au premier export)
+    try:
+        import openpyxl
+        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+        from openpyxl.utils import get_column_letter
+    except ImportError:
         messages.error(request, "Le module openpyxl n'est pas installé. Veuillez installer openpyxl pour utiliser cette fonctionnalité.")
         return redirect('admin_dashboard:statistiques_recettes')
     
@@ -1432,20 +1544,14 @@ def exporter_excel(request):
         
         # Filtrage des données selon les permissions utilisateur
         chauffeurs_accessibles = get_chauffeurs_for_user(request.user)
-        chauffeur_filter = Q(chauffeur__in=chauffeurs_accessibles)
+        filtres = {'chauffeur__in': chauffeurs_accessibles}
         if chauffeur_id:
-            chauffeur_filter &= Q(chauffeur_id=chauffeur_id)
+            filtres['chauffeur_id'] = chauffeur_id
         
-        # Récupération des données
-        prises = PriseCles.objects.filter(
-            chauffeur_filter,
-            date__range=[date_debut, date_fin]
-        ).order_by('date', 'chauffeur__nom')
-        
-        remises = RemiseCles.objects.filter(
-            chauffeur_filter,
-            date__range=[date_debut, date_fin]
-        ).order_by('date', 'chauffeur__nom')
+        # Récupération des données (archive comprise si la période l'atteint)
+        prises = lignes_periode(PriseCles, date_debut, date_fin, ordre=['date', 'chauffeur__nom'], **filtres)
+        remises = lignes_periode(RemiseCles, date_debut, date_fin, ordre=['date', 'chauffeur__nom'], **filtres)
+        remises_par_jour = {(remise.chauffeur_id, remise.date): remise for remise in remises}
         
         # Création du fichier Excel
         wb = openpyxl.Workbook()
@@ -1481,10 +1587,7 @@ def exporter_excel(request):
         row = 2
         for prise in prises:
             # Trouver la remise correspondante
-            remise = remises.filter(
-                chauffeur=prise.chauffeur,
-                date=prise.date
-            ).first()
+            remise = remises_par_jour.get((prise.chauffeur_id, prise.date))
             
             # Calcul de la performance
             performance = 0
@@ -1588,33 +1691,31 @@ def gestion_superviseurs(request):
     Returns:
         HttpResponse: Template de gestion des superviseurs
     """
-    from django.core.paginator import Paginator
-    
     # Récupération du groupe Superviseurs
     try:
         superviseurs_group = Group.objects.get(name='Superviseurs')
-        superviseurs = User.objects.filter(groups=superviseurs_group).order_by('username')
+        superviseurs = User.objects.filter(groups=superviseurs_group)
     except Group.DoesNotExist:
+        superviseurs_group = None
         superviseurs = User.objects.none()
         messages.warning(request, 'Le groupe "Superviseurs" n\'existe pas. Veuillez l\'initialiser.')
     
-    # Pagination des superviseurs
-    paginator = Paginator(superviseurs, 10)  # 10 superviseurs par page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination par curseur des superviseurs (10 par page) ; totaux en cache
+    # au plus PAGINATION_COMPTE_DUREE secondes
+    page_obj = paginer(request, superviseurs, ['username', 'id'], 10)
     
     # Récupération de tous les utilisateurs non-superviseurs avec pagination
-    non_superviseurs = User.objects.exclude(groups=superviseurs_group).order_by('username')
-    non_superviseurs_paginator = Paginator(non_superviseurs, 10)  # 10 utilisateurs par page
-    non_superviseurs_page = request.GET.get('non_superviseurs_page')
-    non_superviseurs_obj = non_superviseurs_paginator.get_page(non_superviseurs_page)
+    non_superviseurs = User.objects.exclude(groups=superviseurs_group) if superviseurs_group else User.objects.all()
+    non_superviseurs_obj = paginer(
+        request, non_superviseurs, ['username', 'id'], 10, parametre='non_superviseurs_curseur'
+    )
     
     context = {
         'superviseurs': page_obj,
         'page_obj': page_obj,
         'non_superviseurs': non_superviseurs_obj,
         'non_superviseurs_page_obj': non_superviseurs_obj,
-        'superviseurs_count': superviseurs.count(),
+        'superviseurs_count': page_obj.total,
     }
     
     return render(request, 'admin_dashboard/gestion_superviseurs.html', context)
@@ -1816,6 +1917,9 @@ def assigner_chauffeurs(request, superviseur_id):
                     errors.append(error_msg)
                     continue
             
+            # Le périmètre du superviseur a changé
+            invalider_indicateurs(perimetres=[perimetre_utilisateur(superviseur)[0]])
+            
             # Messages de succès/erreur
             total_final = AssignationSuperviseur.objects.filter(superviseur=superviseur, actif=True).count()
             if total_final > 0:
@@ -1878,14 +1982,8 @@ def detail_superviseur(request, superviseur_id):
     # Récupérer les chauffeurs assignés
     chauffeurs_assignes = AssignationSuperviseur.get_chauffeurs_assignes(superviseur)
     
-    # Statistiques du superviseur
-    stats = {
-        'total_chauffeurs': chauffeurs_assignes.count(),
-        'chauffeurs_actifs': chauffeurs_assignes.filter(actif=True).count(),
-        'total_prises_mois': get_activites_for_user(superviseur, PriseCles, date__gte=date.today().replace(day=1)).count(),
-        'total_remises_mois': get_activites_for_user(superviseur, RemiseCles, date__gte=date.today().replace(day=1)).count(),
-        'recettes_mois': get_activites_for_user(superviseur, RemiseCles, date__gte=date.today().replace(day=1)).aggregate(total=Sum('recette_realisee'))['total'] or 0,
-    }
+    # Statistiques du superviseur (une requête par table, voir activities.indicateurs)
+    stats = compiler_indicateurs(declarations_du_mois(date.today()), chauffeurs_assignes)
     
     # Activités récentes des chauffeurs assignés
     activites_recentes = []
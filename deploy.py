@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# =============================================================================
+# DÉPLOIEMENT INCRÉMENTAL - Gaboma Driver App
+# =============================================================================
+"""
+Orchestrateur de déploiement : n'exécute que les étapes utiles
+
+Appelé par l'exécuteur du webhook (gabomadriver_app.deploiement) ou à la
+main (bash deploy.sh, python deploy.py). Après le pull, la plage de commits
+depuis le dernier déploiement réussi est comparée, et chaque étape n'est
+lancée que si ses entrées ont changé :
+- dépendances : empreinte SHA-256 de requirements.txt
+- migrations : fichiers ajoutés ou modifiés sous */migrations/
+- fichiers statiques : changements sous static/ ou */static/, ou manifeste
+  absent (collecte incrémentale sans --clear, noms empreintés et variantes
+  compressées, puis vérification des références des templates)
+- rechargement WSGI : tout changement autre que de la documentation (*.md)
+- préchauffage (manage.py warmup) : après chaque rechargement ; avec
+  DEPLOY_URL_PRECHAUFFAGE (URL séparées par des virgules), le site est
+  appelé pour démarrer aussitôt le processus web rechargé
+
+La durée de chaque étape est affichée. L'état du dernier déploiement
+réussi (commit, empreinte des dépendances) est conservé dans
+deploiements/deploy_etat.json ; sans cet état, toutes les étapes sont lancées.
+
+Usage :
+    python deploy.py
+    python deploy.py --force      # toutes les étapes
+    python deploy.py --dry-run    # plan d'exécution sans rien lancer
+    python deploy.py --sans-pull  # déployer le code déjà présent
+
+Codes de sortie : 0 si toutes les étapes ont réussi, 1 si une étape
+bloquante (mise à jour du code, dépendances, migrations) a échoué,
+CODE_PARTIEL (2) si seule une étape non bloquante a échoué : le code est
+en place mais l'état n'est pas enregistré, tout est rejoué au push suivant.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+
+# Sur PythonAnywhere, ajuster ces chemins selon votre configuration
+PROJECT_DIR = Path('/home/Gabomazone/Gaboma-Driver')
+if not PROJECT_DIR.is_dir():
+    PROJECT_DIR = Path(__file__).resolve().parent
+WSGI_FILE = Path(os.environ.get('DEPLOY_WSGI_FILE', '/var/www/gabomazone_pythonanywhere_com_wsgi.py'))
+ETAT = Path(os.environ.get('DEPLOY_ETAT_DIR', PROJECT_DIR / 'deploiements')) / 'deploy_etat.json'
+# Manifeste des noms empreintés (STATIC_ROOT) : sans lui, {% static %} échoue
+MANIFESTE_STATIQUES = PROJECT_DIR / 'staticfiles' / 'staticfiles.json'
+# Code de sortie d'un déploiement partiel (étape non bloquante en échec)
+CODE_PARTIEL = 2
+URLS_PRECHAUFFAGE = [url for url in os.environ.get('DEPLOY_URL_PRECHAUFFAGE', '').split(',') if url]
+
+
+# =============================================================================
+# AFFICHAGE ET COMMANDES
+# =============================================================================
+
+def log(niveau, message):
+    print(f"[{niveau}] {message}", flush=True)
+
+
+def executer(commande, capturer=False):
+    """Lance une commande dans le projet ; lève CalledProcessError en cas d'échec"""
+    resultat = subprocess.run(
+        commande,
+        cwd=str(PROJECT_DIR),
+        check=True,
+        text=True,
+        stdout=subprocess.PIPE if capturer else None,
+    )
+    return (resultat.stdout or '').strip()
+
+
+def git(*arguments):
+    return executer(['git', *arguments], capturer=True)
+
+
+def trouver_python():
+    """Python de l'environnement virtuel du projet, comme deploy.sh"""
+    for venv in (PROJECT_DIR / 'venv', PROJECT_DIR.parent / 'venv'):
+        candidat = venv / 'bin' / 'python'
+        if candidat.exists():
+            return str(candidat)
+    log('WARN', "Aucun environnement virtuel trouvé, utilisation de l'interpréteur courant")
+    return sys.executable
+
+
+def empreinte(chemin):
+    try:
+        return hashlib.sha256(chemin.read_bytes()).hexdigest()
+    except OSError:
+        return ''
+
+
+def lire_etat():
+    try:
+        return json.loads(ETAT.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def ecrire_etat(etat):
+    ETAT.parent.mkdir(parents=True, exist_ok=True)
+    temporaire = ETAT.with_suffix('.tmp')
+    temporaire.write_text(json.dumps(etat, indent=2), encoding='utf-8')
+    os.replace(temporaire, ETAT)
+
+
+# =============================================================================
+# ANALYSE DES CHANGEMENTS
+# =============================================================================
+
+def mettre_a_jour_code():
+    """git fetch + pull de la branche principale ; retourne le commit déployé"""
+    git('fetch', 'origin')
+    branche = 'main'
+    try:
+        git('show-ref', '--verify', '--quiet', 'refs/heads/main')
+    except subprocess.CalledProcessError:
+        branche = 'master'
+    log('INFO', f"Récupération de la branche {branche}...")
+    executer(['git', 'pull', '--ff-only', 'origin', branche])
+    return git('rev-parse', 'HEAD')
+
+
+def fichiers_modifies(depuis, jusqua):
+    """
+    Fichiers ajoutés, modifiés ou renommés entre deux commits
+
+    Returns:
+        list | None: Chemins relatifs, None si la plage est inconnue
+                     (premier déploiement, historique réécrit)
+    """
+    if not depuis:
+        return None
+    try:
+        git('merge-base', '--is-ancestor', depuis, jusqua)
+    except subprocess.CalledProcessError:
+        return None
+    sortie = git('diff', '--name-only', '--diff-filter=ACMR', depuis, jusqua)
+    return [ligne for ligne in sortie.splitlines() if ligne]
+
+
+def planifier(fichiers, etat, hash_requirements, force):
+    """
+    Décide des étapes à lancer
+
+    Returns:
+        dict: étape -> (à lancer, raison)
+    """
+    if force or fichiers is None:
+        raison = 'forcé' if force else 'plage de commits inconnue'
+        return {etape: (True, raison) for etape, *_ in ETAPES}
+
+    migrations = [f for f in fichiers if fnmatch(f, '*/migrations/*.py')]
+    statiques = [f for f in fichiers if f.startswith('static/') or '/static/' in f]
+    code = [f for f in fichiers if not f.endswith('.md')]
+    dependances = hash_requirements != etat.get('requirements')
+    manifeste_absent = not MANIFESTE_STATIQUES.exists()
+
+    return {
+        'dependances': (dependances, 'requirements.txt modifié' if dependances else 'requirements.txt inchangé'),
+        'migrations': (bool(migrations), f"{len(migrations)} fichier(s) de migration" if migrations else 'aucune migration'),
+        # Une mise à jour de Django peut changer les fichiers statiques de l'admin
+        'statiques': (
+            bool(statiques) or dependances or manifeste_absent,
+            f"{len(statiques)} fichier(s) statique(s)" if statiques else (
+                'dépendances modifiées' if dependances else
+                'manifeste absent' if manifeste_absent else 'aucun fichier statique'
+            ),
+        ),
+        'rechargement': (bool(code), f"{len(code)} fichier(s) modifié(s)" if code else 'documentation seulement'),
+        'prechauffage': (bool(code), 'après rechargement' if code else 'aucun rechargement'),
+    }
+
+
+# =============================================================================
+# ÉTAPES
+# =============================================================================
+
+def etape_dependances(python):
+    executer([python, '-m', 'pip', 'install', '-r', 'requirements.txt', '--quiet', '--upgrade'])
+
+
+def etape_migrations(python):
+    executer([python, 'manage.py', 'migrate', '--noinput'])
+
+
+def etape_statiques(python):
+    # Sans --clear : collectstatic ne copie que les fichiers plus récents
+    # (les variantes .gz/.br d'un nom empreinté déjà compressé sont gardées)
+    executer([python, 'manage.py', 'collectstatic', '--noinput'])
+    executer([python, 'manage.py', 'verifier_statiques'])
+
+
+def etape_rechargement(python):
+    # Sur PythonAnywhere, toucher le fichier WSGI force le rechargement
+    if not WSGI_FILE.exists():
+        log('WARN', f"Fichier WSGI non trouvé à {WSGI_FILE}, rechargement manuel nécessaire")
+        return
+    WSGI_FILE.touch()
+
+
+def etape_prechauffage(python):
+    commande = [python, 'manage.py', 'warmup']
+    for url in URLS_PRECHAUFFAGE:
+        commande += ['--url', url]
+    executer(commande)
+
+
+# (clé, libellé, fonction, bloquante) : un échec non bloquant n'arrête pas
+# le déploiement, mais l'état n'est pas enregistré (étape rejouée au suivant)
+ETAPES = [
+    ('dependances', 'Installation des dépendances Python', etape_dependances, True),
+    ('migrations', 'Application des migrations', etape_migrations, True),
+    ('statiques', 'Collecte des fichiers statiques', etape_statiques, False),
+    ('rechargement', "Rechargement de l'application Django", etape_rechargement, False),
+    ('prechauffage', 'Préchauffage des vues, templates et indicateurs', etape_prechauffage, False),
+]
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Déploiement incrémental de Gaboma Driver')
+    arguments.add_argument('--force', action='store_true', help='Lancer toutes les étapes')
+    arguments.add_argument('--dry-run', action='store_true', help="Afficher le plan sans l'exécuter")
+    arguments.add_argument('--sans-pull', action='store_true', help='Ne pas mettre à jour le code')
+    options = arguments.parse_args()
+
+    debut = time.monotonic()
+    log('INFO', f"Démarrage du déploiement dans : {PROJECT_DIR}")
+    etat = lire_etat()
+
+    try:
+        if options.sans_pull or options.dry_run:
+            commit = git('rev-parse', 'HEAD')
+        else:
+            commit = mettre_a_jour_code()
+    except subprocess.CalledProcessError:
+        log('ERROR', "Échec de la mise à jour du code depuis GitHub")
+        return 1
+
+    # Plage comparée : depuis le dernier déploiement réussi (un déploiement
+    # en échec est ainsi entièrement rejoué au push suivant)
+    fichiers = fichiers_modifies(etat.get('commit'), commit)
+    hash_requirements = empreinte(PROJECT_DIR / 'requirements.txt')
+    plan = planifier(fichiers, etat, hash_requirements, options.force)
+    log('INFO', f"Commit {commit[:7]}" + (
+        f", {len(fichiers)} fichier(s) modifié(s) depuis {etat['commit'][:7]}" if fichiers is not None else ''
+    ))
+
+    python = trouver_python()
+    complet = True
+    for cle, libelle, fonction, bloquante in ETAPES:
+        lancer, raison = plan[cle]
+        if not lancer or options.dry_run:
+            log('INFO', f"{libelle} : {'à lancer' if lancer else 'ignorée'} ({raison})")
+            continue
+        log('INFO', f"{libelle} ({raison})...")
+        debut_etape = time.monotonic()
+        try:
+            fonction(python)
+        except (subprocess.CalledProcessError, OSError) as e:
+            if bloquante:
+                log('ERROR', f"Échec de l'étape « {libelle} » : {e}")
+                return 1
+            log('WARN', f"Échec de l'étape « {libelle} » : {e}")
+            complet = False
+            continue
+        log('INFO', f"{libelle} : {time.monotonic() - debut_etape:.1f} s")
+
+    if not complet:
+        log('WARN', f"Déploiement partiel en {time.monotonic() - debut:.1f} s : "
+                    "étape(s) en échec rejouée(s) au prochain déploiement")
+        return CODE_PARTIEL
+    if not options.dry_run:
+        ecrire_etat({'commit': commit, 'requirements': hash_requirements})
+    log('INFO', f"Déploiement terminé avec succès en {time.monotonic() - debut:.1f} s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class DriversConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'drivers'
+
+    def ready(self):
+        # Administration personnalisée des utilisateurs (admin_custom.py) :
+        # inscrite au démarrage, après la découverte des modules admin
+        # (django.contrib.admin est chargé avant drivers), et non par un
+        # import * dans l'URLconf chargée à la première requête
+        import admin_custom  # noqa: F401
@@ -8,6 +8,7 @@ from django.db import transaction
 from django.contrib import messages
 from drivers.models import Chauffeur, AssignationSuperviseur
 from activities.models import DemandeModification
+from activities.purge import estimer_etapes, plan_compte_chauffeur, purger_etapes
 
 
 class Command(BaseCommand):
@@ -84,6 +85,10 @@ class Command(BaseCommand):
         
         for user in users_to_delete:
             try:
+                # Les données du chauffeur sont purgées par lots courts avant
+                # la transaction finale, pour ne pas bloquer les autres chauffeurs
+                self.purge_chauffeur_data(user)
+                
                 with transaction.atomic():
                     self.delete_user_safely(user)
                     deleted_count += 1
@@ -117,6 +122,13 @@ class Command(BaseCommand):
             try:
                 chauffeur = user.chauffeur
                 self.stdout.write(f"  → Chauffeur associé : {chauffeur.nom_complet} (sera supprimé)")
+                
+                # Coût estimé de la purge de ses données
+                estimation = estimer_etapes(plan_compte_chauffeur(chauffeur))
+                for etape in estimation['etapes']:
+                    if etape['lignes']:
+                        self.stdout.write(f"    · {etape['modele']} : {etape['lignes']} ligne(s), {etape['lots']} lot(s)")
+                self.stdout.write(f"    · Total : {estimation['total']} ligne(s) en {estimation['lots']} lot(s)")
             except Chauffeur.DoesNotExist:
                 self.stdout.write(f"  → Aucun chauffeur associé")
             
@@ -138,6 +150,20 @@ class Command(BaseCommand):
             if count > 0:
                 self.stdout.write(f"  → Demandes de modification traitées : {count} (seront mises à NULL)")
     
+    def purge_chauffeur_data(self, user):
+        """Supprime par lots les données du chauffeur associé (si existe)"""
+        try:
+            chauffeur = user.chauffeur
+        except Chauffeur.DoesNotExist:
+            return
+        
+        def progression(modele, supprimes):
+            self.stdout.write(f"    … {modele._meta.verbose_name_plural} : {supprimes} ligne(s) supprimée(s)")
+        
+        total = purger_etapes(plan_compte_chauffeur(chauffeur), progression=progression)
+        if total:
+            self.stdout.write(f"    → {total} ligne(s) de données du chauffeur supprimée(s) par lots")
+    
     def delete_user_safely(self, user):
         """Supprime un utilisateur de manière sécurisée"""
         
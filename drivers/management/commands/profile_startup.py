@@ -0,0 +1,158 @@
+# =============================================================================
+# COMMANDE DE GESTION - Profil du démarrage à froid de l'application
+# =============================================================================
+
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Démarrage mesuré dans un interpréteur neuf : ce que paie la première
+# requête après un rechargement (application WSGI puis URLconf et vues)
+SCRIPT_DEMARRAGE = """
+import json, sys, time
+debut = time.perf_counter()
+from gabomadriver_app.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+duree = time.perf_counter() - debut
+print(json.dumps({'duree': duree, 'modules': sorted(sys.modules)}))
+"""
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour mesurer le démarrage à froid de l'application
+
+    Lance l'application WSGI dans des interpréteurs neufs (python -X importtime)
+    et affiche le temps d'import par paquet et par module du projet. Échoue
+    si le démarrage dépasse DEMARRAGE_BUDGET ou si une dépendance lourde de
+    DEMARRAGE_IMPORTS_DIFFERES est chargée au démarrage : à lancer après une
+    modification des imports, ou depuis le déploiement.
+
+    Usage :
+    python manage.py profile_startup
+    python manage.py profile_startup --limite 30 --repetitions 5
+    python manage.py profile_startup --budget 0.8
+    """
+
+    help = "Mesure le démarrage à froid de l'application (temps d'import par module)"
+
+    def add_arguments(self, parser):
+        """Définit les arguments de la commande"""
+        parser.add_argument(
+            '--repetitions',
+            type=int,
+            default=3,
+            help='Nombre de démarrages mesurés (le plus rapide est retenu)'
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=15,
+            help='Nombre de lignes affichées par tableau'
+        )
+        parser.add_argument(
+            '--budget',
+            type=float,
+            default=settings.DEMARRAGE_BUDGET,
+            help='Durée maximale du démarrage en secondes (0 : pas de vérification)'
+        )
+
+    def handle(self, *args, **options):
+        """Mesure les démarrages, affiche le profil et vérifie le budget"""
+        durees = []
+        for _ in range(max(options['repetitions'], 1)):
+            resultat, imports = self._demarrer()
+            durees.append(resultat['duree'])
+
+        # Profil du dernier démarrage (les précédents ont chauffé le disque,
+        # pas l'interpréteur : chaque mesure part d'un processus neuf)
+        self._afficher_paquets(imports, options['limite'])
+        self._afficher_projet(imports, options['limite'])
+
+        duree = min(durees)
+        self.stdout.write(
+            f"\nDémarrage à froid : {duree * 1000:.0f} ms "
+            f"(meilleur de {len(durees)}, {len(resultat['modules'])} modules chargés)"
+        )
+
+        erreurs = []
+        differes = [
+            nom for nom in settings.DEMARRAGE_IMPORTS_DIFFERES
+            if nom in resultat['modules']
+        ]
+        if differes:
+            erreurs.append(f"import(s) lourd(s) chargé(s) au démarrage : {', '.join(differes)}")
+        if options['budget'] and duree > options['budget']:
+            erreurs.append(f"budget de {options['budget'] * 1000:.0f} ms dépassé")
+        if erreurs:
+            raise CommandError(' ; '.join(erreurs))
+        if options['budget']:
+            self.stdout.write(self.style.SUCCESS(f"Budget de {options['budget'] * 1000:.0f} ms respecté"))
+
+    def _demarrer(self):
+        """
+        Démarre l'application dans un interpréteur neuf
+
+        Returns:
+            tuple: (résultat du script, liste de (module, propre µs, cumulé µs, profondeur))
+        """
+        environnement = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ['DJANGO_SETTINGS_MODULE'])
+        processus = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', SCRIPT_DEMARRAGE],
+            cwd=str(settings.BASE_DIR),
+            env=environnement,
+            capture_output=True,
+            text=True,
+        )
+        if processus.returncode != 0:
+            traceback = processus.stderr.strip().splitlines()[-1:] or ['erreur inconnue']
+            raise CommandError(f"Démarrage de l'application impossible : {traceback[0]}")
+        return json.loads(processus.stdout.strip().splitlines()[-1]), self._lire_importtime(processus.stderr)
+
+    @staticmethod
+    def _lire_importtime(sortie):
+        """Lit les lignes « import time: propre | cumulé | module » de -X importtime"""
+        imports = []
+        for ligne in sortie.splitlines():
+            if not ligne.startswith('import time:'):
+                continue
+            propre, cumule, nom = ligne[len('import time:'):].split('|')
+            if not propre.strip().isdigit():
+                continue  # ligne d'en-tête
+            # Indentation de deux espaces par niveau d'import imbriqué
+            profondeur = (len(nom) - len(nom.lstrip()) - 1) // 2
+            imports.append((nom.strip(), int(propre), int(cumule), profondeur))
+        return imports
+
+    def _afficher_paquets(self, imports, limite):
+        """Temps propre cumulé par paquet de premier niveau (django, openpyxl...)"""
+        par_paquet = defaultdict(int)
+        for nom, propre, _, _ in imports:
+            par_paquet[nom.split('.')[0]] += propre
+        total = sum(par_paquet.values()) or 1
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Temps d'import par paquet"))
+        for paquet, temps in sorted(par_paquet.items(), key=lambda p: -p[1])[:limite]:
+            self.stdout.write(f"  {temps / 1000:8.1f} ms  {temps * 100 / total:5.1f} %  {paquet}")
+
+    def _afficher_projet(self, imports, limite):
+        """Modules du projet, avec le temps de tout ce qu'ils importent"""
+        locaux = {
+            entree.name.removesuffix('.py')
+            for entree in settings.BASE_DIR.iterdir()
+            if entree.suffix == '.py' or (entree / '__init__.py').exists()
+        }
+        modules = [
+            (nom, propre, cumule) for nom, propre, cumule, _ in imports
+            if nom.split('.')[0] in locaux
+        ]
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Modules du projet (temps cumulé)"))
+        for nom, propre, cumule in sorted(modules, key=lambda m: -m[2])[:limite]:
+            self.stdout.write(f"  {cumule / 1000:8.1f} ms  (propre {propre / 1000:5.1f} ms)  {nom}")
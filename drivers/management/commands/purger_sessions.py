@@ -0,0 +1,75 @@
+# =============================================================================
+# COMMANDE DE GESTION - Suppression par lots des sessions expirées
+# =============================================================================
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from activities.purge import purger_par_lots
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour supprimer les sessions expirées de django_session
+
+    Remplace clearsessions, qui supprime toutes les sessions expirées en une
+    seule requête : ici chaque lot de SESSIONS_PURGE_TAILLE_LOT lignes a sa
+    propre transaction courte, suivie d'une pause, pour que les pages
+    consultées pendant le nettoyage n'attendent pas le verrou d'écriture
+    SQLite. À planifier chaque nuit (tâche planifiée PythonAnywhere).
+    Sans objet avec SESSION_STOCKAGE=cookies (aucune session en base) ;
+    avec cache_db, les copies en cache expirent d'elles-mêmes.
+
+    Usage :
+    python manage.py purger_sessions
+    python manage.py purger_sessions --taille-lot 200 --pause 0.2
+    python manage.py purger_sessions --dry-run
+    """
+
+    help = 'Supprime par lots les sessions expirées'
+
+    def add_arguments(self, parser):
+        """Définit les arguments de la commande"""
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=settings.SESSIONS_PURGE_TAILLE_LOT,
+            help='Nombre de sessions supprimées par transaction'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=None,
+            help='Pause en secondes entre deux lots (défaut : PURGE_PAUSE)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compter les sessions expirées sans rien supprimer'
+        )
+
+    def handle(self, *args, **options):
+        """Supprime les sessions expirées et affiche le bilan"""
+        if settings.SESSION_ENGINE.endswith('signed_cookies'):
+            self.stdout.write("Sessions stockées dans les cookies : rien à nettoyer en base")
+            return
+
+        expirees = Session.objects.filter(expire_date__lt=timezone.now())
+        if options['dry_run']:
+            self.stdout.write(f"{expirees.count()} session(s) expirée(s)")
+            return
+
+        lots = 0
+
+        def progression(supprimees):
+            nonlocal lots
+            lots += 1
+            if options['verbosity'] >= 2:
+                self.stdout.write(f"  lot {lots} : {supprimees} session(s)")
+
+        total = purger_par_lots(expirees, options['taille_lot'], options['pause'], progression)
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} session(s) expirée(s) supprimée(s) en {lots} lot(s)"
+        ))
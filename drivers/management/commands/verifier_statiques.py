@@ -0,0 +1,117 @@
+# =============================================================================
+# COMMANDE DE GESTION - Vérification des références aux fichiers statiques
+# =============================================================================
+
+import json
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+
+from gabomadriver_app.statiques import EXTENSIONS_COMPRESSIBLES, VARIANTES
+
+# {% static 'css/style.css' %} ou {% static "js/main.js" %}
+REFERENCE_STATIC = re.compile(r"""{%\s*static\s+(?P<argument>\S+)""")
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour vérifier les fichiers statiques collectés
+
+    Parcourt les templates du projet et vérifie que chaque {% static %}
+    désigne un fichier du manifeste (staticfiles.json), présent dans
+    STATIC_ROOT sous son nom empreinté. Signale aussi les chemins écrits en
+    dur sous STATIC_URL (ils contournent l'empreinte, donc le cache
+    immuable) et les fichiers textuels sans variante précompressée.
+    Lancée par deploy.py après collectstatic.
+
+    Usage :
+    python manage.py verifier_statiques
+    python manage.py verifier_statiques -v 2   # détail de chaque référence
+    """
+
+    help = 'Vérifie que les templates ne référencent que des fichiers statiques empreintés'
+
+    def handle(self, *args, **options):
+        """Contrôle les références et échoue si l'une n'est pas résolue"""
+        self.verbosity = options['verbosity']
+        manifeste = staticfiles_storage.read_manifest()
+        if manifeste is None:
+            raise CommandError(
+                f"Manifeste absent de {settings.STATIC_ROOT} : lancer python manage.py collectstatic"
+            )
+        empreintes = json.loads(manifeste).get('paths', {})
+
+        directe = re.compile(r"""(?:href|src)\s*=\s*["']/?%s""" % re.escape(settings.STATIC_URL.lstrip('/')))
+        erreurs = []
+        avertissements = []
+        verifiees = 0
+        for template, numero, ligne in self._lignes_templates():
+            origine = f"{template}:{numero}"
+            if directe.search(ligne):
+                erreurs.append(f"{origine} : chemin statique écrit en dur (utiliser {{% static %}})")
+            for reference in REFERENCE_STATIC.finditer(ligne):
+                argument = reference.group('argument')
+                if argument[0] not in '\'"':
+                    avertissements.append(f"{origine} : référence dynamique {argument} non vérifiable")
+                    continue
+                nom = argument.strip('\'"')
+                verifiees += 1
+                erreur = self._verifier(nom, empreintes, avertissements, origine)
+                if erreur:
+                    erreurs.append(f"{origine} : {nom} {erreur}")
+
+        for message in avertissements:
+            self.stdout.write(self.style.WARNING(message))
+        for message in erreurs:
+            self.stderr.write(message)
+        if erreurs:
+            raise CommandError(f"{len(erreurs)} référence(s) statique(s) non résolue(s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"{verifiees} référence(s) statique(s) vérifiée(s), {len(empreintes)} fichier(s) au manifeste"
+        ))
+
+    def _verifier(self, nom, empreintes, avertissements, origine):
+        """
+        Vérifie une référence {% static %}
+
+        Returns:
+            str | None: Erreur, None si la référence est résolue
+        """
+        nom_empreinte = empreintes.get(nom)
+        if nom_empreinte is None:
+            return "absent du manifeste (fichier manquant ou collectstatic à relancer)"
+        chemin = staticfiles_storage.path(nom_empreinte)
+        if not os.path.isfile(chemin):
+            return f"-> {nom_empreinte} absent de STATIC_ROOT"
+
+        variantes = [suffixe for _, suffixe in VARIANTES if os.path.isfile(chemin + suffixe)]
+        if os.path.splitext(nom)[1].lower() in EXTENSIONS_COMPRESSIBLES and not variantes:
+            avertissements.append(f"{origine} : {nom_empreinte} sans variante précompressée")
+        if self.verbosity >= 2:
+            self.stdout.write(f"  {nom} -> {nom_empreinte} {' '.join(variantes)}")
+        return None
+
+    @staticmethod
+    def _lignes_templates():
+        """Lignes des templates du projet (DIRS et dossiers templates des apps locales)"""
+        dossiers = list(engines['django'].engine.dirs) + [
+            dossier for dossier in get_app_template_dirs('templates')
+            if Path(dossier).is_relative_to(settings.BASE_DIR)
+        ]
+        for dossier in dossiers:
+            for chemin in sorted(Path(dossier).rglob('*')):
+                if not chemin.is_file():
+                    continue
+                try:
+                    lignes = chemin.read_text(encoding='utf-8').splitlines()
+                except UnicodeDecodeError:
+                    continue
+                nom = chemin.relative_to(dossier).as_posix()
+                for numero, ligne in enumerate(lignes, 1):
+                    yield nom, numero, ligne
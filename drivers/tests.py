@@ -0,0 +1,158 @@
+# =============================================================================
+# TESTS DE L'APPLICATION DRIVERS
+# =============================================================================
+
+import sqlite3
+from datetime import date
+from io import StringIO
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from admin_custom import CustomUserAdmin
+
+from activities.cloture import cloturer_mois
+from activities.models import ClotureMois, OperationPurge, PriseCles, RemiseCles
+from activities.tests import TestCaseCache, creer_chauffeur, creer_journee
+from drivers.models import AssignationSuperviseur, Chauffeur
+
+
+# =============================================================================
+# FORMULAIRES DE CLÉS (prendre_cles, remettre_cles)
+# =============================================================================
+
+class FormulairesClesTests(TestCaseCache):
+
+    def setUp(self):
+        super().setUp()
+        self.chauffeur = creer_chauffeur()
+        self.client.force_login(self.chauffeur.user)
+
+    def test_montants_hors_limites_refuses_sans_erreur_serveur(self):
+        for valeur in ('inf', 'nan', '1e999'):
+            with self.subTest(valeur=valeur):
+                reponse = self.client.post(reverse('drivers:prendre_cles'), {
+                    'objectif_recette': valeur, 'signature': 'Moussavou', 'cle_idempotence': f'prise-{valeur}',
+                })
+                self.assertEqual(reponse.status_code, 200)
+                self.assertContains(reponse, 'obligatoires')
+        self.assertFalse(PriseCles.objects.exists())
+
+    def test_prise_puis_remise(self):
+        self.client.post(reverse('drivers:prendre_cles'), {
+            'objectif_recette': '50 000', 'signature': 'Moussavou', 'cle_idempotence': 'prise-1',
+        })
+        reponse = self.client.post(reverse('drivers:remettre_cles'), {
+            'recette_realisee': 'inf', 'signature': 'Moussavou', 'cle_idempotence': 'remise-1',
+        })
+        self.assertEqual(reponse.status_code, 200)
+        self.assertFalse(RemiseCles.objects.exists())
+
+        self.client.post(reverse('drivers:remettre_cles'), {
+            'recette_realisee': '52000', 'signature': 'Moussavou', 'cle_idempotence': 'remise-2',
+        })
+        self.assertEqual(PriseCles.objects.get(date=date.today()).objectif_recette, 50000)
+        self.assertEqual(RemiseCles.objects.get(date=date.today()).recette_realisee, 52000)
+
+
+    def test_saisie_validee_malgre_cache_verrouille(self):
+        cache_partage = caches['default']
+        cache_partage._connexions()[1].execute('PRAGMA busy_timeout = 50')
+        verrou = sqlite3.connect(cache_partage._dossier / 'etiquettes.sqlite3', isolation_level=None)
+        verrou.execute('BEGIN IMMEDIATE')
+        try:
+            # Les invalidations s'exécutent à la validation, dans assertLogs
+            with self.assertLogs('gabomadriver_app.cache_partage', 'ERROR'), \
+                    self.captureOnCommitCallbacks(execute=True):
+                reponse = self.client.post(reverse('drivers:prendre_cles'), {
+                    'objectif_recette': '50000', 'signature': 'Moussavou', 'cle_idempotence': 'prise-1',
+                })
+        finally:
+            verrou.execute('ROLLBACK')
+            verrou.close()
+
+        self.assertEqual(reponse.status_code, 302)
+        self.assertTrue(PriseCles.objects.filter(date=date.today()).exists())
+
+
+# =============================================================================
+# ADMIN DES UTILISATEURS (admin_custom.CustomUserAdmin)
+# =============================================================================
+
+@override_settings(PURGE_EN_ARRIERE_PLAN=False)
+class AdminUtilisateursTests(TestCaseCache):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.admin)
+        self.chauffeur = creer_chauffeur()
+        for jour in (1, 2, 3):
+            creer_journee(self.chauffeur, date(2024, 3, jour))
+        cloturer_mois(2024, 3)
+
+    def supprimer(self, *users, **confirmation):
+        return self.client.post(reverse('admin:auth_user_changelist'), {
+            'action': 'delete_users_safely',
+            ACTION_CHECKBOX_NAME: [user.pk for user in users],
+            **confirmation,
+        })
+
+    def test_liste_en_nombre_de_requetes_constant(self):
+        for n in range(6):
+            chauffeur = creer_chauffeur(f'Chauffeur{n}', f'+2410700000{n}')
+            superviseur = User.objects.create_user(f'superviseur{n}', password='secret', is_staff=True)
+            AssignationSuperviseur.objects.create(superviseur=superviseur, chauffeur=chauffeur, assigne_par=self.admin)
+            AssignationSuperviseur.objects.create(superviseur=superviseur, chauffeur=self.chauffeur, assigne_par=self.admin)
+
+        # Utilisateur connecté, groupes du filtre, deux comptages, page annotée
+        with self.assertNumQueries(5):
+            reponse = self.client.get(reverse('admin:auth_user_changelist'))
+
+        self.assertContains(reponse, 'Superviseur (2 chauffeurs)', count=6)
+        self.assertContains(reponse, '12 objets liés')
+
+    def test_estimation_avant_suppression(self):
+        reponse = self.supprimer(self.chauffeur.user)
+
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse.context['lignes'][0]['estimation']['total'], 3 + 3 + 1)
+        self.assertContains(reponse, 'Total : 7 ligne(s)')
+        self.assertTrue(User.objects.filter(pk=self.chauffeur.user.pk, is_active=True).exists())
+        self.assertFalse(OperationPurge.objects.exists())
+
+    def test_compte_chauffeur_purge_par_lots(self):
+        sans_chauffeur = User.objects.create_user('ancien', password='secret')
+
+        reponse = self.supprimer(self.chauffeur.user, sans_chauffeur, post='yes')
+
+        self.assertRedirects(reponse, reverse('admin:auth_user_changelist'))
+        operation = OperationPurge.objects.get()
+        self.assertEqual((operation.type_purge, operation.statut, operation.demandeur), ('compte_chauffeur', 'terminee', self.admin))
+        # Historique, mois clôturé, profil et utilisateurs supprimés
+        self.assertEqual(PriseCles.objects.count() + RemiseCles.objects.count(), 0)
+        self.assertFalse(ClotureMois.objects.exists())
+        self.assertFalse(Chauffeur.objects.exists())
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['admin'])
+
+
+# =============================================================================
+# DÉMARRAGE À FROID (profile_startup, admin_custom)
+# =============================================================================
+
+class DemarrageTests(SimpleTestCase):
+
+    def test_budget_de_demarrage_respecte(self):
+        sortie = StringIO()
+        # CommandError si le budget est dépassé ou si un import différé est chargé
+        call_command('profile_startup', repetitions=3, budget=settings.DEMARRAGE_BUDGET, stdout=sortie)
+        self.assertIn('respecté', sortie.getvalue())
+
+    def test_admin_utilisateurs_inscrit_au_demarrage(self):
+        self.assertIsInstance(admin.site._registry[User], CustomUserAdmin)
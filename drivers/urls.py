@@ -17,6 +17,8 @@ Structure des URLs :
 - /prendre-cles/ : Prise de clés du matin
 - /remettre-cles/ : Remise de clés du soir
 - /nouvelle-activite/ : Sélection d'activité
+- /sw.js : Service worker du mode hors ligne
+- /synchroniser-cles/ : Synchronisation des clés saisies hors ligne
 - /exporter-pdf/ : Export PDF des activités
 - /activite-mensuelle/ : Calendrier mensuel
 - /demander-modification/ : Demande de modification
@@ -59,6 +61,10 @@ urlpatterns = [
     path('remettre-cles/', views.remettre_cles, name='remettre_cles'),
     path('nouvelle-activite/', views.nouvelle_activite, name='nouvelle_activite'),
     
+    # Mode hors ligne : service worker et synchronisation des clés en file
+    path('sw.js', views.service_worker, name='service_worker'),
+    path('synchroniser-cles/', views.synchroniser_cles, name='synchroniser_cles'),
+    
     # =============================================================================
     # FONCTIONNALITÉS AVANCÉES - Outils et rapports
     # =============================================================================
@@ -8,24 +8,29 @@ from django.contrib.auth import login, authenticate, logout  # Authentification
 from django.contrib.auth.decorators import login_required  # Décorateur pour protéger les vues
 from django.contrib.auth.models import User  # Modèle utilisateur Django
 from django.contrib import messages  # Système de messages flash
-from django.http import HttpResponse  # Réponses HTTP
+from django.conf import settings  # Paramètres du projet
+from django.http import HttpResponse, JsonResponse  # Réponses HTTP
+from django.views.decorators.http import require_POST  # Restriction aux requêtes POST
 from django.utils import timezone  # Gestion du temps et des fuseaux horaires
 from django.template.loader import render_to_string  # Rendu de templates en chaîne
 
 # Imports Python standard - Modules de la bibliothèque standard
+import json  # Décodage des lots de synchronisation
+import uuid  # Clés d'idempotence des formulaires de clés
 from datetime import datetime, date, timedelta  # Gestion des dates et heures
 
 # Imports locaux - Modèles de l'application
 from .models import Chauffeur  # Modèle chauffeur de l'app drivers
 from activities.models import PriseCles, RemiseCles, DemandeModification  # Modèles d'activités
+from activities.cloture import agreger_avec_clotures  # Agrégats (instantanés des mois clôturés)
+from activities.calendrier import grille_mois  # Calendriers mensuels en cache
+from activities.saisie_cles import enregistrer_saisie, lire_montant  # Écriture transactionnelle des clés
+from activities.synchronisation import appliquer_evenements  # Synchronisation hors ligne
+from activities.indicateurs import ETIQUETTE_INDICATEURS, invalider_indicateurs  # Invalidation des totaux en cache
+from gabomadriver_app.pagination import paginer  # Pagination par curseur
 
-# Import conditionnel de weasyprint - Gestion PDF
-# weasyprint est une bibliothèque optionnelle pour la génération de PDF
-try:
-    import weasyprint
-    WEASYPRINT_AVAILABLE = True
-except ImportError:
-    WEASYPRINT_AVAILABLE = False
+# weasyprint (génération PDF, optionnel) est importé dans exporter_activite_pdf :
+# la pile PDF n'est chargée qu'au premier export, pas au démarrage
 
 
 # =============================================================================
@@ -456,6 +461,23 @@ def dashboard_chauffeur(request):
 # GESTION DES CLÉS - Prise de clés du matin
 # =============================================================================
 
+# Niveaux des résultats de saisie (success, warning, danger, info) en messages flash
+NIVEAUX_MESSAGES = {'success': messages.SUCCESS, 'warning': messages.WARNING, 'danger': messages.ERROR}
+
+
+def _lire_entier(valeur):
+    """Montant saisi dans un formulaire de clés (None si illisible ou hors limites)"""
+    try:
+        return lire_montant(valeur)
+    except ValueError:
+        return None
+
+
+def _afficher_resultat(request, resultat):
+    """Affiche le résultat d'une saisie de clés en message flash"""
+    messages.add_message(request, NIVEAUX_MESSAGES.get(resultat.niveau, messages.INFO), resultat.message)
+
+
 @login_required  # Décorateur : seuls les utilisateurs connectés peuvent accéder
 def prendre_cles(request):
     """
@@ -470,6 +492,10 @@ def prendre_cles(request):
     - Objectif de recette obligatoire et positif
     - Signature électronique obligatoire
     
+    L'enregistrement passe par le service de saisie (activities.saisie_cles) :
+    une seule transaction, doublon détecté par la contrainte unique et
+    clé d'idempotence du formulaire (un double envoi n'enregistre rien de plus).
+    
     Args:
         request: Objet HttpRequest contenant les données du formulaire
         
@@ -486,63 +512,43 @@ def prendre_cles(request):
     # Date du jour pour les vérifications
     today = date.today()
     
-    # Vérification qu'aucune prise de clés n'a déjà été effectuée aujourd'hui
-    if PriseCles.objects.filter(chauffeur=chauffeur, date=today).exists():
-        messages.warning(request, 'Vous avez déjà pris les clés aujourd\'hui.')
-        return redirect('drivers:dashboard_chauffeur')
-    
     # Traitement du formulaire de prise de clés (méthode POST)
     if request.method == 'POST':
         # Récupération des données du formulaire
-        objectif_recette_str = request.POST.get('objectif_recette', '0')
-        objectif_recette = int(float(objectif_recette_str))  # Conversion en entier
-        plein_carburant = request.POST.get('plein_carburant') == 'on'  # Checkbox
-        probleme_mecanique = request.POST.get('probleme_mecanique', 'Aucun')
-        signature = request.POST.get('signature', '')
+        objectif_recette = _lire_entier(request.POST.get('objectif_recette', '0'))
+        signature = request.POST.get('signature', '').strip()
         
         # Validation des champs obligatoires
         if not objectif_recette or not signature:
             messages.error(request, 'L\'objectif de recette et la signature sont obligatoires.')
+        elif objectif_recette < 0:
+            messages.error(request, 'L\'objectif de recette doit être un nombre entier positif.')
         else:
-            try:
-                # Nettoyage et validation de l'objectif de recette
-                objectif_recette_clean = str(objectif_recette).strip()
-                objectif_recette = int(objectif_recette_clean)
-                
-                # Vérification que l'objectif est positif
-                if objectif_recette <= 0:
-                    raise ValueError()
-                
-                # Création de l'enregistrement de prise de clés
-                prise_cles = PriseCles.objects.create(
-                    chauffeur=chauffeur,
-                    date=today,
-                    heure_prise=timezone.now().time(),  # Heure actuelle
-                    objectif_recette=objectif_recette,
-                    plein_carburant=plein_carburant,
-                    probleme_mecanique=probleme_mecanique,
-                    signature=signature
-                )
-                
-                # Création d'une panne si un problème mécanique est signalé
-                if probleme_mecanique and probleme_mecanique != 'Aucun':
-                    from activities.models import Panne
-                    Panne.objects.create(
-                        chauffeur=chauffeur,
-                        description=probleme_mecanique,
-                        severite='moderee',  # Par défaut (modérée au lieu de moyenne)
-                        statut='signalee'  # Statut par défaut
-                    )
-                
-                # Message de succès avec emoji pour la motivation
-                messages.success(request, '✅ La journée peut commencer, bonne route !')
+            # Prise, panne éventuelle et trace d'idempotence dans une transaction
+            resultat = enregistrer_saisie(
+                chauffeur,
+                'prise',
+                cle=request.POST.get('cle_idempotence', '')[:64],
+                jour=today,
+                heure=timezone.now().time(),  # Heure actuelle
+                objectif_recette=objectif_recette,
+                plein_carburant=request.POST.get('plein_carburant') == 'on',  # Checkbox
+                probleme_mecanique=request.POST.get('probleme_mecanique', 'Aucun')[:200],
+                signature=signature,
+            )
+            _afficher_resultat(request, resultat)
+            # Saisie enregistrée, double envoi ou journée déjà saisie : retour au tableau de bord
+            if resultat.statut != 'rejete' or resultat.niveau == 'warning':
                 return redirect('drivers:dashboard_chauffeur')
-                
-            except ValueError:
-                messages.error(request, 'L\'objectif de recette doit être un nombre entier positif.')
     
-    # Affichage du formulaire de prise de clés (méthode GET)
-    return render(request, 'drivers/prendre_cles.html', {'chauffeur': chauffeur, 'today': today})
+    # Vérification qu'aucune prise de clés n'a déjà été effectuée aujourd'hui
+    elif PriseCles.objects.filter(chauffeur=chauffeur, date=today).exists():
+        messages.warning(request, 'Vous avez déjà pris les clés aujourd\'hui.')
+        return redirect('drivers:dashboard_chauffeur')
+    
+    # Affichage du formulaire de prise de clés (nouvelle clé d'idempotence à chaque affichage)
+    context = {'chauffeur': chauffeur, 'today': today, 'cle_idempotence': uuid.uuid4().hex}
+    return render(request, 'drivers/prendre_cles.html', context)
 
 
 @login_required  # Décorateur : seuls les utilisateurs connectés peuvent accéder
@@ -561,6 +567,8 @@ def remettre_cles(request):
     - Recette réalisée obligatoire (peut être zéro)
     - Signature électronique obligatoire
     
+    Comme pour la prise, l'enregistrement passe par activities.saisie_cles.
+    
     Args:
         request: Objet HttpRequest contenant les données du formulaire
         
@@ -577,6 +585,36 @@ def remettre_cles(request):
     # Date du jour pour les vérifications
     today = date.today()
     
+    # Traitement du formulaire de remise de clés (méthode POST)
+    if request.method == 'POST':
+        # Récupération des données du formulaire
+        recette_realisee = _lire_entier(request.POST.get('recette_realisee', ''))
+        signature = request.POST.get('signature', '').strip()
+        
+        # Validation des champs obligatoires
+        if recette_realisee is None or not signature:
+            messages.error(request, 'La recette réalisée et la signature sont obligatoires.')
+        elif recette_realisee < 0:
+            messages.error(request, 'La recette réalisée doit être un nombre entier positif ou zéro.')
+        else:
+            # Remise, panne éventuelle et trace d'idempotence dans une transaction ;
+            # le message indique la performance par rapport à l'objectif du matin
+            resultat = enregistrer_saisie(
+                chauffeur,
+                'remise',
+                cle=request.POST.get('cle_idempotence', '')[:64],
+                jour=today,
+                heure=timezone.now().time(),  # Heure actuelle
+                recette_realisee=recette_realisee,
+                plein_carburant=request.POST.get('plein_carburant') == 'on',  # Checkbox
+                probleme_mecanique=request.POST.get('probleme_mecanique', 'Aucun')[:200],
+                signature=signature,
+            )
+            _afficher_resultat(request, resultat)
+            # Saisie enregistrée, double envoi ou journée déjà saisie : retour au tableau de bord
+            if resultat.statut != 'rejete' or resultat.niveau == 'warning':
+                return redirect('drivers:dashboard_chauffeur')
+    
     # Vérification qu'une prise de clés a été effectuée aujourd'hui
     prise_aujourdhui = PriseCles.objects.filter(chauffeur=chauffeur, date=today).first()
     if not prise_aujourdhui:
@@ -584,82 +622,90 @@ def remettre_cles(request):
         return redirect('drivers:dashboard_chauffeur')
     
     # Vérification qu'aucune remise de clés n'a déjà été effectuée aujourd'hui
-    if RemiseCles.objects.filter(chauffeur=chauffeur, date=today).exists():
+    if request.method != 'POST' and RemiseCles.objects.filter(chauffeur=chauffeur, date=today).exists():
         messages.warning(request, 'Vous avez déjà remis les clés aujourd\'hui.')
         return redirect('drivers:dashboard_chauffeur')
     
-    # Traitement du formulaire de remise de clés (méthode POST)
-    if request.method == 'POST':
-        # Récupération des données du formulaire
-        recette_realisee_str = request.POST.get('recette_realisee', '0')
-        recette_realisee = int(float(recette_realisee_str))  # Conversion en entier
-        plein_carburant = request.POST.get('plein_carburant') == 'on'  # Checkbox
-        probleme_mecanique = request.POST.get('probleme_mecanique', 'Aucun')
-        signature = request.POST.get('signature', '')
-        
-        # Validation des champs obligatoires
-        if not recette_realisee or not signature:
-            messages.error(request, 'La recette réalisée et la signature sont obligatoires.')
-        else:
-            try:
-                # Nettoyage et validation de la recette réalisée
-                recette_realisee = int(recette_realisee)
-                
-                # Vérification que la recette n'est pas négative
-                if recette_realisee < 0:
-                    raise ValueError()
-                
-                # Création de l'enregistrement de remise de clés
-                remise = RemiseCles.objects.create(
-                    chauffeur=chauffeur,
-                    date=today,
-                    heure_remise=timezone.now().time(),  # Heure actuelle
-                    recette_realisee=recette_realisee,
-                    plein_carburant=plein_carburant,
-                    probleme_mecanique=probleme_mecanique,
-                    signature=signature
-                )
-                
-                # Création d'une panne si un problème mécanique est signalé
-                if probleme_mecanique and probleme_mecanique != 'Aucun':
-                    from activities.models import Panne
-                    Panne.objects.create(
-                        chauffeur=chauffeur,
-                        description=probleme_mecanique,
-                        severite='moderee',  # Par défaut (modérée au lieu de moyenne)
-                        statut='signalee'  # Statut par défaut
-                    )
-                
-                # Calcul du message motivant basé sur la performance
-                # La méthode get_objectif_atteint() compare la recette avec l'objectif
-                type_message, message_motivant = remise.get_objectif_atteint()
-                
-                # Affichage du message selon le type (success, warning, danger, info)
-                if type_message == 'success':
-                    messages.success(request, message_motivant)
-                elif type_message == 'warning':
-                    messages.warning(request, message_motivant)
-                elif type_message == 'danger':
-                    messages.error(request, message_motivant)
-                else:
-                    messages.info(request, message_motivant)
-                
-                return redirect('drivers:dashboard_chauffeur')
-                
-            except ValueError:
-                messages.error(request, 'La recette réalisée doit être un nombre entier positif ou zéro.')
-    
     # Préparation du contexte pour le template
     context = {
         'chauffeur': chauffeur,
         'today': today,
         'prise_aujourdhui': prise_aujourdhui,  # Pour afficher l'objectif dans le template
+        'cle_idempotence': uuid.uuid4().hex,  # Nouvelle clé à chaque affichage du formulaire
     }
     
-    # Affichage du formulaire de remise de clés (méthode GET)
+    # Affichage du formulaire de remise de clés
     return render(request, 'drivers/remettre_cles.html', context)
 
 
+# =============================================================================
+# MODE HORS LIGNE - Service worker et synchronisation des clés
+# =============================================================================
+
+def service_worker(request):
+    """
+    Sert le script du service worker à la racine du site
+    
+    Un service worker ne contrôle que les pages situées sous son URL :
+    servi depuis /static/, il ne pourrait pas mettre en cache les pages
+    chauffeur. Le script est donc rendu par cette vue, avec la liste des
+    fichiers statiques à précharger.
+    
+    Args:
+        request: Objet HttpRequest
+        
+    Returns:
+        HttpResponse: Script JavaScript du service worker
+    """
+    response = render(request, 'drivers/sw.js', content_type='application/javascript')
+    response['Service-Worker-Allowed'] = '/'
+    # Le navigateur doit toujours vérifier la dernière version du script
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@login_required
+@require_POST
+def synchroniser_cles(request):
+    """
+    Reçoit un lot de prises/remises de clés mises en file sur le téléphone
+    
+    Corps attendu (JSON) : {"evenements": [...]} (format détaillé dans
+    activities.synchronisation). Le lot est appliqué dans une transaction ;
+    les événements déjà reçus (même clé d'idempotence) ne sont pas rejoués.
+    
+    Les messages des événements appliqués sont aussi ajoutés aux messages
+    flash, affichés sur le tableau de bord après la synchronisation.
+    
+    Args:
+        request: Objet HttpRequest contenant le lot JSON
+        
+    Returns:
+        JsonResponse: {"resultats": [{"cle", "type", "statut", "message"}]}
+    """
+    try:
+        chauffeur = Chauffeur.objects.get(user=request.user)
+    except Chauffeur.DoesNotExist:
+        return JsonResponse({'erreur': 'Aucun chauffeur associé à votre compte.'}, status=403)
+    
+    try:
+        evenements = json.loads(request.body)['evenements']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'erreur': 'Lot de synchronisation illisible.'}, status=400)
+    
+    if not isinstance(evenements, list) or len(evenements) > settings.SYNC_TAILLE_MAX_LOT:
+        return JsonResponse({'erreur': f'Un lot contient au plus {settings.SYNC_TAILLE_MAX_LOT} événements.'}, status=400)
+    
+    resultats = appliquer_evenements(chauffeur, evenements)
+    
+    # Même présentation que les formulaires classiques (success, warning, danger, info)
+    for resultat in resultats:
+        if resultat['statut'] == 'applique':
+            messages.add_message(request, NIVEAUX_MESSAGES.get(resultat['niveau'], messages.INFO), resultat['message'])
+    
+    return JsonResponse({'resultats': resultats})
+
+
 # =============================================================================
 # NOUVELLE ACTIVITÉ - Sélection du type d'activité
 # =============================================================================
@@ -745,8 +791,10 @@ def exporter_activite_pdf(request):
     Returns:
         HttpResponse: Fichier PDF en téléchargement ou redirection en cas d'erreur
     """
-    # Vérification de la disponibilité de weasyprint
-    if not WEASYPRINT_AVAILABLE:
+    # Vérification de la disponibilité de weasyprint (import différé)
+    try:
+        import weasyprint
+    except ImportError:
         messages.error(request, 'La génération de PDF n\'est pas disponible. Veuillez installer weasyprint.')
         return redirect('drivers:dashboard_chauffeur')
     
@@ -907,39 +955,29 @@ def activite_mensuelle(request):
     else:
         mois_fin = date(annee, mois + 1, 1) - timedelta(days=1)
     
-    # Récupérer les données du mois
-    prises_mois = PriseCles.objects.filter(
-        chauffeur=chauffeur,
-        date__gte=mois_debut,
-        date__lte=mois_fin
-    ).order_by('date')
-    
-    remises_mois = RemiseCles.objects.filter(
-        chauffeur=chauffeur,
-        date__gte=mois_debut,
-        date__lte=mois_fin
-    ).order_by('date')
-    
-    # Créer le calendrier du mois
-    calendrier = creer_calendrier_mensuel(annee, mois, prises_mois, remises_mois)
+    # Calendrier et totaux du mois (agrégats par jour, en cache ; un mois
+    # passé n'est recalculé qu'après une modification qui le touche)
+    mois_calendrier = grille_mois(
+        annee, mois, f'chauffeur-{chauffeur.pk}', Chauffeur.objects.filter(pk=chauffeur.pk)
+    )
+    calendrier = mois_calendrier['semaines']
     
     # Calculer les statistiques du mois
-    total_mois = sum(remise.recette_realisee for remise in remises_mois)
-    jours_travailles = remises_mois.count()
+    total_mois = mois_calendrier['total_recette']
+    jours_travailles = mois_calendrier['nb_remises']
     moyenne_journaliere = total_mois / jours_travailles if jours_travailles > 0 else 0
     
     # Statistiques annuelles
     annee_debut = date(annee, 1, 1)
     annee_fin = date(annee, 12, 31)
     
-    remises_annee = RemiseCles.objects.filter(
-        chauffeur=chauffeur,
-        date__gte=annee_debut,
-        date__lte=annee_fin
+    # Recettes par jour de l'année (instantanés pour les mois clôturés)
+    recettes_annee = agreger_avec_clotures(
+        RemiseCles, 'date', 'recette_realisee', annee_debut, annee_fin, chauffeur=chauffeur
     )
     
-    total_annee = sum(remise.recette_realisee for remise in remises_annee)
-    mois_travailles = remises_annee.values('date__month').distinct().count()
+    total_annee = sum(agregat['total'] for agregat in recettes_annee.values())
+    mois_travailles = len({jour.month for jour in recettes_annee})
     
     # Calculer les recettes du jour, de la semaine en cours et du mois
     # Recette du jour (aujourd'hui)
@@ -977,18 +1015,12 @@ def activite_mensuelle(request):
     objectif_semaine = sum(prise.objectif_recette for prise in prises_semaine)
     performance_semaine = (recette_semaine / objectif_semaine * 100) if objectif_semaine > 0 else 0
     
-    # Statistiques par mois de l'année
+    # Statistiques par mois de l'année (à partir des recettes par jour déjà chargées)
     stats_par_mois = []
     for m in range(1, 13):
-        mois_debut_m = date(annee, m, 1)
-        if m == 12:
-            mois_fin_m = date(annee + 1, 1, 1) - timedelta(days=1)
-        else:
-            mois_fin_m = date(annee, m + 1, 1) - timedelta(days=1)
-        
-        remises_m = remises_annee.filter(date__gte=mois_debut_m, date__lte=mois_fin_m)
-        total_m = sum(remise.recette_realisee for remise in remises_m)
-        jours_m = remises_m.count()
+        jours_du_mois = [agregat for jour, agregat in recettes_annee.items() if jour.month == m]
+        total_m = sum(agregat['total'] for agregat in jours_du_mois)
+        jours_m = sum(agregat['nb'] for agregat in jours_du_mois)
         
         stats_par_mois.append({
             'mois': m,
@@ -1007,8 +1039,6 @@ def activite_mensuelle(request):
         'mois_debut': mois_debut,
         'mois_fin': mois_fin,
         'calendrier': calendrier,
-        'prises_mois': prises_mois,
-        'remises_mois': remises_mois,
         'total_mois': total_mois,
         'jours_travailles': jours_travailles,
         'moyenne_journaliere': moyenne_journaliere,
@@ -1031,80 +1061,6 @@ def activite_mensuelle(request):
     return render(request, 'drivers/activite_mensuelle.html', context)
 
 
-# =============================================================================
-# FONCTIONS UTILITAIRES - Fonctions d'aide pour les vues
-# =============================================================================
-
-def creer_calendrier_mensuel(annee, mois, prises, remises):
-    """
-    Créer un calendrier mensuel avec les données d'activité
-    
-    Cette fonction utilitaire génère un calendrier mensuel structuré
-    avec les activités (prises et remises de clés) pour chaque jour.
-    Elle calcule également les performances et l'état de complétude.
-    
-    Args:
-        annee (int): Année du calendrier
-        mois (int): Mois du calendrier (1-12)
-        prises (QuerySet): Prises de clés du mois
-        remises (QuerySet): Remises de clés du mois
-        
-    Returns:
-        list: Liste des semaines, chaque semaine contient une liste de jours
-              avec les activités associées et les métadonnées
-    """
-    import calendar
-    
-    # Création du calendrier du mois avec le module calendar
-    cal = calendar.monthcalendar(annee, mois)
-    
-    # Création de dictionnaires pour un accès rapide aux données
-    # Optimisation : évite de refaire des requêtes dans la boucle
-    prises_dict = {prise.date: prise for prise in prises}
-    remises_dict = {remise.date: remise for remise in remises}
-    
-    # Construction de la structure de données pour le template
-    calendrier_semaines = []
-    
-    for semaine in cal:
-        semaine_data = []
-        for jour in semaine:
-            if jour == 0:  # Jour vide (hors du mois)
-                semaine_data.append(None)
-            else:
-                # Création de la date du jour
-                jour_date = date(annee, mois, jour)
-                
-                # Récupération des activités pour ce jour
-                prise = prises_dict.get(jour_date)
-                remise = remises_dict.get(jour_date)
-                
-                # Construction des données du jour
-                jour_data = {
-                    'jour': jour,
-                    'date': jour_date,
-                    'prise': prise,
-                    'remise': remise,
-                    'recette': remise.recette_realisee if remise else 0,
-                    'objectif': prise.objectif_recette if prise else 0,
-                    'actif': prise is not None or remise is not None,  # Au moins une activité
-                    'complet': prise is not None and remise is not None,  # Prise ET remise
-                }
-                
-                # Calcul du pourcentage de performance
-                # Performance = (recette réalisée / objectif) * 100
-                if jour_data['objectif'] > 0 and jour_data['recette'] > 0:
-                    jour_data['performance'] = int((jour_data['recette'] / jour_data['objectif']) * 100)
-                else:
-                    jour_data['performance'] = 0
-                
-                semaine_data.append(jour_data)
-        
-        calendrier_semaines.append(semaine_data)
-    
-    return calendrier_semaines
-
-
 # =============================================================================
 # DEMANDES DE MODIFICATION - Gestion des demandes de modification d'activité
 # =============================================================================
@@ -1197,6 +1153,8 @@ def demander_modification(request):
             nouvelles_donnees=nouvelles_donnees,
             raison=raison
         )
+        # Le nombre de demandes en cache (listes paginées) est périmé
+        invalider_indicateurs([chauffeur.pk])
         
         messages.success(request, 'Votre demande de modification a été envoyée à l\'administrateur.')
         return redirect('drivers:dashboard_chauffeur')
@@ -1250,21 +1208,18 @@ def mes_demandes(request):
     
     # Récupération de toutes les demandes du chauffeur, triées par date de création (plus récentes en premier)
     from activities.models import DemandeModification
-    from django.core.paginator import Paginator
     
-    demandes = DemandeModification.objects.filter(
-        chauffeur=chauffeur
-    ).order_by('-date_creation')
+    demandes = DemandeModification.objects.filter(chauffeur=chauffeur)
     
-    # Pagination des demandes
-    paginator = Paginator(demandes, 15)  # 15 demandes par page
-    page_number = request.GET.get('page')
-    demandes_page = paginator.get_page(page_number)
+    # Pagination par curseur des demandes (15 par page) ; total en cache,
+    # périmé par les demandes du chauffeur
+    demandes_page = paginer(
+        request, demandes, ['-date_creation', '-id'], 15, etiquettes=[ETIQUETTE_INDICATEURS, f"chauffeur:{chauffeur.pk}"]
+    )
     
     # Préparation du contexte pour le template
     context = {
         'demandes': demandes_page,
-        'demandes_paginator': paginator,
     }
     
     # Affichage de la liste des demandes
@@ -1379,6 +1334,9 @@ def supprimer_compte_chauffeur(request):
     - Suppression du profil chauffeur
     - Suppression de l'utilisateur Django
     
+    Le compte est désactivé immédiatement ; les suppressions elles-mêmes
+    sont exécutées en arrière-plan par lots courts (voir activities.purge).
+    
     Args:
         request: Objet HttpRequest de l'utilisateur connecté
         
@@ -1401,35 +1359,32 @@ def supprimer_compte_chauffeur(request):
         
         try:
             from django.db import transaction
+            from django.contrib.auth import logout
+            from activities.purge import lancer_purge
+            
+            user = request.user
+            username = user.username
             
             with transaction.atomic():
-                # Supprimer toutes les activités liées au chauffeur
-                from activities.models import PriseCles, RemiseCles, Panne, Recette, DemandeModification
+                # Désactiver immédiatement le compte : plus de connexion possible
+                user.is_active = False
+                user.save(update_fields=['is_active'])
+                chauffeur.actif = False
+                chauffeur.save(update_fields=['actif'])
                 
-                PriseCles.objects.filter(chauffeur=chauffeur).delete()
-                RemiseCles.objects.filter(chauffeur=chauffeur).delete()
-                Panne.objects.filter(chauffeur=chauffeur).delete()
-                Recette.objects.filter(chauffeur=chauffeur).delete()
-                DemandeModification.objects.filter(chauffeur=chauffeur).delete()
-                
-                # Supprimer les assignations de superviseur
-                from drivers.models import AssignationSuperviseur
-                AssignationSuperviseur.objects.filter(chauffeur=chauffeur).delete()
-                AssignationSuperviseur.objects.filter(assigne_par=request.user).update(assigne_par=None)
-                
-                # Supprimer le profil chauffeur
-                chauffeur.delete()
-                
-                # Supprimer l'utilisateur Django
-                username = request.user.username
-                request.user.delete()
-                
-                # Déconnecter l'utilisateur
-                from django.contrib.auth import logout
-                logout(request)
-                
-                messages.success(request, f'Votre compte "{username}" a été supprimé avec succès.')
-                return redirect('drivers:index')
+                # Les données du chauffeur puis son profil et son utilisateur
+                # sont supprimés en arrière-plan, par lots courts
+                lancer_purge(
+                    'compte_chauffeur',
+                    {'chauffeur_id': chauffeur.pk, 'user_id': user.pk},
+                    demandeur=user
+                )
+            
+            # Déconnecter l'utilisateur
+            logout(request)
+            
+            messages.success(request, f'Votre compte "{username}" a été supprimé avec succès.')
+            return redirect('drivers:index')
                 
         except Exception as e:
             messages.error(request, f'Erreur lors de la suppression du compte : {str(e)}')
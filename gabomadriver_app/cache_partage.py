@@ -0,0 +1,496 @@
+# =============================================================================
+# CACHE PARTAGÉ - Deux niveaux (mémoire + SQLite) et invalidation par étiquettes
+# =============================================================================
+"""
+Backend de cache (CACHES['default']) commun à tous les processus web
+
+- L1 : dictionnaire LRU propre au processus, entrées gardées au plus
+  L1_DUREE secondes (lecture sans aucun accès disque)
+- L2 : fichier SQLite dédié (LOCATION/cache.sqlite3, mode WAL), partagé
+  par les processus web, le worker de l'outbox et les commandes de gestion
+
+Étiquettes : une entrée peut déclarer les données dont elle dépend
+(ex. 'chauffeur:12', 'scope:superviseur-3'). Chaque étiquette a un numéro
+de version (LOCATION/etiquettes.sqlite3) ; l'entrée garde les versions
+lues avant son calcul et n'est plus valide dès que l'une a changé.
+invalider_etiquettes() incrémente une ligne par étiquette : une écriture
+périme toutes les entrées dépendantes, dans tous les processus, sans les
+parcourir. Un processus détecte qu'un autre a incrémenté une étiquette par
+PRAGMA data_version (quelques microsecondes, sans lecture de table) et ne
+relit alors que la table des versions : L1 reste cohérent.
+
+Suppressions : delete, touch, incr et clear incrémentent une étiquette
+réservée (ETIQUETTE_SUPPRESSIONS) ; chaque entrée L1 retient la version
+de cette étiquette relevée avant sa lecture dans le L2, et une entrée L1
+antérieure à une suppression n'est plus servie par aucun processus. Les sessions
+(L1_PREFIXES_EXCLUS) ne passent jamais par le L1 : une session modifiée
+par un processus est aussitôt lue telle quelle par les autres.
+
+Usage (fonctions du module, utilisables avec tout backend de cache) :
+    memoriser(cle, calcul, 300, etiquettes=['chauffeur:12'])
+    invalider_etiquettes('chauffeur:12')
+"""
+
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+logger = logging.getLogger(__name__)
+
+# Nettoyage des entrées expirées du L2 : une écriture sur N
+FREQUENCE_NETTOYAGE = 100
+
+# Étiquette réservée, incrémentée à chaque suppression : périme le L1 de
+# tous les processus (jamais déclarée par une entrée)
+ETIQUETTE_SUPPRESSIONS = '~suppressions'
+
+_ABSENT = object()
+
+
+class CacheDeuxNiveaux(BaseCache):
+    """
+    Cache LRU en mémoire devant un cache SQLite partagé, avec étiquettes
+
+    OPTIONS :
+        MAX_ENTRIES (int): Entrées gardées dans le L2 (défaut 300)
+        L1_MAX_ENTREES (int): Entrées gardées en mémoire par processus (défaut 500)
+        L1_DUREE (float): Durée de vie maximale d'une entrée L1 en secondes (défaut 5)
+        L1_PREFIXES_EXCLUS (list): Clés jamais gardées en L1 (défaut : sessions)
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._dossier = Path(location)
+        self._l1_max = int(options.get('L1_MAX_ENTREES', 500))
+        self._l1_duree = float(options.get('L1_DUREE', 5))
+        self._l1_exclus = tuple(options.get('L1_PREFIXES_EXCLUS', ['django.contrib.sessions.']))
+        # Clé -> (fin de validité L1, valeur, versions des étiquettes, suppressions)
+        self._l1 = OrderedDict()
+        # Étiquette -> version (copie de etiquettes.sqlite3)
+        self._versions = {}
+        self._verrou = threading.Lock()
+        self._local = threading.local()
+        self._ecritures = 0
+
+    # =========================================================================
+    # CONNEXIONS SQLITE
+    # =========================================================================
+
+    def _connexions(self):
+        """Connexions (entrées, étiquettes) du thread, rouvertes après un fork"""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            self._dossier.mkdir(parents=True, exist_ok=True)
+            local.entrees = self._ouvrir(
+                'cache.sqlite3',
+                'CREATE TABLE IF NOT EXISTS entrees '
+                '(cle TEXT PRIMARY KEY, donnees BLOB NOT NULL, expire REAL)'
+            )
+            local.etiquettes = self._ouvrir(
+                'etiquettes.sqlite3',
+                'CREATE TABLE IF NOT EXISTS etiquettes (nom TEXT PRIMARY KEY, version INTEGER NOT NULL)'
+            )
+            local.data_version = None
+            local.pid = os.getpid()
+        return local.entrees, local.etiquettes
+
+    def _ouvrir(self, nom, schema):
+        # isolation_level=None : chaque instruction est sa propre transaction
+        connexion = sqlite3.connect(
+            self._dossier / nom, timeout=5, isolation_level=None, check_same_thread=False
+        )
+        connexion.execute('PRAGMA journal_mode=WAL')
+        connexion.execute('PRAGMA synchronous=NORMAL')
+        connexion.execute(schema)
+        return connexion
+
+    # =========================================================================
+    # ÉTIQUETTES
+    # =========================================================================
+
+    def _rafraichir_versions(self):
+        """Relit les versions si un autre processus (ou thread) en a changé"""
+        _, etiquettes = self._connexions()
+        data_version = etiquettes.execute('PRAGMA data_version').fetchone()[0]
+        if data_version != self._local.data_version:
+            versions = dict(etiquettes.execute('SELECT nom, version FROM etiquettes'))
+            with self._verrou:
+                self._versions = versions
+            self._local.data_version = data_version
+
+    def _valide(self, versions):
+        return all(self._versions.get(nom, 0) == version for nom, version in versions.items())
+
+    def versions_etiquettes(self, etiquettes):
+        """
+        Versions courantes d'étiquettes (à lire avant de calculer une valeur)
+
+        Returns:
+            dict: Étiquette -> version (0 si jamais invalidée)
+        """
+        try:
+            self._rafraichir_versions()
+        except sqlite3.Error:
+            logger.exception("Cache L2 indisponible")
+        return {nom: self._versions.get(nom, 0) for nom in etiquettes}
+
+    def invalider_etiquettes(self, *etiquettes):
+        """
+        Périme toutes les entrées qui dépendent d'une des étiquettes
+
+        Une requête par étiquette, quel que soit le nombre d'entrées.
+        Appelée après validation (transaction.on_commit) : un L2 verrouillé
+        ou indisponible est journalisé sans faire échouer la requête.
+        """
+        if not etiquettes:
+            return
+        try:
+            _, connexion = self._connexions()
+            # Première version : horodatage en ms, jamais égal à une version
+            # perdue si etiquettes.sqlite3 est supprimé
+            initiale = int(time.time() * 1000)
+            connexion.execute('BEGIN IMMEDIATE')
+            try:
+                connexion.executemany(
+                    'INSERT INTO etiquettes (nom, version) VALUES (?, ?) '
+                    'ON CONFLICT(nom) DO UPDATE SET version = version + 1',
+                    [(nom, initiale) for nom in set(etiquettes)]
+                )
+                connexion.execute('COMMIT')
+            except BaseException:
+                connexion.execute('ROLLBACK')
+                raise
+            # Nos propres écritures ne changent pas notre data_version : relecture
+            self._local.data_version = None
+            self._rafraichir_versions()
+        except sqlite3.Error:
+            # L'ancienne valeur reste servie depuis le L2 jusqu'à son expiration
+            # (durée de vie de l'entrée) ; ce processus abandonne son L1
+            logger.exception("Étiquettes non invalidées : %s", ', '.join(sorted(set(etiquettes))))
+            with self._verrou:
+                self._l1.clear()
+
+    def _suppressions(self):
+        """Nombre de suppressions connu de ce processus (voir ETIQUETTE_SUPPRESSIONS)"""
+        return self._versions.get(ETIQUETTE_SUPPRESSIONS, 0)
+
+    def _signaler_suppression(self):
+        """Périme le L1 de tous les processus après une suppression dans le L2"""
+        # Erreurs SQLite journalisées par invalider_etiquettes
+        self.invalider_etiquettes(ETIQUETTE_SUPPRESSIONS)
+
+    # =========================================================================
+    # L1 - MÉMOIRE DU PROCESSUS
+    # =========================================================================
+
+    def _l1_lire(self, cle):
+        with self._verrou:
+            entree = self._l1.get(cle)
+            if entree is None:
+                return _ABSENT
+            fin, valeur, versions, suppressions = entree
+            if fin <= time.time() or suppressions != self._suppressions() or not self._valide(versions):
+                del self._l1[cle]
+                return _ABSENT
+            self._l1.move_to_end(cle)
+            return valeur
+
+    def _l1_ecrire(self, cle, valeur, versions, expire, suppressions):
+        if any(prefixe in cle for prefixe in self._l1_exclus):
+            return
+        fin = time.time() + self._l1_duree
+        if expire is not None:
+            fin = min(fin, expire)
+        with self._verrou:
+            self._l1[cle] = (fin, valeur, versions, suppressions)
+            self._l1.move_to_end(cle)
+            while len(self._l1) > self._l1_max:
+                self._l1.popitem(last=False)
+
+    def _l1_retirer(self, cle):
+        with self._verrou:
+            self._l1.pop(cle, None)
+
+    # =========================================================================
+    # API DU CACHE DJANGO
+    # =========================================================================
+
+    def get(self, key, default=None, version=None):
+        cle = self.make_and_validate_key(key, version=version)
+        try:
+            self._rafraichir_versions()
+            valeur = self._l1_lire(cle)
+            if valeur is not _ABSENT:
+                return valeur
+            # Relevé avant la lecture : une suppression concurrente périme
+            # l'entrée L1 écrite ci-dessous
+            suppressions = self._suppressions()
+            entrees, _ = self._connexions()
+            ligne = entrees.execute('SELECT donnees, expire FROM entrees WHERE cle = ?', (cle,)).fetchone()
+        except sqlite3.Error:
+            logger.exception("Cache L2 indisponible")
+            return default
+        if ligne is None or (ligne[1] is not None and ligne[1] <= time.time()):
+            return default
+        valeur, versions = pickle.loads(ligne[0])
+        if not self._valide(versions):
+            return default
+        self._l1_ecrire(cle, valeur, versions, ligne[1], suppressions)
+        return valeur
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, etiquettes=None, versions=None):
+        """
+        Écrit une valeur ; etiquettes : données dont elle dépend
+
+        versions (dict), s'il est fourni, remplace etiquettes : versions lues
+        par versions_etiquettes() avant le calcul de la valeur (voir memoriser)
+        """
+        cle = self.make_and_validate_key(key, version=version)
+        if versions is None:
+            versions = self.versions_etiquettes(etiquettes or [])
+        self._ecrire(cle, value, versions, self.get_backend_timeout(timeout))
+
+    def _ecrire(self, cle, valeur, versions, expire, requete='INSERT OR REPLACE'):
+        donnees = pickle.dumps((valeur, versions), pickle.HIGHEST_PROTOCOL)
+        suppressions = self._suppressions()
+        try:
+            entrees, _ = self._connexions()
+            curseur = entrees.execute(
+                f'{requete} INTO entrees (cle, donnees, expire) VALUES (?, ?, ?)', (cle, donnees, expire)
+            )
+            if curseur.rowcount == 0:
+                return False
+            self._ecritures += 1
+            if self._ecritures % FREQUENCE_NETTOYAGE == 0:
+                self._nettoyer(entrees)
+        except sqlite3.Error:
+            # Cache plein ou verrouillé : la valeur sera recalculée
+            logger.exception("Écriture impossible dans le cache L2")
+            self._l1_retirer(cle)
+            return False
+        self._l1_ecrire(cle, valeur, versions, expire, suppressions)
+        return True
+
+    def _nettoyer(self, entrees):
+        """Supprime les entrées expirées et, au-delà de MAX_ENTRIES, les plus anciennes"""
+        entrees.execute('DELETE FROM entrees WHERE expire IS NOT NULL AND expire <= ?', (time.time(),))
+        total = entrees.execute('SELECT COUNT(*) FROM entrees').fetchone()[0]
+        if total > self._max_entries:
+            entrees.execute(
+                'DELETE FROM entrees WHERE rowid IN (SELECT rowid FROM entrees ORDER BY rowid LIMIT ?)',
+                (total // self._cull_frequency,)
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        cle = self.make_and_validate_key(key, version=version)
+        try:
+            entrees, _ = self._connexions()
+            entrees.execute(
+                'DELETE FROM entrees WHERE cle = ? AND expire IS NOT NULL AND expire <= ?', (cle, time.time())
+            )
+        except sqlite3.Error:
+            logger.exception("Cache L2 indisponible")
+            return False
+        return self._ecrire(cle, value, {}, self.get_backend_timeout(timeout), 'INSERT OR IGNORE')
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cle = self.make_and_validate_key(key, version=version)
+        self._l1_retirer(cle)
+        try:
+            entrees, _ = self._connexions()
+            curseur = entrees.execute(
+                'UPDATE entrees SET expire = ? WHERE cle = ? AND (expire IS NULL OR expire > ?)',
+                (self.get_backend_timeout(timeout), cle, time.time())
+            )
+        except sqlite3.Error:
+            logger.exception("Cache L2 indisponible")
+            return False
+        if curseur.rowcount == 0:
+            return False
+        # Échéance raccourcie : les copies L1 des autres processus ne la connaissent pas
+        self._signaler_suppression()
+        return True
+
+    def delete(self, key, version=None):
+        return self.delete_many([key], version=version) > 0
+
+    def delete_many(self, keys, version=None):
+        """Supprime des clés en une requête et une seule invalidation des L1"""
+        cles = [self.make_and_validate_key(key, version=version) for key in keys]
+        for cle in cles:
+            self._l1_retirer(cle)
+        if not cles:
+            return 0
+        try:
+            entrees, _ = self._connexions()
+            supprimees = entrees.execute(
+                f'DELETE FROM entrees WHERE cle IN ({", ".join("?" * len(cles))})', cles
+            ).rowcount
+        except sqlite3.Error:
+            logger.exception("Suppression impossible dans le cache L2")
+            return 0
+        if supprimees:
+            self._signaler_suppression()
+        return supprimees
+
+    def has_key(self, key, version=None):
+        return self.get(key, _ABSENT, version=version) is not _ABSENT
+
+    def incr(self, key, delta=1, version=None):
+        """Incrément atomique entre processus (transaction IMMEDIATE)"""
+        cle = self.make_and_validate_key(key, version=version)
+        try:
+            entrees, _ = self._connexions()
+            entrees.execute('BEGIN IMMEDIATE')
+            try:
+                ligne = entrees.execute(
+                    'SELECT donnees, expire FROM entrees WHERE cle = ? AND (expire IS NULL OR expire > ?)',
+                    (cle, time.time())
+                ).fetchone()
+                if ligne is None:
+                    raise ValueError(f"Key '{key}' not found")
+                valeur, versions = pickle.loads(ligne[0])
+                valeur += delta
+                entrees.execute(
+                    'UPDATE entrees SET donnees = ? WHERE cle = ?',
+                    (pickle.dumps((valeur, versions), pickle.HIGHEST_PROTOCOL), cle)
+                )
+                entrees.execute('COMMIT')
+            except BaseException:
+                entrees.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            # Même contrat que les autres backends : ValueError si l'incrément échoue
+            logger.exception("Cache L2 indisponible")
+            raise ValueError(f"Key '{key}' not incremented: {e}") from e
+        finally:
+            self._l1_retirer(cle)
+        self._signaler_suppression()
+        return valeur
+
+    def clear(self):
+        with self._verrou:
+            self._l1.clear()
+        try:
+            entrees, _ = self._connexions()
+            entrees.execute('DELETE FROM entrees')
+        except sqlite3.Error:
+            logger.exception("Cache L2 indisponible")
+            return
+        self._signaler_suppression()
+
+    def close(self, **kwargs):
+        # Connexions gardées d'une requête à l'autre (une par thread)
+        pass
+
+    # =========================================================================
+    # MÉMOÏSATION
+    # =========================================================================
+
+    def memoriser(self, key, calcul, timeout=DEFAULT_TIMEOUT, etiquettes=None, version=None):
+        """
+        Valeur en cache, calculée et mise en cache si absente ou périmée
+
+        Les versions des étiquettes sont lues avant le calcul : une écriture
+        concurrente (invalidation pendant le calcul) périme aussitôt le
+        résultat au lieu de laisser en cache des chiffres d'avant l'écriture.
+
+        Args:
+            key (str): Clé
+            calcul (callable): Calcule la valeur (sans argument)
+            timeout (int): Durée de vie en secondes
+            etiquettes (list | callable): Étiquettes, ou fonction qui les
+                                          renvoie (appelée seulement si la
+                                          valeur doit être calculée)
+            version (int): Version de clé Django
+
+        Returns:
+            Valeur en cache ou calculée
+        """
+        valeur = self.get(key, _ABSENT, version=version)
+        if valeur is not _ABSENT:
+            return valeur
+        if callable(etiquettes):
+            etiquettes = etiquettes()
+        versions = self.versions_etiquettes(etiquettes or [])
+        valeur = calcul()
+        self.set(key, valeur, timeout, version=version, versions=versions)
+        return valeur
+
+
+# =============================================================================
+# FONCTIONS DU MODULE - Étiquettes avec tout backend de cache
+# =============================================================================
+# CacheDeuxNiveaux garde les versions des étiquettes dans sa propre base.
+# Avec un autre backend (locmem, redis, memcached configurés dans CACHES),
+# chaque version est une clé 'etiquette:<nom>' et l'entrée est gardée avec
+# les versions lues avant son calcul : mêmes garanties, une lecture de plus.
+
+def _versions_cache(cache, etiquettes):
+    versions = cache.get_many([f'etiquette:{nom}' for nom in etiquettes])
+    return {nom: versions.get(f'etiquette:{nom}', 0) for nom in etiquettes}
+
+
+def memoriser(key, calcul, timeout=DEFAULT_TIMEOUT, etiquettes=None, cache=None):
+    """
+    Valeur en cache, calculée et mise en cache si absente ou périmée
+
+    Voir CacheDeuxNiveaux.memoriser ; fonctionne aussi avec les autres backends.
+
+    Args:
+        key (str): Clé
+        calcul (callable): Calcule la valeur (sans argument)
+        timeout (int): Durée de vie en secondes
+        etiquettes (list | callable): Étiquettes, ou fonction qui les renvoie
+        cache: Backend de cache (par défaut CACHES['default'])
+
+    Returns:
+        Valeur en cache ou calculée
+    """
+    cache = cache or caches['default']
+    if isinstance(cache, CacheDeuxNiveaux):
+        return cache.memoriser(key, calcul, timeout, etiquettes=etiquettes)
+
+    entree = cache.get(key)
+    if entree is not None:
+        valeur, versions = entree
+        if _versions_cache(cache, versions) == versions:
+            return valeur
+    if callable(etiquettes):
+        etiquettes = etiquettes()
+    versions = _versions_cache(cache, etiquettes or [])
+    valeur = calcul()
+    cache.set(key, (valeur, versions), timeout)
+    return valeur
+
+
+def invalider_etiquettes(*etiquettes, cache=None):
+    """
+    Périme toutes les entrées mémorisées qui dépendent d'une des étiquettes
+
+    Voir CacheDeuxNiveaux.invalider_etiquettes ; fonctionne aussi avec les
+    autres backends.
+    """
+    cache = cache or caches['default']
+    if isinstance(cache, CacheDeuxNiveaux):
+        cache.invalider_etiquettes(*etiquettes)
+        return
+
+    for nom in set(etiquettes):
+        cle = f'etiquette:{nom}'
+        try:
+            cache.incr(cle)
+        except ValueError:
+            # Première invalidation (ou version évincée) : horodatage en ms,
+            # jamais égal à une version perdue ; add() départage deux processus
+            if not cache.add(cle, int(time.time() * 1000), None):
+                cache.incr(cle)
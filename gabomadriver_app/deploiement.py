@@ -0,0 +1,278 @@
+# =============================================================================
+# DÉPLOIEMENT ASYNCHRONE - File, regroupement et exécution unique
+# =============================================================================
+"""
+Exécution des déploiements demandés par le webhook GitHub, hors requête
+
+Le webhook enregistre la demande (demander_deploiement) puis lance un
+exécuteur détaché : `python -m gabomadriver_app.deploiement`. L'exécuteur :
+- ne tourne qu'en un seul exemplaire (verrou fichier) : deux pushes
+  rapprochés ne lancent jamais deux déploiements concurrents
+- attend DEPLOY_DELAI_REGROUPEMENT secondes sans nouvelle demande, puis
+  déploie une seule fois pour tous les pushes reçus entre-temps
+- reprend les demandes arrivées pendant un déploiement en cours
+- lance l'orchestrateur deploy.py (étapes incrémentales) et écrit l'état
+  (statut.json) et la sortie de l'orchestrateur (deploiement.log),
+  consultables via le point d'accès de statut du webhook
+
+L'exécuteur est un processus séparé (nouvelle session) : il survit au
+rechargement de l'application web déclenché en fin de déploiement.
+
+Ce module n'importe pas Django : l'exécuteur fonctionne même si le
+déploiement casse temporairement le projet.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+REPERTOIRE = Path(os.environ.get('DEPLOY_ETAT_DIR', BASE_DIR / 'deploiements'))
+ORCHESTRATEUR = BASE_DIR / 'deploy.py'
+# Statut selon le code de sortie de l'orchestrateur (2 : déploiement partiel)
+STATUTS = {0: 'reussi', 2: 'partiel'}
+TAILLE_HISTORIQUE = 20
+
+
+# =============================================================================
+# FICHIERS D'ÉTAT
+# =============================================================================
+
+def _chemin(nom):
+    REPERTOIRE.mkdir(parents=True, exist_ok=True)
+    return REPERTOIRE / nom
+
+
+@contextmanager
+def _verrou(nom, bloquant=True):
+    """
+    Verrou exclusif sur un fichier (fcntl, serveur Linux)
+
+    Yields:
+        bool: True si le verrou est obtenu (toujours en mode bloquant)
+    """
+    import fcntl
+
+    with open(_chemin(nom), 'a') as fichier:
+        try:
+            fcntl.flock(fichier, fcntl.LOCK_EX | (0 if bloquant else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fichier, fcntl.LOCK_UN)
+
+
+def _lire_json(nom, defaut):
+    try:
+        with open(_chemin(nom), encoding='utf-8') as fichier:
+            return json.load(fichier)
+    except (OSError, ValueError):
+        return defaut
+
+
+def _ecrire_json(nom, donnees):
+    """Écriture atomique (fichier temporaire puis renommage)"""
+    chemin = _chemin(nom)
+    temporaire = chemin.with_suffix('.tmp')
+    with open(temporaire, 'w', encoding='utf-8') as fichier:
+        json.dump(donnees, fichier, ensure_ascii=False, indent=2)
+    os.replace(temporaire, chemin)
+
+
+def _maintenant():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _interpreteur():
+    """Python à utiliser pour l'exécuteur (sys.executable peut être uWSGI)"""
+    if os.environ.get('DEPLOY_PYTHON'):
+        return os.environ['DEPLOY_PYTHON']
+    if 'python' in os.path.basename(sys.executable):
+        return sys.executable
+    return shutil.which('python3') or 'python3'
+
+
+# =============================================================================
+# CÔTÉ WEBHOOK - Demande et consultation
+# =============================================================================
+
+def demander_deploiement(commit, delai, timeout):
+    """
+    Enregistre une demande de déploiement et lance l'exécuteur
+
+    Args:
+        commit (dict): {'id', 'auteur', 'message', 'branche'} du push reçu
+        delai (int): Délai de regroupement des pushes en secondes
+        timeout (int): Durée maximale d'un déploiement en secondes
+
+    Returns:
+        int: Nombre de pushes en attente de déploiement (celui-ci compris)
+    """
+    with _verrou('demande.lock'):
+        demande = _lire_json('demande.json', {'commits': []})
+        demande['commits'].append({**commit, 'recu': _maintenant()})
+        demande['derniere_demande'] = time.time()
+        _ecrire_json('demande.json', demande)
+
+    # Si un exécuteur tourne déjà, le nouveau s'arrête aussitôt :
+    # le premier prendra cette demande avant de se terminer
+    subprocess.Popen(
+        [_interpreteur(), '-m', 'gabomadriver_app.deploiement', '--delai', str(delai), '--timeout', str(timeout)],
+        cwd=str(BASE_DIR),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True,
+    )
+    return len(demande['commits'])
+
+
+def lire_statut(journal=False, lignes=200):
+    """
+    État des déploiements pour le point d'accès de statut
+
+    Args:
+        journal (bool): Inclure la fin de la sortie du dernier déploiement
+        lignes (int): Nombre de lignes de sortie retournées
+
+    Returns:
+        dict: {'en_attente', 'dernier', 'historique'[, 'journal']}
+    """
+    etat = _lire_json('statut.json', {'dernier': None, 'historique': []})
+    etat['en_attente'] = len(_lire_json('demande.json', {'commits': []})['commits'])
+    if journal:
+        try:
+            with open(_chemin('deploiement.log'), encoding='utf-8', errors='replace') as fichier:
+                etat['journal'] = fichier.readlines()[-lignes:]
+        except OSError:
+            etat['journal'] = []
+    return etat
+
+
+# =============================================================================
+# EXÉCUTEUR - Processus détaché
+# =============================================================================
+
+def _prendre_demande(delai):
+    """
+    Attend la fin de la rafale de pushes puis retire la demande de la file
+
+    Returns:
+        dict | None: Demande regroupée, None si la file est vide
+    """
+    while True:
+        with _verrou('demande.lock'):
+            demande = _lire_json('demande.json', None)
+            if not demande or not demande.get('commits'):
+                return None
+            attente = demande['derniere_demande'] + delai - time.time()
+            if attente <= 0:
+                os.remove(_chemin('demande.json'))
+                return demande
+        time.sleep(attente)
+
+
+def _enregistrer(deploiement):
+    """Met à jour l'état du déploiement courant et l'historique"""
+    etat = _lire_json('statut.json', {'dernier': None, 'historique': []})
+    etat['dernier'] = deploiement
+    if deploiement['statut'] != 'en_cours':
+        etat['historique'] = ([deploiement] + etat['historique'])[:TAILLE_HISTORIQUE]
+    _ecrire_json('statut.json', etat)
+
+
+def _arreter_groupe(processus, delai=10):
+    """Arrête l'orchestrateur et tout son groupe (SIGTERM, puis SIGKILL après delai)"""
+    try:
+        os.killpg(processus.pid, signal.SIGTERM)
+        try:
+            processus.wait(timeout=delai)
+        except subprocess.TimeoutExpired:
+            pass
+        # Sous-processus restants, ou orchestrateur sourd à SIGTERM
+        os.killpg(processus.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    processus.wait()
+
+
+def _deployer(demande, timeout):
+    """Exécute l'orchestrateur de déploiement (deploy.py) pour une demande regroupée"""
+    debut = time.monotonic()
+    deploiement = {
+        'statut': 'en_cours',
+        'commits': demande['commits'],
+        'debut': _maintenant(),
+        'fin': None,
+        'duree': None,
+        'code_retour': None,
+    }
+    _enregistrer(deploiement)
+
+    with open(_chemin('deploiement.log'), 'w', encoding='utf-8') as journal:
+        try:
+            # L'orchestrateur choisit lui-même le Python de l'environnement virtuel.
+            # Groupe de processus propre : à l'expiration, ses sous-processus
+            # (pip, migrate, collectstatic) sont arrêtés avec lui
+            processus = subprocess.Popen(
+                [_interpreteur(), '-u', str(ORCHESTRATEUR)],
+                stdout=journal,
+                stderr=subprocess.STDOUT,
+                cwd=str(BASE_DIR),
+                start_new_session=True,
+            )
+        except OSError as e:
+            journal.write(f"Lancement impossible : {e}\n")
+            deploiement['statut'] = 'echoue'
+        else:
+            try:
+                deploiement['code_retour'] = processus.wait(timeout=timeout)
+                deploiement['statut'] = STATUTS.get(deploiement['code_retour'], 'echoue')
+            except subprocess.TimeoutExpired:
+                _arreter_groupe(processus)
+                journal.write(f"\nDéploiement interrompu après {timeout} s\n")
+                deploiement['statut'] = 'expire'
+
+    deploiement['fin'] = _maintenant()
+    deploiement['duree'] = round(time.monotonic() - debut, 1)
+    _enregistrer(deploiement)
+
+
+def executer(delai, timeout):
+    """
+    Boucle de l'exécuteur : un seul exemplaire actif à la fois
+
+    Après libération du verrou, la file est relue : une demande arrivée
+    pendant que le verrou était tenu (exécuteur concurrent arrêté faute
+    de verrou) n'est jamais perdue.
+    """
+    while True:
+        with _verrou('executeur.lock', bloquant=False) as obtenu:
+            if not obtenu:
+                return
+            demande = _prendre_demande(delai)
+            while demande:
+                _deployer(demande, timeout)
+                demande = _prendre_demande(delai)
+        if not _lire_json('demande.json', {}).get('commits'):
+            return
+
+
+if __name__ == '__main__':
+    arguments = argparse.ArgumentParser(description='Exécuteur des déploiements demandés par le webhook')
+    arguments.add_argument('--delai', type=float, default=15)
+    arguments.add_argument('--timeout', type=float, default=600)
+    options = arguments.parse_args()
+    executer(options.delai, options.timeout)
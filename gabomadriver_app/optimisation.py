@@ -0,0 +1,200 @@
+# =============================================================================
+# OPTIMISATION DES RÉPONSES - Minification HTML et compression négociée
+# =============================================================================
+"""
+Allègement des pages générées (tableaux de bord, listes, statistiques)
+
+- minifier_html : réduit les blancs et retire les commentaires HTML, sans
+  toucher au contenu de <pre>, <textarea>, <script> et <style>
+- OptimisationReponsesMiddleware : minifie les réponses HTML puis les
+  compresse en brotli ou gzip selon l'en-tête Accept-Encoding du client
+  (réponses en flux comprises, morceau par morceau) ; les tailles avant et
+  après sont journalisées par vue (logger gabomadriver_app.optimisation, niveau
+  DEBUG) et la commande rapport_tailles les affiche pour les pages principales
+
+Les réponses déjà encodées (fichiers statiques précompressés) et les types
+non textuels (Excel, PDF, images) ne sont pas recompressés.
+"""
+
+import logging
+import re
+import secrets
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_sequence, compress_string
+
+from .statiques import brotli_disponible, compresser, encodages_acceptes
+
+logger = logging.getLogger(__name__)
+
+# Types de contenu compressés à la volée
+TYPES_COMPRESSIBLES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+)
+
+# Octets aléatoires ajoutés aux réponses compressées : la longueur compressée
+# ne révèle plus le contenu d'une page (attaque BREACH sur le jeton CSRF)
+OCTETS_ALEATOIRES_MAX = 100
+
+# Blocs dont les blancs sont significatifs : recopiés tels quels
+BLOCS_PROTEGES = _lazy_re_compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.S | re.I)
+
+# Commentaires HTML, sauf commentaires conditionnels (<!--[if IE]>)
+COMMENTAIRE_HTML = _lazy_re_compile(r'<!--(?!\[if|<!).*?-->', re.S)
+
+BLANCS = _lazy_re_compile(r'\s+')
+
+
+# =============================================================================
+# MINIFICATION
+# =============================================================================
+
+def _reduire_blancs(texte):
+    # Un blanc n'est jamais supprimé, seulement réduit : « a <b>c</b> » garde
+    # son espace (le rendu des éléments en ligne ne change pas)
+    texte = COMMENTAIRE_HTML.sub('', texte)
+    return BLANCS.sub(lambda m: '\n' if '\n' in m.group() else ' ', texte)
+
+
+def minifier_html(html):
+    """
+    Minifie une page HTML sans en changer le rendu
+
+    Args:
+        html (str): Page rendue
+
+    Returns:
+        str: Page dont chaque suite de blancs est réduite à un caractère
+    """
+    morceaux = []
+    position = 0
+    for bloc in BLOCS_PROTEGES.finditer(html):
+        morceaux.append(_reduire_blancs(html[position:bloc.start()]))
+        morceaux.append(bloc.group())
+        position = bloc.end()
+    morceaux.append(_reduire_blancs(html[position:]))
+    return ''.join(morceaux)
+
+
+# =============================================================================
+# COMPRESSION
+# =============================================================================
+
+def _bourrage(encodage, type_contenu):
+    """Octets aléatoires (mitigation BREACH) à ajouter au contenu brotli"""
+    # gzip : compress_string / compress_sequence de Django s'en chargent dans
+    # l'en-tête du flux ; brotli n'en a pas, on ajoute un commentaire HTML.
+    # Pages HTML seulement : un commentaire rendrait un JSON ou un CSS
+    # illisible, et ce sont les pages qui portent le jeton CSRF
+    if encodage != 'br' or type_contenu != 'text/html':
+        return b''
+    return b'<!--' + secrets.token_hex(secrets.randbelow(OCTETS_ALEATOIRES_MAX // 2) + 1).encode() + b'-->'
+
+
+def _compresser_flux(morceaux, encodage):
+    """Compresse un flux morceau par morceau (chaque morceau est envoyé aussitôt)"""
+    if encodage == 'gzip':
+        yield from compress_sequence(morceaux, max_random_bytes=OCTETS_ALEATOIRES_MAX)
+        return
+    import brotli
+    compresseur = brotli.Compressor(quality=5)
+    for morceau in morceaux:
+        sortie = compresseur.process(morceau) + compresseur.flush()
+        if sortie:
+            yield sortie
+    yield compresseur.finish()
+
+
+def choisir_encodage(request):
+    """
+    Encodage de compression à utiliser pour une requête
+
+    Returns:
+        str | None: 'br', 'gzip' ou None (client sans compression)
+    """
+    acceptes = encodages_acceptes(request)
+    if 'br' in acceptes and brotli_disponible():
+        return 'br'
+    if 'gzip' in acceptes:
+        return 'gzip'
+    return None
+
+
+class OptimisationReponsesMiddleware:
+    """
+    Minifie les pages HTML et compresse les réponses textuelles
+
+    Placé juste après SecurityMiddleware : il traite la réponse finale, une
+    fois les en-têtes des autres middlewares posés. Les tailles de chaque
+    réponse sont exposées dans response.tailles_optimisation.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        type_contenu = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if response.has_header('Content-Encoding') or not type_contenu.startswith(TYPES_COMPRESSIBLES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encodage = choisir_encodage(request)
+        if response.streaming:
+            if encodage:
+                self._compresser_flux(response, encodage)
+            return response
+
+        tailles = {'origine': len(response.content)}
+        if type_contenu == 'text/html' and settings.OPTIMISATION_MINIFIER_HTML:
+            html = response.content.decode(response.charset)
+            response.content = minifier_html(html).encode(response.charset)
+        tailles['minifie'] = len(response.content)
+
+        if encodage and tailles['minifie'] >= settings.OPTIMISATION_TAILLE_MIN:
+            if encodage == 'gzip':
+                compresse = compress_string(response.content, max_random_bytes=OCTETS_ALEATOIRES_MAX)
+            else:
+                compresse = compresser(response.content + _bourrage(encodage, type_contenu), encodage, niveau_max=False)
+            if len(compresse) < tailles['minifie']:
+                response.content = compresse
+                response['Content-Encoding'] = encodage
+                tailles[encodage] = len(compresse)
+                self._affaiblir_etag(response)
+
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+        response.tailles_optimisation = tailles
+        self._journaliser(request, tailles)
+        return response
+
+    def _compresser_flux(self, response, encodage):
+        """Remplace le contenu d'une réponse en flux par sa version compressée"""
+        if response.is_async:
+            # Flux asynchrone : pas de compression morceau par morceau ici
+            return
+        response.streaming_content = _compresser_flux(response.streaming_content, encodage)
+        # La taille compressée n'est connue qu'à la fin du flux
+        del response.headers['Content-Length']
+        response['Content-Encoding'] = encodage
+        self._affaiblir_etag(response)
+
+    @staticmethod
+    def _affaiblir_etag(response):
+        # Un ETag fort désigne des octets précis : ceux-ci ont changé
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+    @staticmethod
+    def _journaliser(request, tailles):
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        vue = request.resolver_match.view_name if request.resolver_match else request.path
+        logger.debug(
+            "%s : %s",
+            vue,
+            ' -> '.join(f"{nom} {taille} o" for nom, taille in tailles.items())
+        )
@@ -0,0 +1,304 @@
+# =============================================================================
+# PAGINATION PAR CURSEUR - Pages lues sur un index, sans OFFSET
+# =============================================================================
+"""
+Pagination par clé (keyset) sur les colonnes de tri d'une liste
+
+Paginator fait un OFFSET (les lignes des pages précédentes sont lues puis
+jetées) et un COUNT(*) à chaque affichage : la page 500 coûte 500 fois la
+page 1. Ici, une page commence après (ou avant) les valeurs de tri de la
+dernière (ou première) ligne de la page voisine : WHERE (a, b, id) > (...)
+ORDER BY a, b, id LIMIT n, une lecture d'index de n lignes quelle que soit
+la profondeur. La dernière page se lit de la même façon, à rebours.
+
+Le curseur est un jeton opaque (JSON en base64 URL) : sens de lecture,
+position et valeurs de tri d'une ligne. La position ne sert qu'à
+l'affichage (numéro de page, numéro de ligne). Un jeton illisible ramène à
+la première page.
+
+Le total est lu par compte_en_cache() : gardé dans le cache partagé avec
+les étiquettes des données comptées (périmé par invalider_etiquettes()
+comme les indicateurs), au plus PAGINATION_COMPTE_DUREE secondes sinon.
+
+Les colonnes de tri sont des champs non nuls du modèle et doivent rendre
+l'ordre total : la dernière est en pratique 'id' (ou '-id').
+
+Usage :
+    page = PaginationCurseur(pannes, ['priorite', '-date_creation', '-id']).page(request.GET.get('curseur'))
+    page = paginer(request, demandes, ['-date_creation', '-id'], 15, etiquettes=[...])
+    page.objets, page.suivant, page.precedent, page.url_suivante...
+"""
+
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db.models import Q
+
+from .cache_partage import memoriser
+
+# Sens de lecture d'un jeton : après une ligne, avant une ligne, dernière page
+APRES, AVANT, FIN = 'a', 'v', 'f'
+
+
+def compte_en_cache(queryset, etiquettes=None):
+    """
+    COUNT(*) d'un QuerySet, gardé dans le cache partagé
+
+    Args:
+        queryset (QuerySet): Lignes comptées (la requête SQL sert de clé)
+        etiquettes (list | callable): Étiquettes des données comptées
+                                      (ex. 'chauffeur:<id>'), ou fonction
+                                      qui les renvoie
+
+    Returns:
+        int: Nombre de lignes
+    """
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        # QuerySet vide par construction (.none(), pk__in=[])
+        return 0
+    cle = 'compte:' + hashlib.sha1(f'{sql}|{params!r}'.encode()).hexdigest()
+    return memoriser(cle, queryset.count, settings.PAGINATION_COMPTE_DUREE, etiquettes=etiquettes)
+
+
+class PageCurseur:
+    """
+    Lignes d'une page et jetons des pages voisines (None en bout de liste)
+
+    Expose les attributs de django.core.paginator.Page utilisés par les
+    templates (has_next, has_previous, number, start_index...).
+    """
+
+    def __init__(self, objets, debut=0, par_page=25, total=None, suivant=None, precedent=None):
+        self.objets = objets
+        self.debut = debut
+        self.par_page = par_page
+        self.total = total
+        self.suivant = suivant
+        self.precedent = precedent
+        self.parametres = None
+        self.parametre = None
+
+    def __iter__(self):
+        return iter(self.objets)
+
+    def __len__(self):
+        return len(self.objets)
+
+    def __getitem__(self, index):
+        return self.objets[index]
+
+    # Compatibilité avec les templates écrits pour Paginator
+
+    def has_next(self):
+        return self.suivant is not None
+
+    def has_previous(self):
+        return self.precedent is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def start_index(self):
+        return self.debut + 1 if self.objets else 0
+
+    def end_index(self):
+        return self.debut + len(self.objets)
+
+    @property
+    def number(self):
+        return self.debut // self.par_page + 1
+
+    @property
+    def num_pages(self):
+        if self.total is None:
+            return None
+        return max((self.total + self.par_page - 1) // self.par_page, 1)
+
+    # Liens (page_requete) : paramètres de la requête, curseur remplacé
+
+    def _url(self, jeton):
+        parametres = self.parametres.copy()
+        parametres.pop(self.parametre, None)
+        if jeton:
+            parametres[self.parametre] = jeton
+        return f'?{parametres.urlencode()}'
+
+    @property
+    def url_suivante(self):
+        return self._url(self.suivant) if self.suivant else None
+
+    @property
+    def url_precedente(self):
+        return self._url(self.precedent) if self.precedent else None
+
+    @property
+    def url_premiere(self):
+        return self._url(None)
+
+    @property
+    def url_derniere(self):
+        return self._url(_encoder([FIN, None, None]))
+
+
+def _encoder(contenu):
+    # str() garde les microsecondes (DjangoJSONEncoder les tronque) : la
+    # comparaison avec la ligne de départ doit être exacte
+    texte = json.dumps(contenu, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texte.encode()).decode().rstrip('=')
+
+
+class PaginationCurseur:
+    """
+    Pages successives d'un QuerySet dans l'ordre de colonnes de tri
+
+    Args:
+        queryset (QuerySet): Lignes à paginer (filtres déjà appliqués)
+        ordre (list): Colonnes de tri, '-' pour un ordre décroissant
+        par_page (int): Lignes par page
+        total (int | callable): Nombre de lignes (ex. compte_en_cache),
+                                None si inconnu (pas de dernière page)
+    """
+
+    def __init__(self, queryset, ordre, par_page=25, total=None):
+        self.queryset = queryset
+        self.par_page = par_page
+        self.total = total
+        modele = queryset.model
+        self.colonnes = []
+        for colonne in ordre:
+            nom = colonne.lstrip('-')
+            champ = modele._meta.pk if nom == 'pk' else modele._meta.get_field(nom)
+            self.colonnes.append((champ.attname, champ, colonne.startswith('-')))
+
+    # -------------------------------------------------------------------------
+    # Jetons
+    # -------------------------------------------------------------------------
+
+    def _jeton(self, sens, position, objet):
+        return _encoder([sens, position, [getattr(objet, nom) for nom, _, _ in self.colonnes]])
+
+    def _lire_jeton(self, jeton):
+        """(sens, position, valeurs) d'un jeton, ou None s'il est absent ou illisible"""
+        if not jeton:
+            return None
+        try:
+            contenu = base64.urlsafe_b64decode(jeton + '=' * (-len(jeton) % 4))
+            sens, position, valeurs = json.loads(contenu)
+            if sens == FIN:
+                return FIN, None, None
+            if sens not in (APRES, AVANT) or len(valeurs) != len(self.colonnes):
+                return None
+            valeurs = [champ.to_python(v) for (_, champ, _), v in zip(self.colonnes, valeurs)]
+            return sens, max(int(position), 0), valeurs
+        except (ValueError, TypeError, ValidationError):
+            return None
+
+    # -------------------------------------------------------------------------
+    # Lecture
+    # -------------------------------------------------------------------------
+
+    def _condition(self, valeurs, inverse):
+        """Lignes placées après (ou avant, si inverse) les valeurs, dans l'ordre de tri"""
+        condition = Q()
+        egalites = {}
+        for (nom, _, decroissant), valeur in zip(self.colonnes, valeurs):
+            operateur = 'lt' if decroissant != inverse else 'gt'
+            condition |= Q(**egalites, **{f'{nom}__{operateur}': valeur})
+            egalites[nom] = valeur
+        return condition
+
+    def _tri(self, inverse):
+        return [
+            f"{'-' if decroissant != inverse else ''}{nom}"
+            for nom, _, decroissant in self.colonnes
+        ]
+
+    def page(self, jeton=None):
+        """
+        Page désignée par un jeton (première page sans jeton)
+
+        Returns:
+            PageCurseur: Lignes, position, jetons suivant et précédent
+        """
+        total = self.total() if callable(self.total) else self.total
+        sens, position, valeurs = self._lire_jeton(jeton) or (None, 0, None)
+        inverse = sens in (AVANT, FIN)
+        # La dernière page garde le reste de la division : les pages
+        # précédentes, lues à rebours depuis elle, tombent sur les mêmes
+        # bornes que depuis la première
+        taille = self.par_page
+        if sens == FIN and total:
+            taille = total - (total - 1) // self.par_page * self.par_page
+        lignes = self.queryset
+        if valeurs is not None:
+            lignes = lignes.filter(self._condition(valeurs, inverse))
+        lignes = list(lignes.order_by(*self._tri(inverse))[:taille + 1])
+
+        encore = len(lignes) > taille
+        lignes = lignes[:taille]
+        if inverse:
+            lignes.reverse()
+        if not lignes:
+            return PageCurseur([], par_page=self.par_page, total=total)
+
+        # Une page lue vers l'avant a une précédente si elle a un curseur, et
+        # inversement : la page voisine dans le sens de lecture existe si la
+        # requête a ramené une ligne de plus
+        if inverse:
+            suivant, precedent = sens == AVANT, encore
+        else:
+            suivant, precedent = encore, sens is not None
+
+        # Position de la première ligne : ligne de départ du jeton + 1 vers
+        # l'avant, ligne de départ - taille de la page à rebours
+        if not precedent:
+            debut = 0
+        elif sens == APRES:
+            debut = position + 1
+        elif sens == AVANT:
+            debut = max(position - len(lignes), 0)
+        else:
+            debut = max((total or 0) - len(lignes), 0)
+
+        return PageCurseur(
+            lignes,
+            debut=debut,
+            par_page=self.par_page,
+            total=total,
+            suivant=self._jeton(APRES, debut + len(lignes) - 1, lignes[-1]) if suivant else None,
+            precedent=self._jeton(AVANT, debut, lignes[0]) if precedent else None,
+        )
+
+    def page_requete(self, request, parametre='curseur'):
+        """
+        Page désignée par le paramètre GET d'une requête, avec les liens vers
+        les pages voisines (autres paramètres de la requête conservés)
+        """
+        page = self.page(request.GET.get(parametre))
+        page.parametres = request.GET
+        page.parametre = parametre
+        return page
+
+
+def paginer(request, queryset, ordre, par_page=25, parametre='curseur', etiquettes=None):
+    """
+    Page d'une liste désignée par un paramètre GET, total lu par compte_en_cache()
+
+    Args:
+        request (HttpRequest): Requête (curseur lu dans request.GET[parametre])
+        queryset (QuerySet), ordre (list), par_page (int): Voir PaginationCurseur
+        parametre (str): Paramètre GET du curseur (un par liste de la page)
+        etiquettes (list | callable): Étiquettes du total en cache
+
+    Returns:
+        PageCurseur: Page avec ses liens (url_suivante, url_precedente...)
+    """
+    pagination = PaginationCurseur(
+        queryset, ordre, par_page, total=lambda: compte_en_cache(queryset, etiquettes)
+    )
+    return pagination.page_requete(request, parametre)
@@ -0,0 +1,192 @@
+# =============================================================================
+# PROFIL DES TEMPLATES - Temps de rendu par template, bloc et boucle
+# =============================================================================
+"""
+Mesure du temps passé dans chaque partie des templates
+
+Les templates sont compilés une fois par processus (chargeur
+cached.Loader, configuré explicitement dans TEMPLATES). Reste le rendu :
+ce module instrumente le moteur Django pour mesurer, pendant une requête,
+
+- chaque template rendu (page, parent {% extends %}, {% include %}),
+- chaque {% block %},
+- chaque boucle {% for %} (identifiée par template:ligne : les grilles des
+  calendriers de calendrier_activites.html et activite_mensuelle.html),
+- le chargement des templates (compilation au premier appel, puis cache).
+
+Pour chaque élément : nombre d'appels, temps total (enfants compris) et
+temps propre (enfants exclus). L'instrumentation n'est installée que si
+PROFIL_TEMPLATES est activé (ProfilTemplatesMiddleware : journal et en-tête
+Server-Timing, visible dans l'onglet Réseau du navigateur) ou par la
+commande profil_templates.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template import Engine
+from django.template.base import Template
+from django.template.defaulttags import ForNode
+from django.template.loader_tags import BlockNode
+
+logger = logging.getLogger(__name__)
+
+# Éléments affichés dans le journal et l'en-tête Server-Timing
+LIMITE_ELEMENTS = 8
+
+_collecteur = ContextVar('collecteur_templates', default=None)
+_installe = False
+
+
+class Collecteur:
+    """Mesures d'une requête (ou d'une série de rendus)"""
+
+    def __init__(self):
+        # Clé (nature, nom) -> [appels, total, propre] en secondes
+        self.mesures = defaultdict(lambda: [0, 0.0, 0.0])
+        self._pile = []
+
+    def mesurer(self, cle, fonction, *args, **kwargs):
+        """Exécute fonction(*args, **kwargs) en comptant son temps sous cle"""
+        debut = time.perf_counter()
+        self._pile.append(0.0)
+        try:
+            return fonction(*args, **kwargs)
+        finally:
+            duree = time.perf_counter() - debut
+            enfants = self._pile.pop()
+            if self._pile:
+                self._pile[-1] += duree
+            mesure = self.mesures[cle]
+            mesure[0] += 1
+            mesure[1] += duree
+            mesure[2] += duree - enfants
+
+    def total(self):
+        """Temps de rendu total (somme des temps propres), en secondes"""
+        return sum(mesure[2] for mesure in self.mesures.values())
+
+    def classement(self, limite=None):
+        """
+        Éléments triés par temps propre décroissant
+
+        Returns:
+            list: Tuples (nature, nom, appels, total, propre)
+        """
+        lignes = sorted(
+            ((nature, nom, *mesure) for (nature, nom), mesure in self.mesures.items()),
+            key=lambda ligne: ligne[4],
+            reverse=True,
+        )
+        return lignes[:limite] if limite else lignes
+
+
+# =============================================================================
+# INSTRUMENTATION DU MOTEUR
+# =============================================================================
+
+def _instrumenter(classe, methode, cle):
+    """Remplace classe.methode par une version chronométrée si un collecteur est actif"""
+    originale = getattr(classe, methode)
+
+    def chronometree(self, *args, **kwargs):
+        collecteur = _collecteur.get()
+        if collecteur is None:
+            return originale(self, *args, **kwargs)
+        return collecteur.mesurer(cle(self, *args), originale, self, *args, **kwargs)
+
+    chronometree.__wrapped__ = originale
+    setattr(classe, methode, chronometree)
+
+
+def _ligne(noeud):
+    origine = getattr(noeud.origin, 'template_name', None) or '?'
+    return f"{origine}:{noeud.token.lineno}" if noeud.token else origine
+
+
+def installer():
+    """Installe l'instrumentation (une fois par processus)"""
+    global _installe
+    if _installe:
+        return
+    _installe = True
+    # Même principe que l'instrumentation des tests Django (Template._render)
+    _instrumenter(Template, '_render', lambda t, contexte: ('template', t.name or '<chaîne>'))
+    # Un bloc est nommé d'après la page rendue : le nœud exécuté est celui du
+    # parent (base.html), le contenu celui de la page qui le redéfinit
+    _instrumenter(BlockNode, 'render', lambda n, contexte: ('bloc', f"{contexte.template.name} {n.name}"))
+    _instrumenter(ForNode, 'render', lambda n, contexte: ('boucle', f"{_ligne(n)} for {n.sequence.token}"))
+    _instrumenter(Engine, 'find_template', lambda e, nom, *args: ('chargement', nom))
+
+
+@contextmanager
+def profiler():
+    """
+    Collecte les mesures des rendus exécutés dans le bloc with
+
+    Usage :
+        with profiler() as collecteur:
+            render(...)
+        collecteur.classement()
+    """
+    installer()
+    collecteur = Collecteur()
+    jeton = _collecteur.set(collecteur)
+    try:
+        yield collecteur
+    finally:
+        _collecteur.reset(jeton)
+
+
+def formater(collecteur, limite=LIMITE_ELEMENTS):
+    """
+    Tableau texte des éléments les plus coûteux
+
+    Returns:
+        str: Une ligne par élément (temps propre, total, appels, nom)
+    """
+    lignes = [f"{'propre':>9} {'total':>9} {'appels':>7}  élément"]
+    for nature, nom, appels, total, propre in collecteur.classement(limite):
+        lignes.append(f"{propre * 1000:>6.1f} ms {total * 1000:>6.1f} ms {appels:>7}  {nature} {nom}")
+    return '\n'.join(lignes)
+
+
+# =============================================================================
+# MIDDLEWARE
+# =============================================================================
+
+class ProfilTemplatesMiddleware:
+    """
+    Profile le rendu des templates de chaque requête (si PROFIL_TEMPLATES)
+
+    Journalise le classement (logger gabomadriver_app.profil_templates,
+    niveau INFO) et l'envoie dans l'en-tête Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFIL_TEMPLATES:
+            raise MiddlewareNotUsed
+        installer()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with profiler() as collecteur:
+            response = self.get_response(request)
+        if not collecteur.mesures:
+            return response
+
+        vue = request.resolver_match.view_name if request.resolver_match else request.path
+        logger.info(
+            "Rendu %s : %.1f ms\n%s", vue, collecteur.total() * 1000, formater(collecteur)
+        )
+        elements = [f'tpl;dur={collecteur.total() * 1000:.1f};desc="templates"']
+        for rang, (nature, nom, appels, total, propre) in enumerate(collecteur.classement(LIMITE_ELEMENTS)):
+            description = f"{nature} {nom}".replace('"', "'")
+            elements.append(f'tpl{rang};dur={propre * 1000:.1f};desc="{description}"')
+        response['Server-Timing'] = ', '.join(elements)
+        return response
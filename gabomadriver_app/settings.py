@@ -66,6 +66,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',           # Sécurité générale
+    'gabomadriver_app.optimisation.OptimisationReponsesMiddleware',  # Minification et compression
+    'gabomadriver_app.profil_templates.ProfilTemplatesMiddleware',   # Profil des templates (si activé)
     'django.contrib.sessions.middleware.SessionMiddleware',    # Gestion des sessions
     'django.middleware.common.CommonMiddleware',               # Middleware commun
     'django.middleware.csrf.CsrfViewMiddleware',               # Protection CSRF
@@ -88,8 +90,16 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],  # Répertoire global des templates
-        'APP_DIRS': True,                  # Recherche dans les dossiers templates des apps
         'OPTIONS': {
+            # Templates compilés une fois par processus, en production comme
+            # en DEBUG (runserver vide le cache quand un template change) ;
+            # remplace APP_DIRS, incompatible avec une liste de chargeurs
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',      # DIRS
+                    'django.template.loaders.app_directories.Loader', # Dossiers templates des apps
+                ]),
+            ],
             'context_processors': [
                 # Processeurs de contexte disponibles dans tous les templates
                 'django.template.context_processors.debug',      # Variables de debug
@@ -101,6 +111,23 @@ TEMPLATES = [
     },
 ]
 
+# Profil du rendu (temps par template, bloc et boucle {% for %}) : journal et
+# en-tête Server-Timing de chaque réponse, voir gabomadriver_app/profil_templates.py
+PROFIL_TEMPLATES = os.environ.get('PROFIL_TEMPLATES', '') == '1'
+
+# Le classement des templates les plus lents est écrit sur la console
+# (journal d'erreurs du serveur sur PythonAnywhere)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'gabomadriver_app.profil_templates': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 # =============================================================================
 # CONFIGURATION WSGI - Interface de déploiement
 # =============================================================================
@@ -130,6 +157,49 @@ DATABASES = {
 #     }
 # }
 
+# =============================================================================
+# CACHE - Partagé entre les processus web et les commandes de gestion
+# =============================================================================
+
+# Deux niveaux (voir gabomadriver_app/cache_partage.py) : mémoire du
+# processus (L1, quelques secondes) devant un fichier SQLite dédié (L2),
+# partagé par les processus web, le worker et les commandes de gestion. Les
+# entrées étiquetées (ex. 'chauffeur:12') sont périmées dans tous les
+# processus par cache_partage.invalider_etiquettes()
+CACHES = {
+    'default': {
+        'BACKEND': 'gabomadriver_app.cache_partage.CacheDeuxNiveaux',
+        'LOCATION': os.environ.get('CACHE_DIR', str(BASE_DIR / 'cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'L1_MAX_ENTREES': 500,
+            'L1_DUREE': 5,
+        },
+    }
+}
+
+# =============================================================================
+# SESSIONS ET MESSAGES - Sans accès à la base à chaque requête
+# =============================================================================
+
+# SESSION_STOCKAGE :
+# - cache_db (défaut) : session lue dans le cache partagé, écrite en base
+#   seulement quand elle change (connexion, déconnexion)
+# - cookies : session signée dans le cookie, aucune ligne django_session
+#   (une déconnexion n'invalide pas une copie volée du cookie)
+# - db : comportement Django par défaut, une lecture SQL par requête
+SESSION_ENGINE = {
+    'cache_db': 'django.contrib.sessions.backends.cached_db',
+    'cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'db': 'django.contrib.sessions.backends.db',
+}[os.environ.get('SESSION_STOCKAGE', 'cache_db')]
+
+# Messages flash dans un cookie signé : jamais écrits dans la session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Nettoyage des sessions expirées (commande purger_sessions), par lots
+SESSIONS_PURGE_TAILLE_LOT = 500
+
 # =============================================================================
 # VALIDATION DES MOTS DE PASSE - Sécurité des comptes utilisateurs
 # =============================================================================
@@ -172,6 +242,31 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / "staticfiles"    # Répertoire de collecte pour la production
 
+# Collecte : noms empreintés (manifeste staticfiles.json) et variantes
+# .gz/.br précompressées, voir gabomadriver_app/statiques.py. Hors DEBUG,
+# toute page avec {% static %} échoue tant que collectstatic n'a pas été
+# lancé (manifeste absent) : le déploiement (deploy.py) le lance
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'gabomadriver_app.statiques.StockageStatiqueCompresse',
+    },
+}
+
+# Servir STATIC_ROOT par Django (hors DEBUG) avec Cache-Control immuable et
+# variantes compressées, à la place du mappage statique de PythonAnywhere
+STATIQUES_PAR_DJANGO = os.environ.get('STATIQUES_PAR_DJANGO', '') == '1'
+
+# =============================================================================
+# OPTIMISATION DES RÉPONSES - Minification HTML et compression br/gzip
+# =============================================================================
+
+# Voir gabomadriver_app/optimisation.py ; tailles par vue : commande rapport_tailles
+OPTIMISATION_MINIFIER_HTML = True
+OPTIMISATION_TAILLE_MIN = 200             # Octets : en dessous, pas de compression
+
 # =============================================================================
 # CONFIGURATION DES CLÉS PRIMAIRES - Type de clé par défaut
 # =============================================================================
@@ -209,4 +304,111 @@ LOGOUT_REDIRECT_URL = 'drivers:index'
 # À définir dans les variables d'environnement sur PythonAnywhere :
 # export GITHUB_WEBHOOK_SECRET="votre-clé-secrète-ici"
 # Ou définir directement ici (moins sécurisé) :
-GITHUB_WEBHOOK_SECRET = os.environ.get('GITHUB_WEBHOOK_SECRET', '')
\ No newline at end of file
+GITHUB_WEBHOOK_SECRET = os.environ.get('GITHUB_WEBHOOK_SECRET', '')
+
+# Délai en secondes sans nouveau push avant de déployer : une rafale de
+# pushes ne donne lieu qu'à un seul déploiement
+DEPLOY_DELAI_REGROUPEMENT = int(os.environ.get('DEPLOY_DELAI_REGROUPEMENT', 15))
+
+# Durée maximale d'un déploiement en secondes (exécuté hors requête)
+DEPLOY_TIMEOUT = 600
+
+# =============================================================================
+# DÉMARRAGE À FROID - Budget vérifié par profile_startup
+# =============================================================================
+
+# Durée maximale en secondes du démarrage à froid (application WSGI et
+# URLconf chargées) ; à ajuster selon la machine de production
+DEMARRAGE_BUDGET = float(os.environ.get('DEMARRAGE_BUDGET', 1.5))
+
+# Dépendances lourdes importées seulement à l'usage (export Excel, PDF) :
+# profile_startup échoue si l'une d'elles est chargée au démarrage
+DEMARRAGE_IMPORTS_DIFFERES = ['openpyxl', 'weasyprint', 'reportlab']
+
+# =============================================================================
+# INDICATEURS ET PRÉCHAUFFAGE - Tableaux de bord superviseur
+# =============================================================================
+
+# Durée de vie en secondes des indicateurs en cache (activities.indicateurs).
+# Les saisies, imports, pannes et suppressions les périment aussitôt ; ce
+# délai borne seulement le retard des modifications faites dans l'admin Django
+INDICATEURS_CACHE_DUREE = 300
+
+# Nombre total de lignes des listes paginées (gabomadriver_app.pagination) :
+# les comptes étiquetés sont périmés par les écritures qui les touchent, les
+# autres (chauffeurs, utilisateurs) affichés avec au plus ce retard
+PAGINATION_COMPTE_DUREE = 60
+
+# Calendriers mensuels en cache (activities.calendrier) : un mois terminé est
+# gardé jusqu'à une modification qui le touche, le mois courant au plus ce délai
+CALENDRIER_MOIS_COURANT_DUREE = 3600
+
+# Préchauffage dans chaque processus web à son démarrage (wsgi.py) : vues
+# importées, templates compilés et indicateurs du jour calculés avant la
+# première requête. Désactivé par défaut (démarrage du processus plus long)
+PRECHAUFFAGE_AU_DEMARRAGE = os.environ.get('PRECHAUFFAGE_AU_DEMARRAGE', '') == '1'
+
+# =============================================================================
+# ARCHIVAGE DE L'HISTORIQUE - Partitionnement chaud/froid
+# =============================================================================
+
+# Nombre de mois conservés dans les tables chaudes (mois courant non compris)
+# Les mois plus anciens sont déplacés vers les tables *Archive par :
+# python manage.py archiver_activites
+ARCHIVE_AGE_MOIS = int(os.environ.get('ARCHIVE_AGE_MOIS', 3))
+
+# Nombre de lignes déplacées par transaction (verrou d'écriture SQLite court)
+ARCHIVE_TAILLE_LOT = 500
+
+# Répertoire des exports mensuels JSON lines compressés (stockage à froid)
+ARCHIVE_EXPORT_DIR = BASE_DIR / 'archives'
+
+# =============================================================================
+# PURGES PAR LOTS - Suppressions massives en arrière-plan
+# =============================================================================
+
+# Nombre de lignes supprimées par transaction (verrou d'écriture SQLite court)
+PURGE_TAILLE_LOT = 500
+
+# Pause en secondes entre deux lots : laisse passer les écritures des chauffeurs
+PURGE_PAUSE = 0.05
+
+# Exécution dans un thread du processus web ; à False, la purge est exécutée
+# pendant la requête et les opérations restent reprenables par :
+# python manage.py executer_purges
+PURGE_EN_ARRIERE_PLAN = True
+
+# =============================================================================
+# SYNCHRONISATION HORS LIGNE - Client chauffeur (service worker)
+# =============================================================================
+
+# Ancienneté maximale (en jours) d'un événement de clés mis en file hors ligne
+SYNC_JOURS_MAX = 7
+
+# Nombre maximal d'événements acceptés par lot de synchronisation
+SYNC_TAILLE_MAX_LOT = 50
+
+# =============================================================================
+# OUTBOX TRANSACTIONNELLE - Effets secondaires différés
+# =============================================================================
+
+# Les effets publiés par les vues (pannes, notifications, cache) sont
+# traités par un processus séparé (tâche "Always-on" sur PythonAnywhere) :
+# python manage.py run_outbox_worker
+
+# Nombre d'effets réservés et traités par lot
+OUTBOX_TAILLE_LOT = 100
+
+# Pause en secondes entre deux scrutations quand la file est vide
+OUTBOX_PAUSE = 2
+
+# Délai en secondes avant de reprendre un effet réservé non traité
+# (worker arrêté en cours de lot) ou de retenter un effet en échec
+OUTBOX_DELAI_VERROU = 300
+
+# Nombre d'échecs avant abandon d'un effet (statut "échoué")
+OUTBOX_TENTATIVES_MAX = 5
+
+# Courriels récapitulatifs (console par défaut, SMTP à configurer en production)
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Gaboma Driver <noreply@gabomadriver.local>')
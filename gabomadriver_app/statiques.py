@@ -0,0 +1,187 @@
+# =============================================================================
+# FICHIERS STATIQUES - Noms empreintés, variantes compressées et en-têtes
+# =============================================================================
+"""
+Chaîne de production des fichiers statiques
+
+- StockageStatiqueCompresse (STORAGES['staticfiles']) : collectstatic écrit
+  chaque fichier sous un nom empreinté (style.3f2a9c1b7d4e.css, manifeste
+  staticfiles.json) puis, pour les types textuels, ses variantes
+  précompressées .gz et .br (brotli, si le module est installé)
+- servir_statique : sert STATIC_ROOT avec Cache-Control immuable pour les
+  noms empreintés et la variante compressée acceptée par le navigateur ;
+  utilisée quand STATIQUES_PAR_DJANGO est activé (sur PythonAnywhere, à la
+  place du mappage statique du serveur, qui n'envoie pas ces en-têtes)
+- la commande verifier_statiques contrôle que chaque référence {% static %}
+  des templates pointe vers un fichier empreinté du manifeste
+
+Un nom empreinté change avec le contenu : le navigateur peut le garder un
+an sans jamais le revalider.
+"""
+
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+# Types textuels qui gagnent à être compressés (les images le sont déjà)
+EXTENSIONS_COMPRESSIBLES = {'.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml'}
+
+# En dessous, l'en-tête de compression coûte plus qu'il ne rapporte
+TAILLE_MIN_COMPRESSION = 256
+
+# Variantes par ordre de préférence : (Content-Encoding, suffixe)
+VARIANTES = [('br', '.br'), ('gzip', '.gz')]
+
+# Empreinte ajoutée par ManifestStaticFilesStorage : nom.<12 hexa>.ext
+NOM_EMPREINTE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+CACHE_IMMUABLE = 'public, max-age=31536000, immutable'
+
+
+# =============================================================================
+# COMPRESSION
+# =============================================================================
+
+def brotli_disponible():
+    """Vrai si le module brotli (optionnel) est installé"""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def compresser(contenu, encodage, niveau_max=True):
+    """
+    Compresse des octets pour un Content-Encoding donné
+
+    Args:
+        contenu (bytes): Données à compresser
+        encodage (str): 'br' ou 'gzip'
+        niveau_max (bool): Compression maximale (fichiers compressés une
+                           fois pour toutes) ou rapide (réponses à la volée)
+
+    Returns:
+        bytes: Données compressées
+    """
+    if encodage == 'br':
+        import brotli
+        return brotli.compress(contenu, quality=11 if niveau_max else 5)
+    # mtime=0 : même contenu, mêmes octets (variantes reproductibles)
+    return gzip.compress(contenu, compresslevel=9 if niveau_max else 6, mtime=0)
+
+
+def encodages_acceptes(request):
+    """
+    Encodages acceptés par le client (en-tête Accept-Encoding, q=0 exclu)
+
+    Returns:
+        set: Ex. {'br', 'gzip'}
+    """
+    acceptes = set()
+    for element in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        nom, _, parametres = element.strip().partition(';')
+        parametres = parametres.replace(' ', '')
+        if nom and parametres not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            acceptes.add(nom.lower())
+    return acceptes
+
+
+class StockageStatiqueCompresse(ManifestStaticFilesStorage):
+    """
+    Stockage des fichiers collectés : noms empreintés et variantes .gz/.br
+
+    Les variantes d'un nom empreinté ne changent jamais : un fichier déjà
+    compressé lors d'une collecte précédente n'est pas recompressé.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        # Noms définitifs du manifeste (les CSS passent par des noms
+        # intermédiaires pendant la réécriture de leurs url())
+        encodages = [e for e in VARIANTES if e[0] != 'br' or brotli_disponible()]
+        for nom_empreinte in set(self.hashed_files.values()):
+            self._compresser(nom_empreinte, encodages)
+
+    def _compresser(self, nom, encodages):
+        if os.path.splitext(nom)[1].lower() not in EXTENSIONS_COMPRESSIBLES:
+            return
+        chemin = self.path(nom)
+        if not os.path.isfile(chemin):
+            return
+        contenu = None
+        for encodage, suffixe in encodages:
+            if os.path.exists(chemin + suffixe):
+                continue
+            if contenu is None:
+                with open(chemin, 'rb') as fichier:
+                    contenu = fichier.read()
+                if len(contenu) < TAILLE_MIN_COMPRESSION:
+                    return
+            compresse = compresser(contenu, encodage)
+            # Variante inutile si le gain est négligeable
+            if len(compresse) < len(contenu) * 0.95:
+                with open(chemin + suffixe, 'wb') as fichier:
+                    fichier.write(compresse)
+
+
+# =============================================================================
+# SERVICE DES FICHIERS COLLECTÉS
+# =============================================================================
+
+@require_safe
+def servir_statique(request, chemin):
+    """
+    Sert un fichier de STATIC_ROOT avec cache immuable et précompression
+
+    Args:
+        request: Objet HttpRequest
+        chemin (str): Chemin relatif sous STATIC_URL
+
+    Returns:
+        FileResponse: Fichier (ou sa variante .br/.gz acceptée), 304 si inchangé
+    """
+    try:
+        fichier = safe_join(settings.STATIC_ROOT, chemin)
+    except ValueError:
+        raise Http404("Fichier statique introuvable")
+    if not os.path.isfile(fichier):
+        raise Http404("Fichier statique introuvable")
+
+    stat = os.stat(fichier)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    type_contenu, _ = mimetypes.guess_type(fichier)
+    acceptes = encodages_acceptes(request)
+    a_servir, encodage = fichier, None
+    for nom, suffixe in VARIANTES:
+        if nom in acceptes and os.path.isfile(fichier + suffixe):
+            a_servir, encodage = fichier + suffixe, nom
+            break
+
+    response = FileResponse(open(a_servir, 'rb'), content_type=type_contenu or 'application/octet-stream')
+    # FileResponse ajoute « inline; filename=... » : inutile pour un statique
+    response.headers.pop('Content-Disposition', None)
+    if encodage:
+        response['Content-Encoding'] = encodage
+    response['Vary'] = 'Accept-Encoding'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if NOM_EMPREINTE.search(chemin):
+        response['Cache-Control'] = CACHE_IMMUABLE
+    else:
+        # Nom non empreinté (ex. admin sans manifeste) : toujours revalider
+        response['Cache-Control'] = 'no-cache'
+    return response
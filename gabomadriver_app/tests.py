@@ -0,0 +1,383 @@
+# =============================================================================
+# TESTS DU PROJET (cache partagé, pagination, compression, déploiement)
+# =============================================================================
+
+import gzip
+import importlib.util
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, time as heure
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+
+import deploy
+
+from activities.models import PriseCles
+from activities.tests import TestCaseCache, creer_chauffeur
+
+from . import deploiement
+from .pagination import PaginationCurseur, paginer
+from .cache_partage import CacheDeuxNiveaux, invalider_etiquettes, memoriser
+from .optimisation import OptimisationReponsesMiddleware
+
+
+# =============================================================================
+# CACHE PARTAGÉ (cache_partage.py)
+# =============================================================================
+
+class CachePartageTests(SimpleTestCase):
+    """Deux instances sur le même dossier : deux processus web"""
+
+    def setUp(self):
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        self.web1, self.web2 = (
+            CacheDeuxNiveaux(dossier.name, {'OPTIONS': {'L1_DUREE': 60}}) for _ in range(2)
+        )
+
+    def test_suppression_vue_par_les_autres_processus(self):
+        self.web1.set('page', 'ancienne')
+        self.assertEqual(self.web2.get('page'), 'ancienne')  # copie en L1 de web2
+
+        self.web1.delete('page')
+        self.assertIsNone(self.web2.get('page'))
+
+        self.web1.set('compteur', 1)
+        self.assertEqual(self.web2.get('compteur'), 1)
+        self.web1.incr('compteur')
+        self.assertEqual(self.web2.get('compteur'), 2)
+
+        self.web1.set('tableau', 'calculé')
+        self.assertEqual(self.web2.get('tableau'), 'calculé')
+        self.web1.clear()
+        self.assertIsNone(self.web2.get('tableau'))
+
+    def test_sessions_hors_l1(self):
+        cle = 'django.contrib.sessions.cached_dbabc123'
+        self.web1.set(cle, {'_auth_user_id': '1'})
+        self.assertEqual(self.web2.get(cle), {'_auth_user_id': '1'})
+
+        # Session modifiée ailleurs : pas de copie L1 à attendre
+        self.web1.set(cle, {})
+        self.assertEqual(self.web2.get(cle), {})
+
+    def test_invalidation_par_etiquette(self):
+        calculs = []
+
+        def calcul():
+            calculs.append(1)
+            return len(calculs)
+
+        self.assertEqual(memoriser('indicateurs', calcul, 300, ['chauffeur:1'], cache=self.web1), 1)
+        self.assertEqual(memoriser('indicateurs', calcul, 300, ['chauffeur:1'], cache=self.web2), 1)
+
+        invalider_etiquettes('chauffeur:2', cache=self.web2)
+        self.assertEqual(memoriser('indicateurs', calcul, 300, ['chauffeur:1'], cache=self.web1), 1)
+        invalider_etiquettes('chauffeur:1', cache=self.web2)
+        self.assertEqual(memoriser('indicateurs', calcul, 300, ['chauffeur:1'], cache=self.web1), 2)
+        self.assertEqual(memoriser('indicateurs', calcul, 300, ['chauffeur:1'], cache=self.web2), 2)
+
+    def test_l2_indisponible_sans_exception_sqlite(self):
+        self.web1.set('page', 'valeur')
+        with mock.patch.object(self.web1, '_connexions', side_effect=sqlite3.OperationalError('database is locked')), \
+                self.assertLogs('gabomadriver_app.cache_partage', 'ERROR'):
+            self.assertIsNone(self.web1.get('page'))
+            self.assertFalse(self.web1.delete('page'))
+            self.assertFalse(self.web1.touch('page'))
+            self.web1.clear()
+            with self.assertRaises(ValueError):
+                self.web1.incr('page')
+
+    def verrouiller_etiquettes(self, cache):
+        """Un autre processus tient le verrou d'écriture de etiquettes.sqlite3"""
+        cache._connexions()[1].execute('PRAGMA busy_timeout = 50')
+        verrou = sqlite3.connect(cache._dossier / 'etiquettes.sqlite3', isolation_level=None)
+        verrou.execute('BEGIN IMMEDIATE')
+        self.addCleanup(verrou.close)
+        self.addCleanup(verrou.execute, 'ROLLBACK')
+
+    def test_invalidation_avec_l2_verrouille(self):
+        calcul = mock.Mock(side_effect=[1, 2])
+        self.assertEqual(memoriser('indicateurs', calcul, 300, ['chauffeur:1'], cache=self.web1), 1)
+        self.verrouiller_etiquettes(self.web1)
+
+        with self.assertLogs('gabomadriver_app.cache_partage', 'ERROR') as journal:
+            invalider_etiquettes('chauffeur:1', cache=self.web1)
+            self.web1.delete('autre')
+
+        self.assertIn('chauffeur:1', journal.output[0])
+        # L1 abandonné : l'entrée est relue depuis le L2, jusqu'à son expiration
+        self.assertFalse(self.web1._l1)
+        self.assertEqual(self.web1.get('indicateurs'), 1)
+
+    def test_etiquettes_avec_un_autre_backend(self):
+        autre = LocMemCache('etiquettes', {})
+        calcul = mock.Mock(side_effect=[10, 20])
+
+        self.assertEqual(memoriser('compte', calcul, 300, lambda: ['scope:tous'], cache=autre), 10)
+        self.assertEqual(memoriser('compte', calcul, 300, lambda: ['scope:tous'], cache=autre), 10)
+        invalider_etiquettes('scope:tous', cache=autre)
+        invalider_etiquettes('scope:tous', cache=autre)
+        self.assertEqual(memoriser('compte', calcul, 300, lambda: ['scope:tous'], cache=autre), 20)
+        self.assertEqual(calcul.call_count, 2)
+
+
+# =============================================================================
+# PAGINATION PAR CURSEUR (pagination.py)
+# =============================================================================
+
+class PaginationCurseurTests(TestCaseCache):
+
+    ORDRE = ['-date', 'heure_prise', '-id']
+
+    def setUp(self):
+        super().setUp()
+        chauffeurs = [creer_chauffeur(f'Chauffeur{i}', f'+2410600000{i}') for i in range(6)]
+        # 23 lignes, beaucoup d'égalités sur date et heure : l'id départage
+        for n in range(23):
+            PriseCles.objects.create(
+                chauffeur=chauffeurs[n % 6], date=date(2024, 1, 1 + n // 6), heure_prise=heure(7 + n % 2),
+                objectif_recette=50000, signature='x',
+            )
+        self.attendu = list(PriseCles.objects.order_by(*self.ORDRE).values_list('pk', flat=True))
+        self.pagination = PaginationCurseur(PriseCles.objects.all(), self.ORDRE, par_page=5, total=23)
+
+    def pages_en_avant(self):
+        pages, jeton = [], None
+        while True:
+            page = self.pagination.page(jeton)
+            pages.append(page)
+            if not page.suivant:
+                return pages
+            jeton = page.suivant
+
+    def test_ordre_et_bornes_en_avant(self):
+        pages = self.pages_en_avant()
+
+        self.assertEqual([len(page) for page in pages], [5, 5, 5, 5, 3])
+        self.assertEqual([objet.pk for page in pages for objet in page], self.attendu)
+        self.assertEqual([page.number for page in pages], [1, 2, 3, 4, 5])
+        self.assertEqual([(page.start_index(), page.end_index()) for page in pages][-1], (21, 23))
+        self.assertFalse(pages[0].has_previous())
+        self.assertEqual(pages[-1].num_pages, 5)
+
+    def test_derniere_page_puis_a_rebours(self):
+        en_avant = [[objet.pk for objet in page] for page in self.pages_en_avant()]
+
+        lien = self.pagination.page_requete(RequestFactory().get('/')).url_derniere
+        page = self.pagination.page_requete(RequestFactory().get('/' + lien))
+        a_rebours = []
+        while True:
+            a_rebours.insert(0, [objet.pk for objet in page])
+            self.assertEqual(page.number, len(en_avant) - len(a_rebours) + 1)
+            if not page.precedent:
+                break
+            page = self.pagination.page(page.precedent)
+
+        # Mêmes bornes de pages dans les deux sens
+        self.assertEqual(a_rebours, en_avant)
+
+    def test_ligne_ajoutee_entre_deux_pages(self):
+        premiere = self.pagination.page()
+        # Nouvelle ligne en tête de liste : la page suivante ne répète rien
+        PriseCles.objects.create(
+            chauffeur=premiere[0].chauffeur, date=date(2024, 2, 1), heure_prise=heure(7),
+            objectif_recette=50000, signature='x',
+        )
+        deuxieme = self.pagination.page(premiere.suivant)
+        self.assertEqual([objet.pk for objet in deuxieme], self.attendu[5:10])
+
+    def test_jeton_illisible_premiere_page(self):
+        for jeton in ('n-importe-quoi', 'W10', 'WyJhIiwxLFsiMjAyNCJdXQ'):
+            with self.subTest(jeton=jeton):
+                self.assertEqual([objet.pk for objet in self.pagination.page(jeton)], self.attendu[:5])
+
+    def test_liens_conservent_les_filtres(self):
+        requete = RequestFactory().get('/', {'statut': 'en_cours'})
+        page = paginer(requete, PriseCles.objects.all(), self.ORDRE, 5)
+
+        self.assertEqual(page.total, 23)
+        self.assertIn('statut=en_cours', page.url_suivante)
+        self.assertIn('statut=en_cours', page.url_derniere)
+        suivante = paginer(RequestFactory().get('/' + page.url_suivante), PriseCles.objects.all(), self.ORDRE, 5)
+        self.assertEqual([objet.pk for objet in suivante], self.attendu[5:10])
+
+
+# =============================================================================
+# COMPRESSION DES RÉPONSES (optimisation.py)
+# =============================================================================
+
+class OptimisationReponsesTests(SimpleTestCase):
+
+    DONNEES = {'chauffeurs': [{'nom': f'Chauffeur {i}', 'recette': 50000 + i} for i in range(50)]}
+
+    def servir(self, reponse, encodage):
+        requete = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=encodage)
+        return OptimisationReponsesMiddleware(lambda request: reponse)(requete)
+
+    def test_json_gzip_lisible(self):
+        reponse = self.servir(JsonResponse(self.DONNEES), 'gzip')
+
+        self.assertEqual(reponse['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(reponse.content)), self.DONNEES)
+
+    @skipUnless(importlib.util.find_spec('brotli'), "brotli n'est pas installé")
+    def test_json_brotli_sans_bourrage(self):
+        import brotli
+
+        for _ in range(5):
+            reponse = self.servir(JsonResponse(self.DONNEES), 'br, gzip')
+            self.assertEqual(reponse['Content-Encoding'], 'br')
+            self.assertEqual(json.loads(brotli.decompress(reponse.content)), self.DONNEES)
+
+    @skipUnless(importlib.util.find_spec('brotli'), "brotli n'est pas installé")
+    def test_html_brotli_bourre(self):
+        import brotli
+
+        page = '<html><body>' + '<p>Recette du jour</p>' * 50 + '</body></html>'
+        reponse = self.servir(HttpResponse(page), 'br')
+
+        contenu = brotli.decompress(reponse.content).decode()
+        self.assertTrue(contenu.startswith(page))
+        self.assertRegex(contenu[len(page):], r'^<!--[0-9a-f]+-->$')
+
+
+# =============================================================================
+# DÉPLOIEMENT (webhook.py, deploiement.py, deploy.py)
+# =============================================================================
+
+@override_settings(GITHUB_WEBHOOK_SECRET='')
+class WebhookTests(SimpleTestCase):
+
+    def pousser(self):
+        return self.client.post(
+            reverse('github_webhook'),
+            json.dumps({'ref': 'refs/heads/main', 'head_commit': {'id': 'abcdef123456'}}),
+            content_type='application/json',
+            HTTP_X_GITHUB_EVENT='push',
+            HTTP_X_HUB_SIGNATURE_256='sha256=non-verifiee',
+        )
+
+    def test_script_absent_refuse(self):
+        with mock.patch.object(deploiement, 'ORCHESTRATEUR', Path('/inexistant/deploy.py')), \
+                mock.patch('gabomadriver_app.webhook.demander_deploiement') as demander:
+            reponse = self.pousser()
+
+        self.assertEqual(reponse.status_code, 500)
+        self.assertIn(b'Deployment script not found', reponse.content)
+        demander.assert_not_called()
+
+    def test_push_programme(self):
+        with mock.patch('gabomadriver_app.webhook.demander_deploiement', return_value=1) as demander:
+            reponse = self.pousser()
+
+        self.assertEqual(reponse.status_code, 202)
+        self.assertEqual(reponse.json()['commit'], 'abcdef1')
+        demander.assert_called_once()
+
+
+@skipUnless(hasattr(os, 'killpg'), "groupes de processus POSIX requis")
+class ExecuteurTests(SimpleTestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dossier.cleanup)
+        self.enfant = Path(self.dossier.name) / 'enfant.pid'
+        orchestrateur = Path(self.dossier.name) / 'deploy.py'
+        # Orchestrateur bloqué sur une étape lancée en sous-processus
+        orchestrateur.write_text(
+            'import subprocess, sys, time\n'
+            'etape = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])\n'
+            f'open({str(self.enfant)!r}, "w").write(str(etape.pid))\n'
+            'time.sleep(60)\n'
+        )
+        for cible, valeur in (('REPERTOIRE', Path(self.dossier.name)), ('ORCHESTRATEUR', orchestrateur)):
+            patch = mock.patch.object(deploiement, cible, valeur)
+            patch.start()
+            self.addCleanup(patch.stop)
+        patch = mock.patch.object(deploiement, '_interpreteur', return_value=sys.executable)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_expiration_arrete_tout_le_groupe(self):
+        deploiement._deployer({'commits': []}, timeout=2)
+
+        self.assertEqual(deploiement.lire_statut()['dernier']['statut'], 'expire')
+        pid = int(self.enfant.read_text())
+        # L'étape en cours ne survit pas à l'orchestrateur
+        for _ in range(50):
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                break
+            # Zombie rattaché à init : plus de processus actif
+            if subprocess.run(['ps', '-o', 'stat=', '-p', str(pid)], capture_output=True, text=True).stdout.startswith('Z'):
+                break
+            time.sleep(0.1)
+        else:
+            self.fail("Le sous-processus de l'orchestrateur tourne encore")
+
+    def test_code_partiel_enregistre(self):
+        Path(deploiement.ORCHESTRATEUR).write_text('import sys\nsys.exit(2)\n')
+
+        deploiement._deployer({'commits': []}, timeout=10)
+
+        dernier = deploiement.lire_statut()['dernier']
+        self.assertEqual((dernier['statut'], dernier['code_retour']), ('partiel', 2))
+
+
+class OrchestrateurTests(SimpleTestCase):
+    """deploy.main avec des étapes simulées, sans git ni sous-processus"""
+
+    def setUp(self):
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        self.etat = Path(dossier.name) / 'deploy_etat.json'
+        for cible, valeur in (
+            ('ETAT', self.etat),
+            ('git', mock.Mock(return_value='abcdef123456')),
+            ('fichiers_modifies', mock.Mock(return_value=None)),
+            ('trouver_python', mock.Mock(return_value=sys.executable)),
+        ):
+            patch = mock.patch.object(deploy, cible, valeur)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def deployer(self, *etapes):
+        with mock.patch.object(deploy, 'ETAPES', list(etapes)), \
+                mock.patch.object(sys, 'argv', ['deploy.py', '--sans-pull']), \
+                mock.patch('sys.stdout', new_callable=io.StringIO) as sortie:
+            return deploy.main(), sortie.getvalue()
+
+    def test_etape_non_bloquante_en_echec(self):
+        def echec(python):
+            raise subprocess.CalledProcessError(1, ['collectstatic'])
+
+        code, sortie = self.deployer(
+            ('migrations', 'Migrations', lambda python: None, True),
+            ('statiques', 'Statiques', echec, False),
+        )
+
+        self.assertEqual(code, deploy.CODE_PARTIEL)
+        self.assertIn('[WARN] Déploiement partiel', sortie)
+        self.assertNotIn('succès', sortie)
+        # État non enregistré : tout est rejoué au prochain déploiement
+        self.assertFalse(self.etat.exists())
+
+    def test_deploiement_complet(self):
+        code, sortie = self.deployer(('migrations', 'Migrations', lambda python: None, True))
+
+        self.assertEqual(code, 0)
+        self.assertIn('terminé avec succès', sortie)
+        self.assertEqual(json.loads(self.etat.read_text())['commit'], 'abcdef123456')
@@ -20,16 +20,15 @@ L'application utilise un système de namespaces pour éviter les conflits
 entre les URLs des différentes applications.
 """
 
+import re
+
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
-# Import de la configuration admin personnalisée
-from admin_custom import *
-
 # Import du webhook GitHub pour le déploiement automatique
-from .webhook import github_webhook
+from .webhook import github_webhook, statut_deploiement
 
 # =============================================================================
 # DÉFINITION DES ROUTES PRINCIPALES - Mapping des applications
@@ -71,6 +70,10 @@ urlpatterns = [
     # Accès : /webhook/github/
     # Utilisation : Configuré sur GitHub pour appeler cette URL lors d'un push
     path('webhook/github/', github_webhook, name='github_webhook'),
+    
+    # Suivi des déploiements programmés par le webhook (administrateurs)
+    # Accès : /webhook/github/statut/ (?journal=1 pour la sortie du script)
+    path('webhook/github/statut/', statut_deploiement, name='statut_deploiement'),
 ]
 
 # =============================================================================
@@ -78,7 +81,14 @@ urlpatterns = [
 # =============================================================================
 
 # Servir les fichiers statiques en mode développement
-# En production, les fichiers statiques sont servis par le serveur web (Nginx, Apache)
+# En production, les fichiers statiques sont servis par le serveur web (Nginx, Apache),
+# ou par Django avec des en-têtes de cache immuables (STATIQUES_PAR_DJANGO)
 if settings.DEBUG:
     from django.contrib.staticfiles.urls import staticfiles_urlpatterns
     urlpatterns += staticfiles_urlpatterns()
+elif settings.STATIQUES_PAR_DJANGO:
+    from django.urls import re_path
+    from .statiques import servir_statique
+    urlpatterns += [
+        re_path(r'^%s(?P<chemin>.+)$' % re.escape(settings.STATIC_URL.lstrip('/')), servir_statique),
+    ]
@@ -12,19 +12,24 @@ Sécurité :
 Utilisation :
 1. Configurer le webhook sur GitHub avec l'URL : https://votre-domaine.pythonanywhere.com/webhook/github/
 2. Définir la clé secrète dans les variables d'environnement ou settings.py
-3. Le webhook déclenche automatiquement le script deploy.sh lors d'un push
+3. Le webhook programme le déploiement lors d'un push et répond 202 aussitôt ;
+   l'orchestrateur deploy.py est exécuté hors requête par gabomadriver_app.deploiement
+4. Suivi : /webhook/github/statut/ (administrateurs, ?journal=1 pour la sortie)
 """
 
 import os
-import subprocess
 import hmac
 import hashlib
 import json
-from django.http import HttpResponse, HttpResponseForbidden
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.conf import settings
 
+from . import deploiement
+from .deploiement import demander_deploiement, lire_statut
+
 
 def get_webhook_secret():
     """
@@ -85,7 +90,8 @@ def github_webhook(request):
     Sécurité : Vérification de la signature GitHub (si configurée)
     
     Returns:
-        HttpResponse: Réponse avec le résultat du déploiement
+        JsonResponse: 202 avec le lien de suivi si le déploiement est programmé
+        HttpResponse: Événement ignoré, signature ou contenu invalide
     """
     # Vérification de la signature GitHub
     signature = request.META.get('HTTP_X_HUB_SIGNATURE_256', '')
@@ -120,74 +126,51 @@ def github_webhook(request):
             content_type='text/plain'
         )
     
-    # Chemin du script de déploiement
-    # Ajuster selon votre structure sur PythonAnywhere
-    script_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-        'deploy.sh'
-    )
-    
-    # Vérifier que le script existe
-    if not os.path.exists(script_path):
+    # Vérifier que le script de déploiement existe : sinon la demande
+    # serait acceptée puis échouerait sans bruit dans l'exécuteur
+    if not deploiement.ORCHESTRATEUR.exists():
         return HttpResponse(
-            f'Deployment script not found at: {script_path}',
+            f'Deployment script not found at: {deploiement.ORCHESTRATEUR}',
             status=500,
             content_type='text/plain'
         )
     
-    # Exécuter le script de déploiement
-    try:
-        result = subprocess.run(
-            ['bash', script_path],
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 minutes maximum
-            cwd=os.path.dirname(script_path)
-        )
-        
-        if result.returncode == 0:
-            response_text = f"""Deployment successful!
-
-Branch: {ref}
-Commit: {payload.get('head_commit', {}).get('id', 'N/A')[:7]}
-Author: {payload.get('head_commit', {}).get('author', {}).get('name', 'N/A')}
-Message: {payload.get('head_commit', {}).get('message', 'N/A')}
-
-Output:
-{result.stdout}
-"""
-            return HttpResponse(
-                response_text,
-                content_type='text/plain'
-            )
-        else:
-            error_text = f"""Deployment failed!
-
-Branch: {ref}
-Commit: {payload.get('head_commit', {}).get('id', 'N/A')[:7]}
-
-Error output:
-{result.stderr}
+    # Enregistrement de la demande : le déploiement est exécuté hors requête,
+    # une seule fois pour une rafale de pushes (voir gabomadriver_app.deploiement)
+    head_commit = payload.get('head_commit') or {}
+    en_attente = demander_deploiement(
+        {
+            'id': (head_commit.get('id') or 'N/A')[:7],
+            'auteur': (head_commit.get('author') or {}).get('name', 'N/A'),
+            'message': head_commit.get('message', 'N/A'),
+            'branche': ref,
+        },
+        delai=settings.DEPLOY_DELAI_REGROUPEMENT,
+        timeout=settings.DEPLOY_TIMEOUT,
+    )
+    
+    return JsonResponse(
+        {
+            'statut': 'programme',
+            'commit': (head_commit.get('id') or 'N/A')[:7],
+            'en_attente': en_attente,
+            'suivi': request.build_absolute_uri(reverse('statut_deploiement')),
+        },
+        status=202
+    )
 
-Standard output:
-{result.stdout}
-"""
-            return HttpResponse(
-                error_text,
-                status=500,
-                content_type='text/plain'
-            )
-            
-    except subprocess.TimeoutExpired:
-        return HttpResponse(
-            'Deployment script timed out after 5 minutes',
-            status=500,
-            content_type='text/plain'
-        )
-    except Exception as e:
-        return HttpResponse(
-            f'Error executing deployment script: {str(e)}',
-            status=500,
-            content_type='text/plain'
-        )
 
+def statut_deploiement(request):
+    """
+    État des déploiements : demandes en attente, dernier déploiement, historique
+    
+    Réservé aux administrateurs connectés. Le paramètre ?journal=1 ajoute
+    la fin de la sortie du dernier déploiement.
+    
+    Returns:
+        JsonResponse: État lu dans les fichiers de l'exécuteur
+    """
+    if not (request.user.is_authenticated and request.user.is_superuser):
+        return HttpResponseForbidden('Accès réservé aux administrateurs')
+    
+    return JsonResponse(lire_statut(journal=request.GET.get('journal') == '1'))
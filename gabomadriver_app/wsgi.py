@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gabomadriver_app.settings')
 
 application = get_wsgi_application()
+
+# Préchauffage optionnel du processus (vues, templates, indicateurs) avant
+# sa première requête, voir admin_dashboard/prechauffage.py
+from django.conf import settings  # noqa: E402
+
+if settings.PRECHAUFFAGE_AU_DEMARRAGE:
+    from admin_dashboard.prechauffage import prechauffer_processus
+    prechauffer_processus()
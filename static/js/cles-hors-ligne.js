@@ -0,0 +1,255 @@
+// =============================================================================
+// GABOMA DRIVER - Prise et remise de clés hors ligne
+// =============================================================================
+/**
+ * File locale des prises/remises de clés et synchronisation par lots
+ *
+ * Sur réseau mobile instable, un formulaire envoyé pendant une coupure est
+ * perdu. Ce script intercepte les formulaires de clés (attribut
+ * data-synchro="prise" ou "remise"), enregistre l'événement dans le
+ * stockage local avec une clé d'idempotence, puis envoie la file au
+ * serveur (drivers:synchroniser_cles) dès que possible :
+ * - immédiatement après la saisie
+ * - au chargement de chaque page chauffeur
+ * - au retour du réseau (événement "online")
+ *
+ * Un renvoi d'un événement déjà reçu est sans effet côté serveur.
+ * Il enregistre aussi le service worker qui garde les pages en cache.
+ *
+ * Configuration (attributs de la balise <script>) :
+ * - data-sw-url : URL du service worker
+ * - data-sync-url : URL de synchronisation
+ * - data-dashboard-url : page affichée après une synchronisation réussie
+ */
+
+(function() {
+    'use strict';
+
+    var script = document.currentScript;
+    var CONFIG = {
+        swUrl: script.getAttribute('data-sw-url'),
+        syncUrl: script.getAttribute('data-sync-url'),
+        dashboardUrl: script.getAttribute('data-dashboard-url')
+    };
+    var CLE_FILE = 'gaboma-file-cles';
+    var TAILLE_LOT = 50;
+    var envoiEnCours = null;
+
+    // =========================================================================
+    // FILE LOCALE - Stockage des événements non synchronisés
+    // =========================================================================
+
+    function lireFile() {
+        try {
+            return JSON.parse(window.localStorage.getItem(CLE_FILE)) || [];
+        } catch (e) {
+            return [];
+        }
+    }
+
+    function ecrireFile(file) {
+        window.localStorage.setItem(CLE_FILE, JSON.stringify(file));
+    }
+
+    function genererCle() {
+        if (window.crypto && window.crypto.randomUUID) {
+            return window.crypto.randomUUID();
+        }
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2, 12);
+    }
+
+    function deuxChiffres(nombre) {
+        return (nombre < 10 ? '0' : '') + nombre;
+    }
+
+    function dateLocale(maintenant) {
+        return maintenant.getFullYear() + '-' + deuxChiffres(maintenant.getMonth() + 1) + '-' + deuxChiffres(maintenant.getDate());
+    }
+
+    function heureLocale(maintenant) {
+        return deuxChiffres(maintenant.getHours()) + ':' + deuxChiffres(maintenant.getMinutes()) + ':' + deuxChiffres(maintenant.getSeconds());
+    }
+
+    function lireCookie(nom) {
+        var morceaux = document.cookie ? document.cookie.split('; ') : [];
+        for (var i = 0; i < morceaux.length; i++) {
+            var separateur = morceaux[i].indexOf('=');
+            if (morceaux[i].slice(0, separateur) === nom) {
+                return decodeURIComponent(morceaux[i].slice(separateur + 1));
+            }
+        }
+        return '';
+    }
+
+    function jetonCsrf() {
+        var champ = document.querySelector('input[name="csrfmiddlewaretoken"]');
+        return champ ? champ.value : lireCookie('csrftoken');
+    }
+
+    // =========================================================================
+    // SYNCHRONISATION - Envoi de la file par lots
+    // =========================================================================
+
+    /**
+     * Envoie la file au serveur et retire les événements traités
+     *
+     * @returns {Promise<Array>} Résultats renvoyés par le serveur
+     */
+    function synchroniser() {
+        if (envoiEnCours) {
+            return envoiEnCours;
+        }
+        var lot = lireFile().slice(0, TAILLE_LOT);
+        if (!lot.length) {
+            return Promise.resolve([]);
+        }
+
+        envoiEnCours = fetch(CONFIG.syncUrl, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': jetonCsrf()
+            },
+            body: JSON.stringify({evenements: lot})
+        }).then(function(reponse) {
+            if (!reponse.ok || reponse.redirected) {
+                // Session expirée ou erreur serveur : la file est conservée
+                throw new Error('Synchronisation refusée (' + reponse.status + ')');
+            }
+            return reponse.json();
+        }).then(function(donnees) {
+            var traitees = {};
+            donnees.resultats.forEach(function(resultat) {
+                traitees[resultat.cle] = true;
+            });
+            ecrireFile(lireFile().filter(function(evenement) {
+                return !traitees[evenement.cle];
+            }));
+            return donnees.resultats;
+        });
+
+        envoiEnCours.then(terminer, terminer);
+        return envoiEnCours;
+    }
+
+    function terminer() {
+        envoiEnCours = null;
+        mettreAJourIndicateur();
+    }
+
+    // =========================================================================
+    // FORMULAIRES DE CLÉS - Mise en file au lieu de l'envoi classique
+    // =========================================================================
+
+    function construireEvenement(formulaire, type) {
+        var maintenant = new Date();
+        var evenement = {
+            cle: genererCle(),
+            type: type,
+            date: dateLocale(maintenant),
+            heure: heureLocale(maintenant),
+            plein_carburant: formulaire.elements.plein_carburant.checked,
+            probleme_mecanique: formulaire.elements.probleme_mecanique.value,
+            signature: formulaire.elements.signature.value.trim()
+        };
+        if (type === 'prise') {
+            evenement.objectif_recette = formulaire.elements.objectif_recette.value;
+        } else {
+            evenement.recette_realisee = formulaire.elements.recette_realisee.value;
+        }
+        return evenement;
+    }
+
+    function afficherMessage(formulaire, classe, texte) {
+        var zone = formulaire.querySelector('.synchro-message');
+        if (!zone) {
+            zone = document.createElement('div');
+            zone.className = 'synchro-message';
+            formulaire.insertBefore(zone, formulaire.firstChild);
+        }
+        zone.className = 'synchro-message alert alert-' + classe;
+        zone.textContent = texte;
+    }
+
+    function intercepterFormulaire(formulaire) {
+        var type = formulaire.getAttribute('data-synchro');
+
+        formulaire.addEventListener('submit', function(event) {
+            event.preventDefault();
+            var bouton = formulaire.querySelector('[type="submit"]');
+            if (bouton) {
+                bouton.disabled = true;
+            }
+
+            var evenement = construireEvenement(formulaire, type);
+            var file = lireFile();
+            file.push(evenement);
+            ecrireFile(file);
+
+            synchroniser().then(function(resultats) {
+                var resultat = resultats.filter(function(r) { return r.cle === evenement.cle; })[0];
+                if (resultat && resultat.statut === 'rejete') {
+                    afficherMessage(formulaire, 'danger', resultat.message);
+                    if (bouton) {
+                        bouton.disabled = false;
+                    }
+                    return;
+                }
+                window.location.href = CONFIG.dashboardUrl;
+            }).catch(function() {
+                afficherMessage(
+                    formulaire,
+                    'warning',
+                    'Pas de connexion : votre saisie est enregistrée sur le téléphone et sera envoyée automatiquement.'
+                );
+            });
+        });
+    }
+
+    // =========================================================================
+    // INDICATEUR - Nombre d'événements en attente d'envoi
+    // =========================================================================
+
+    function mettreAJourIndicateur() {
+        var enAttente = lireFile().length;
+        var indicateur = document.getElementById('synchro-en-attente');
+        if (!enAttente) {
+            if (indicateur) {
+                indicateur.parentNode.removeChild(indicateur);
+            }
+            return;
+        }
+        if (!indicateur) {
+            indicateur = document.createElement('div');
+            indicateur.id = 'synchro-en-attente';
+            indicateur.className = 'alert alert-warning text-center mb-0 rounded-0';
+            document.body.insertBefore(indicateur, document.body.firstChild);
+        }
+        indicateur.textContent = enAttente + ' saisie(s) de clés en attente d\'envoi.';
+    }
+
+    // =========================================================================
+    // INITIALISATION
+    // =========================================================================
+
+    document.addEventListener('DOMContentLoaded', function() {
+        if ('serviceWorker' in navigator && CONFIG.swUrl) {
+            navigator.serviceWorker.register(CONFIG.swUrl, {scope: '/'}).catch(function() {
+                // Navigateur sans service worker utilisable : mode en ligne uniquement
+            });
+        }
+
+        var formulaires = document.querySelectorAll('form[data-synchro]');
+        for (var i = 0; i < formulaires.length; i++) {
+            intercepterFormulaire(formulaires[i]);
+        }
+
+        mettreAJourIndicateur();
+        synchroniser().catch(function() {});
+    });
+
+    window.addEventListener('online', function() {
+        synchroniser().catch(function() {});
+    });
+})();
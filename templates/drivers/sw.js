@@ -0,0 +1,131 @@
+{% load static %}// =============================================================================
+// GABOMA DRIVER - Service worker du mode hors ligne (espace chauffeur)
+// =============================================================================
+/**
+ * Servi par la vue drivers:service_worker à la racine du site.
+ *
+ * Stratégies de cache :
+ * - fichiers statiques (CSS, JS, Bootstrap) : réponse immédiate depuis le
+ *   cache puis mise à jour en arrière-plan
+ * - pages chauffeur : réseau d'abord, dernière version en cache si le
+ *   réseau est coupé (le formulaire de clés reste accessible hors ligne)
+ *
+ * Les prises et remises de clés ne passent pas par ce script : elles sont
+ * mises en file par static/js/cles-hors-ligne.js puis synchronisées.
+ */
+
+const VERSION = 'gaboma-chauffeur-v1';
+const CACHE_STATIQUE = VERSION + '-statique';
+const CACHE_PAGES = VERSION + '-pages';
+
+// Fichiers préchargés à l'installation
+const FICHIERS_STATIQUES = [
+    '{% static "css/style.css" %}',
+    '{% static "js/main.js" %}',
+    '{% static "js/cles-hors-ligne.js" %}',
+    'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.0/font/bootstrap-icons.css'
+];
+
+// Pages chauffeur consultables hors ligne (dernière version vue)
+const PAGES_CHAUFFEUR = [
+    '{% url "drivers:dashboard_chauffeur" %}',
+    '{% url "drivers:prendre_cles" %}',
+    '{% url "drivers:remettre_cles" %}',
+    '{% url "drivers:nouvelle_activite" %}'
+];
+
+const URL_DECONNEXION = '{% url "drivers:logout_chauffeur" %}';
+
+self.addEventListener('install', function(event) {
+    event.waitUntil(
+        caches.open(CACHE_STATIQUE)
+            .then(function(cache) { return cache.addAll(FICHIERS_STATIQUES); })
+            .then(function() { return self.skipWaiting(); })
+    );
+});
+
+self.addEventListener('activate', function(event) {
+    // Suppression des caches des versions précédentes
+    event.waitUntil(
+        caches.keys().then(function(noms) {
+            return Promise.all(noms.filter(function(nom) {
+                return nom.indexOf(VERSION) !== 0;
+            }).map(function(nom) {
+                return caches.delete(nom);
+            }));
+        }).then(function() { return self.clients.claim(); })
+    );
+});
+
+function estStatique(url) {
+    return url.pathname.indexOf('{% get_static_prefix %}') === 0 || url.hostname === 'cdn.jsdelivr.net';
+}
+
+function reponseHorsLigne() {
+    return new Response(
+        '<!DOCTYPE html><html lang="fr"><head><meta charset="UTF-8">' +
+        '<meta name="viewport" content="width=device-width, initial-scale=1.0">' +
+        '<title>Hors ligne - Gaboma Driver</title></head><body style="font-family: sans-serif; padding: 2rem;">' +
+        '<h1>Hors ligne</h1><p>Cette page n\'est pas disponible sans connexion. ' +
+        'Vos prises et remises de clés déjà saisies seront envoyées dès le retour du réseau.</p>' +
+        '</body></html>',
+        {headers: {'Content-Type': 'text/html; charset=utf-8'}}
+    );
+}
+
+self.addEventListener('fetch', function(event) {
+    const requete = event.request;
+    if (requete.method !== 'GET') {
+        return;
+    }
+    const url = new URL(requete.url);
+
+    // Déconnexion : les pages personnelles ne restent pas sur le téléphone
+    if (url.pathname === URL_DECONNEXION) {
+        event.waitUntil(caches.delete(CACHE_PAGES));
+        return;
+    }
+
+    // Statiques : cache immédiat, rafraîchi en arrière-plan
+    if (estStatique(url)) {
+        event.respondWith(
+            caches.open(CACHE_STATIQUE).then(function(cache) {
+                return cache.match(requete).then(function(enCache) {
+                    const reseau = fetch(requete).then(function(reponse) {
+                        if (reponse.ok) {
+                            cache.put(requete, reponse.clone());
+                        }
+                        return reponse;
+                    }).catch(function() { return enCache; });
+                    return enCache || reseau;
+                });
+            })
+        );
+        return;
+    }
+
+    // Pages chauffeur : réseau d'abord, cache en secours
+    if (requete.mode === 'navigate' && url.origin === self.location.origin) {
+        const pageChauffeur = PAGES_CHAUFFEUR.indexOf(url.pathname) !== -1;
+        event.respondWith(
+            fetch(requete).then(function(reponse) {
+                // Seules les pages affichées directement sont conservées (pas les redirections)
+                if (pageChauffeur && reponse.ok && !reponse.redirected) {
+                    const copie = reponse.clone();
+                    caches.open(CACHE_PAGES).then(function(cache) { cache.put(url.pathname, copie); });
+                }
+                return reponse;
+            }).catch(function() {
+                return caches.open(CACHE_PAGES).then(function(cache) {
+                    return cache.match(url.pathname).then(function(enCache) {
+                        return enCache || cache.match(PAGES_CHAUFFEUR[0]);
+                    });
+                }).then(function(enCache) {
+                    return enCache || reponseHorsLigne();
+                });
+            })
+        );
+    }
+});